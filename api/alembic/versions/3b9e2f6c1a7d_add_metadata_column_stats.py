@@ -0,0 +1,44 @@
+"""add metadata column stats
+
+Revision ID: 3b9e2f6c1a7d
+Revises: dedaf4f384ba
+Create Date: 2025-09-12 10:21:37.184203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9e2f6c1a7d'
+down_revision: Union[str, Sequence[str], None] = 'dedaf4f384ba'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('resources_metadata_column_stats',
+    sa.Column('id', sa.BIGINT(), autoincrement=True, nullable=False),
+    sa.Column('table_id', sa.UUID(), nullable=False),
+    sa.Column('column_name', sa.String(length=255), nullable=False),
+    sa.Column('sample_rows', sa.BIGINT(), nullable=False),
+    sa.Column('null_count', sa.BIGINT(), nullable=False),
+    sa.Column('distinct_count', sa.BIGINT(), nullable=True),
+    sa.Column('min_value', sa.Text(), nullable=True),
+    sa.Column('max_value', sa.Text(), nullable=True),
+    sa.Column('top_values', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('histogram', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('profiled_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['table_id'], ['resources_metadata_tables.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('table_id', 'column_name', name='uq_metadata_column_stats_table_column')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('resources_metadata_column_stats')
@@ -0,0 +1,56 @@
+"""add resources hot path indexes
+
+Revision ID: 5d2a9e7b3c14
+Revises: 8c41d7a2e5f0
+Create Date: 2025-09-18 11:37:05.402168
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2a9e7b3c14'
+down_revision: Union[str, Sequence[str], None] = '8c41d7a2e5f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # resources.state / resources.type 为枚举类型，库中按名称存储（ACTIVE/PENDING/DELETED）
+    op.create_index('ix_resources_created_by_type', 'resources', ['created_by', 'type'], unique=False)
+    op.create_index('ix_resources_type_id_live', 'resources', ['type', 'id'], unique=False,
+                    postgresql_where=sa.text("state <> 'DELETED'"))
+    op.create_index('ix_metadata_table_columns_table_id_position', 'resources_metadata_table_columns',
+                    ['table_id', 'ordinal_position'], unique=False)
+    op.create_index('ix_workspaces_owner_id', 'workspaces', ['owner_id'], unique=False)
+    # state_enum 最初随 workspaces 表以 ('A', 'P') 创建；'D' 标记已移除的关联和删除中的工作区。
+    # 新枚举值需先提交才能在后面的索引谓词中使用
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE state_enum ADD VALUE IF NOT EXISTS 'D'")
+    op.create_index('ix_workspace_resources_workspace_resource_live', 'workspace_resources',
+                    ['workspace_id', 'resource_id'], unique=False,
+                    postgresql_where=sa.text("state <> 'D'"))
+    op.create_index('ix_workspace_resources_resource_id', 'workspace_resources', ['resource_id'], unique=False)
+    op.create_index('ix_workspace_users_user_id', 'workspace_users', ['user_id'], unique=False)
+    op.create_index('ix_workspace_users_workspace_user_live', 'workspace_users',
+                    ['workspace_id', 'user_id'], unique=False,
+                    postgresql_where=sa.text("state <> 'D'"))
+    op.create_index('ix_user_roles_user_id', 'user_roles', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_user_roles_user_id', table_name='user_roles')
+    op.drop_index('ix_workspace_users_workspace_user_live', table_name='workspace_users')
+    op.drop_index('ix_workspace_users_user_id', table_name='workspace_users')
+    op.drop_index('ix_workspace_resources_resource_id', table_name='workspace_resources')
+    op.drop_index('ix_workspace_resources_workspace_resource_live', table_name='workspace_resources')
+    op.drop_index('ix_workspaces_owner_id', table_name='workspaces')
+    op.drop_index('ix_metadata_table_columns_table_id_position', table_name='resources_metadata_table_columns')
+    op.drop_index('ix_resources_type_id_live', table_name='resources')
+    op.drop_index('ix_resources_created_by_type', table_name='resources')
+    # PostgreSQL 不支持删除枚举值，state_enum 中的 'D' 保留
@@ -0,0 +1,61 @@
+"""add owner to change notifications
+
+Revision ID: 6f2d8a4c9b37
+Revises: a4c8e2f6d913
+Create Date: 2025-10-09 14:21:05.118402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6f2d8a4c9b37'
+down_revision: Union[str, Sequence[str], None] = 'a4c8e2f6d913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 通知负载附带实体所有者（资源创建者或工作区所有者），订阅端据此按租户过滤
+    op.execute("""
+    CREATE OR REPLACE FUNCTION notify_resource_change() RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_notify('resource_changes', json_build_object(
+            'id', NEW.id,
+            'entity', NEW.entity,
+            'entity_id', NEW.entity_id,
+            'action', NEW.action,
+            'actor_id', NEW.actor_id,
+            'created_at', NEW.created_at,
+            'owner_id', COALESCE(
+                (SELECT created_by FROM resources WHERE id = NEW.entity_id),
+                (SELECT owner_id FROM workspaces WHERE id = NEW.entity_id)
+            )
+        )::text);
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("""
+    CREATE OR REPLACE FUNCTION notify_resource_change() RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_notify('resource_changes', json_build_object(
+            'id', NEW.id,
+            'entity', NEW.entity,
+            'entity_id', NEW.entity_id,
+            'action', NEW.action,
+            'actor_id', NEW.actor_id,
+            'created_at', NEW.created_at
+        )::text);
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+    """)
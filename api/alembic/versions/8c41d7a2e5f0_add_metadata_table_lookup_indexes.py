@@ -0,0 +1,62 @@
+"""add metadata table lookup indexes
+
+Revision ID: 8c41d7a2e5f0
+Revises: 3b9e2f6c1a7d
+Create Date: 2025-09-15 14:02:51.530917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c41d7a2e5f0'
+down_revision: Union[str, Sequence[str], None] = '3b9e2f6c1a7d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 软删除标记在 resources.state 上，部分索引不能引用其他表；
+    # 在子表上冗余一个 deleted 列，由 resources 的触发器同步
+    op.add_column('resources_metadata_tables',
+                  sa.Column('deleted', sa.Boolean(), server_default=sa.text('false'), nullable=False))
+    op.execute("""
+    UPDATE resources_metadata_tables AS t SET deleted = true
+    FROM resources AS r
+    WHERE r.id = t.id AND r.state = 'DELETED'
+    """)
+    op.execute("""
+    CREATE OR REPLACE FUNCTION sync_metadata_table_deleted() RETURNS trigger AS $$
+    BEGIN
+        UPDATE resources_metadata_tables
+        SET deleted = (NEW.state = 'DELETED')
+        WHERE id = NEW.id AND deleted IS DISTINCT FROM (NEW.state = 'DELETED');
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+    CREATE TRIGGER resources_sync_metadata_table_deleted
+    AFTER UPDATE OF state ON resources
+    FOR EACH ROW WHEN (OLD.state IS DISTINCT FROM NEW.state)
+    EXECUTE FUNCTION sync_metadata_table_deleted()
+    """)
+    # 只约束未删除的元数据表，软删除后可重新创建同名表；
+    # 如果未删除的表中已存在重复的 (connection_id, database_name, table_name)，需先人工合并后再执行本迁移
+    op.create_index('uq_metadata_tables_connection_database_table', 'resources_metadata_tables',
+                    ['connection_id', 'database_name', 'table_name'], unique=True,
+                    postgresql_where=sa.text('NOT deleted'))
+    op.create_index('ix_metadata_tables_table_name', 'resources_metadata_tables', ['table_name'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_metadata_tables_table_name', table_name='resources_metadata_tables')
+    op.drop_index('uq_metadata_tables_connection_database_table', table_name='resources_metadata_tables')
+    op.execute("DROP TRIGGER IF EXISTS resources_sync_metadata_table_deleted ON resources")
+    op.execute("DROP FUNCTION IF EXISTS sync_metadata_table_deleted()")
+    op.drop_column('resources_metadata_tables', 'deleted')
@@ -0,0 +1,54 @@
+"""add catalog item closure
+
+Revision ID: a4c8e2f6d913
+Revises: d3a7c5e1f946
+Create Date: 2025-10-06 10:12:48.301954
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c8e2f6d913'
+down_revision: Union[str, Sequence[str], None] = 'd3a7c5e1f946'
+branch_labels: Union[str, Sequence[str], None] = None
+# 外键和回填都读取 catalog_items，该表由 e7c1b9a4d258 创建
+depends_on: Union[str, Sequence[str], None] = 'e7c1b9a4d258'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'catalog_item_closure',
+        sa.Column('ancestor_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('descendant_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('depth', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['ancestor_id'], ['catalog_items.id']),
+        sa.ForeignKeyConstraint(['descendant_id'], ['catalog_items.id']),
+        sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id'),
+    )
+    op.create_index('ix_catalog_item_closure_descendant_depth', 'catalog_item_closure',
+                    ['descendant_id', 'depth'], unique=False)
+    # 从现有的 parent_id 邻接表回填；深度上限防止脏数据中的环导致递归不终止
+    op.execute("""
+        INSERT INTO catalog_item_closure (ancestor_id, descendant_id, depth)
+        WITH RECURSIVE tree (ancestor_id, descendant_id, depth) AS (
+            SELECT id, id, 0 FROM catalog_items
+            UNION ALL
+            SELECT tree.ancestor_id, child.id, tree.depth + 1
+            FROM tree JOIN catalog_items AS child ON child.parent_id = tree.descendant_id
+            WHERE tree.depth < 1000
+        )
+        SELECT ancestor_id, descendant_id, min(depth) FROM tree
+        GROUP BY ancestor_id, descendant_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_catalog_item_closure_descendant_depth', table_name='catalog_item_closure')
+    op.drop_table('catalog_item_closure')
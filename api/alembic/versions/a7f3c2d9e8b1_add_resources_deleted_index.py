@@ -0,0 +1,31 @@
+"""add resources deleted index
+
+Revision ID: a7f3c2d9e8b1
+Revises: 5d2a9e7b3c14
+Create Date: 2025-09-19 16:12:44.918305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7f3c2d9e8b1'
+down_revision: Union[str, Sequence[str], None] = '5d2a9e7b3c14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 清理任务按ID键集扫描已删除资源，并按 updated_at 判断保留期
+    op.create_index('ix_resources_deleted_id', 'resources', ['id'], unique=False,
+                    postgresql_where=sa.text("state = 'DELETED'"),
+                    postgresql_include=['updated_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_resources_deleted_id', table_name='resources')
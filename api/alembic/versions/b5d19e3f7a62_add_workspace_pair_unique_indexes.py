@@ -0,0 +1,50 @@
+"""add workspace pair unique indexes
+
+Revision ID: b5d19e3f7a62
+Revises: f81c3a6d2b47
+Create Date: 2025-09-26 15:12:41.318427
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d19e3f7a62'
+down_revision: Union[str, Sequence[str], None] = 'f81c3a6d2b47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _dedupe(table: str, column: str) -> None:
+    # 同一对只保留一行：优先保留未删除的，其次保留最新的
+    op.execute(sa.text(f"""
+        DELETE FROM {table} WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (
+                    PARTITION BY workspace_id, {column}
+                    ORDER BY (state = 'D'), created_at DESC NULLS LAST
+                ) AS rn
+                FROM {table}
+            ) ranked
+            WHERE rn > 1
+        )
+    """))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _dedupe('workspace_users', 'user_id')
+    _dedupe('workspace_resources', 'resource_id')
+    op.create_index('ix_workspace_users_workspace_user', 'workspace_users',
+                    ['workspace_id', 'user_id'], unique=True)
+    op.create_index('ix_workspace_resources_workspace_resource', 'workspace_resources',
+                    ['workspace_id', 'resource_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_workspace_resources_workspace_resource', table_name='workspace_resources')
+    op.drop_index('ix_workspace_users_workspace_user', table_name='workspace_users')
@@ -0,0 +1,59 @@
+"""add resource change log
+
+Revision ID: c4e81b6f2a93
+Revises: a7f3c2d9e8b1
+Create Date: 2025-09-22 09:48:16.205731
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e81b6f2a93'
+down_revision: Union[str, Sequence[str], None] = 'a7f3c2d9e8b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('resource_change_log',
+    sa.Column('id', sa.BIGINT(), autoincrement=True, nullable=False),
+    sa.Column('entity', sa.String(length=32), nullable=False),
+    sa.Column('entity_id', sa.UUID(), nullable=False),
+    sa.Column('action', sa.String(length=16), nullable=False),
+    sa.Column('actor_id', sa.UUID(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # 插入后通过 pg_notify 推送变更，事务提交后送达订阅者
+    op.execute("""
+    CREATE OR REPLACE FUNCTION notify_resource_change() RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_notify('resource_changes', json_build_object(
+            'id', NEW.id,
+            'entity', NEW.entity,
+            'entity_id', NEW.entity_id,
+            'action', NEW.action,
+            'actor_id', NEW.actor_id,
+            'created_at', NEW.created_at
+        )::text);
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+    CREATE TRIGGER resource_change_log_notify
+    AFTER INSERT ON resource_change_log
+    FOR EACH ROW EXECUTE FUNCTION notify_resource_change()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS resource_change_log_notify ON resource_change_log")
+    op.execute("DROP FUNCTION IF EXISTS notify_resource_change()")
+    op.drop_table('resource_change_log')
@@ -0,0 +1,32 @@
+"""add workspace deletion support
+
+Revision ID: d3a7c5e1f946
+Revises: e7c1b9a4d258
+Create Date: 2025-09-29 09:41:27.615203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a7c5e1f946'
+down_revision: Union[str, Sequence[str], None] = 'e7c1b9a4d258'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # state_enum 的 'D' 值由 5d2a9e7b3c14 添加，catalog_items 由 e7c1b9a4d258 创建
+    # 后台删除按工作区分批扫描依赖表
+    op.create_index('ix_catalog_items_workspace_id', 'catalog_items', ['workspace_id'], unique=False)
+    op.create_index('ix_api_keys_workspace_id', 'api_keys', ['workspace_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_api_keys_workspace_id', table_name='api_keys')
+    op.drop_index('ix_catalog_items_workspace_id', table_name='catalog_items')
@@ -0,0 +1,70 @@
+"""add catalog tables
+
+Revision ID: e7c1b9a4d258
+Revises: b5d19e3f7a62
+Create Date: 2025-09-27 10:18:44.206391
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7c1b9a4d258'
+down_revision: Union[str, Sequence[str], None] = 'b5d19e3f7a62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 目录模型此前只由应用启动时的 create_all 建表，已有的库中这些表和列可能已经存在
+    inspector = sa.inspect(op.get_bind())
+
+    # resources.type 在库中按名称存储；新枚举值需先提交才能被后续语句使用
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE resourcestype ADD VALUE IF NOT EXISTS 'CATALOG'")
+
+    columns = {column['name'] for column in inspector.get_columns('resources_metadata_tables')}
+    if 'display_name' not in columns:
+        op.add_column('resources_metadata_tables', sa.Column('display_name', sa.String(length=255), nullable=True))
+
+    if not inspector.has_table('catalog_items'):
+        op.create_table('catalog_items',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('type', sa.String(), nullable=False),
+        sa.Column('workspace_id', sa.UUID(), nullable=False),
+        sa.Column('parent_id', sa.UUID(), nullable=True),
+        sa.Column('resource_id', sa.UUID(), nullable=True),
+        sa.Column('order', sa.Integer(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('created_by', sa.UUID(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['parent_id'], ['catalog_items.id'], ),
+        sa.ForeignKeyConstraint(['resource_id'], ['resources.id'], ),
+        sa.ForeignKeyConstraint(['workspace_id'], ['workspaces.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    if not inspector.has_table('catalog_resources'):
+        op.create_table('catalog_resources',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('catalog_item_id', sa.UUID(), nullable=False),
+        sa.ForeignKeyConstraint(['catalog_item_id'], ['catalog_items.id'], ),
+        sa.ForeignKeyConstraint(['id'], ['resources.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('catalog_resources')
+    op.drop_table('catalog_items')
+    op.drop_column('resources_metadata_tables', 'display_name')
+    # PostgreSQL 不支持删除枚举值，resourcestype 中的 'CATALOG' 保留
@@ -13,7 +13,87 @@ class Settings(BaseSettings):
     NEXTAUTH_SECRET: str = ""
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
+    AUTH_PRINCIPAL_CACHE_SIZE: int = 10000
+    AUTH_PRINCIPAL_CACHE_TTL: int = 60
+    TOKEN_MAX_WORKSPACES: int = 50
+    TOKEN_REVOCATION_CAPACITY: int = 100000
+    TOKEN_REVOCATION_ERROR_RATE: float = 0.001
+    TOKEN_REVOCATION_REFRESH_SECONDS: int = 60
 
+    # API Key 配置（API_KEY_SECRET 为空时使用 NEXTAUTH_SECRET）
+    API_KEY_SECRET: str = ""
+    API_KEY_CACHE_SIZE: int = 10000
+    API_KEY_CACHE_TTL: int = 300
+    API_KEY_LAST_USED_FLUSH_SECONDS: int = 30
+
+    # 租户索引从数据库重建的间隔（秒）
+    TENANCY_INDEX_REFRESH_SECONDS: int = 300
+
+    # 权限缓存配置
+    PERMISSION_CACHE_SIZE: int = 10000
+    PERMISSION_CACHE_TTL: int = 300
+
+    # 工作区目录树缓存配置
+    CATALOG_TREE_CACHE_SIZE: int = 1000
+    CATALOG_TREE_CACHE_TTL: int = 300
+
+    # 密码哈希进程池配置
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    PASSWORD_HASH_RETRY_AFTER: int = 1
+
+    # 批量创建用户时每个事务的行数
+    USER_PROVISION_BATCH_SIZE: int = 500
+
+    # 元数据导入导出配置
+    METADATA_TRANSFER_BATCH_SIZE: int = 500
+
+    # 字段画像配置
+    PROFILING_SAMPLE_ROWS: int = 100000
+    PROFILING_TOP_K: int = 10
+    PROFILING_HISTOGRAM_BINS: int = 10
+
+    # 源库连接池配置
+    SOURCE_ENGINE_CACHE_SIZE: int = 32
+    SOURCE_ENGINE_POOL_SIZE: int = 2
+    SOURCE_ENGINE_MAX_OVERFLOW: int = 3
+    SOURCE_ENGINE_POOL_RECYCLE: int = 1800
+    SOURCE_ENGINE_CONNECT_TIMEOUT: int = 10
+
+    # 连接器健康检查配置
+    CONNECTOR_HEALTH_ENABLED: bool = True
+    CONNECTOR_HEALTH_INTERVAL: int = 60
+    CONNECTOR_HEALTH_CONCURRENCY: int = 8
+    CONNECTOR_HEALTH_TIMEOUT: int = 5
+    CONNECTOR_BREAKER_FAILURE_THRESHOLD: int = 3
+    CONNECTOR_BREAKER_RESET_TIMEOUT: int = 30
+
+    # 连接器批量测试配置
+    CONNECTOR_TEST_CONCURRENCY: int = 32
+    CONNECTOR_TEST_TIMEOUT: int = 5
+
+    # 资源批量操作配置
+    RESOURCE_BULK_CHUNK_SIZE: int = 1000
+
+    # 工作区成员和资源批量操作每条语句的行数
+    WORKSPACE_BULK_CHUNK_SIZE: int = 1000
+
+    # 工作区后台删除配置
+    WORKSPACE_DELETE_BATCH_SIZE: int = 500
+    WORKSPACE_DELETE_THROTTLE_SECONDS: float = 0.1
+
+    # 已删除资源清理配置
+    RESOURCE_PURGE_RETENTION_DAYS: int = 30
+    RESOURCE_PURGE_BATCH_SIZE: int = 200
+    RESOURCE_PURGE_THROTTLE_SECONDS: float = 0.2
+
+    # 资源变更订阅配置
+    CHANGE_FEED_QUEUE_SIZE: int = 1000
+    CHANGE_FEED_REPLAY_BATCH_SIZE: int = 500
+    CHANGE_FEED_KEEPALIVE_SECONDS: int = 15
+    CHANGE_FEED_RECONNECT_SECONDS: int = 5
+    # 续传时回看的ID数量，覆盖ID较小但提交较晚的变更
+    CHANGE_FEED_RESUME_LOOKBACK: int = 1000
 
     PROJECT_NAME: str = "Data Platform App"
     VERSION: str = "1.0.0"
@@ -1,5 +1,7 @@
-from .auth import User,UserRoles
+from .auth import User,UserRoles,RevokedToken
 from .resources import Resources
-from .metadata import MetaDataTable,MetaDataTableColumn
+from .metadata import MetaDataTable,MetaDataTableColumn,MetaDataColumnStats
 from .connections import DataBaseConnection
-from .workspace import Workspaces,WorkspaceResources,WorkspaceUsers
\ No newline at end of file
+from .workspace import Workspaces,WorkspaceResources,WorkspaceUsers
+from .changes import ResourceChangeLog
+from .api_keys import ApiKey
@@ -0,0 +1,64 @@
+"""
+ 服务 API Key
+
+ 供 ETL 等机器客户端使用，每个 Key 归属于一个用户并限定在一个工作区内。
+ 库中只保存 Key 的公开前缀（用于索引查找）和整个 Key 的 HMAC-SHA256 摘要，明文只在创建时返回一次。
+"""
+
+import uuid
+import datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field
+from sqlalchemy import Column, DateTime, ForeignKey, Index, String
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.config.db import Base
+
+
+class ApiKey(Base):
+    __tablename__ = "api_keys"
+    __table_args__ = (
+        Index("ix_api_keys_prefix", "prefix", unique=True),
+        Index("ix_api_keys_user_id", "user_id"),
+        Index("ix_api_keys_workspace_id", "workspace_id"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    name = Column(String(255), nullable=False)
+    prefix = Column(String(16), nullable=False)
+    key_hash = Column(String(64), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=False)
+    workspace_id = Column(UUID(as_uuid=True), ForeignKey('workspaces.id'), nullable=False)
+    expires_at = Column(DateTime, nullable=True)
+    revoked_at = Column(DateTime, nullable=True)
+    last_used_at = Column(DateTime, nullable=True)  # 批量回写，存在延迟
+    created_at = Column(DateTime, default=datetime.datetime.now)
+
+
+# Pydantic models for API requests/responses
+class ApiKeyCreate(BaseModel):
+    """创建 API Key 的请求模型"""
+    name: str
+    workspace_id: uuid.UUID
+    expires_in_days: Optional[int] = Field(None, ge=1)
+
+
+class ApiKeyRead(BaseModel):
+    """API Key 的响应模型（不含明文）"""
+    id: uuid.UUID
+    name: str
+    prefix: str
+    workspace_id: uuid.UUID
+    expires_at: Optional[datetime.datetime] = None
+    revoked_at: Optional[datetime.datetime] = None
+    last_used_at: Optional[datetime.datetime] = None
+    created_at: datetime.datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ApiKeyCreated(ApiKeyRead):
+    """创建成功时返回一次明文 Key"""
+    key: str
@@ -1,9 +1,10 @@
 import uuid
-from sqlalchemy import Column, String, DateTime
+from sqlalchemy import Column, String, DateTime, Index
 from sqlalchemy.dialects.postgresql import UUID, BIGINT
 import datetime
 from sqlalchemy import Boolean,ForeignKey,Enum as SQLEnum
 from enum import Enum as PyEnum
+from typing import List, Literal, Optional
 from pydantic import BaseModel, EmailStr
 from app.config.db import Base
 
@@ -46,8 +47,22 @@ class User(Base):
 
 
 
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+    __table_args__ = (
+        Index("ix_revoked_tokens_expires_at", "expires_at"),
+    )
+    jti = Column(String(64), primary_key=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=False)
+    expires_at = Column(DateTime, nullable=False)  # Token 过期后记录可删除
+    revoked_at = Column(DateTime, default=datetime.datetime.now)
+
+
 class UserRoles(Base):
     __tablename__ = "user_roles"
+    __table_args__ = (
+        Index("ix_user_roles_user_id", "user_id"),
+    )
     id = Column(BIGINT, primary_key=True, autoincrement=True)
     user_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=False)
     role = Column(SQLEnum(RoleEnum, name="role_enum"), nullable=False)
@@ -76,6 +91,25 @@ class UserRead(UserBase):
         from_attributes = True
 
 
+class UserProvisionItem(BaseModel):
+    """批量创建用户时单行的结果"""
+    line: int
+    username: Optional[str] = None
+    status: Literal["created", "conflict", "invalid", "failed"]
+    id: Optional[uuid.UUID] = None
+    error: Optional[str] = None
+
+
+class UserProvisionResult(BaseModel):
+    """批量创建用户的结果汇总及逐行结果"""
+    total: int = 0
+    created: int = 0
+    conflicts: int = 0
+    invalid: int = 0
+    failed: int = 0
+    items: List[UserProvisionItem] = []
+
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -85,6 +119,26 @@ class TokenData(BaseModel):
     username: str | None = None
 
 
+class TokenClaims(BaseModel):
+    """
+    访问令牌中的声明，签名校验通过后即可用于授权判断，无需查询数据库
+
+    ws 为工作区成员关系摘要（工作区ID -> owner/member）；
+    工作区数量超过上限时只携带部分，ws_complete 为 False，未列出的工作区需回查数据库。
+    """
+    sub: str
+    uid: uuid.UUID
+    roles: list[str] = []
+    ws: dict[str, str] = {}
+    ws_complete: bool = True
+    jti: str
+    iat: int
+    exp: int
+
+    def workspace_role(self, workspace_id: uuid.UUID) -> str | None:
+        return self.ws.get(str(workspace_id))
+
+
 class ResetPasswordRequest(BaseModel):
     username: str
     new_password: str
\ No newline at end of file
@@ -16,7 +16,9 @@
 
 import uuid
 import enum
-from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Integer, Boolean
+from typing import List, Optional
+from pydantic import BaseModel, Field
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index, Text, Integer, Boolean
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import datetime
@@ -36,7 +38,10 @@ class CatalogItemType(str, enum.Enum):
 
 class CatalogItem(Base):
     __tablename__ = "catalog_items"
-    
+    __table_args__ = (
+        Index("ix_catalog_items_workspace_id", "workspace_id"),
+    )
+
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
@@ -60,6 +65,24 @@ class CatalogItem(Base):
         return f'<CatalogItem {self.name}>'
 
 
+class CatalogItemClosure(Base):
+    '''
+    目录树的闭包表：每个目录项与其自身及所有祖先各有一行（depth 为层级差，自身为 0），
+    子树、祖先路径和子树内计数都是按 ancestor_id 或 descendant_id 的一次索引查找
+    '''
+    __tablename__ = "catalog_item_closure"
+    __table_args__ = (
+        Index("ix_catalog_item_closure_descendant_depth", "descendant_id", "depth"),
+    )
+
+    ancestor_id = Column(UUID(as_uuid=True), ForeignKey('catalog_items.id'), primary_key=True)
+    descendant_id = Column(UUID(as_uuid=True), ForeignKey('catalog_items.id'), primary_key=True)
+    depth = Column(Integer, nullable=False)
+
+    def __repr__(self):
+        return f'<CatalogItemClosure {self.ancestor_id} -> {self.descendant_id} ({self.depth})>'
+
+
 # 如果需要将目录项作为资源类型
 class CatalogResource(Resources):
     __tablename__ = "catalog_resources"
@@ -72,4 +95,48 @@ class CatalogResource(Resources):
     }
     
     def __repr__(self):
-        return f'<CatalogResource {self.id}>'
\ No newline at end of file
+        return f'<CatalogResource {self.id}>'
+
+
+# -------------------- Pydantic Schemas --------------------
+
+class CatalogItemCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=255)
+    description: Optional[str] = None
+    type: CatalogItemType
+    parent_id: Optional[uuid.UUID] = None
+    resource_id: Optional[uuid.UUID] = None
+    order: int = 0
+
+
+class CatalogItemMove(BaseModel):
+    """移动目录项，parent_id 为空时移动到根级"""
+    parent_id: Optional[uuid.UUID] = None
+
+
+class CatalogItemRead(BaseModel):
+    id: uuid.UUID
+    name: str
+    description: Optional[str] = None
+    type: str
+    workspace_id: uuid.UUID
+    parent_id: Optional[uuid.UUID] = None
+    resource_id: Optional[uuid.UUID] = None
+    order: Optional[int] = None
+    is_active: Optional[bool] = None
+    created_by: uuid.UUID
+    created_at: datetime.datetime
+    updated_at: datetime.datetime
+
+    class Config:
+        from_attributes = True
+
+
+class CatalogSubtreeItem(CatalogItemRead):
+    """子树中的目录项，depth 为相对子树根的层级"""
+    depth: int
+
+
+class CatalogTreeNode(CatalogItemRead):
+    """目录树节点，children 按排序字段排列"""
+    children: List["CatalogTreeNode"] = []
@@ -0,0 +1,89 @@
+'''
+ 资源变更日志（outbox）
+
+ 各服务在创建、更新、删除资源和工作区时，在同一事务内追加一条变更记录；
+ 插入触发器通过 pg_notify 把记录推送到 resource_changes 频道，事务提交后才会送达。
+ 自增ID即为订阅端的续传标记（resume token）。
+'''
+
+import datetime
+import enum
+import uuid
+from typing import Optional
+
+from pydantic import BaseModel
+from sqlalchemy import DDL, BIGINT, Column, DateTime, String, event
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.config.db import Base
+
+
+# pg_notify 频道名
+CHANGE_CHANNEL = "resource_changes"
+
+
+# 变更动作
+class ChangeAction(str, enum.Enum):
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"
+
+
+class ResourceChangeLog(Base):
+    __tablename__ = "resource_change_log"
+
+    id = Column(BIGINT, primary_key=True, autoincrement=True)
+    entity = Column(String(32), nullable=False)  # 资源类型（connector/metadata/...）或 workspace
+    entity_id = Column(UUID(as_uuid=True), nullable=False)
+    action = Column(String(16), nullable=False)
+    actor_id = Column(UUID(as_uuid=True), nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.datetime.now)
+
+
+# 插入后通知订阅者，负载为日志本身的字段加上实体所有者（资源创建者或工作区所有者，供订阅端按租户过滤），
+# 远小于 pg_notify 的 8000 字节上限
+CHANGE_NOTIFY_FUNCTION = DDL(f"""
+CREATE OR REPLACE FUNCTION notify_resource_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('{CHANGE_CHANNEL}', json_build_object(
+        'id', NEW.id,
+        'entity', NEW.entity,
+        'entity_id', NEW.entity_id,
+        'action', NEW.action,
+        'actor_id', NEW.actor_id,
+        'created_at', NEW.created_at,
+        'owner_id', COALESCE(
+            (SELECT created_by FROM resources WHERE id = NEW.entity_id),
+            (SELECT owner_id FROM workspaces WHERE id = NEW.entity_id)
+        )
+    )::text);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+""")
+
+CHANGE_NOTIFY_TRIGGER = DDL("""
+CREATE TRIGGER resource_change_log_notify
+AFTER INSERT ON resource_change_log
+FOR EACH ROW EXECUTE FUNCTION notify_resource_change()
+""")
+
+# 通过 create_all 建表时同时创建触发器（迁移中有相同的语句）
+event.listen(ResourceChangeLog.__table__, "after_create",
+             CHANGE_NOTIFY_FUNCTION.execute_if(dialect="postgresql"))
+event.listen(ResourceChangeLog.__table__, "after_create",
+             CHANGE_NOTIFY_TRIGGER.execute_if(dialect="postgresql"))
+
+
+# Pydantic models for API responses
+class ResourceChangeRead(BaseModel):
+    """变更记录的响应模型"""
+    id: int
+    entity: str
+    entity_id: uuid.UUID
+    action: ChangeAction
+    actor_id: Optional[uuid.UUID] = None
+    created_at: datetime.datetime
+
+    class Config:
+        from_attributes = True
@@ -2,10 +2,11 @@ import uuid
 from sqlalchemy import Column, String, Integer, ForeignKey, Enum
 import enum
 from sqlalchemy.dialects.postgresql import UUID
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 from app.config.db import Base
 import base64
-from typing import Optional
+import datetime
+from typing import Any, Dict, List, Optional
 from app.models.resources import Resources
 # 连接器类型
 class ConnectionType(str, enum.Enum):
@@ -52,6 +53,43 @@ class DataConnectionTestResponse(BaseModel):
         from_attributes = True
 
 
+# DataConnectionBulkTest schema for testing stored connections in bulk
+class DataConnectionBulkTest(BaseModel):
+    connection_ids: Optional[List[uuid.UUID]] = None
+    workspace_id: Optional[uuid.UUID] = None
+    timeout: Optional[float] = Field(default=None, gt=0, le=60)
+    concurrency: Optional[int] = Field(default=None, ge=1, le=256)
+
+    @model_validator(mode="after")
+    def check_target(self):
+        if (self.connection_ids is None) == (self.workspace_id is None):
+            raise ValueError("Specify exactly one of connection_ids or workspace_id")
+        return self
+
+
+# DataConnectionBulkTestResult schema for one line of a bulk test stream
+class DataConnectionBulkTestResult(BaseModel):
+    connection_id: uuid.UUID
+    name: Optional[str] = None
+    success: bool
+    error: Optional[str] = None
+    elapsed_ms: float = 0.0
+
+
+# ConnectorHealthRead schema for reading connector health
+class ConnectorHealthRead(BaseModel):
+    connection_id: uuid.UUID
+    circuit_state: str
+    checks: int
+    errors: int
+    error_rate: float
+    recent_error_rate: float
+    last_error: Optional[str] = None
+    last_checked_at: Optional[datetime.datetime] = None
+    connect_latency: Dict[str, Any]
+    query_latency: Dict[str, Any]
+
+
 # DataConnectionRead schema for reading connection information
 class DataConnectionRead(BaseModel):
     id: uuid.UUID
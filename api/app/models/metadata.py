@@ -9,8 +9,9 @@
 
 import uuid
 from typing import List, Optional, Dict, Any
-from sqlalchemy import Column, String, Integer, ForeignKey, Text
-from sqlalchemy.dialects.postgresql import UUID,BIGINT,ENUM
+import datetime
+from sqlalchemy import Boolean, Column, DDL, String, Integer, ForeignKey, Text, DateTime, UniqueConstraint, Index, event, text
+from sqlalchemy.dialects.postgresql import UUID,BIGINT,ENUM,JSONB
 from sqlalchemy.orm import relationship
 from app.config.db import Base
 from app.models.resources import Resources,STATE_ENUM
@@ -20,6 +21,12 @@ from app.models.resources import ResourcesType, ResourcesState
 
 class MetaDataTable(Resources):
     __tablename__ = "resources_metadata_tables"
+    __table_args__ = (
+        # 同一连接器、同一数据库下未删除的表名唯一，用于按三元组定位元数据表
+        Index("uq_metadata_tables_connection_database_table", "connection_id", "database_name", "table_name",
+              unique=True, postgresql_where=text("NOT deleted")),
+        Index("ix_metadata_tables_table_name", "table_name"),
+    )
 
     id = Column(UUID(as_uuid=True), ForeignKey('resources.id', onupdate='CASCADE', ondelete='CASCADE'), primary_key=True, default=uuid.uuid4)
     database_name = Column(String(255), nullable=False)
@@ -27,6 +34,8 @@ class MetaDataTable(Resources):
     description = Column(Text, nullable=True)
     connection_id = Column(UUID(as_uuid=True), ForeignKey('resources_database_connections.id'), nullable=False)
     display_name = Column(String(255), nullable=True)
+    # resources.state 是否为 DELETED，由 resources 上的触发器同步，供部分唯一索引使用
+    deleted = Column(Boolean, nullable=False, default=False, server_default=text("false"))
     
     # 关联字段
     columns = relationship("MetaDataTableColumn", back_populates="table", cascade="all, delete-orphan")
@@ -36,8 +45,37 @@ class MetaDataTable(Resources):
     }
 
 
+METADATA_TABLE_DELETED_FUNCTION = DDL("""
+CREATE OR REPLACE FUNCTION sync_metadata_table_deleted() RETURNS trigger AS $$
+BEGIN
+    UPDATE resources_metadata_tables
+    SET deleted = (NEW.state = 'DELETED')
+    WHERE id = NEW.id AND deleted IS DISTINCT FROM (NEW.state = 'DELETED');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+""")
+
+METADATA_TABLE_DELETED_TRIGGER = DDL("""
+CREATE TRIGGER resources_sync_metadata_table_deleted
+AFTER UPDATE OF state ON resources
+FOR EACH ROW WHEN (OLD.state IS DISTINCT FROM NEW.state)
+EXECUTE FUNCTION sync_metadata_table_deleted()
+""")
+
+# 通过 create_all 建表时同时创建触发器（迁移中有相同的语句）；resources 表先于子表创建
+event.listen(MetaDataTable.__table__, "after_create",
+             METADATA_TABLE_DELETED_FUNCTION.execute_if(dialect="postgresql"))
+event.listen(MetaDataTable.__table__, "after_create",
+             METADATA_TABLE_DELETED_TRIGGER.execute_if(dialect="postgresql"))
+
+
 class MetaDataTableColumn(Base):
     __tablename__ = "resources_metadata_table_columns"
+    __table_args__ = (
+        # 按表读取字段并按序号排序
+        Index("ix_metadata_table_columns_table_id_position", "table_id", "ordinal_position"),
+    )
 
     seq = Column(BIGINT, primary_key=True, autoincrement=True)
     table_id = Column(UUID(as_uuid=True), ForeignKey('resources_metadata_tables.id'), nullable=False)
@@ -53,6 +91,26 @@ class MetaDataTableColumn(Base):
     
     # 关联表
     table = relationship("MetaDataTable", back_populates="columns")
+
+
+class MetaDataColumnStats(Base):
+    """字段统计信息，由画像任务写入，查询时无需访问源库"""
+    __tablename__ = "resources_metadata_column_stats"
+    __table_args__ = (
+        UniqueConstraint("table_id", "column_name", name="uq_metadata_column_stats_table_column"),
+    )
+
+    id = Column(BIGINT, primary_key=True, autoincrement=True)
+    table_id = Column(UUID(as_uuid=True), ForeignKey('resources_metadata_tables.id', ondelete='CASCADE'), nullable=False)
+    column_name = Column(String(255), nullable=False)
+    sample_rows = Column(BIGINT, nullable=False, default=0)
+    null_count = Column(BIGINT, nullable=False, default=0)
+    distinct_count = Column(BIGINT, nullable=True)  # HyperLogLog 近似值
+    min_value = Column(Text, nullable=True)
+    max_value = Column(Text, nullable=True)
+    top_values = Column(JSONB, nullable=True)  # [{"value": ..., "count": ...}]
+    histogram = Column(JSONB, nullable=True)  # [{"lower": ..., "upper": ..., "count": ...}]
+    profiled_at = Column(DateTime, default=datetime.datetime.now)
     
 
 # Pydantic models for API requests and responses
@@ -102,6 +160,9 @@ class MetaDataTableRead(BaseModel):
     state: ResourcesState
     created_by: uuid.UUID
 
+    class Config:
+        from_attributes = True
+
 
 class MetaDataTableColumnUpdate(BaseModel):
     """更新元数据表字段的请求模型"""
@@ -121,12 +182,32 @@ class MetaDataTableColumnRead(MetaDataTableColumnCreate):
     table_id: uuid.UUID
     state: str
 
+    class Config:
+        from_attributes = True
+
 
 class MetaDataTableWithColumnsRead(MetaDataTableRead):
     """包含字段信息的元数据表响应模型"""
     columns: List[MetaDataTableColumnRead] = []
 
 
+class MetaDataColumnStatsRead(BaseModel):
+    """字段统计信息的响应模型"""
+    table_id: uuid.UUID
+    column_name: str
+    sample_rows: int
+    null_count: int
+    distinct_count: Optional[int] = None
+    min_value: Optional[str] = None
+    max_value: Optional[str] = None
+    top_values: Optional[List[Dict[str, Any]]] = None
+    histogram: Optional[List[Dict[str, Any]]] = None
+    profiled_at: Optional[datetime.datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
 # 数据查询相关模型
 class QueryParams(BaseModel):
     """查询参数模型"""
@@ -144,4 +225,20 @@ class TableDataResponse(BaseModel):
     total: int
     page: int
     page_size: int
-    total_pages: int
\ No newline at end of file
+    total_pages: int
+
+
+# 批量导入导出相关模型
+class MetaDataImportError(BaseModel):
+    """导入失败行的错误信息"""
+    line: int
+    error: str
+
+
+class MetaDataImportResult(BaseModel):
+    """NDJSON 导入结果汇总"""
+    total: int = 0
+    created: int = 0
+    updated: int = 0
+    failed: int = 0
+    errors: List[MetaDataImportError] = []
@@ -0,0 +1,43 @@
+"""
+ 权限模型
+
+ 权限用整数位集表示，判断时只需一次按位与。
+ - 全局角色（superadmin）的权限对所有工作区生效
+ - 其他角色的权限只在用户所属（拥有或加入）的工作区内生效
+ - 工作区关系（owner/member）决定工作区本身的基础权限
+"""
+
+import enum
+
+from app.models.auth import RoleEnum
+
+
+class Permission(enum.IntFlag):
+    NONE = 0
+    WORKSPACE_READ = 1 << 0
+    WORKSPACE_UPDATE = 1 << 1
+    WORKSPACE_DELETE = 1 << 2
+    WORKSPACE_MANAGE_MEMBERS = 1 << 3
+    RESOURCE_READ = 1 << 4
+    RESOURCE_WRITE = 1 << 5
+    RESOURCE_DELETE = 1 << 6
+    ALL = (1 << 7) - 1
+
+
+# 对所有工作区生效的角色权限
+GLOBAL_ROLE_PERMISSIONS = {
+    RoleEnum.superadmin: Permission.ALL,
+}
+
+# 只在所属工作区内生效的角色权限
+ROLE_PERMISSIONS = {
+    RoleEnum.normal_user: Permission.NONE,
+    RoleEnum.data_engineer: Permission.RESOURCE_READ | Permission.RESOURCE_WRITE | Permission.RESOURCE_DELETE,
+    RoleEnum.data_analyst: Permission.RESOURCE_READ,
+}
+
+# 工作区关系对应的基础权限
+WORKSPACE_ROLE_PERMISSIONS = {
+    "owner": Permission.ALL,
+    "member": Permission.WORKSPACE_READ | Permission.RESOURCE_READ,
+}
@@ -8,10 +8,12 @@
 """
 
 import uuid
-from sqlalchemy import Column, String, DateTime, Integer, Boolean, Text, ForeignKey, Enum
+from sqlalchemy import Column, String, DateTime, Integer, Boolean, Text, ForeignKey, Enum, Index, text
 import enum
 from sqlalchemy.dialects.postgresql import UUID
 import datetime
+from typing import List, Literal, Optional, Union
+from pydantic import BaseModel, model_validator
 from app.config.db import Base
 
 
@@ -48,5 +50,121 @@ class Resources(Base):
     }
 
 
+# 索引定义在类外，避免被连接继承的子类通过 __table_args__ 继承
+# 按创建者列资源（可附加类型筛选）
+Index("ix_resources_created_by_type", Resources.created_by, Resources.type)
+# 按类型列出未删除的资源，按ID分页；枚举在库中按名称存储
+Index("ix_resources_type_id_live", Resources.type, Resources.id,
+      postgresql_where=text("state <> 'DELETED'"))
+# 清理任务按ID扫描已删除的资源
+Index("ix_resources_deleted_id", Resources.id,
+      postgresql_where=text("state = 'DELETED'"), postgresql_include=["updated_at"])
+
+
 # Define the ENUM separately to prevent Alembic from creating it multiple times
-STATE_ENUM = Enum("A", "P", "D", name="state_enum")
\ No newline at end of file
+STATE_ENUM = Enum("A", "P", "D", name="state_enum")
+
+
+# -------------------- Pydantic Schemas --------------------
+
+class ResourceRead(BaseModel):
+    """资源基表的响应模型"""
+    id: uuid.UUID
+    name: str
+    type: ResourcesType
+    state: ResourcesState
+    created_by: uuid.UUID
+    created_at: Optional[datetime.datetime] = None
+    updated_at: Optional[datetime.datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ConnectorResourceRead(ResourceRead):
+    """连接器资源的响应模型（不包含密码）"""
+    type: Literal[ResourcesType.CONNECTOR]
+    db_type: str
+    host: str
+    port: Optional[int] = None
+    database: Optional[str] = None
+    username: Optional[str] = None
+
+
+class MetaDataResourceRead(ResourceRead):
+    """元数据表资源的响应模型"""
+    type: Literal[ResourcesType.METADATA]
+    connection_id: uuid.UUID
+    database_name: str
+    table_name: str
+    display_name: Optional[str] = None
+    description: Optional[str] = None
+
+
+class CatalogResourceRead(ResourceRead):
+    """目录资源的响应模型"""
+    type: Literal[ResourcesType.CATALOG]
+    catalog_item_id: uuid.UUID
+
+
+class ResourceFilter(BaseModel):
+    """批量操作的资源筛选条件"""
+    type: Optional[ResourcesType] = None
+    state: Optional[ResourcesState] = None
+
+
+class ResourceBulkDelete(BaseModel):
+    """批量删除请求，ids 与 filter 二选一"""
+    ids: Optional[List[uuid.UUID]] = None
+    filter: Optional[ResourceFilter] = None
+
+    @model_validator(mode="after")
+    def check_target(self):
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("Specify exactly one of ids or filter")
+        return self
+
+
+class ResourceBulkStateUpdate(ResourceBulkDelete):
+    """批量状态变更请求"""
+    state: ResourcesState
+
+
+class ResourceBulkItemResult(BaseModel):
+    """批量操作中单个资源的结果：updated / unchanged / not_found"""
+    id: uuid.UUID
+    status: str
+    state: Optional[ResourcesState] = None
+
+
+class ResourceBulkResult(BaseModel):
+    """批量操作结果"""
+    updated: int = 0
+    unchanged: int = 0
+    not_found: int = 0
+    items: List[ResourceBulkItemResult] = []
+
+
+class ResourcePurgeProgress(BaseModel):
+    """已删除资源清理任务的进度"""
+    running: bool = False
+    retention_days: Optional[int] = None
+    cutoff: Optional[datetime.datetime] = None
+    started_at: Optional[datetime.datetime] = None
+    finished_at: Optional[datetime.datetime] = None
+    batches: int = 0
+    resources_deleted: int = 0
+    columns_deleted: int = 0
+    skipped: int = 0
+    last_id: Optional[uuid.UUID] = None
+    error: Optional[str] = None
+
+
+# 按资源类型返回对应子类字段，没有子表的类型（如计算节点）只返回基表字段
+TypedResourceRead = Union[ConnectorResourceRead, MetaDataResourceRead, CatalogResourceRead, ResourceRead]
+
+TYPED_RESOURCE_READ_MODELS = {
+    ResourcesType.CONNECTOR: ConnectorResourceRead,
+    ResourcesType.METADATA: MetaDataResourceRead,
+    ResourcesType.CATALOG: CatalogResourceRead,
+}
@@ -1,20 +1,24 @@
 import uuid
-from sqlalchemy import Column, String, DateTime
+from sqlalchemy import Column, String, DateTime, Index, text
 from sqlalchemy.dialects.postgresql import UUID,ENUM
 import datetime
 from sqlalchemy import ForeignKey,Enum as SQLEnum
-from pydantic import BaseModel
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
 from app.config.db import Base
 from app.models.resources import STATE_ENUM
 
 
 class Workspaces(Base):
     __tablename__ = "workspaces"
+    __table_args__ = (
+        Index("ix_workspaces_owner_id", "owner_id"),
+    )
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String, unique=True, index=True, nullable=False)
     description = Column(String, nullable=True)
     owner_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=False)
-    state = Column(SQLEnum('A', 'P', name="state_enum"), default='A')  # e.g., A, P
+    state = Column(SQLEnum('A', 'P', 'D', name="state_enum"), default='A')  # e.g., A, P；D 表示删除中
     created_at = Column(DateTime, default=datetime.datetime.now)
     updated_at = Column(DateTime, default=datetime.datetime.now, onupdate=datetime.datetime.now)
 
@@ -25,6 +29,14 @@ class Workspaces(Base):
 # -------------------- Resources in Workspace --------------
 class WorkspaceResources(Base):
     __tablename__ = "workspace_resources"
+    __table_args__ = (
+        # 列出工作区内未删除的资源
+        Index("ix_workspace_resources_workspace_resource_live", "workspace_id", "resource_id",
+              postgresql_where=text("state <> 'D'")),
+        Index("ix_workspace_resources_resource_id", "resource_id"),
+        # 同一资源在工作区内只有一行，批量分配用 ON CONFLICT 去重
+        Index("ix_workspace_resources_workspace_resource", "workspace_id", "resource_id", unique=True),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     workspace_id = Column(UUID(as_uuid=True), ForeignKey('workspaces.id'), nullable=False)
@@ -40,6 +52,14 @@ class WorkspaceResources(Base):
 # -------------------- Users in Workspace --------------
 class WorkspaceUsers(Base):
     __tablename__ = "workspace_users"
+    __table_args__ = (
+        Index("ix_workspace_users_user_id", "user_id"),
+        # 列出工作区内未删除的成员
+        Index("ix_workspace_users_workspace_user_live", "workspace_id", "user_id",
+              postgresql_where=text("state <> 'D'")),
+        # 同一用户在工作区内只有一行，批量添加用 ON CONFLICT 去重
+        Index("ix_workspace_users_workspace_user", "workspace_id", "user_id", unique=True),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     workspace_id = Column(UUID(as_uuid=True), ForeignKey('workspaces.id'), nullable=False)
@@ -73,4 +93,36 @@ class WorkspaceRead(WorkspaceBase):
     updated_at: datetime.datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class WorkspaceMembersBulk(BaseModel):
+    """批量添加或移除工作区成员"""
+    user_ids: List[uuid.UUID] = Field(..., min_length=1, max_length=100000)
+
+
+class WorkspaceResourcesBulk(BaseModel):
+    """批量分配或移出工作区资源"""
+    resource_ids: List[uuid.UUID] = Field(..., min_length=1, max_length=100000)
+
+
+class WorkspaceBulkResult(BaseModel):
+    """批量变更工作区成员或资源的结果"""
+    requested: int = 0  # 去重后的ID数量
+    added: int = 0
+    removed: int = 0
+    unchanged: int = 0  # 添加时已存在，移除时不存在
+    not_found: int = 0  # 用户或资源不存在
+
+
+class WorkspaceDeletionProgress(BaseModel):
+    """工作区后台删除任务的进度"""
+    workspace_id: uuid.UUID
+    owner_id: Optional[uuid.UUID] = None
+    running: bool = False
+    phase: Optional[str] = None  # 当前清理的表
+    batches: int = 0
+    rows_deleted: Dict[str, int] = {}
+    started_at: Optional[datetime.datetime] = None
+    finished_at: Optional[datetime.datetime] = None
+    error: Optional[str] = None
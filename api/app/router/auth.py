@@ -1,11 +1,20 @@
 # -------------------- Imports --------------------
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from typing import List
+import uuid
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from app.models.auth import User, UserCreate, UserRead
-from app.config.db import get_db
-from app.services.auth import AuthService
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.auth import TokenClaims, User, UserCreate, UserProvisionResult, UserRead
+from app.config.db import get_async_db
+from app.config.settings import settings
+from app.models.api_keys import ApiKeyCreate, ApiKeyCreated, ApiKeyRead
+from app.services.api_keys import ApiKeyService
+from app.services.auth import AuthService, get_current_claims
+from app.services.passwords import PasswordHasherBusyError
+from app.services.provisioning import UserProvisioningService, parse_csv_users, parse_ndjson_users
+from app.services.tokens import revoke_token
 from pydantic import BaseModel
+from app.utils.ndjson import iter_lines
 from app.utils.schema import BaseResponse
 
 router = APIRouter()
@@ -28,21 +37,38 @@ class ResetPasswordRequest(BaseModel):
 # 创建 AuthService 实例
 auth_service = AuthService()
 
+
+def hasher_overloaded(e: PasswordHasherBusyError) -> HTTPException:
+    """
+    密码哈希排队已满时返回 503，登录高峰不影响其他接口
+    """
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(e),
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
 # -------------------- Routes --------------------
 @router.post("/register", response_model=BaseResponse[UserRead])
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    return auth_service.register_user(user, db)
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    try:
+        return await auth_service.register_user(user, db)
+    except PasswordHasherBusyError as e:
+        raise hasher_overloaded(e)
 
 @router.post("/token", response_model=Token) #BaseResponse[Token]
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = auth_service.authenticate_user(db, form_data.username, form_data.password)
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    try:
+        user = await auth_service.authenticate_user(db, form_data.username, form_data.password)
+    except PasswordHasherBusyError as e:
+        raise hasher_overloaded(e)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = auth_service.create_access_token(data={"sub": user.username})
+    access_token = await auth_service.issue_access_token(db, user)
     return Token(access_token=access_token, token_type="bearer") #BaseResponse[Token](data=Token(access_token=access_token, token_type="bearer"))
 
 @router.get("/me", response_model=BaseResponse[UserRead])
@@ -52,26 +78,112 @@ async def read_users_me(current_user: User = Depends(auth_service.get_current_us
     """
     return BaseResponse[UserRead](data=current_user)
 
+@router.post("/logout", response_model=BaseResponse[dict])
+async def logout(claims: TokenClaims = Depends(get_current_claims), db: AsyncSession = Depends(get_async_db)):
+    """
+    吊销当前访问令牌
+    """
+    await revoke_token(db, claims)
+    return BaseResponse[dict](data={"msg": "Logged out"})
+
 @router.post("/reset-password", response_model=BaseResponse[dict])
-def reset_password(req: ResetPasswordRequest, db: Session = Depends(get_db)):
-    user = auth_service.get_user_by_username(db, req.username)
+async def reset_password(req: ResetPasswordRequest, db: AsyncSession = Depends(get_async_db)):
+    try:
+        user = await auth_service.reset_password(db, req.username, req.new_password)
+    except PasswordHasherBusyError as e:
+        raise hasher_overloaded(e)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    user.hashed_password = auth_service.get_password_hash(req.new_password)
-    db.commit()
     return BaseResponse[dict](data={"msg": "Password reset successful"})
 
 
+@router.post("/users/bulk", response_model=BaseResponse[UserProvisionResult])
+async def provision_users(
+    request: Request,
+    batch_size: int = Query(default=settings.USER_PROVISION_BATCH_SIZE, ge=1, le=5000),
+    claims: TokenClaims = Depends(get_current_claims),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    从 CSV（Content-Type: text/csv，首行为表头）或 NDJSON 流批量创建用户
+
+    每 batch_size 行一个事务，新用户授予 normal_user 角色，结果按行号返回；
+    中途遇到非 UTF-8 的行或密码哈希过载时停止读取，返回已处理部分的结果。
+    仅超级管理员可用。
+    """
+    if "superadmin" not in claims.roles:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+    lines = iter_lines(request.stream())
+    if request.headers.get("content-type", "").startswith("text/csv"):
+        rows = parse_csv_users(lines)
+    else:
+        rows = parse_ndjson_users(lines)
+    service = UserProvisioningService(db, batch_size)
+    report = await service.provision_users(rows)
+    return BaseResponse[UserProvisionResult](data=report)
+
+
 
 # 前端
 @router.post("/front_token", response_model=BaseResponse[Token])
-def front_login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = auth_service.authenticate_user(db, form_data.username, form_data.password)
+async def front_login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    try:
+        user = await auth_service.authenticate_user(db, form_data.username, form_data.password)
+    except PasswordHasherBusyError as e:
+        raise hasher_overloaded(e)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = auth_service.create_access_token(data={"sub": user.username})
+    access_token = await auth_service.issue_access_token(db, user)
     return BaseResponse[Token](data=Token(access_token=access_token, token_type="bearer"))
+
+
+
+# -------------------- API Keys --------------------
+@router.post("/api-keys", response_model=BaseResponse[ApiKeyCreated], status_code=status.HTTP_201_CREATED)
+async def create_api_key(
+    api_key: ApiKeyCreate,
+    claims: TokenClaims = Depends(get_current_claims),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    为当前用户创建限定在一个工作区内的 API Key，明文只返回一次
+    """
+    service = ApiKeyService(db)
+    member = claims.workspace_role(api_key.workspace_id) is not None
+    if not member and not claims.ws_complete:
+        member = await service.is_workspace_member(claims.uid, api_key.workspace_id)
+    if not member:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions to access this workspace"
+        )
+    created = await service.create_api_key(claims.uid, api_key)
+    return BaseResponse[ApiKeyCreated](data=created)
+
+@router.get("/api-keys", response_model=BaseResponse[List[ApiKeyRead]])
+async def read_api_keys(
+    claims: TokenClaims = Depends(get_current_claims),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    获取当前用户的 API Key 列表
+    """
+    keys = await ApiKeyService(db).get_api_keys(claims.uid)
+    return BaseResponse[List[ApiKeyRead]](data=keys)
+
+@router.delete("/api-keys/{key_id}", response_model=BaseResponse[dict])
+async def revoke_api_key(
+    key_id: uuid.UUID,
+    claims: TokenClaims = Depends(get_current_claims),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    吊销 API Key
+    """
+    if not await ApiKeyService(db).revoke_api_key(claims.uid, key_id):
+        raise HTTPException(status_code=404, detail="API key not found")
+    return BaseResponse[dict](data={"msg": "API key revoked"})
@@ -0,0 +1,75 @@
+from fastapi import APIRouter, Depends, Header, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+import uuid
+
+from app.config.db import AsyncSessionLocal, get_async_db
+from app.config.settings import settings
+from app.models.auth import RoleEnum, TokenClaims
+from app.models.changes import ResourceChangeRead
+from app.services.auth import get_current_claims, get_current_user
+from app.services.changes import ResourceChangeService, change_feed, change_visible_to, stream_changes
+
+# 创建router实例
+router = APIRouter(dependencies=[Depends(get_current_user)])
+
+
+def visible_user_id(claims: TokenClaims) -> Optional[uuid.UUID]:
+    # 超级管理员可以看到全部变更，其他用户只能看到自己可见的资源和工作区的变更
+    return None if RoleEnum.superadmin.value in claims.roles else claims.uid
+
+
+async def load_changes(after: Optional[int], limit: int,
+                       user_id: Optional[uuid.UUID] = None) -> List[ResourceChangeRead]:
+    # 事件流的生命周期长于请求依赖，补发时每批使用独立会话
+    async with AsyncSessionLocal() as db:
+        return await ResourceChangeService(db).get_changes(after=after, limit=limit, user_id=user_id)
+
+
+@router.get("/", response_model=List[ResourceChangeRead])
+async def read_changes(
+    after: Optional[int] = Query(None, description="续传标记，返回该ID之后的变更"),
+    limit: int = Query(100, ge=1, le=1000),
+    entity: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    claims: TokenClaims = Depends(get_current_claims)
+):
+    """
+    按ID顺序获取对当前用户可见的变更记录
+    """
+    service = ResourceChangeService(db)
+    return await service.get_changes(after=after, limit=limit, entity=entity, user_id=visible_user_id(claims))
+
+
+@router.get("/stream")
+async def stream_resource_changes(
+    after: Optional[int] = Query(None, description="续传标记，返回该ID之后的变更"),
+    last_event_id: Optional[int] = Header(None),
+    claims: TokenClaims = Depends(get_current_claims)
+):
+    """
+    以 Server-Sent Events 订阅对当前用户可见的资源和工作区的变更
+
+    断线重连时浏览器会自动携带 Last-Event-ID 请求头，从上次收到的变更之后续传（含回看窗口，可能重复送达）；
+    服务端关闭事件流（订阅者消费过慢或数据库连接中断）时客户端同样重连续传即可。
+    """
+    resume_from = last_event_id if last_event_id is not None else after
+    user_id = visible_user_id(claims)
+
+    async def load_batch(cursor: Optional[int], limit: int) -> List[ResourceChangeRead]:
+        return await load_changes(cursor, limit, user_id)
+
+    return StreamingResponse(
+        stream_changes(
+            change_feed,
+            resume_from,
+            load_batch,
+            batch_size=settings.CHANGE_FEED_REPLAY_BATCH_SIZE,
+            keepalive_seconds=settings.CHANGE_FEED_KEEPALIVE_SECONDS,
+            lookback=settings.CHANGE_FEED_RESUME_LOOKBACK,
+            visible=change_visible_to(user_id) if user_id is not None else None,
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
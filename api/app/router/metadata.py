@@ -7,17 +7,23 @@
 - 创建、查询、更新、删除元数据表
 - 创建、查询、更新、删除元数据表字段
 - 根据元数据配置查询实际表数据
+- 元数据目录的 NDJSON 导入导出，按三元组定位元数据表（/metadata-catalog）
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 import uuid
 
-from app.config.db import get_async_db
+from app.config.db import get_async_db, AsyncSessionLocal
+from app.config.settings import settings
 from app.models.resources import ResourcesType
-from app.services.metadata import MetaDataTableService
+from app.services.metadata import AmbiguousTableNameError, MetaDataTableService
 from app.services.tabledata import TableDataService
+from app.services.metadata_transfer import MetaDataTransferService
+from app.services.profiling import ColumnProfilingService, run_profiling_job
+from app.services.health import CircuitOpenError, connector_health
 from app.models.metadata import (
     MetaDataTableCreate, 
     MetaDataTableRead, 
@@ -27,14 +33,21 @@ from app.models.metadata import (
     MetaDataTableColumnUpdate,
     MetaDataTableWithColumnsRead,
     QueryParams,
-    TableDataResponse
+    TableDataResponse,
+    MetaDataImportResult,
+    MetaDataColumnStatsRead
 )
-from app.models.auth import UserRead
-from app.services.auth import get_current_user
+from app.models.auth import TokenClaims, UserRead
+from app.models.permissions import Permission
+from app.services.auth import get_current_claims, get_current_user
+from app.services.permissions import check_workspace_permission
 from app.utils.schema import BaseResponse
+from app.utils.ndjson import iter_lines
 
 # 创建路由实例，所有路径都以 /metadata 为前缀
 router = APIRouter(prefix="/metadata", dependencies=[Depends(get_current_user)])
+# 导入导出和定位接口使用独立前缀，避免与资源路由的 /metadata/{metadata_id} 冲突
+catalog_router = APIRouter(prefix="/metadata-catalog", dependencies=[Depends(get_current_user)])
 
 
 @router.post("/", response_model=BaseResponse[MetaDataTableRead], status_code=status.HTTP_201_CREATED)
@@ -327,11 +340,70 @@ async def delete_table_column(
     return BaseResponse[dict](data={"message": "Metadata table column deleted successfully"})
 
 
+# 字段画像接口
+@router.post("/{table_id}/profile", response_model=BaseResponse[dict], status_code=status.HTTP_202_ACCEPTED)
+async def profile_metadata_table(
+    table_id: uuid.UUID,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    提交元数据表的字段画像任务
+    
+    Args:
+        table_id: 元数据表ID
+        background_tasks: 后台任务
+        db: 数据库会话依赖
+        
+    Returns:
+        BaseResponse[dict]: 任务提交结果
+    """
+    service = MetaDataTableService(db)
+    table = await service.get_metadata_table(table_id)
+    if not table:
+        raise HTTPException(status_code=404, detail="Metadata table not found")
+    
+    # 源库不可用时直接拒绝，不再排队等待超时
+    try:
+        connector_health.check_available(table.connection_id)
+    except CircuitOpenError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(int(e.retry_after) + 1)}
+        )
+    
+    background_tasks.add_task(run_profiling_job, table_id)
+    return BaseResponse[dict](data={"message": "Profiling job scheduled"})
+
+
+@router.get("/{table_id}/stats", response_model=BaseResponse[List[MetaDataColumnStatsRead]])
+async def read_metadata_table_stats(
+    table_id: uuid.UUID,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    获取元数据表最近一次画像的字段统计信息
+    
+    Args:
+        table_id: 元数据表ID
+        db: 数据库会话依赖
+        
+    Returns:
+        BaseResponse[List[MetaDataColumnStatsRead]]: 字段统计列表
+    """
+    service = ColumnProfilingService(db)
+    stats = await service.get_table_stats(table_id)
+    return BaseResponse[List[MetaDataColumnStatsRead]](data=stats)
+
+
 # 数据查询接口
 @router.post("/{table_name}/query", response_model=BaseResponse[TableDataResponse])
 async def query_table_data(
     table_name: str,
     query_params: QueryParams,
+    connection_id: Optional[uuid.UUID] = None,
+    database_name: Optional[str] = None,
     db: AsyncSession = Depends(get_async_db)
 ):
     """
@@ -340,6 +412,8 @@ async def query_table_data(
     Args:
         table_name: 表名
         query_params: 查询参数
+        connection_id: 连接器ID（可选，同名表存在时用于消除歧义）
+        database_name: 数据库名（可选，同名表存在时用于消除歧义）
         db: 数据库会话依赖
         
     Returns:
@@ -347,9 +421,109 @@ async def query_table_data(
     """
     try:
         service = TableDataService(db)
-        result = await service.query_table_data(table_name, query_params)
+        result = await service.query_table_data(table_name, query_params, connection_id, database_name)
         return BaseResponse[TableDataResponse](data=TableDataResponse(**result))
+    except AmbiguousTableNameError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ------------------------------
+# 元数据目录的批量导入导出与定位接口
+# ------------------------------
+
+@catalog_router.get("/export")
+async def export_metadata_tables(
+    connection_id: Optional[uuid.UUID] = None,
+    workspace_id: Optional[uuid.UUID] = None,
+    batch_size: int = Query(default=settings.METADATA_TRANSFER_BATCH_SIZE, ge=1, le=5000),
+    current_user: UserRead = Depends(get_current_user),
+    claims: TokenClaims = Depends(get_current_claims)
+):
+    """
+    以 NDJSON 流式导出元数据表及字段
+
+    指定 workspace_id 时需要该工作区的 RESOURCE_READ 权限，导出工作区内的表；
+    未指定时只导出当前用户创建的表。
+    
+    Args:
+        connection_id: 按连接器筛选（可选）
+        workspace_id: 按工作区筛选（可选）
+        batch_size: 每批读取的元数据表数量
+        current_user: 当前登录用户信息
+        claims: 当前令牌声明
+        
+    Returns:
+        StreamingResponse: 每行一个元数据表（包含字段）
+    """
+    created_by = None
+    if workspace_id is not None:
+        await check_workspace_permission(claims, workspace_id, Permission.RESOURCE_READ)
+    else:
+        created_by = current_user.id
+
+    async def generate():
+        # 流式响应期间请求级会话可能已关闭，这里使用独立会话
+        async with AsyncSessionLocal() as db:
+            service = MetaDataTransferService(db, batch_size)
+            async for line in service.export_tables(connection_id, workspace_id, created_by):
+                yield line
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+@catalog_router.post("/import", response_model=BaseResponse[MetaDataImportResult])
+async def import_metadata_tables(
+    request: Request,
+    batch_size: int = Query(default=settings.METADATA_TRANSFER_BATCH_SIZE, ge=1, le=5000),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserRead = Depends(get_current_user)
+):
+    """
+    从 NDJSON 流导入元数据表及字段
+    
+    按 (connection_id, database_name, table_name) 幂等地新增或更新，
+    每 batch_size 行一个事务，错误按行号返回；遇到非 UTF-8 的行时记为错误并停止读取。
+    
+    Args:
+        request: 请求对象，请求体为 NDJSON
+        batch_size: 每个事务写入的元数据表数量
+        db: 数据库会话依赖
+        current_user: 当前登录用户信息
+        
+    Returns:
+        BaseResponse[MetaDataImportResult]: 导入结果汇总
+    """
+    service = MetaDataTransferService(db, batch_size)
+    report = await service.import_tables(iter_lines(request.stream()), current_user.id)
+    return BaseResponse[MetaDataImportResult](data=report)
+
+
+@catalog_router.get("/resolve", response_model=BaseResponse[MetaDataTableRead])
+async def resolve_metadata_table(
+    connection_id: uuid.UUID,
+    database_name: str,
+    table_name: str,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    按 (connection_id, database_name, table_name) 定位元数据表
+    
+    Args:
+        connection_id: 连接器ID
+        database_name: 数据库名
+        table_name: 表名
+        db: 数据库会话依赖
+        
+    Returns:
+        BaseResponse[MetaDataTableRead]: 元数据表信息
+    """
+    service = MetaDataTableService(db)
+    db_table = await service.resolve_metadata_table(connection_id, database_name, table_name)
+    if not db_table:
+        raise HTTPException(status_code=404, detail="Metadata table not found")
+    
+    return BaseResponse[MetaDataTableRead](data=MetaDataTableRead.model_validate(db_table))
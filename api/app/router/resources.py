@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select  # 添加select导入
 from typing import List, Optional
@@ -7,19 +8,36 @@ import uuid
 from app.config.db import get_async_db
 from app.config.settings import settings  # 添加settings导入
 from app.services.resources import ResourcesService
-from app.services.connections import DataConnectionService  # 添加导入
-from app.models.resources import ResourcesType, ResourcesState
+from app.services.connections import DataConnectionService, run_connection_tests  # 添加导入
+from app.services.health import connector_health
+from app.services.purge import get_purge_progress, run_purge_job
+from app.models.resources import (
+    ResourcesType,
+    ResourcesState,
+    ResourceBulkDelete,
+    ResourceBulkResult,
+    ResourceBulkStateUpdate,
+    ResourcePurgeProgress,
+    TypedResourceRead
+)
+from app.models.permissions import Permission
 from app.models.connections import (
     DataConnectionCreate,
     DataConnectionTest,
+    DataConnectionBulkTest,
+    DataConnectionBulkTestResult,
     DataConnectionRead,
     DataConnectionTestResponse,
+    ConnectorHealthRead,
     ConnectionType,
     DataBaseConnection
 )
-from app.utils.schema import BaseResponse
-from app.models.auth import User,UserRead
-from app.services.auth import get_current_user
+from app.utils.schema import BaseResponse, PageResponse
+from app.utils.ndjson import dumps_line
+from app.models.auth import TokenClaims, User, UserRead
+from app.services.auth import get_current_claims, get_current_user
+from app.services.permissions import check_workspace_permission
+from app.services.tenancy import workspace_resource_ids
 
 # 创建router实例
 router = APIRouter(dependencies=[Depends(get_current_user)])
@@ -28,20 +46,35 @@ router = APIRouter(dependencies=[Depends(get_current_user)])
 # Resources 通用接口
 # ------------------------------
 
-@router.get("/")
+@router.get("/", response_model=List[TypedResourceRead])
 async def read_resources(
     skip: int = 0,
     limit: int = 100,
     type: Optional[ResourcesType] = None,
     state: Optional[ResourcesState] = None,
+    workspace_id: Optional[uuid.UUID] = None,
     db: AsyncSession = Depends(get_async_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    claims: TokenClaims = Depends(get_current_claims)
 ):
     """
     获取资源列表，支持分页和筛选
+
+    每个资源返回对应子类（连接器、元数据表、目录）的完整字段，无需再逐个调用详情接口。
+    未指定 workspace_id 时返回当前用户创建的资源；指定时需要该工作区的 RESOURCE_READ 权限，
+    返回该工作区内的资源，资源范围来自进程内的租户索引。
     """
     service = ResourcesService(db)
-    resources = await service.get_resources(
+    if workspace_id is not None:
+        await check_workspace_permission(claims, workspace_id, Permission.RESOURCE_READ)
+        return await service.get_typed_resources(
+            skip=skip,
+            limit=limit,
+            type=type,
+            state=state,
+            resource_ids=await workspace_resource_ids(workspace_id)
+        )
+    resources = await service.get_typed_resources(
         skip=skip,
         limit=limit,
         type=type,
@@ -50,6 +83,69 @@ async def read_resources(
     )
     return resources
 
+@router.post("/bulk/state", response_model=BaseResponse[ResourceBulkResult])
+async def bulk_update_resource_state(
+    request: ResourceBulkStateUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    批量变更资源状态
+
+    按 ids 操作时返回每个ID的结果（updated / unchanged / not_found）；
+    按 filter 操作时只作用于当前用户创建的资源。
+    """
+    service = ResourcesService(db)
+    report = await service.bulk_update_state(
+        request.state,
+        ids=request.ids,
+        filter=request.filter,
+        created_by=uuid.UUID(str(current_user.id)),
+        chunk_size=settings.RESOURCE_BULK_CHUNK_SIZE
+    )
+    return BaseResponse[ResourceBulkResult](data=report)
+
+@router.post("/bulk/delete", response_model=BaseResponse[ResourceBulkResult])
+async def bulk_delete_resources(
+    request: ResourceBulkDelete,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    批量删除资源（软删除，将状态设置为DELETED）
+    """
+    service = ResourcesService(db)
+    report = await service.bulk_update_state(
+        ResourcesState.DELETED,
+        ids=request.ids,
+        filter=request.filter,
+        created_by=uuid.UUID(str(current_user.id)),
+        chunk_size=settings.RESOURCE_BULK_CHUNK_SIZE
+    )
+    return BaseResponse[ResourceBulkResult](data=report)
+
+@router.post("/purge", response_model=BaseResponse[dict], status_code=status.HTTP_202_ACCEPTED)
+async def purge_deleted_resources(
+    background_tasks: BackgroundTasks,
+    retention_days: Optional[int] = Query(default=None, ge=1),
+    claims: TokenClaims = Depends(get_current_claims)
+):
+    """
+    提交已删除资源的清理任务，物理删除超过保留期的资源及其依赖记录。
+    仅超级管理员可用。
+    """
+    if "superadmin" not in claims.roles:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+    background_tasks.add_task(run_purge_job, retention_days)
+    return BaseResponse[dict](data={"message": "Purge job scheduled"})
+
+@router.get("/purge", response_model=BaseResponse[ResourcePurgeProgress])
+async def read_purge_progress():
+    """
+    获取最近一次清理任务的进度
+    """
+    return BaseResponse[ResourcePurgeProgress](data=get_purge_progress())
+
 @router.get("/{resource_id}")
 async def read_resource(
     resource_id: uuid.UUID,
@@ -115,29 +211,51 @@ async def create_data_connection(
 
     return BaseResponse[DataConnectionRead](data=db_connection)
 
-@router.get("/connectors/", response_model=BaseResponse[List[DataConnectionRead]])
+@router.get("/connectors/", response_model=BaseResponse[PageResponse[DataConnectionRead]])
 async def read_data_connections(
-    skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(default=100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    state: Optional[ResourcesState] = None,
+    skip: Optional[int] = Query(default=None, include_in_schema=False),
     db: AsyncSession = Depends(get_async_db)
 ):
     """
     获取数据连接器列表
+
+    按ID键集分页：下一页游标在响应体的 next_cursor 中返回，作为 cursor 参数传回即可；不支持偏移分页（skip）。
     """
-    service = ResourcesService(db)
-    connections = await service.get_resources_by_type(ResourcesType.CONNECTOR, skip, limit)
-    # 需要将Resources对象转换为DataConnectionRead对象
-    connection_reads = []
-    for connection in connections:
-        # 获取具体的连接器信息
-        result = await db.execute(
-            select(DataBaseConnection).where(DataBaseConnection.id == connection.id)
-        )
-        db_connection = result.scalar_one_or_none()
-        if db_connection:
-            connection_reads.append(DataConnectionRead.model_validate(db_connection))
-    
-    return BaseResponse[List[DataConnectionRead]](data=connection_reads)
+    if skip is not None:
+        raise HTTPException(status_code=400, detail="skip is not supported, use cursor from next_cursor")
+    connection_service = DataConnectionService(db)
+    try:
+        connection_reads, next_cursor = await connection_service.list_data_connections(limit, cursor, state)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    page = PageResponse[DataConnectionRead](
+        items=connection_reads,
+        size=limit,
+        has_next=next_cursor is not None,
+        has_prev=bool(cursor),
+        next_cursor=next_cursor,
+    )
+    return BaseResponse[PageResponse[DataConnectionRead]](data=page)
+
+@router.get("/connectors/health", response_model=BaseResponse[List[ConnectorHealthRead]])
+async def read_connectors_health():
+    """
+    获取全部连接器的健康状态（连接/查询耗时直方图、错误率、熔断器状态）
+    """
+    return BaseResponse[List[ConnectorHealthRead]](data=connector_health.snapshot())
+
+@router.get("/connectors/{connection_id}/health", response_model=BaseResponse[ConnectorHealthRead])
+async def read_connector_health(connection_id: uuid.UUID):
+    """
+    获取单个连接器的健康状态
+    """
+    health = connector_health.snapshot(connection_id)
+    if not health:
+        raise HTTPException(status_code=404, detail="No health data for this connection")
+    return BaseResponse[ConnectorHealthRead](data=health[0])
 
 @router.get("/connectors/{connection_id}", response_model=BaseResponse[DataConnectionRead])
 async def read_data_connection(
@@ -268,6 +386,46 @@ async def test_data_connection(
             )
         )
 
+# 批量测试已保存的数据库连接
+@router.post("/connectors/test/bulk")
+async def bulk_test_data_connections(
+    request: DataConnectionBulkTest,
+    db: AsyncSession = Depends(get_async_db),
+    claims: TokenClaims = Depends(get_current_claims)
+):
+    """
+    并发测试多个已保存的连接器，按完成顺序以 NDJSON 流式返回结果
+
+    connection_ids 与 workspace_id 二选一；workspace_id 表示该工作区内全部激活的连接器，
+    需要该工作区的 RESOURCE_READ 权限；connection_ids 只包含当前用户创建或位于其工作区内的连接器，
+    其余按不存在返回。每个连接器新建连接测试（使用解密后的密码），单个连接器超时不影响其他连接器。
+    """
+    visible_to = None
+    if request.workspace_id is not None:
+        await check_workspace_permission(claims, request.workspace_id, Permission.RESOURCE_READ)
+    elif "superadmin" not in claims.roles:
+        visible_to = claims.uid
+    connections = await DataConnectionService(db).get_connections_for_test(
+        request.connection_ids, request.workspace_id, visible_to
+    )
+    missing = []
+    if request.connection_ids is not None:
+        found = {connection.id for connection in connections}
+        missing = [cid for cid in dict.fromkeys(request.connection_ids) if cid not in found]
+
+    timeout = request.timeout or settings.CONNECTOR_TEST_TIMEOUT
+    concurrency = request.concurrency or settings.CONNECTOR_TEST_CONCURRENCY
+
+    async def generate():
+        for connection_id in missing:
+            yield dumps_line(DataConnectionBulkTestResult(
+                connection_id=connection_id, success=False, error="Data connection not found"
+            ))
+        async for result in run_connection_tests(connections, concurrency, timeout):
+            yield dumps_line(result)
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
 # ------------------------------ 
 # Metadata 元数据相关接口
 # ------------------------------
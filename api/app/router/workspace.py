@@ -11,27 +11,47 @@ Workspace 的业务逻辑，并返回相应结果。
 - 实现多租户环境下的数据隔离和权限控制的接口入口
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 import uuid
-from app.config.db import get_db
+from app.config.db import get_async_db
 from app.services.workspace import WorkspaceService
-from app.models.workspace import WorkspaceCreate, WorkspaceRead, WorkspaceUpdate
-from app.models.auth import User, UserRead
-from app.services.auth import AuthService
+from app.config.settings import settings
+from app.models.workspace import (
+    WorkspaceBulkResult,
+    WorkspaceCreate,
+    WorkspaceDeletionProgress,
+    WorkspaceMembersBulk,
+    WorkspaceRead,
+    WorkspaceResourcesBulk,
+    WorkspaceUpdate,
+)
+from app.models.auth import TokenClaims
+from app.models.catalog import (
+    CatalogItemCreate,
+    CatalogItemMove,
+    CatalogItemRead,
+    CatalogItemType,
+    CatalogSubtreeItem,
+    CatalogTreeNode,
+)
+from app.models.permissions import Permission
+from app.services.auth import get_current_claims
+from app.services.catalog import CatalogService, catalog_tree_cache
+from app.services.permissions import require_workspace_permission
+from app.services.workspace_deletion import get_deletion_progress, run_workspace_deletion
 from app.utils.schema import BaseResponse, PageResponse
 
 router = APIRouter()
-auth_service = AuthService()
 
 # -------------------- Routes --------------------
 
 @router.post("/", response_model=BaseResponse[WorkspaceRead], status_code=status.HTTP_201_CREATED)
-def create_workspace(
+async def create_workspace(
     workspace: WorkspaceCreate,
-    current_user: UserRead = Depends(auth_service.get_current_user),
-    db: Session = Depends(get_db)
+    claims: TokenClaims = Depends(get_current_claims),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     创建新的工作区
@@ -39,8 +59,8 @@ def create_workspace(
     """
     workspace_service = WorkspaceService(db)
     try:
-        owner_id = current_user.id
-        db_workspace = workspace_service.create_workspace(workspace, owner_id)
+        owner_id = claims.uid
+        db_workspace = await workspace_service.create_workspace(workspace, owner_id)
         return BaseResponse[WorkspaceRead](data=db_workspace)
     except Exception as e:
         raise HTTPException(
@@ -49,152 +69,272 @@ def create_workspace(
         )
 
 @router.get("/{workspace_id}", response_model=BaseResponse[WorkspaceRead])
-def read_workspace(
+async def read_workspace(
     workspace_id: str,
-    current_user: User = Depends(auth_service.get_current_user),
-    db: Session = Depends(get_db)
+    claims: TokenClaims = Depends(require_workspace_permission(Permission.WORKSPACE_READ)),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     根据ID获取单个工作区信息
     只有工作区的所有者或授权用户才能访问
     """
-    try:
-        workspace_uuid = uuid.UUID(workspace_id)
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid workspace ID format"
-        )
-    
     workspace_service = WorkspaceService(db)
-    workspace = workspace_service.get_workspace(workspace_uuid)
+    workspace = await workspace_service.get_workspace(uuid.UUID(workspace_id))
     if not workspace:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Workspace not found"
         )
     
-    # 检查用户是否有权限访问该工作区
-    if workspace.owner_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions to access this workspace"
-        )
-    
     return BaseResponse[WorkspaceRead](data=workspace)
 
 @router.get("/", response_model=BaseResponse[PageResponse[WorkspaceRead]])
-def read_workspaces(
-    skip: int = 0,
-    limit: int = 100,
-    current_user: UserRead = Depends(auth_service.get_current_user),
-    db: Session = Depends(get_db)
+async def read_workspaces(
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    claims: TokenClaims = Depends(get_current_claims),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     获取当前用户拥有的工作区列表
+    支持偏移分页（skip）和游标分页（cursor，取自上一页的 next_cursor）
     """
     workspace_service = WorkspaceService(db)
-    owner_id = current_user.id
-    workspaces = workspace_service.get_workspaces_by_owner(owner_id, skip, limit)
-    
-    # 计算总数以支持分页
-    total_workspaces = len(workspace_service.get_workspaces_by_owner(owner_id, 0, 10000))  # 获取所有工作区数量
-    
-    # 构造分页响应
-    page_response = PageResponse[WorkspaceRead](
-        items=workspaces,
-        total=total_workspaces,
-        page=skip // limit + 1,
-        size=limit,
-        has_next=(skip + limit) < total_workspaces,
-        has_prev=skip > 0
-    )
-    
+    try:
+        page_response = await workspace_service.page_workspaces_by_owner(claims.uid, limit, skip, cursor)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     return BaseResponse[PageResponse[WorkspaceRead]](data=page_response)
 
 @router.put("/{workspace_id}", response_model=BaseResponse[WorkspaceRead])
-def update_workspace(
+async def update_workspace(
     workspace_id: str,
     workspace_update: WorkspaceUpdate,
-    current_user: UserRead = Depends(auth_service.get_current_user),
-    db: Session = Depends(get_db)
+    claims: TokenClaims = Depends(require_workspace_permission(Permission.WORKSPACE_UPDATE)),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     更新工作区信息
     只有工作区的所有者才能更新工作区信息
     """
-    try:
-        workspace_uuid = uuid.UUID(workspace_id)
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid workspace ID format"
-        )
-    
     workspace_service = WorkspaceService(db)
-    workspace = workspace_service.get_workspace(workspace_uuid)
-    
-    if not workspace:
+    updated_workspace = await workspace_service.update_workspace(uuid.UUID(workspace_id), workspace_update)
+    if not updated_workspace:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Workspace not found"
         )
     
-    # 检查用户是否有权限更新该工作区
-    if workspace.owner_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions to update this workspace"
-        )
-    
-    updated_workspace = workspace_service.update_workspace(workspace_uuid, workspace_update)
-    if not updated_workspace:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Failed to update workspace"
-        )
-    
     return BaseResponse[WorkspaceRead](data=updated_workspace)
 
-@router.delete("/{workspace_id}", response_model=BaseResponse[dict])
-def delete_workspace(
+@router.delete("/{workspace_id}", response_model=BaseResponse[WorkspaceDeletionProgress],
+               status_code=status.HTTP_202_ACCEPTED)
+async def delete_workspace(
     workspace_id: str,
-    current_user: User = Depends(auth_service.get_current_user),
-    db: Session = Depends(get_db)
+    background_tasks: BackgroundTasks,
+    claims: TokenClaims = Depends(require_workspace_permission(Permission.WORKSPACE_DELETE)),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     删除工作区
-    只有工作区的所有者才能删除工作区
+    只有工作区的所有者才能删除工作区；工作区立即不可见，成员、资源关联和目录等由后台任务分批删除，
+    进度通过 GET /{workspace_id}/deletion 查询
     """
-    try:
-        workspace_uuid = uuid.UUID(workspace_id)
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid workspace ID format"
-        )
-    
+    workspace_uuid = uuid.UUID(workspace_id)
     workspace_service = WorkspaceService(db)
-    workspace = workspace_service.get_workspace(workspace_uuid)
-    
-    if not workspace:
+    success = await workspace_service.delete_workspace(workspace_uuid, claims.uid)
+    if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Workspace not found"
         )
-    
-    # 检查用户是否有权限删除该工作区
-    if workspace.owner_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions to delete this workspace"
-        )
-    
-    success = workspace_service.delete_workspace(workspace_uuid)
-    if not success:
+
+    background_tasks.add_task(run_workspace_deletion, workspace_uuid)
+    return BaseResponse[WorkspaceDeletionProgress](
+        data=WorkspaceDeletionProgress(workspace_id=workspace_uuid, owner_id=claims.uid)
+    )
+
+@router.get("/{workspace_id}/deletion", response_model=BaseResponse[WorkspaceDeletionProgress])
+async def read_workspace_deletion(
+    workspace_id: uuid.UUID,
+    claims: TokenClaims = Depends(get_current_claims),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    获取工作区后台删除任务的进度，只有工作区的所有者或超级管理员可以查询
+    """
+    progress = await get_deletion_progress(db, workspace_id)
+    if progress is None or (progress.owner_id != claims.uid and "superadmin" not in claims.roles):
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Failed to delete workspace"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Workspace deletion not found"
         )
-    
-    return BaseResponse[dict](data={"message": "Workspace deleted successfully"})
\ No newline at end of file
+    return BaseResponse[WorkspaceDeletionProgress](data=progress)
+
+
+# -------------------- Members & Resources --------------------
+
+@router.post("/{workspace_id}/members/bulk", response_model=BaseResponse[WorkspaceBulkResult])
+async def add_workspace_members(
+    workspace_id: str,
+    request: WorkspaceMembersBulk,
+    claims: TokenClaims = Depends(require_workspace_permission(Permission.WORKSPACE_MANAGE_MEMBERS)),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    批量添加工作区成员，已是成员的用户不变，不存在的用户计入 not_found
+    """
+    report = await WorkspaceService(db).add_members(
+        uuid.UUID(workspace_id), request.user_ids, claims.uid, settings.WORKSPACE_BULK_CHUNK_SIZE
+    )
+    return BaseResponse[WorkspaceBulkResult](data=report)
+
+@router.post("/{workspace_id}/members/bulk/delete", response_model=BaseResponse[WorkspaceBulkResult])
+async def remove_workspace_members(
+    workspace_id: str,
+    request: WorkspaceMembersBulk,
+    claims: TokenClaims = Depends(require_workspace_permission(Permission.WORKSPACE_MANAGE_MEMBERS)),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    批量移除工作区成员
+    """
+    report = await WorkspaceService(db).remove_members(
+        uuid.UUID(workspace_id), request.user_ids, claims.uid, settings.WORKSPACE_BULK_CHUNK_SIZE
+    )
+    return BaseResponse[WorkspaceBulkResult](data=report)
+
+@router.post("/{workspace_id}/resources/bulk", response_model=BaseResponse[WorkspaceBulkResult])
+async def add_workspace_resources(
+    workspace_id: str,
+    request: WorkspaceResourcesBulk,
+    claims: TokenClaims = Depends(require_workspace_permission(Permission.RESOURCE_WRITE)),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    批量把资源分配到工作区，已分配的资源不变；不存在、已删除或当前用户无权访问的资源计入 not_found
+    """
+    report = await WorkspaceService(db).add_resources(
+        uuid.UUID(workspace_id), request.resource_ids, claims.uid, settings.WORKSPACE_BULK_CHUNK_SIZE,
+        unrestricted="superadmin" in claims.roles
+    )
+    return BaseResponse[WorkspaceBulkResult](data=report)
+
+@router.post("/{workspace_id}/resources/bulk/delete", response_model=BaseResponse[WorkspaceBulkResult])
+async def remove_workspace_resources(
+    workspace_id: str,
+    request: WorkspaceResourcesBulk,
+    claims: TokenClaims = Depends(require_workspace_permission(Permission.RESOURCE_WRITE)),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    批量把资源移出工作区
+    """
+    report = await WorkspaceService(db).remove_resources(
+        uuid.UUID(workspace_id), request.resource_ids, claims.uid, settings.WORKSPACE_BULK_CHUNK_SIZE
+    )
+    return BaseResponse[WorkspaceBulkResult](data=report)
+
+
+# -------------------- Catalog --------------------
+
+@router.get("/{workspace_id}/catalog", response_model=BaseResponse[List[CatalogTreeNode]])
+async def read_catalog_tree(
+    workspace_id: str,
+    claims: TokenClaims = Depends(require_workspace_permission(Permission.RESOURCE_READ)),
+):
+    """
+    获取工作区的完整目录树（侧边栏菜单），只包含启用的目录项，同级按排序字段排列
+    """
+    tree = await catalog_tree_cache.get(uuid.UUID(workspace_id))
+    return BaseResponse[List[CatalogTreeNode]](data=tree)
+
+@router.post("/{workspace_id}/catalog/items", response_model=BaseResponse[CatalogItemRead],
+             status_code=status.HTTP_201_CREATED)
+async def create_catalog_item(
+    workspace_id: str,
+    item: CatalogItemCreate,
+    claims: TokenClaims = Depends(require_workspace_permission(Permission.RESOURCE_WRITE)),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    在工作区目录中创建目录项
+    """
+    try:
+        db_item = await CatalogService(db).create_item(uuid.UUID(workspace_id), item, claims.uid)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return BaseResponse[CatalogItemRead](data=db_item)
+
+@router.put("/{workspace_id}/catalog/items/{item_id}/parent", response_model=BaseResponse[CatalogItemRead])
+async def move_catalog_item(
+    workspace_id: str,
+    item_id: uuid.UUID,
+    request: CatalogItemMove,
+    claims: TokenClaims = Depends(require_workspace_permission(Permission.RESOURCE_WRITE)),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    把目录项连同子树移动到新的父目录项下
+    """
+    try:
+        db_item = await CatalogService(db).move_item(uuid.UUID(workspace_id), item_id, request.parent_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if db_item is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Catalog item not found")
+    return BaseResponse[CatalogItemRead](data=db_item)
+
+@router.get("/{workspace_id}/catalog/items/{item_id}/subtree",
+            response_model=BaseResponse[List[CatalogSubtreeItem]])
+async def read_catalog_subtree(
+    workspace_id: str,
+    item_id: uuid.UUID,
+    max_depth: Optional[int] = Query(None, ge=0),
+    claims: TokenClaims = Depends(require_workspace_permission(Permission.RESOURCE_READ)),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    获取目录项及其后代
+    """
+    items = await CatalogService(db).get_subtree(uuid.UUID(workspace_id), item_id, max_depth)
+    if not items:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Catalog item not found")
+    return BaseResponse[List[CatalogSubtreeItem]](data=items)
+
+@router.get("/{workspace_id}/catalog/items/{item_id}/ancestors",
+            response_model=BaseResponse[List[CatalogItemRead]])
+async def read_catalog_ancestors(
+    workspace_id: str,
+    item_id: uuid.UUID,
+    claims: TokenClaims = Depends(require_workspace_permission(Permission.RESOURCE_READ)),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    获取从根到目录项的路径（面包屑）
+    """
+    items = await CatalogService(db).get_ancestors(uuid.UUID(workspace_id), item_id)
+    if not items:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Catalog item not found")
+    return BaseResponse[List[CatalogItemRead]](data=items)
+
+@router.get("/{workspace_id}/catalog/items/{item_id}/count", response_model=BaseResponse[int])
+async def count_catalog_descendants(
+    workspace_id: str,
+    item_id: uuid.UUID,
+    type: Optional[CatalogItemType] = Query(CatalogItemType.REPORT),
+    claims: TokenClaims = Depends(require_workspace_permission(Permission.RESOURCE_READ)),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    统计目录项下某类目录项（默认报表）的数量
+    """
+    service = CatalogService(db)
+    if await service.get_item(uuid.UUID(workspace_id), item_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Catalog item not found")
+    count = await service.count_descendants(uuid.UUID(workspace_id), item_id, type)
+    return BaseResponse[int](data=count)
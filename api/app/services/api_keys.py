@@ -0,0 +1,331 @@
+"""
+API Key 服务模块
+
+Key 的格式为 "dpk_<前缀>.<密钥>"：
+- 前缀随 Key 一起存储并建唯一索引，校验时按前缀一次索引查找
+- 库中保存整个 Key 的 HMAC-SHA256 摘要，校验为常数时间比较，无需 bcrypt
+- 解析结果按前缀缓存（只缓存摘要，不缓存明文），命中时每次校验只需一次 HMAC 计算
+- 最近使用时间先记在内存中，由后台任务批量回写
+"""
+
+import asyncio
+import datetime
+import hashlib
+import hmac
+import logging
+import secrets
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.db import AsyncSessionLocal
+from app.config.settings import settings
+from app.models.api_keys import ApiKey, ApiKeyCreate, ApiKeyCreated, ApiKeyRead
+from app.models.auth import TokenClaims, User
+from app.models.workspace import Workspaces, WorkspaceUsers
+
+
+logger = logging.getLogger(__name__)
+
+API_KEY_PREFIX = "dpk_"
+# API Key 对应声明的 jti 前缀
+API_KEY_JTI_PREFIX = "apikey:"
+
+
+def hash_api_key(key: str) -> str:
+    """
+    计算 Key 的 HMAC-SHA256 摘要
+    """
+    secret = (settings.API_KEY_SECRET or settings.NEXTAUTH_SECRET).encode("utf-8")
+    return hmac.new(secret, key.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def generate_api_key() -> Tuple[str, str]:
+    """
+    生成新 Key
+
+    Returns:
+        Tuple[str, str]: (前缀, 完整 Key)
+    """
+    prefix = secrets.token_hex(6)
+    return prefix, f"{API_KEY_PREFIX}{prefix}.{secrets.token_urlsafe(32)}"
+
+
+def parse_api_key(key: str) -> Optional[str]:
+    """
+    解析 Key 的前缀，格式错误时返回 None
+    """
+    if not key.startswith(API_KEY_PREFIX):
+        return None
+    prefix, sep, secret = key[len(API_KEY_PREFIX):].partition(".")
+    if not sep or not prefix or not secret or len(prefix) > 16:
+        return None
+    return prefix
+
+
+class ApiKeyService:
+    """
+    API Key 管理服务类
+    """
+
+    def __init__(self, db: AsyncSession):
+        """
+        初始化 API Key 服务
+
+        Args:
+            db: 数据库会话实例
+        """
+        self.db = db
+
+    async def is_workspace_member(self, user_id: uuid.UUID, workspace_id: uuid.UUID) -> bool:
+        """
+        判断用户是否为工作区所有者或成员
+        """
+        owner = select(Workspaces.id).where(
+            Workspaces.id == workspace_id, Workspaces.owner_id == user_id, Workspaces.state != 'D'
+        )
+        member = select(WorkspaceUsers.workspace_id).join(
+            Workspaces, Workspaces.id == WorkspaceUsers.workspace_id
+        ).where(
+            WorkspaceUsers.workspace_id == workspace_id,
+            WorkspaceUsers.user_id == user_id,
+            WorkspaceUsers.state != 'D',
+            Workspaces.state != 'D',
+        )
+        result = await self.db.execute(owner.union_all(member).limit(1))
+        return result.first() is not None
+
+    async def create_api_key(self, user_id: uuid.UUID, api_key: ApiKeyCreate) -> ApiKeyCreated:
+        """
+        创建 API Key，明文只在返回值中出现一次
+
+        Args:
+            user_id: Key 所属用户ID
+            api_key: 创建信息
+
+        Returns:
+            ApiKeyCreated: 创建后的 Key（含明文）
+        """
+        prefix, key = generate_api_key()
+        expires_at = None
+        if api_key.expires_in_days:
+            expires_at = datetime.datetime.now() + datetime.timedelta(days=api_key.expires_in_days)
+        db_key = ApiKey(
+            id=uuid.uuid4(),
+            name=api_key.name,
+            prefix=prefix,
+            key_hash=hash_api_key(key),
+            user_id=user_id,
+            workspace_id=api_key.workspace_id,
+            expires_at=expires_at,
+            created_at=datetime.datetime.now(),
+        )
+        self.db.add(db_key)
+        await self.db.commit()
+        return ApiKeyCreated(**ApiKeyRead.model_validate(db_key).model_dump(), key=key)
+
+    async def get_api_keys(self, user_id: uuid.UUID) -> List[ApiKeyRead]:
+        """
+        获取用户的全部 API Key
+        """
+        result = await self.db.execute(
+            select(ApiKey).where(ApiKey.user_id == user_id).order_by(ApiKey.created_at)
+        )
+        return [ApiKeyRead.model_validate(k) for k in result.scalars().all()]
+
+    async def revoke_api_key(self, user_id: uuid.UUID, key_id: uuid.UUID) -> bool:
+        """
+        吊销 API Key，本进程立即生效，其他进程在缓存过期后生效
+        """
+        result = await self.db.execute(
+            update(ApiKey)
+            .where(ApiKey.id == key_id, ApiKey.user_id == user_id, ApiKey.revoked_at.is_(None))
+            .values(revoked_at=datetime.datetime.now())
+            .returning(ApiKey.prefix)
+        )
+        prefix = result.scalar_one_or_none()
+        await self.db.commit()
+        if prefix is None:
+            return False
+        api_key_resolver.invalidate(prefix)
+        return True
+
+
+@dataclass
+class ResolvedApiKey:
+    """缓存中的 Key 解析结果"""
+    id: uuid.UUID
+    key_hash: str
+    user_id: uuid.UUID
+    username: str
+    is_active: bool
+    workspace_id: uuid.UUID
+    created_at: datetime.datetime
+    expires_at: Optional[datetime.datetime]
+    revoked_at: Optional[datetime.datetime]
+
+
+async def load_api_key(prefix: str) -> Optional[ResolvedApiKey]:
+    """
+    按前缀加载 Key 及其所属用户
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(
+                ApiKey.id, ApiKey.key_hash, ApiKey.user_id, User.username, User.is_active,
+                ApiKey.workspace_id, ApiKey.created_at, ApiKey.expires_at, ApiKey.revoked_at,
+            )
+            .join(User, User.id == ApiKey.user_id)
+            .where(ApiKey.prefix == prefix)
+        )
+        row = result.first()
+        return ResolvedApiKey(**row._asdict()) if row is not None else None
+
+
+async def write_last_used(last_used: Dict[uuid.UUID, datetime.datetime]) -> None:
+    """
+    批量回写最近使用时间（按主键的 ORM 批量 UPDATE）
+    """
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(ApiKey),
+            [{"id": key_id, "last_used_at": used_at} for key_id, used_at in last_used.items()],
+        )
+        await db.commit()
+
+
+class ApiKeyResolver:
+    """
+    API Key 校验器：按前缀缓存解析结果，批量回写最近使用时间
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 300,
+                 flush_seconds: float = 30,
+                 loader: Callable[[str], Awaitable[Optional[ResolvedApiKey]]] = load_api_key,
+                 writer: Callable[[Dict[uuid.UUID, datetime.datetime]], Awaitable[None]] = write_last_used,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        初始化校验器
+
+        Args:
+            max_entries: 最多缓存的 Key 数量
+            ttl_seconds: 缓存有效期（秒），也是其他进程吊销 Key 的最长生效延迟
+            flush_seconds: 回写最近使用时间的间隔（秒）
+            loader: 按前缀加载 Key 的函数
+            writer: 批量回写最近使用时间的函数
+            clock: 单调时钟，便于测试替换
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.flush_seconds = flush_seconds
+        self.loader = loader
+        self.writer = writer
+        self.clock = clock
+        self._entries: "OrderedDict[str, Tuple[ResolvedApiKey, float]]" = OrderedDict()
+        self._last_used: Dict[uuid.UUID, datetime.datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def _get(self, prefix: str) -> Optional[ResolvedApiKey]:
+        entry = self._entries.get(prefix)
+        if entry is not None and entry[1] > self.clock():
+            self._entries.move_to_end(prefix)
+            return entry[0]
+        # 不存在的前缀不缓存，避免随机 Key 占满缓存
+        resolved = await self.loader(prefix)
+        if resolved is None:
+            self._entries.pop(prefix, None)
+            return None
+        self._entries[prefix] = (resolved, self.clock() + self.ttl_seconds)
+        self._entries.move_to_end(prefix)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return resolved
+
+    def invalidate(self, prefix: str) -> None:
+        self._entries.pop(prefix, None)
+
+    async def resolve(self, key: str) -> Optional[TokenClaims]:
+        """
+        校验 Key，成功时返回等价的令牌声明（限定在 Key 所属的工作区）
+
+        Returns:
+            Optional[TokenClaims]: 校验失败（格式错误、不存在、摘要不符、已吊销、已过期、用户已停用）时返回 None
+        """
+        prefix = parse_api_key(key)
+        if prefix is None:
+            return None
+        resolved = await self._get(prefix)
+        if resolved is None or not hmac.compare_digest(resolved.key_hash, hash_api_key(key)):
+            return None
+        now = datetime.datetime.now()
+        if resolved.revoked_at is not None or not resolved.is_active:
+            return None
+        if resolved.expires_at is not None and resolved.expires_at <= now:
+            return None
+
+        self._last_used[resolved.id] = now
+        expires_at = resolved.expires_at or now + datetime.timedelta(seconds=self.ttl_seconds)
+        return TokenClaims(
+            sub=resolved.username,
+            uid=resolved.user_id,
+            roles=[],
+            ws={str(resolved.workspace_id): "member"},
+            ws_complete=True,
+            jti=f"{API_KEY_JTI_PREFIX}{resolved.id}",
+            iat=int(resolved.created_at.timestamp()),
+            exp=int(expires_at.timestamp()),
+        )
+
+    async def flush(self) -> None:
+        """
+        回写缓冲的最近使用时间
+        """
+        if not self._last_used:
+            return
+        pending, self._last_used = self._last_used, {}
+        try:
+            await self.writer(pending)
+        except Exception:
+            # 回写失败时放回缓冲，保留较新的时间
+            for key_id, used_at in pending.items():
+                if key_id not in self._last_used:
+                    self._last_used[key_id] = used_at
+            raise
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Failed to write API key last-used timestamps")
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Failed to write API key last-used timestamps")
+
+
+# 进程内共享的 API Key 校验器
+api_key_resolver = ApiKeyResolver(
+    max_entries=settings.API_KEY_CACHE_SIZE,
+    ttl_seconds=settings.API_KEY_CACHE_TTL,
+    flush_seconds=settings.API_KEY_LAST_USED_FLUSH_SECONDS,
+)
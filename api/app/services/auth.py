@@ -2,15 +2,22 @@
 Auth 服务模块
 负责用户认证、密码校验、Token生成与校验、当前用户依赖等功能。
 依赖 FastAPI、SQLAlchemy、python-jose、passlib。
+密码哈希与校验在独立进程池中执行（见 app.services.passwords）。
 """
 
 from fastapi import Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError, jwt
 from datetime import datetime, timedelta, timezone
-from app.config.db import get_db
-from app.models.auth import User, UserRead, UserCreate, UserRoles, RoleEnum
-from app.config.settings import settings, pwd_context, oauth2_scheme
+from pydantic import ValidationError
+from app.models.auth import User, UserRead, UserCreate, UserRoles, RoleEnum, TokenClaims
+from app.models.workspace import Workspaces, WorkspaceUsers
+from app.config.settings import settings, oauth2_scheme
+from app.services.api_keys import API_KEY_JTI_PREFIX, API_KEY_PREFIX, api_key_resolver
+from app.services.passwords import password_hasher
+from app.services.principals import principal_cache
+from app.services.tokens import revocation_list
 import uuid
 
 
@@ -30,60 +37,104 @@ class AuthService:
         self.access_token_expire_minutes = ACCESS_TOKEN_EXPIRE_MINUTES
 
     # -------------------- Utility Functions --------------------
-    def verify_password(self, plain_password, hashed_password):
+    async def verify_password(self, plain_password, hashed_password):
         """
         验证明文密码与哈希密码是否匹配
         """
-        return pwd_context.verify(plain_password, hashed_password)
+        return await password_hasher.verify(plain_password, hashed_password)
 
-    def get_password_hash(self, password):
+    async def get_password_hash(self, password):
         """
         对密码进行哈希处理
         """
-        return pwd_context.hash(password)
+        return await password_hasher.hash(password)
 
     def create_access_token(self, data: dict, expires_delta: timedelta | None = None):
         """
         创建访问令牌
         """
         to_encode = data.copy()
+        now = datetime.now(timezone.utc)
         if expires_delta:
-            expire = datetime.now(timezone.utc) + expires_delta
+            expire = now + expires_delta
         else:
-            expire = datetime.now(timezone.utc) + timedelta(minutes=self.access_token_expire_minutes)
+            expire = now + timedelta(minutes=self.access_token_expire_minutes)
         to_encode.update({"exp": expire})
+        to_encode.setdefault("iat", now)
+        to_encode.setdefault("jti", uuid.uuid4().hex)
         encoded_jwt = jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
         return encoded_jwt
 
-    def get_user_by_username(self, db: Session, username: str):
+    async def build_token_claims(self, db: AsyncSession, user: User) -> dict:
+        """
+        构建访问令牌的声明：用户ID、角色和工作区成员关系摘要
+        """
+        result = await db.execute(select(UserRoles.role).where(UserRoles.user_id == user.id))
+        roles = sorted({role.value for role in result.scalars().all()})
+
+        limit = settings.TOKEN_MAX_WORKSPACES
+        result = await db.execute(
+            select(Workspaces.id).where(Workspaces.owner_id == user.id).order_by(Workspaces.id).limit(limit + 1)
+        )
+        workspaces = {str(ws_id): "owner" for ws_id in result.scalars().all()}
+        result = await db.execute(
+            select(WorkspaceUsers.workspace_id)
+            .where(WorkspaceUsers.user_id == user.id, WorkspaceUsers.state != 'D')
+            .order_by(WorkspaceUsers.workspace_id)
+            .limit(limit + 1)
+        )
+        for ws_id in result.scalars().all():
+            workspaces.setdefault(str(ws_id), "member")
+
+        # 超出上限时只携带部分工作区，其余由授权逻辑回查数据库
+        complete = len(workspaces) <= limit
+        if not complete:
+            workspaces = dict(sorted(workspaces.items())[:limit])
+        return {
+            "sub": user.username,
+            "uid": str(user.id),
+            "roles": roles,
+            "ws": workspaces,
+            "ws_complete": complete,
+        }
+
+    async def issue_access_token(self, db: AsyncSession, user: User) -> str:
+        """
+        为已认证的用户签发携带完整声明的访问令牌
+        """
+        return self.create_access_token(data=await self.build_token_claims(db, user))
+
+    async def get_user_by_username(self, db: AsyncSession, username: str):
         """
         根据用户名获取用户
         """
-        return db.query(User).filter(User.username == username).first()
+        result = await db.execute(select(User).where(User.username == username))
+        return result.scalars().first()
 
-    def authenticate_user(self, db: Session, username: str, password: str):
+    async def authenticate_user(self, db: AsyncSession, username: str, password: str):
         """
         验证用户身份
         """
-        user = self.get_user_by_username(db, username)
+        user = await self.get_user_by_username(db, username)
         if not user:
             return None
-        if not self.verify_password(password, user.hashed_password):
+        if not await self.verify_password(password, user.hashed_password):
             return None
         return user
 
     # -------------------- User Service --------------------
-    def register_user(self, user_create: UserCreate, db: Session):
+    async def register_user(self, user_create: UserCreate, db: AsyncSession):
         """
         注册新用户
         """
-        db_user = db.query(User).filter(User.username == user_create.username).first()
+        db_user = await self.get_user_by_username(db, user_create.username)
         if db_user:
             raise HTTPException(status_code=400, detail="Username already registered")
-        db_email = db.query(User).filter(User.email == user_create.email).first()
+        result = await db.execute(select(User).where(User.email == user_create.email))
+        db_email = result.scalars().first()
         if db_email:
             raise HTTPException(status_code=400, detail="Email already registered")
-        hashed_password = self.get_password_hash(user_create.password)
+        hashed_password = await self.get_password_hash(user_create.password)
         new_user = User(
             id=uuid.uuid4(),
             username=user_create.username,
@@ -93,56 +144,104 @@ class AuthService:
             is_active=True
         )
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await db.commit()
+        await db.refresh(new_user)
         # 分配 normal_user 角色
         user_role = UserRoles(user_id=new_user.id, role=RoleEnum.normal_user)
         db.add(user_role)
-        db.commit()
+        await db.commit()
         return new_user
 
-    async def get_current_user(self, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> UserRead:
+    async def reset_password(self, db: AsyncSession, username: str, new_password: str):
+        """
+        重置用户密码，用户不存在时返回 None
+        """
+        user = await self.get_user_by_username(db, username)
+        if not user:
+            return None
+        user.hashed_password = await self.get_password_hash(new_password)
+        await db.commit()
+        return user
+
+    async def get_current_user(self, token: str = Depends(oauth2_scheme)) -> UserRead:
         """
         获取当前用户依赖项
         """
-        credentials_exception = HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-        username = None
-        try:
-            payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
-            username = payload.get("sub")
-            if username is None:
-                raise credentials_exception
-        except JWTError:
-            raise credentials_exception
-        user = self.get_user_by_username(db, username)
-        if user is None:
-            raise credentials_exception
-        return UserRead.model_validate(user)
-   
-    
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> UserRead:
-    """
-    获取当前用户依赖项
-    """
-    credentials_exception = HTTPException(
+        return await resolve_current_user(token, self.secret_key, self.algorithm)
+
+
+def credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    username = None
+
+
+def reject_api_key(claims: TokenClaims) -> TokenClaims:
+    """
+    API Key 只能访问按路径参数 workspace_id 校验权限的工作区路由，其他路由一律拒绝
+    """
+    if claims.jti.startswith(API_KEY_JTI_PREFIX):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="API keys can only access workspace routes"
+        )
+    return claims
+
+
+async def resolve_token_claims(token: str, secret_key: str, algorithm: str) -> TokenClaims:
+    """
+    校验 Token 签名、声明和吊销状态，不查询数据库（吊销过滤器命中时除外）
+
+    以 "dpk_" 开头的 Bearer Token 按 API Key 校验，返回限定在 Key 所属工作区的声明
+    """
+    if token.startswith(API_KEY_PREFIX):
+        claims = await api_key_resolver.resolve(token)
+        if claims is None:
+            raise credentials_exception()
+        return claims
     try:
-        payload = jwt.decode(token, settings.NEXTAUTH_SECRET, algorithms=[settings.ALGORITHM])
-        username = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    user = db.query(User).filter(User.username == username).first()
-    if user is None:
-        raise credentials_exception
-    return UserRead.model_validate(user)
-    
\ No newline at end of file
+        claims = TokenClaims.model_validate(jwt.decode(token, secret_key, algorithms=[algorithm]))
+    except (JWTError, ValidationError):
+        # 缺少 uid/jti 等声明的旧令牌同样视为无效，需要重新登录
+        raise credentials_exception()
+    if await revocation_list.is_revoked(claims.jti):
+        raise credentials_exception()
+    # 用户停用前签发的令牌一律失效
+    if revocation_list.is_user_revoked(claims.uid, claims.iat):
+        raise credentials_exception()
+    return claims
+
+
+async def resolve_current_user(token: str, secret_key: str, algorithm: str) -> UserRead:
+    """
+    校验 Token 并返回当前用户，用户从缓存中读取，未命中时异步查询数据库
+    """
+    claims = reject_api_key(await resolve_token_claims(token, secret_key, algorithm))
+    user = await principal_cache.get(claims.sub)
+    if user is None or not user.is_active or user.id != claims.uid:
+        raise credentials_exception()
+    return user
+
+
+async def get_current_claims(token: str = Depends(oauth2_scheme)) -> TokenClaims:
+    """
+    获取当前令牌声明的依赖项，只需要用户ID、角色或工作区成员关系时使用，不接受 API Key
+    """
+    return reject_api_key(await resolve_token_claims(token, settings.NEXTAUTH_SECRET, settings.ALGORITHM))
+
+
+async def get_workspace_claims(token: str = Depends(oauth2_scheme)) -> TokenClaims:
+    """
+    获取当前令牌声明的依赖项，接受 API Key；
+    只用于工作区权限依赖，由其校验 Key 所属的工作区
+    """
+    return await resolve_token_claims(token, settings.NEXTAUTH_SECRET, settings.ALGORITHM)
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserRead:
+    """
+    获取当前用户依赖项
+    """
+    return await resolve_current_user(token, settings.NEXTAUTH_SECRET, settings.ALGORITHM)
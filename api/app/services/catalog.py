@@ -0,0 +1,350 @@
+"""
+工作区目录服务模块
+
+目录项（CatalogItem）以 parent_id 组成树，另维护闭包表 catalog_item_closure：
+
+- 新建目录项时在同一事务内插入其与自身及父节点所有祖先的路径
+- 移动目录项时删除子树与旧祖先之间的路径，再插入新祖先与子树的笛卡尔积
+- 子树、祖先路径（面包屑）和子树内某类目录项的计数都是闭包表上的一次索引查找，
+  不再逐层懒加载 children
+- 同一工作区的目录写操作用事务级 advisory lock 串行化，并发移动不会产生环
+
+整个工作区的目录树（侧边栏菜单）用一条查询加载全部启用的目录项，在内存中一次遍历组装，
+按工作区缓存；本进程内的目录写操作（ORM 事件及提交后）使缓存失效，其他进程的缓存在 TTL 后过期。
+"""
+
+import datetime
+import time
+import uuid
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from sqlalchemy import Select, delete, event, func, insert, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.config.db import AsyncSessionLocal
+from app.config.settings import settings
+from app.models.catalog import (
+    CatalogItem,
+    CatalogItemClosure,
+    CatalogItemCreate,
+    CatalogItemRead,
+    CatalogItemType,
+    CatalogSubtreeItem,
+    CatalogTreeNode,
+)
+
+
+def catalog_tree_query(workspace_id: uuid.UUID) -> Select:
+    """
+    工作区全部启用目录项的查询，按排序字段排列，只取列不构造 ORM 对象
+    """
+    return (
+        select(*CatalogItem.__table__.c)
+        .where(CatalogItem.workspace_id == workspace_id, CatalogItem.is_active.is_not(False))
+        .order_by(CatalogItem.order, CatalogItem.name, CatalogItem.id)
+    )
+
+
+def build_catalog_tree(items: Iterable[Mapping]) -> List[CatalogTreeNode]:
+    """
+    把已排序的目录项组装为嵌套树，O(n)；子节点沿用输入顺序。
+    父目录项已停用（不在输入中）的目录项连同其子树不出现在树中
+
+    Returns:
+        List[CatalogTreeNode]: 根级目录项
+    """
+    nodes: Dict[uuid.UUID, CatalogTreeNode] = {}
+    for item in items:
+        node = CatalogTreeNode(**item)
+        nodes[node.id] = node
+    roots: List[CatalogTreeNode] = []
+    for node in nodes.values():
+        if node.parent_id is None:
+            roots.append(node)
+        elif node.parent_id in nodes:
+            nodes[node.parent_id].children.append(node)
+    return roots
+
+
+async def load_catalog_tree(workspace_id: uuid.UUID) -> List[CatalogTreeNode]:
+    """
+    从数据库加载工作区目录树
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(catalog_tree_query(workspace_id))
+        return build_catalog_tree(result.mappings())
+
+
+class CatalogTreeCache:
+    """
+    按工作区缓存目录树，带版本号失效
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 300,
+                 loader: Callable[[uuid.UUID], Awaitable[List[CatalogTreeNode]]] = load_catalog_tree,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        初始化目录树缓存
+
+        Args:
+            max_entries: 最多缓存的工作区数量
+            ttl_seconds: 缓存有效期（秒），也是其他进程中目录变更的最长生效延迟
+            loader: 加载工作区目录树的函数
+            clock: 单调时钟，便于测试替换
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.loader = loader
+        self.clock = clock
+        self._entries: "OrderedDict[uuid.UUID, Tuple[int, float, List[CatalogTreeNode]]]" = OrderedDict()
+        self._versions: Dict[uuid.UUID, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def version(self, workspace_id: uuid.UUID) -> int:
+        return self._versions.get(workspace_id, 0)
+
+    def invalidate(self, workspace_id: Optional[uuid.UUID]) -> None:
+        """
+        工作区目录发生变化，使其缓存失效
+        """
+        if workspace_id is None:
+            return
+        self._versions[workspace_id] = self._versions.get(workspace_id, 0) + 1
+        self._entries.pop(workspace_id, None)
+
+    async def get(self, workspace_id: uuid.UUID) -> List[CatalogTreeNode]:
+        entry = self._entries.get(workspace_id)
+        version = self.version(workspace_id)
+        if entry is not None and entry[0] == version and entry[1] > self.clock():
+            self._entries.move_to_end(workspace_id)
+            return entry[2]
+
+        tree = await self.loader(workspace_id)
+        # 加载期间版本变化时不写入缓存，下次请求重新加载
+        if self.version(workspace_id) == version:
+            self._entries[workspace_id] = (version, self.clock() + self.ttl_seconds, tree)
+            self._entries.move_to_end(workspace_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return tree
+
+
+# 进程内共享的目录树缓存
+catalog_tree_cache = CatalogTreeCache(
+    max_entries=settings.CATALOG_TREE_CACHE_SIZE,
+    ttl_seconds=settings.CATALOG_TREE_CACHE_TTL,
+)
+
+
+# 目录项在本进程内被修改时使所属工作区的目录树失效
+@event.listens_for(CatalogItem, "after_insert")
+@event.listens_for(CatalogItem, "after_update")
+@event.listens_for(CatalogItem, "after_delete")
+def _invalidate_catalog_tree(mapper, connection, target: CatalogItem) -> None:
+    catalog_tree_cache.invalidate(target.workspace_id)
+
+
+class CatalogService:
+    """
+    目录服务类，提供目录项的创建、移动和树查询
+    """
+
+    def __init__(self, db: AsyncSession):
+        """
+        初始化目录服务
+
+        Args:
+            db: 数据库会话实例
+        """
+        self.db = db
+
+    async def _lock_workspace_catalog(self, workspace_id: uuid.UUID) -> None:
+        # 事务结束时自动释放，不锁工作区行本身
+        await self.db.execute(select(func.pg_advisory_xact_lock(func.hashtext(str(workspace_id)))))
+
+    async def _get_item(self, workspace_id: uuid.UUID, item_id: uuid.UUID) -> Optional[CatalogItem]:
+        result = await self.db.execute(
+            select(CatalogItem).where(CatalogItem.id == item_id, CatalogItem.workspace_id == workspace_id)
+        )
+        return result.scalar_one_or_none()
+
+    async def get_item(self, workspace_id: uuid.UUID, item_id: uuid.UUID) -> Optional[CatalogItemRead]:
+        """
+        根据ID获取工作区内的目录项
+        """
+        db_item = await self._get_item(workspace_id, item_id)
+        return CatalogItemRead.model_validate(db_item) if db_item is not None else None
+
+    async def create_item(self, workspace_id: uuid.UUID, item: CatalogItemCreate,
+                          created_by: uuid.UUID) -> CatalogItemRead:
+        """
+        创建目录项并写入闭包表
+
+        Raises:
+            ValueError: 父目录项不存在或不属于该工作区
+        """
+        try:
+            await self._lock_workspace_catalog(workspace_id)
+            if item.parent_id is not None and await self._get_item(workspace_id, item.parent_id) is None:
+                raise ValueError("Parent catalog item not found")
+
+            db_item = CatalogItem(
+                name=item.name,
+                description=item.description,
+                type=item.type.value,
+                workspace_id=workspace_id,
+                parent_id=item.parent_id,
+                resource_id=item.resource_id,
+                order=item.order,
+                created_by=created_by,
+            )
+            self.db.add(db_item)
+            await self.db.flush()
+
+            # 自身路径（depth 0），加上父节点的每条祖先路径各加一层
+            paths = select(
+                literal(db_item.id, CatalogItemClosure.descendant_id.type).label("ancestor_id"),
+                literal(db_item.id, CatalogItemClosure.descendant_id.type).label("descendant_id"),
+                literal(0).label("depth"),
+            )
+            if item.parent_id is not None:
+                paths = paths.union_all(
+                    select(
+                        CatalogItemClosure.ancestor_id,
+                        literal(db_item.id, CatalogItemClosure.descendant_id.type),
+                        CatalogItemClosure.depth + 1,
+                    ).where(CatalogItemClosure.descendant_id == item.parent_id)
+                )
+            await self.db.execute(
+                insert(CatalogItemClosure).from_select(["ancestor_id", "descendant_id", "depth"], paths)
+            )
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+        # 提交后再次失效，避免提交前开始的加载写入旧树
+        catalog_tree_cache.invalidate(workspace_id)
+        return CatalogItemRead.model_validate(db_item)
+
+    async def move_item(self, workspace_id: uuid.UUID, item_id: uuid.UUID,
+                        parent_id: Optional[uuid.UUID]) -> Optional[CatalogItemRead]:
+        """
+        把目录项（连同子树）移动到新的父目录项下，parent_id 为空时移动到根级
+
+        Returns:
+            Optional[CatalogItemRead]: 目录项不存在时返回 None
+
+        Raises:
+            ValueError: 新父目录项不存在，或是目录项自身及其后代
+        """
+        try:
+            await self._lock_workspace_catalog(workspace_id)
+            db_item = await self._get_item(workspace_id, item_id)
+            if db_item is None:
+                await self.db.rollback()
+                return None
+            if parent_id is not None:
+                if await self._get_item(workspace_id, parent_id) is None:
+                    raise ValueError("Parent catalog item not found")
+                result = await self.db.execute(
+                    select(CatalogItemClosure.depth).where(
+                        CatalogItemClosure.ancestor_id == item_id,
+                        CatalogItemClosure.descendant_id == parent_id,
+                    )
+                )
+                if result.scalar_one_or_none() is not None:
+                    raise ValueError("Cannot move a catalog item under itself or its descendants")
+
+            subtree = select(CatalogItemClosure.descendant_id).where(CatalogItemClosure.ancestor_id == item_id)
+            # 删除子树外的祖先到子树内各节点的路径，子树内部路径保持不变
+            await self.db.execute(
+                delete(CatalogItemClosure)
+                .where(
+                    CatalogItemClosure.descendant_id.in_(subtree),
+                    CatalogItemClosure.ancestor_id.not_in(subtree),
+                )
+                .execution_options(synchronize_session=False)
+            )
+            if parent_id is not None:
+                above = aliased(CatalogItemClosure)
+                below = aliased(CatalogItemClosure)
+                await self.db.execute(
+                    insert(CatalogItemClosure).from_select(
+                        ["ancestor_id", "descendant_id", "depth"],
+                        select(above.ancestor_id, below.descendant_id, above.depth + below.depth + 1)
+                        .where(above.descendant_id == parent_id, below.ancestor_id == item_id)
+                    )
+                )
+            await self.db.execute(
+                update(CatalogItem)
+                .where(CatalogItem.id == item_id)
+                .values(parent_id=parent_id, updated_at=datetime.datetime.now())
+                .execution_options(synchronize_session=False)
+            )
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+        # Core UPDATE 不会触发 ORM 事件
+        catalog_tree_cache.invalidate(workspace_id)
+        await self.db.refresh(db_item)
+        return CatalogItemRead.model_validate(db_item)
+
+    async def get_subtree(self, workspace_id: uuid.UUID, item_id: uuid.UUID,
+                          max_depth: Optional[int] = None) -> List[CatalogSubtreeItem]:
+        """
+        获取目录项及其全部后代，按层级和排序字段排列
+
+        Args:
+            max_depth: 最多返回的相对层级，为空时返回整棵子树
+        """
+        query = (
+            select(CatalogItem, CatalogItemClosure.depth)
+            .join(CatalogItemClosure, CatalogItemClosure.descendant_id == CatalogItem.id)
+            .where(CatalogItemClosure.ancestor_id == item_id, CatalogItem.workspace_id == workspace_id)
+        )
+        if max_depth is not None:
+            query = query.where(CatalogItemClosure.depth <= max_depth)
+        result = await self.db.execute(
+            query.order_by(CatalogItemClosure.depth, CatalogItem.order, CatalogItem.name)
+        )
+        return [
+            CatalogSubtreeItem.model_validate({**CatalogItemRead.model_validate(item).model_dump(), "depth": depth})
+            for item, depth in result
+        ]
+
+    async def get_ancestors(self, workspace_id: uuid.UUID, item_id: uuid.UUID) -> List[CatalogItemRead]:
+        """
+        获取从根到目录项自身的路径（面包屑）
+        """
+        result = await self.db.execute(
+            select(CatalogItem)
+            .join(CatalogItemClosure, CatalogItemClosure.ancestor_id == CatalogItem.id)
+            .where(CatalogItemClosure.descendant_id == item_id, CatalogItem.workspace_id == workspace_id)
+            .order_by(CatalogItemClosure.depth.desc())
+        )
+        return [CatalogItemRead.model_validate(item) for item in result.scalars().all()]
+
+    async def count_descendants(self, workspace_id: uuid.UUID, item_id: uuid.UUID,
+                                item_type: Optional[CatalogItemType] = CatalogItemType.REPORT) -> int:
+        """
+        统计目录项下（不含自身）某类目录项的数量，item_type 为空时统计全部后代
+        """
+        query = (
+            select(func.count())
+            .select_from(CatalogItemClosure)
+            .join(CatalogItem, CatalogItem.id == CatalogItemClosure.descendant_id)
+            .where(
+                CatalogItemClosure.ancestor_id == item_id,
+                CatalogItemClosure.depth > 0,
+                CatalogItem.workspace_id == workspace_id,
+            )
+        )
+        if item_type is not None:
+            query = query.where(CatalogItem.type == item_type.value)
+        result = await self.db.execute(query)
+        return result.scalar_one()
@@ -0,0 +1,356 @@
+"""
+资源变更订阅模块
+
+- record_change 在业务事务内追加一条变更日志（outbox），与业务数据一起提交或回滚
+- 日志表的插入触发器执行 pg_notify，事务提交后才会送达
+- ChangeFeed 在每个进程内只持有一个 LISTEN 连接，把通知分发给各订阅者的有界队列；
+  订阅者消费过慢（队列已满）或 LISTEN 连接断开时关闭其订阅，客户端凭最后收到的ID续传
+- stream_changes 先从日志表补发续传标记之后的记录，再切换到实时通知
+- 查询和订阅都按租户过滤：只返回自己操作的、自己拥有的或位于可访问工作区内的资源和工作区的变更
+
+自增ID在并发事务下可能乱序提交：续传时从标记往前回看一个窗口补发，实时通知不按续传标记过滤，
+SSE 事件的 id 为已发送的最大变更ID。回看窗口内的记录可能重复送达，客户端应按变更ID幂等处理事件。
+"""
+
+import asyncio
+import json
+import logging
+import uuid
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Set, Union
+
+import asyncpg
+from sqlalchemy import and_, make_url, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config.settings import settings
+from app.models.changes import CHANGE_CHANNEL, ChangeAction, ResourceChangeLog, ResourceChangeRead
+from app.models.resources import Resources, ResourcesType
+from app.models.workspace import Workspaces
+from app.services.tenancy import resources_visible_to, tenancy_index, workspaces_visible_to
+
+
+logger = logging.getLogger(__name__)
+
+# 工作区的变更实体名，资源使用其类型值
+WORKSPACE_ENTITY = "workspace"
+
+# 实时通知的租户过滤函数：(变更, 实体所有者ID) -> 是否转发
+ChangeFilter = Callable[[ResourceChangeRead, Optional[uuid.UUID]], bool]
+
+
+def record_change(db: Union[Session, AsyncSession],
+                  entity: Union[ResourcesType, str],
+                  entity_id: uuid.UUID,
+                  action: ChangeAction,
+                  actor_id: Optional[uuid.UUID] = None) -> ResourceChangeLog:
+    """
+    在当前事务中追加一条变更日志，需在 commit 之前调用
+
+    Args:
+        db: 数据库会话（同步或异步）
+        entity: 资源类型或 "workspace"
+        entity_id: 资源或工作区ID
+        action: 变更动作
+        actor_id: 操作用户ID
+
+    Returns:
+        ResourceChangeLog: 待插入的日志对象
+    """
+    entry = ResourceChangeLog(
+        entity=entity.value if isinstance(entity, ResourcesType) else entity,
+        entity_id=entity_id,
+        action=action.value,
+        actor_id=actor_id,
+    )
+    db.add(entry)
+    return entry
+
+
+class ResourceChangeService:
+    """
+    变更日志查询服务类
+    """
+
+    def __init__(self, db: AsyncSession):
+        """
+        初始化变更日志服务
+
+        Args:
+            db: 数据库会话实例
+        """
+        self.db = db
+
+    @staticmethod
+    def changes_visible_to(user_id: uuid.UUID):
+        """
+        变更对用户可见的条件：由该用户操作，或实体是其可访问的工作区、对其可见的资源
+        """
+        return or_(
+            ResourceChangeLog.actor_id == user_id,
+            and_(
+                ResourceChangeLog.entity == WORKSPACE_ENTITY,
+                or_(
+                    ResourceChangeLog.entity_id.in_(workspaces_visible_to(user_id)),
+                    ResourceChangeLog.entity_id.in_(select(Workspaces.id).where(Workspaces.owner_id == user_id)),
+                ),
+            ),
+            and_(
+                ResourceChangeLog.entity != WORKSPACE_ENTITY,
+                ResourceChangeLog.entity_id.in_(select(Resources.id).where(resources_visible_to(user_id))),
+            ),
+        )
+
+    async def get_changes(self, after: Optional[int] = None, limit: int = 100,
+                          entity: Optional[str] = None,
+                          user_id: Optional[uuid.UUID] = None) -> List[ResourceChangeRead]:
+        """
+        按ID顺序获取续传标记之后的变更
+
+        Args:
+            after: 续传标记（上次收到的最后一个变更ID）
+            limit: 返回的最大记录数
+            entity: 按实体类型筛选
+            user_id: 只返回对该用户可见的变更，None 表示不限制（超级管理员）
+
+        Returns:
+            List[ResourceChangeRead]: 变更列表
+        """
+        query = select(ResourceChangeLog)
+        if user_id is not None:
+            query = query.where(self.changes_visible_to(user_id))
+        if after is not None:
+            query = query.where(ResourceChangeLog.id > after)
+        if entity is not None:
+            query = query.where(ResourceChangeLog.entity == entity)
+        result = await self.db.execute(query.order_by(ResourceChangeLog.id).limit(limit))
+        return [ResourceChangeRead.model_validate(row) for row in result.scalars().all()]
+
+
+def change_visible_to(user_id: uuid.UUID) -> ChangeFilter:
+    """
+    实时通知的租户过滤，条件与 ResourceChangeService.changes_visible_to 一致，按租户索引判断不查询数据库；
+    索引未就绪时只转发自己操作或拥有的实体的变更
+    """
+    def visible(change: ResourceChangeRead, owner_id: Optional[uuid.UUID]) -> bool:
+        if change.actor_id == user_id or owner_id == user_id:
+            return True
+        if change.entity == WORKSPACE_ENTITY:
+            return tenancy_index.has_access(user_id, change.entity_id)
+        return tenancy_index.can_see_resource(user_id, change.entity_id)
+    return visible
+
+
+class ChangeSubscription:
+    """
+    单个订阅者的有界队列；收到 None 表示订阅已被关闭，客户端需要续传
+    """
+
+    def __init__(self, maxsize: int, visible: Optional[ChangeFilter] = None):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.visible = visible
+        self.closed = False
+
+    def put(self, change: ResourceChangeRead, owner_id: Optional[uuid.UUID] = None) -> bool:
+        """
+        放入一条变更（对订阅者不可见的变更直接跳过），队列已满时返回 False
+        """
+        if self.closed:
+            return False
+        if self.visible is not None and not self.visible(change, owner_id):
+            return True
+        try:
+            self.queue.put_nowait(change)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    def close(self) -> None:
+        """
+        丢弃未消费的变更并唤醒消费者
+        """
+        if self.closed:
+            return
+        self.closed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+    async def get(self) -> Optional[ResourceChangeRead]:
+        return await self.queue.get()
+
+
+class ChangeFeed:
+    """
+    进程内的变更通知分发器，首次订阅时启动 LISTEN 连接
+    """
+
+    def __init__(self,
+                 dsn: Optional[str] = None,
+                 queue_size: int = 1000,
+                 reconnect_seconds: float = 5,
+                 connect: Optional[Callable[[str], Awaitable[asyncpg.Connection]]] = None):
+        self._dsn = dsn
+        self.queue_size = queue_size
+        self.reconnect_seconds = reconnect_seconds
+        self._connect = connect or asyncpg.connect
+        self._subscribers: Set[ChangeSubscription] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def dsn(self) -> str:
+        # asyncpg 不识别 SQLAlchemy 的 "+asyncpg" 驱动名
+        if self._dsn is None:
+            url = make_url(settings.ASYNC_DATABASE_URL).set(drivername="postgresql")
+            self._dsn = url.render_as_string(hide_password=False)
+        return self._dsn
+
+    def subscribe(self, visible: Optional[ChangeFilter] = None) -> ChangeSubscription:
+        """
+        注册一个订阅者；之后提交的、对其可见的变更都会放入其队列
+        """
+        subscription = ChangeSubscription(self.queue_size, visible)
+        self._subscribers.add(subscription)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._listen())
+        return subscription
+
+    def unsubscribe(self, subscription: ChangeSubscription) -> None:
+        self._subscribers.discard(subscription)
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, change: ResourceChangeRead, owner_id: Optional[uuid.UUID] = None) -> None:
+        """
+        分发一条变更；队列已满的订阅者被关闭，由客户端从日志表续传
+        """
+        for subscription in list(self._subscribers):
+            if not subscription.put(change, owner_id):
+                logger.warning("Change feed subscriber overflowed, closing subscription")
+                self._subscribers.discard(subscription)
+                subscription.close()
+
+    def close_all(self) -> None:
+        """
+        关闭全部订阅（LISTEN 连接断开期间的通知会丢失，订阅者需续传）
+        """
+        subscribers, self._subscribers = self._subscribers, set()
+        for subscription in subscribers:
+            subscription.close()
+
+    def _on_notify(self, connection, pid, channel, payload: str) -> None:
+        try:
+            data = json.loads(payload)
+            change = ResourceChangeRead.model_validate(data)
+            owner_id = uuid.UUID(data["owner_id"]) if data.get("owner_id") else None
+        except (ValueError, TypeError, AttributeError):
+            logger.warning("Ignoring malformed change notification: %s", payload)
+            return
+        self.publish(change, owner_id)
+
+    async def _listen(self) -> None:
+        while True:
+            connection = None
+            try:
+                connection = await self._connect(self.dsn)
+                lost = asyncio.Event()
+                connection.add_termination_listener(lambda _: lost.set())
+                await connection.add_listener(CHANGE_CHANNEL, self._on_notify)
+                logger.info("Listening on channel %s", CHANGE_CHANNEL)
+                await lost.wait()
+                logger.warning("Change feed connection lost")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Change feed listener failed")
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            self.close_all()
+            await asyncio.sleep(self.reconnect_seconds)
+
+    async def stop(self) -> None:
+        """
+        停止 LISTEN 连接并关闭全部订阅
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.close_all()
+
+
+def format_event(change: ResourceChangeRead, resume_id: Optional[int] = None) -> str:
+    """
+    格式化为 SSE 事件，id 字段即续传标记（默认为变更ID）
+    """
+    resume_id = change.id if resume_id is None else resume_id
+    return f"id: {resume_id}\nevent: change\ndata: {change.model_dump_json()}\n\n"
+
+
+async def stream_changes(feed: ChangeFeed,
+                         after: Optional[int],
+                         load_batch: Callable[[Optional[int], int], Awaitable[List[ResourceChangeRead]]],
+                         batch_size: int = 500,
+                         keepalive_seconds: float = 15,
+                         lookback: int = 0,
+                         visible: Optional[ChangeFilter] = None) -> AsyncIterator[str]:
+    """
+    生成 SSE 事件流：先订阅实时通知，再补发续传标记之后的历史记录，最后转发实时通知
+
+    先订阅可以保证补发期间提交的变更不会遗漏；与补发重复的通知会被跳过。
+    ID 乱序提交时，ID 小于续传标记的变更可能在上次断开后才提交，因此补发从 after - lookback 开始；
+    实时通知都是订阅之后提交的变更，不按续传标记过滤。事件的 id 字段为已发送的最大变更ID。
+
+    Args:
+        feed: 变更分发器
+        after: 续传标记，None 表示只接收实时变更
+        load_batch: 按 (after, limit) 读取日志表的函数
+        batch_size: 补发时每批读取的记录数
+        keepalive_seconds: 空闲时发送注释行的间隔，防止代理断开连接
+        lookback: 续传时回看的ID数量
+        visible: 实时通知的租户过滤函数，load_batch 应按相同条件过滤，None 表示不过滤
+    """
+    subscription = feed.subscribe(visible)
+    try:
+        replayed: Set[int] = set()
+        high_water = after
+        if after is not None:
+            cursor = max(0, after - max(0, lookback))
+            while True:
+                rows = await load_batch(cursor, batch_size)
+                for change in rows:
+                    if change.id in replayed:
+                        continue
+                    replayed.add(change.id)
+                    high_water = max(high_water, change.id)
+                    yield format_event(change, high_water)
+                if len(rows) < batch_size:
+                    break
+                cursor = rows[-1].id
+
+        while True:
+            try:
+                change = await asyncio.wait_for(subscription.get(), keepalive_seconds)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if change is None:
+                return
+            if change.id in replayed:
+                continue
+            high_water = change.id if high_water is None else max(high_water, change.id)
+            yield format_event(change, high_water)
+    finally:
+        feed.unsubscribe(subscription)
+
+
+# 进程内共享的变更分发器
+change_feed = ChangeFeed(
+    queue_size=settings.CHANGE_FEED_QUEUE_SIZE,
+    reconnect_seconds=settings.CHANGE_FEED_RECONNECT_SECONDS,
+)
@@ -1,12 +1,27 @@
+import asyncio
+import time
 import uuid
-from typing import List, Optional
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy import delete, update
-from app.models.connections import DataBaseConnection, ConnectionType, DataConnectionCreate, DataConnectionRead
+from app.models.connections import (
+    DataBaseConnection,
+    ConnectionType,
+    DataConnectionCreate,
+    DataConnectionRead,
+    DataConnectionBulkTestResult
+)
 from app.config.settings import settings
-from app.models.resources import ResourcesState
+from app.models.changes import ChangeAction
+from app.models.resources import ResourcesState, ResourcesType
+from app.models.workspace import WorkspaceResources
+from app.utils.pagination import decode_cursor, encode_cursor
 from app.utils.sercret import get_decrypted_password, set_encrypted_password
+from app.services.changes import record_change
+from app.services.source_engines import source_engines
+from app.services.tenancy import resources_visible_to
 
 class DataConnectionService:
     """
@@ -58,6 +73,8 @@ class DataConnectionService:
 
         
         self.db.add(db_data_connection)
+        await self.db.flush()
+        record_change(self.db, ResourcesType.CONNECTOR, db_data_connection.id, ChangeAction.CREATE, user_id)
         await self.db.commit()
         return DataConnectionRead.model_validate(db_data_connection)
 
@@ -104,6 +121,47 @@ class DataConnectionService:
         data_connections = result.scalars().all()
         return [DataConnectionRead.model_validate(dc) for dc in data_connections]
 
+    async def list_data_connections(self,
+                                    limit: int = 100,
+                                    cursor: Optional[str] = None,
+                                    state: Optional[ResourcesState] = None
+                                    ) -> Tuple[List[DataConnectionRead], Optional[str]]:
+        """
+        按ID键集分页获取数据连接列表，单条SQL同时取出资源基表和连接器字段
+
+        Args:
+            limit: 每页记录数
+            cursor: 上一页返回的游标，为空时从第一页开始
+            state: 资源状态筛选，为空时返回除已删除外的全部连接器
+
+        Returns:
+            Tuple[List[DataConnectionRead], Optional[str]]: 当前页数据和下一页游标（没有下一页时为None）
+
+        Raises:
+            ValueError: 游标格式错误
+        """
+        stmt = select(DataBaseConnection)
+        if state is not None:
+            stmt = stmt.where(DataBaseConnection.state == state)
+        else:
+            stmt = stmt.where(DataBaseConnection.state != ResourcesState.DELETED)
+        if cursor:
+            after = decode_cursor(cursor).get("id")
+            try:
+                stmt = stmt.where(DataBaseConnection.id > uuid.UUID(str(after)))
+            except ValueError as e:
+                raise ValueError("Invalid cursor") from e
+
+        # 多取一行用于判断是否还有下一页
+        result = await self.db.execute(stmt.order_by(DataBaseConnection.id).limit(limit + 1))
+        data_connections = list(result.scalars().all())
+
+        next_cursor = None
+        if len(data_connections) > limit:
+            data_connections = data_connections[:limit]
+            next_cursor = encode_cursor({"id": str(data_connections[-1].id)})
+        return [DataConnectionRead.model_validate(dc) for dc in data_connections], next_cursor
+
     async def update_data_connection(self, connection_id: uuid.UUID, connection_update: dict) -> Optional[DataConnectionRead]:
         """
         更新数据连接记录
@@ -120,8 +178,12 @@ class DataConnectionService:
             .where(DataBaseConnection.id == connection_id)
             .values(**connection_update)
         )
-        await self.db.execute(stmt)
+        result = await self.db.execute(stmt)
+        if result.rowcount:
+            record_change(self.db, ResourcesType.CONNECTOR, connection_id, ChangeAction.UPDATE)
         await self.db.commit()
+        # 连接配置已变化，丢弃旧的源库连接池
+        await source_engines.invalidate(connection_id)
         
         # 获取更新后的记录
         result = await self.db.execute(
@@ -144,7 +206,10 @@ class DataConnectionService:
         """
         stmt = delete(DataBaseConnection).where(DataBaseConnection.id == connection_id)
         result = await self.db.execute(stmt)
+        if result.rowcount:
+            record_change(self.db, ResourcesType.CONNECTOR, connection_id, ChangeAction.DELETE)
         await self.db.commit()
+        await source_engines.invalidate(connection_id)
         return result.rowcount > 0
 
     # Additional utility methods
@@ -188,44 +253,141 @@ class DataConnectionService:
             bool: 连接成功返回True，失败返回False
         """
         try:
-            # 获取实际的枚举值进行比较
-            connection_type = connection_config.db_type.value if hasattr(connection_config.db_type, 'value') else str(connection_config.db_type)
-            
-            if connection_type == ConnectionType.POSTGRESQL.value:
-                import asyncpg
-                # 直接使用传入的密码
-                conn = await asyncpg.connect(
-                    host=connection_config.host,
-                    port=connection_config.port,
-                    user=connection_config.username,
-                    password=connection_config.password,
-                    database=connection_config.database
-                )
-                await conn.close()
-                return True
-                
-            elif connection_type == ConnectionType.MYSQL.value:
-                # 为避免导入错误，使用延迟导入
-                try:
-                    import aiomysql
-                    # 直接使用传入的密码
-                    conn = await aiomysql.connect(
-                        host=connection_config.host,
-                        port=connection_config.port,
-                        user=connection_config.username,
-                        password=connection_config.password,
-                        db=connection_config.database
-                    )
-                    await conn.ensure_closed()
-                    return True
-                except ImportError:
-                    # 如果没有安装aiomysql，返回False表示连接测试失败
-                    return False
-                
-            # 其他类型的数据源可以在这里添加处理逻辑
-            # 对于API等非数据库类型，可以添加相应的测试逻辑
-            else:
-                return False
+            await probe_connection(connection_config)
+            return True
         except Exception as e:
             # 连接失败
-            return False
\ No newline at end of file
+            return False
+
+    async def get_connections_for_test(self,
+                                       connection_ids: Optional[List[uuid.UUID]] = None,
+                                       workspace_id: Optional[uuid.UUID] = None,
+                                       visible_to: Optional[uuid.UUID] = None) -> List[DataBaseConnection]:
+        """
+        获取待批量测试的连接器
+
+        Args:
+            connection_ids: 连接器ID列表
+            workspace_id: 工作区ID，取该工作区内全部激活的连接器
+            visible_to: 只取该用户创建或位于其工作区内的连接器（可选）
+
+        Returns:
+            List[DataBaseConnection]: 连接器列表
+        """
+        stmt = select(DataBaseConnection)
+        if connection_ids is not None:
+            stmt = stmt.where(DataBaseConnection.id.in_(connection_ids))
+        if visible_to is not None:
+            stmt = stmt.where(resources_visible_to(visible_to))
+        if workspace_id is not None:
+            stmt = stmt.join(
+                WorkspaceResources,
+                WorkspaceResources.resource_id == DataBaseConnection.id
+            ).where(
+                WorkspaceResources.workspace_id == workspace_id,
+                WorkspaceResources.state == 'A',
+                DataBaseConnection.state == ResourcesState.ACTIVE
+            )
+        result = await self.db.execute(stmt)
+        return list(result.scalars().all())
+
+
+async def probe_connection(connection_config) -> None:
+    """
+    新建一条连接并立即关闭，用于验证连接配置（不经过连接池）
+
+    Args:
+        connection_config: 包含 db_type/host/port/database/username/password（明文）的配置对象
+
+    Raises:
+        ValueError: 不支持的数据库类型
+        Exception: 连接失败时驱动抛出的异常
+    """
+    # 获取实际的枚举值进行比较
+    connection_type = connection_config.db_type.value if hasattr(connection_config.db_type, 'value') else str(connection_config.db_type)
+    
+    if connection_type == ConnectionType.POSTGRESQL.value:
+        import asyncpg
+        # 直接使用传入的密码
+        conn = await asyncpg.connect(
+            host=connection_config.host,
+            port=connection_config.port,
+            user=connection_config.username,
+            password=connection_config.password,
+            database=connection_config.database
+        )
+        await conn.close()
+        
+    elif connection_type == ConnectionType.MYSQL.value:
+        # 为避免导入错误，使用延迟导入
+        import aiomysql
+        # 直接使用传入的密码
+        conn = await aiomysql.connect(
+            host=connection_config.host,
+            port=connection_config.port,
+            user=connection_config.username,
+            password=connection_config.password,
+            db=connection_config.database
+        )
+        await conn.ensure_closed()
+        
+    # 其他类型的数据源可以在这里添加处理逻辑
+    # 对于API等非数据库类型，可以添加相应的测试逻辑
+    else:
+        raise ValueError("Unsupported database type")
+
+
+async def run_connection_tests(connections: List[DataBaseConnection],
+                               concurrency: int,
+                               timeout: float,
+                               probe: Callable[[Any], Awaitable[None]] = probe_connection
+                               ) -> AsyncIterator[DataConnectionBulkTestResult]:
+    """
+    并发测试多个连接器，按完成顺序逐个产出结果
+
+    Args:
+        connections: 连接器列表（密码为加密存储）
+        concurrency: 同时测试的连接器数量上限
+        timeout: 单个连接器的超时时间（秒）
+        probe: 单个连接器的测试函数
+
+    Yields:
+        DataConnectionBulkTestResult: 单个连接器的测试结果
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def test_one(connection: DataBaseConnection) -> DataConnectionBulkTestResult:
+        # 复制连接配置并解密密码，测试期间不再访问ORM对象
+        config = SimpleNamespace(
+            db_type=connection.db_type,
+            host=connection.host,
+            port=connection.port,
+            database=connection.database,
+            username=connection.username,
+            password=get_decrypted_password(connection.password, settings.DATASOURCE_KEY),
+        )
+        async with semaphore:
+            started = time.monotonic()
+            error = None
+            try:
+                await asyncio.wait_for(probe(config), timeout)
+            except asyncio.TimeoutError:
+                error = f"Timed out after {timeout:g}s"
+            except Exception as e:
+                error = str(e) or type(e).__name__
+            return DataConnectionBulkTestResult(
+                connection_id=connection.id,
+                name=connection.name,
+                success=error is None,
+                error=error,
+                elapsed_ms=(time.monotonic() - started) * 1000,
+            )
+
+    tasks = [asyncio.ensure_future(test_one(connection)) for connection in connections]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # 客户端断开时取消尚未完成的测试
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,366 @@
+"""
+连接器健康检查模块
+
+后台定时探测所有激活的数据库连接器，记录连接耗时、查询耗时和错误率，
+并为每个连接器维护熔断器：源库持续不可用时，元数据读取和画像等调用直接失败，
+不再逐个等待连接超时。
+
+- 探测并发数受信号量限制，单次探测有超时上限；探测使用独立的无连接池引擎，
+  不占用也不淘汰元数据读取使用的共享连接池
+- 熔断器连续失败达到阈值后打开，冷却时间后放行一次试探调用（半开）；
+  试探调用被取消时归还试探机会，试探超过冷却时间仍无结果时重新打开，避免停留在半开状态
+- 后台探测不受熔断器限制，源库恢复后由探测成功关闭熔断器
+"""
+
+import asyncio
+import datetime
+import logging
+import time
+import uuid
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+from sqlalchemy import select, text
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config.db import AsyncSessionLocal
+from app.config.settings import settings
+from app.models.connections import ConnectorHealthRead, DataBaseConnection
+from app.models.resources import ResourcesState
+from app.services.source_engines import SOURCE_DRIVERS, create_probe_engine
+from app.utils.metrics import LatencyHistogram
+
+
+logger = logging.getLogger(__name__)
+
+# 视为源库不可用的异常
+SOURCE_ERRORS = (OperationalError, InterfaceError, OSError, asyncio.TimeoutError)
+
+
+class CircuitOpenError(Exception):
+    """
+    连接器熔断器处于打开状态
+    """
+
+    def __init__(self, connection_id: uuid.UUID, retry_after: float):
+        self.connection_id = connection_id
+        self.retry_after = retry_after
+        super().__init__(
+            f"Data connection '{connection_id}' is unavailable, retry after {retry_after:.0f}s"
+        )
+
+
+class CircuitBreaker:
+    """
+    连接器熔断器，状态为 closed / open / half_open
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        初始化熔断器
+
+        Args:
+            failure_threshold: 连续失败多少次后打开
+            reset_timeout: 打开后多久（秒）放行试探调用
+            clock: 单调时钟，便于测试替换
+        """
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.half_opened_at = 0.0
+
+    def _expire_trial(self) -> None:
+        # 试探调用超过冷却时间仍无结果（例如调用方没有回报），视为失败重新打开
+        if self.state == self.HALF_OPEN and self.clock() - self.half_opened_at >= self.reset_timeout:
+            self.state = self.OPEN
+            self.opened_at = self.clock()
+
+    def retry_after(self) -> float:
+        self._expire_trial()
+        if self.state == self.HALF_OPEN:
+            return max(0.0, self.half_opened_at + self.reset_timeout - self.clock())
+        return max(0.0, self.opened_at + self.reset_timeout - self.clock())
+
+    def peek(self) -> bool:
+        """
+        判断当前是否会放行调用，不改变状态、不占用试探机会，用于提前拒绝请求
+        """
+        self._expire_trial()
+        if self.state == self.CLOSED:
+            return True
+        return self.state == self.OPEN and self.retry_after() <= 0
+
+    def allow(self) -> bool:
+        """
+        判断是否放行一次调用；冷却结束后只放行一次试探调用
+        """
+        self._expire_trial()
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and self.retry_after() <= 0:
+            self.state = self.HALF_OPEN
+            self.half_opened_at = self.clock()
+            return True
+        return False
+
+    def release(self) -> None:
+        """
+        试探调用没有结果（被取消）时归还试探机会，下一次调用可以立即试探
+        """
+        if self.state == self.HALF_OPEN:
+            self.state = self.OPEN
+            self.opened_at = self.clock() - self.reset_timeout
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = self.clock()
+
+
+class ConnectorHealth:
+    """
+    单个连接器的健康状态
+    """
+
+    def __init__(self, connection_id: uuid.UUID, breaker: CircuitBreaker, window: int = 50):
+        self.connection_id = connection_id
+        self.breaker = breaker
+        self.connect_latency = LatencyHistogram()
+        self.query_latency = LatencyHistogram()
+        self.checks = 0
+        self.errors = 0
+        self.recent = deque(maxlen=window)  # 最近若干次探测结果，True 表示失败
+        self.last_error: Optional[str] = None
+        self.last_checked_at: Optional[datetime.datetime] = None
+
+    def record_check(self, error: Optional[BaseException]) -> None:
+        self.checks += 1
+        self.recent.append(error is not None)
+        self.last_checked_at = datetime.datetime.now()
+        if error is None:
+            self.breaker.record_success()
+        else:
+            self.errors += 1
+            self.last_error = str(error) or type(error).__name__
+            self.breaker.record_failure()
+
+    def to_read(self) -> ConnectorHealthRead:
+        return ConnectorHealthRead(
+            connection_id=self.connection_id,
+            circuit_state=self.breaker.state,
+            checks=self.checks,
+            errors=self.errors,
+            error_rate=self.errors / self.checks if self.checks else 0.0,
+            recent_error_rate=sum(self.recent) / len(self.recent) if self.recent else 0.0,
+            last_error=self.last_error,
+            last_checked_at=self.last_checked_at,
+            connect_latency=self.connect_latency.snapshot(),
+            query_latency=self.query_latency.snapshot(),
+        )
+
+
+class ConnectorHealthMonitor:
+    """
+    连接器健康检查器，维护各连接器的健康状态和熔断器
+    """
+
+    def __init__(self, interval: float = 60, concurrency: int = 8, timeout: float = 5,
+                 failure_threshold: int = 3, reset_timeout: float = 30,
+                 clock: Callable[[], float] = time.monotonic,
+                 engine_factory: Callable[[DataBaseConnection], AsyncEngine] = create_probe_engine):
+        """
+        初始化健康检查器
+
+        Args:
+            interval: 两轮探测的间隔（秒）
+            concurrency: 同时探测的连接器数量上限
+            timeout: 单个连接器的探测超时（秒）
+            failure_threshold: 熔断器打开所需的连续失败次数
+            reset_timeout: 熔断器冷却时间（秒）
+            clock: 单调时钟，便于测试替换
+            engine_factory: 创建探测引擎的函数，默认不带连接池，便于测试替换
+        """
+        self.interval = interval
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.engine_factory = engine_factory
+        self._health: Dict[uuid.UUID, ConnectorHealth] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def health(self, connection_id: uuid.UUID) -> ConnectorHealth:
+        """
+        获取连接器健康状态，不存在时创建
+        """
+        health = self._health.get(connection_id)
+        if health is None:
+            breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout, self.clock)
+            health = self._health[connection_id] = ConnectorHealth(connection_id, breaker)
+        return health
+
+    def snapshot(self, connection_id: Optional[uuid.UUID] = None) -> List[ConnectorHealthRead]:
+        """
+        导出健康状态
+
+        Args:
+            connection_id: 连接器ID，为空时导出全部
+        """
+        if connection_id is not None:
+            health = self._health.get(connection_id)
+            return [health.to_read()] if health else []
+        return [health.to_read() for health in self._health.values()]
+
+    def check_available(self, connection_id: uuid.UUID) -> None:
+        """
+        熔断器打开时抛出 CircuitOpenError；只做预检，不占用半开状态的试探机会
+
+        Raises:
+            CircuitOpenError: 连接器当前不可用
+        """
+        breaker = self.health(connection_id).breaker
+        if not breaker.peek():
+            raise CircuitOpenError(connection_id, breaker.retry_after())
+
+    @asynccontextmanager
+    async def guard(self, connection_id: uuid.UUID) -> AsyncIterator[None]:
+        """
+        包裹一次源库调用：熔断器打开时直接失败，源库错误计入熔断器
+
+        Raises:
+            CircuitOpenError: 连接器当前不可用
+        """
+        breaker = self.health(connection_id).breaker
+        if not breaker.allow():
+            raise CircuitOpenError(connection_id, breaker.retry_after())
+        recorded = False
+        try:
+            yield
+        except SOURCE_ERRORS:
+            recorded = True
+            breaker.record_failure()
+            raise
+        except Exception:
+            # 源库有响应（例如SQL错误），连接器本身可用
+            recorded = True
+            breaker.record_success()
+            raise
+        else:
+            recorded = True
+            breaker.record_success()
+        finally:
+            # 调用被取消（CancelledError）等没有结果的情况，归还试探机会
+            if not recorded:
+                breaker.release()
+
+    async def check_connection(self, db_connection: DataBaseConnection) -> Optional[BaseException]:
+        """
+        探测单个连接器：新建一条连接（连接耗时）并执行 SELECT 1（查询耗时）
+
+        使用不经过缓存的无连接池引擎：连接耗时是真实的建连时间，
+        探测大量连接器时也不会淘汰查询共享的引擎缓存中的连接池。
+
+        Returns:
+            BaseException: 探测失败时的异常，成功时返回None
+        """
+        health = self.health(db_connection.id)
+
+        async def ping() -> None:
+            engine = self.engine_factory(db_connection)
+            try:
+                started = self.clock()
+                async with engine.connect() as conn:
+                    connected = self.clock()
+                    health.connect_latency.observe((connected - started) * 1000)
+                    await conn.execute(text("SELECT 1"))
+                    health.query_latency.observe((self.clock() - connected) * 1000)
+            finally:
+                await engine.dispose()
+
+        error: Optional[BaseException] = None
+        try:
+            await asyncio.wait_for(ping(), self.timeout)
+        except Exception as e:
+            error = e
+        health.record_check(error)
+        return error
+
+    async def run_once(self) -> None:
+        """
+        执行一轮探测，覆盖全部激活的数据库连接器
+        """
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(DataBaseConnection).where(
+                    DataBaseConnection.state == ResourcesState.ACTIVE,
+                    DataBaseConnection.db_type.in_(list(SOURCE_DRIVERS)),
+                )
+            )
+            connections = list(result.scalars().all())
+
+        # 清理已删除或停用连接器的状态
+        active_ids = {connection.id for connection in connections}
+        for connection_id in list(self._health):
+            if connection_id not in active_ids:
+                del self._health[connection_id]
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(connection: DataBaseConnection) -> None:
+            async with semaphore:
+                await self.check_connection(connection)
+
+        await asyncio.gather(*(bounded(connection) for connection in connections))
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Connector health check round failed")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """
+        启动后台探测任务，应用启动时调用
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        停止后台探测任务，应用关闭时调用
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# 全局共享的连接器健康检查器
+connector_health = ConnectorHealthMonitor(
+    interval=settings.CONNECTOR_HEALTH_INTERVAL,
+    concurrency=settings.CONNECTOR_HEALTH_CONCURRENCY,
+    timeout=settings.CONNECTOR_HEALTH_TIMEOUT,
+    failure_threshold=settings.CONNECTOR_BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=settings.CONNECTOR_BREAKER_RESET_TIMEOUT,
+)
@@ -11,7 +11,8 @@
 
 import uuid
 from typing import List, Optional
-from sqlalchemy import select
+from sqlalchemy import Select, not_, select, text
+from sqlalchemy.exc import MultipleResultsFound
 from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -25,8 +26,19 @@ from app.models.metadata import (
     MetaDataTableColumnCreate,
     MetaDataTableColumnUpdate
 )
-from app.models.connections import DataBaseConnection, DataConnectionRead
+from app.models.changes import ChangeAction
+from app.models.connections import ConnectionType, DataBaseConnection
+from app.models.resources import ResourcesType
+from app.services.changes import record_change
+from app.services.health import CircuitOpenError, connector_health
 from app.services.resources import ResourcesService
+from app.services.source_engines import source_engines
+
+
+class AmbiguousTableNameError(ValueError):
+    """
+    表名匹配到多个元数据表，需附加连接器和数据库名
+    """
 
 
 class MetaDataTableService:
@@ -81,6 +93,8 @@ class MetaDataTableService:
         )
         
         self.db.add(db_table)
+        await self.db.flush()
+        record_change(self.db, ResourcesType.METADATA, db_table.id, ChangeAction.CREATE, user_id)
         await self.db.commit()
         await self.db.refresh(db_table)
         return MetaDataTableRead.model_validate(db_table)
@@ -102,22 +116,81 @@ class MetaDataTableService:
         )
         return result.scalar_one_or_none()
 
-    async def get_metadata_table_by_name(self, table_name: str) -> Optional[MetaDataTableRead]:
+    @staticmethod
+    def metadata_table_lookup_query(table_name: str,
+                                    connection_id: Optional[uuid.UUID] = None,
+                                    database_name: Optional[str] = None) -> Select:
         """
-        根据表名获取元数据表（包含字段信息）
+        构建按名称定位元数据表的查询
+
+        三元组 (connection_id, database_name, table_name) 齐全时命中唯一索引
+        uq_metadata_tables_connection_database_table，否则使用 ix_metadata_tables_table_name。
+        已软删除的元数据表不参与定位（唯一索引只约束未删除的表）。
 
         Args:
-            table_name: 元数据表名
+            table_name: 表名
+            connection_id: 连接器ID（可选）
+            database_name: 数据库名（可选）
+
+        Returns:
+            Select: 查询语句
+        """
+        query = select(MetaDataTable).where(MetaDataTable.table_name == table_name, not_(MetaDataTable.deleted))
+        if connection_id is not None:
+            query = query.where(MetaDataTable.connection_id == connection_id)
+        if database_name is not None:
+            query = query.where(MetaDataTable.database_name == database_name)
+        return query
+
+    async def resolve_metadata_table(self,
+                                     connection_id: uuid.UUID,
+                                     database_name: str,
+                                     table_name: str) -> Optional[MetaDataTable]:
+        """
+        按 (connection_id, database_name, table_name) 唯一定位元数据表
+
+        Args:
+            connection_id: 连接器ID
+            database_name: 数据库名
+            table_name: 表名
 
         Returns:
             MetaDataTable: 元数据表对象，如果未找到则返回None
         """
         result = await self.db.execute(
-            select(MetaDataTable)
+            self.metadata_table_lookup_query(table_name, connection_id, database_name)
+        )
+        return result.scalar_one_or_none()
+
+    async def get_metadata_table_by_name(self,
+                                         table_name: str,
+                                         connection_id: Optional[uuid.UUID] = None,
+                                         database_name: Optional[str] = None) -> Optional[MetaDataTableRead]:
+        """
+        根据表名获取元数据表（包含字段信息），可附加连接器和数据库名消除歧义
+
+        Args:
+            table_name: 元数据表名
+            connection_id: 连接器ID（可选）
+            database_name: 数据库名（可选）
+
+        Returns:
+            MetaDataTableRead: 元数据表信息，如果未找到则返回None
+
+        Raises:
+            AmbiguousTableNameError: 表名匹配到多个元数据表
+        """
+        result = await self.db.execute(
+            self.metadata_table_lookup_query(table_name, connection_id, database_name)
             .options(selectinload(MetaDataTable.columns))
-            .where(MetaDataTable.table_name == table_name)
         )
-        return MetaDataTableRead.model_validate(result.scalar_one_or_none())
+        try:
+            db_table = result.scalar_one_or_none()
+        except MultipleResultsFound:
+            raise AmbiguousTableNameError(
+                f"Table name '{table_name}' is ambiguous, specify connection_id and database_name"
+            )
+        return MetaDataTableRead.model_validate(db_table) if db_table is not None else None
 
     async def get_metadata_tables(self, skip: int = 0, limit: int = 100) -> List[MetaDataTableRead]:
         """
@@ -175,7 +248,10 @@ class MetaDataTableService:
         
         for key, value in update_data.items():
             setattr(db_table, key, value)
-        
+
+        # 资源字段的变更已由 ResourcesService 记录
+        if update_data:
+            record_change(self.db, ResourcesType.METADATA, table_id, ChangeAction.UPDATE)
         await self.db.commit()
         await self.db.refresh(db_table)
         return db_table
@@ -216,6 +292,8 @@ class MetaDataTableService:
             description=column_data.description
         )
         self.db.add(db_column)
+        # 字段变更记为所属元数据表的更新
+        record_change(self.db, ResourcesType.METADATA, table_id, ChangeAction.UPDATE)
         await self.db.commit()
         await self.db.refresh(db_column)
         return db_column
@@ -256,64 +334,37 @@ class MetaDataTableService:
         db_connections = await self.db.execute(
             select(DataBaseConnection).where(DataBaseConnection.id == connection_id)
         )
-        db_config: DataConnectionRead = db_connections.scalar_one_or_none()
+        db_config: DataBaseConnection = db_connections.scalar_one_or_none()
         if not db_config:
             return None
         
-        # 根据连接类型创建相应数据库引擎
-        engine = None
         try:
-            if db_config.db_type == "postgresql":
-                from sqlalchemy import create_engine
-                connection_url = f"postgresql://{db_config.username}:{db_config.password}@{db_config.host}:{db_config.port}/{database_name or db_config.database_name}"
-                engine = create_engine(connection_url)
-            elif db_config.db_type == "mysql":
-                from sqlalchemy import create_engine
-                connection_url = f"mysql+pymysql://{db_config.username}:{db_config.password}@{db_config.host}:{db_config.port}/{database_name or db_config.database_name}"
-                engine = create_engine(connection_url)
-            # 可以根据需要添加其他数据库类型支持
-            
-            if not engine:
-                raise ValueError(f"Unsupported database type: {db_config.db_type}")
-                
-            # 查询表的字段信息
-            with engine.connect() as conn:
-                from sqlalchemy import text
+            # 复用按 (连接器, 数据库) 缓存的连接池，密码在构建连接URL时解密
+            engine = source_engines.get_engine(db_config, database_name)
                 
-                # 构建查询字段信息的SQL语句
-                if db_config.db_type == "postgresql":
-                    sql = """
-                        SELECT 
-                            column_name,
-                            data_type,
-                            ordinal_position,
-                            is_nullable,
-                            column_default
-                        FROM information_schema.columns 
-                        WHERE table_name = :table_name
-                        AND table_schema = :schema_name
-                        ORDER BY ordinal_position
-                    """
-                    schema = schema_name or 'public'
-                else:  # mysql等其他数据库
-                    sql = """
-                        SELECT 
-                            column_name,
-                            data_type,
-                            ordinal_position,
-                            is_nullable,
-                            column_default
-                        FROM information_schema.columns 
-                        WHERE table_name = :table_name
-                        AND table_schema = :database_name
-                        ORDER BY ordinal_position
-                    """
-                    schema = database_name or db_config.database_name
-                    
-                result = conn.execute(text(sql), {
+            # 构建查询字段信息的SQL语句，显式别名兼容 MySQL 大写列名
+            sql = """
+                SELECT 
+                    column_name AS column_name,
+                    data_type AS data_type,
+                    ordinal_position AS ordinal_position,
+                    is_nullable AS is_nullable,
+                    column_default AS column_default
+                FROM information_schema.columns 
+                WHERE table_name = :table_name
+                AND table_schema = :schema_name
+                ORDER BY ordinal_position
+            """
+            if db_config.db_type == ConnectionType.POSTGRESQL:
+                schema = schema_name or 'public'
+            else:  # mysql等其他数据库
+                schema = database_name or db_config.database
+
+            # 查询表的字段信息，连接器熔断时直接失败
+            async with connector_health.guard(db_config.id), engine.connect() as conn:
+                result = await conn.execute(text(sql), {
                     "table_name": table_name,
-                    "schema_name": schema,
-                    "database_name": schema
+                    "schema_name": schema
                 })
                 
                 # 将查询结果转换为字段创建模型
@@ -330,14 +381,14 @@ class MetaDataTableService:
                     
                 return columns
                 
+        except CircuitOpenError:
+            # 熔断时交给调用方返回 503，不能当作"读取失败"吞掉
+            raise
         except Exception as e:
             # 处理连接或查询异常
             print(f"Error connecting to database or querying columns: {str(e)}")
             return None
-        finally:
-            # 关闭引擎连接
-            if engine:
-                engine.dispose()
+
     async def update_table_column(self, seq: int, column_update: MetaDataTableColumnUpdate) -> Optional[MetaDataTableColumnRead]:
         """
         更新元数据表字段信息
@@ -359,7 +410,8 @@ class MetaDataTableService:
         update_data = column_update.dict(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_column, key, value)
-        
+
+        record_change(self.db, ResourcesType.METADATA, db_column.table_id, ChangeAction.UPDATE)
         await self.db.commit()
         await self.db.refresh(db_column)
         return MetaDataTableColumnRead.model_validate(db_column)
@@ -383,6 +435,7 @@ class MetaDataTableService:
             return False
         
         await self.db.delete(db_column)
+        record_change(self.db, ResourcesType.METADATA, db_column.table_id, ChangeAction.UPDATE)
         await self.db.commit()
         return True
     
\ No newline at end of file
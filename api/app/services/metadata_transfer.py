@@ -0,0 +1,300 @@
+"""
+元数据导入导出服务模块
+
+该模块用于在不同环境之间迁移元数据目录（元数据表及其字段），数据格式为 NDJSON，
+每行一个 MetaDataTableCreate 对象。
+
+主要功能包括：
+- 按连接器或工作区流式导出元数据表及字段，分批读取，内存占用恒定
+- 增量解析 NDJSON 流，按批次事务写入
+- 以 (connection_id, database_name, table_name) 为键幂等地新增或更新
+- 逐行返回解析、解码和写入错误
+"""
+
+import uuid
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import delete, insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.models.changes import ChangeAction
+from app.models.connections import DataBaseConnection
+from app.models.metadata import (
+    MetaDataTable,
+    MetaDataTableColumn,
+    MetaDataTableColumnCreate,
+    MetaDataTableCreate,
+    MetaDataImportError,
+    MetaDataImportResult,
+)
+from app.models.resources import ResourcesState, ResourcesType
+from app.models.workspace import WorkspaceResources
+from app.services.changes import record_change
+from app.utils.ndjson import LineDecodeError, dumps_line
+
+
+# 导入结果中最多保留的错误明细条数，避免错误行过多时结果无限增长
+MAX_REPORTED_ERRORS = 1000
+
+TableKey = Tuple[uuid.UUID, str, str]
+
+
+class MetaDataTransferService:
+    """
+    元数据导入导出服务类
+    """
+
+    def __init__(self, db: AsyncSession, batch_size: int = 500):
+        """
+        初始化元数据导入导出服务
+
+        Args:
+            db: 数据库会话实例
+            batch_size: 每批读取或写入的元数据表数量
+        """
+        self.db = db
+        self.batch_size = max(1, batch_size)
+
+    async def export_tables(self,
+                            connection_id: Optional[uuid.UUID] = None,
+                            workspace_id: Optional[uuid.UUID] = None,
+                            created_by: Optional[uuid.UUID] = None) -> AsyncIterator[str]:
+        """
+        以 NDJSON 行的形式导出元数据表及字段
+
+        按表ID做键集分页，每页一次查询表、一次查询字段，
+        输出后清空会话缓存，保证导出任意规模目录时内存占用恒定。
+
+        Args:
+            connection_id: 按连接器筛选（可选）
+            workspace_id: 按工作区筛选（可选）
+            created_by: 按创建者筛选（可选）
+
+        Yields:
+            str: 单行 JSON，内容为 MetaDataTableCreate
+        """
+        query = (
+            select(MetaDataTable)
+            .options(selectinload(MetaDataTable.columns))
+            .where(MetaDataTable.state != ResourcesState.DELETED)
+            .order_by(MetaDataTable.id)
+            .limit(self.batch_size)
+        )
+        if connection_id:
+            query = query.where(MetaDataTable.connection_id == connection_id)
+        if created_by:
+            query = query.where(MetaDataTable.created_by == created_by)
+        if workspace_id:
+            query = query.where(
+                MetaDataTable.id.in_(
+                    select(WorkspaceResources.resource_id).where(
+                        WorkspaceResources.workspace_id == workspace_id,
+                        WorkspaceResources.state != "D",
+                    )
+                )
+            )
+
+        last_id: Optional[uuid.UUID] = None
+        while True:
+            page_query = query if last_id is None else query.where(MetaDataTable.id > last_id)
+            result = await self.db.execute(page_query)
+            tables = list(result.scalars().all())
+            if not tables:
+                break
+
+            for table in tables:
+                yield dumps_line(self._to_export_item(table))
+            last_id = tables[-1].id
+
+            # 释放已输出的对象，避免 identity map 随导出规模增长
+            self.db.expunge_all()
+            if len(tables) < self.batch_size:
+                break
+
+    async def import_tables(self,
+                            lines: AsyncIterator[Tuple[int, str]],
+                            user_id: uuid.UUID) -> MetaDataImportResult:
+        """
+        从 NDJSON 行流中导入元数据表及字段
+
+        Args:
+            lines: (行号, 行内容) 的异步迭代器，通常来自 ``iter_lines(request.stream())``
+            user_id: 新建元数据表的创建者ID
+
+        Returns:
+            MetaDataImportResult: 导入结果汇总及逐行错误信息
+        """
+        report = MetaDataImportResult()
+        batch: List[Tuple[int, MetaDataTableCreate]] = []
+
+        try:
+            async for line_no, line in lines:
+                report.total += 1
+                try:
+                    batch.append((line_no, MetaDataTableCreate.model_validate_json(line)))
+                except ValidationError as e:
+                    self._add_error(report, line_no, str(e))
+                    continue
+
+                if len(batch) >= self.batch_size:
+                    await self._write_batch(batch, user_id, report)
+                    batch = []
+        except LineDecodeError as e:
+            # 之前的批次已经提交，不能整体返回 400；记为该行的错误并停止读取，已解析的行照常写入
+            report.total += 1
+            self._add_error(report, e.line_no, f"Invalid UTF-8, import stopped at this line: {e.reason}")
+
+        if batch:
+            await self._write_batch(batch, user_id, report)
+        return report
+
+    async def _write_batch(self,
+                           batch: List[Tuple[int, MetaDataTableCreate]],
+                           user_id: uuid.UUID,
+                           report: MetaDataImportResult) -> None:
+        """
+        在单个事务内写入一批元数据表，失败时整批回滚并记录到每一行
+        """
+        # 同一批次内重复的键以最后一行为准，被覆盖的行随该键一起计入结果
+        items: Dict[TableKey, Tuple[int, MetaDataTableCreate]] = {}
+        superseded: Dict[TableKey, List[int]] = {}
+        for line_no, item in batch:
+            key = (item.connection_id, item.database_name, item.table_name)
+            if key in items:
+                superseded.setdefault(key, []).append(items[key][0])
+            items[key] = (line_no, item)
+
+        def lines_of(key: TableKey) -> List[int]:
+            return superseded.get(key, []) + [items[key][0]]
+
+        try:
+            # 一次查询校验连接器是否存在
+            connection_ids = {key[0] for key in items}
+            result = await self.db.execute(
+                select(DataBaseConnection.id).where(DataBaseConnection.id.in_(connection_ids))
+            )
+            known_connections = set(result.scalars().all())
+            for key in [k for k in items if k[0] not in known_connections]:
+                for line_no in lines_of(key):
+                    self._add_error(report, line_no, f"Data connection '{key[0]}' not found")
+                items.pop(key)
+            if not items:
+                return
+
+            # 一次查询取出已存在的表；同一键可能有多个已软删除的表和至多一个未删除的表，
+            # 优先使用未删除的表，否则恢复任意一个已删除的表，不会违反部分唯一索引
+            result = await self.db.execute(
+                select(MetaDataTable).where(
+                    tuple_(
+                        MetaDataTable.connection_id,
+                        MetaDataTable.database_name,
+                        MetaDataTable.table_name,
+                    ).in_(list(items.keys()))
+                )
+            )
+            existing: Dict[TableKey, MetaDataTable] = {}
+            for table in result.scalars().all():
+                key = (table.connection_id, table.database_name, table.table_name)
+                if key not in existing or existing[key].deleted:
+                    existing[key] = table
+
+            created = 0
+            column_rows = []
+            for key, (_, item) in items.items():
+                db_table = existing.get(key)
+                if db_table is None:
+                    db_table = MetaDataTable(
+                        id=uuid.uuid4(),
+                        name=item.name,
+                        state=ResourcesState.PENDING,
+                        created_by=user_id,
+                        database_name=item.database_name,
+                        table_name=item.table_name,
+                        description=item.description,
+                        connection_id=item.connection_id,
+                        display_name=item.display_name,
+                    )
+                    self.db.add(db_table)
+                    record_change(self.db, ResourcesType.METADATA, db_table.id, ChangeAction.CREATE, user_id)
+                    created += 1
+                else:
+                    db_table.name = item.name
+                    db_table.description = item.description
+                    db_table.display_name = item.display_name
+                    if db_table.state == ResourcesState.DELETED:
+                        db_table.state = ResourcesState.PENDING
+                    record_change(self.db, ResourcesType.METADATA, db_table.id, ChangeAction.UPDATE, user_id)
+                column_rows.extend(self._column_rows(db_table.id, item.columns))
+
+            # 已存在的表整体替换字段
+            if existing:
+                await self.db.execute(
+                    delete(MetaDataTableColumn).where(
+                        MetaDataTableColumn.table_id.in_([t.id for t in existing.values()])
+                    )
+                )
+            await self.db.flush()
+            if column_rows:
+                await self.db.execute(insert(MetaDataTableColumn), column_rows)
+
+            await self.db.commit()
+            report.created += created
+            report.updated += len(items) - created + sum(len(superseded.get(key, [])) for key in items)
+        except Exception as e:
+            await self.db.rollback()
+            for key in items:
+                for line_no in lines_of(key):
+                    self._add_error(report, line_no, str(e))
+        finally:
+            self.db.expunge_all()
+
+    @staticmethod
+    def _column_rows(table_id: uuid.UUID, columns: List[MetaDataTableColumnCreate]) -> List[dict]:
+        """
+        将字段创建模型转换为批量插入的行
+        """
+        return [
+            {"table_id": table_id, "state": "A", **column.model_dump()}
+            for column in columns
+        ]
+
+    @staticmethod
+    def _to_export_item(table: MetaDataTable) -> MetaDataTableCreate:
+        """
+        将元数据表转换为导出行模型
+        """
+        columns = sorted(
+            (column for column in table.columns if column.state != "D"),
+            key=lambda column: column.ordinal_position,
+        )
+        return MetaDataTableCreate(
+            name=table.name,
+            database_name=table.database_name,
+            table_name=table.table_name,
+            description=table.description,
+            connection_id=table.connection_id,
+            display_name=table.display_name,
+            columns=[
+                MetaDataTableColumnCreate(
+                    column_name=column.column_name,
+                    display_name=column.display_name,
+                    data_type=column.data_type,
+                    ordinal_position=column.ordinal_position,
+                    is_nullable=column.is_nullable,
+                    column_default=column.column_default,
+                    description=column.description,
+                )
+                for column in columns
+            ],
+        )
+
+    @staticmethod
+    def _add_error(report: MetaDataImportResult, line_no: int, error: str) -> None:
+        """
+        记录单行错误，超过上限后只计数不保留明细
+        """
+        report.failed += 1
+        if len(report.errors) < MAX_REPORTED_ERRORS:
+            report.errors.append(MetaDataImportError(line=line_no, error=error))
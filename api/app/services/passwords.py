@@ -0,0 +1,130 @@
+"""
+密码哈希模块
+
+bcrypt 的哈希与校验是纯 CPU 计算（每次约数百毫秒），在事件循环或 Web 线程池中执行会拖慢其他请求。
+该模块把哈希与校验放到独立的、大小固定的进程池中执行，并提供异步入口：
+
+- 进程池在首次使用时创建，应用关闭时释放
+- 排队中的任务数量有上限，超出时抛出 PasswordHasherBusyError，由接口返回 503，
+  登录高峰不会占满进程池之外的资源
+"""
+
+import asyncio
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, List, Optional
+
+from app.config.settings import pwd_context, settings
+
+
+logger = logging.getLogger(__name__)
+
+# 批量哈希时每个任务最多处理的密码数量
+MAX_PASSWORDS_PER_TASK = 16
+
+
+class PasswordHasherBusyError(Exception):
+    """
+    密码哈希任务排队已满
+    """
+
+    def __init__(self, retry_after: int):
+        super().__init__("Password hasher is overloaded")
+        self.retry_after = retry_after
+
+
+# 在工作进程中执行的函数需可被 pickle，定义在模块顶层
+def _hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _hash_passwords(passwords: List[str]) -> List[str]:
+    return [pwd_context.hash(password) for password in passwords]
+
+
+def _verify_password(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """
+    基于进程池的异步密码哈希器
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 64, retry_after: int = 1,
+                 executor_factory: Optional[Callable[[int], Executor]] = None):
+        """
+        初始化密码哈希器
+
+        Args:
+            max_workers: 工作进程数量
+            max_pending: 允许同时提交（执行中 + 排队中）的任务数量
+            retry_after: 过载时建议客户端重试的等待时间（秒）
+            executor_factory: 创建执行器的函数，便于测试替换
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.retry_after = retry_after
+        self._executor_factory = executor_factory or (lambda n: ProcessPoolExecutor(max_workers=n))
+        self._executor: Optional[Executor] = None
+        self.pending = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = self._executor_factory(self.max_workers)
+        return self._executor
+
+    async def _submit(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self.pending >= self.max_pending:
+            raise PasswordHasherBusyError(self.retry_after)
+        loop = asyncio.get_running_loop()
+        future = self._get_executor().submit(fn, *args)
+        self.pending += 1
+        # 调用方被取消时进程中的任务仍在执行，直到任务真正结束才释放名额；回调可能在其他线程触发
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release))
+        return await asyncio.wrap_future(future)
+
+    def _release(self) -> None:
+        self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        """
+        对密码进行哈希处理
+        """
+        return await self._submit(_hash_password, password)
+
+    async def hash_many(self, passwords: List[str]) -> List[str]:
+        """
+        批量哈希密码：切分为小任务，每轮最多提交与工作进程数相同的任务并行执行，
+        单个任务耗时有限，登录请求的哈希任务可以穿插执行
+        """
+        size = max(1, min(MAX_PASSWORDS_PER_TASK, -(-len(passwords) // self.max_workers)))
+        slices = [passwords[i:i + size] for i in range(0, len(passwords), size)]
+        hashed: List[str] = []
+        for start in range(0, len(slices), self.max_workers):
+            wave = slices[start:start + self.max_workers]
+            for chunk in await asyncio.gather(*(self._submit(_hash_passwords, s) for s in wave)):
+                hashed.extend(chunk)
+        return hashed
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """
+        验证明文密码与哈希密码是否匹配
+        """
+        return await self._submit(_verify_password, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        """
+        释放进程池
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# 进程内共享的密码哈希器
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    retry_after=settings.PASSWORD_HASH_RETRY_AFTER,
+)
@@ -0,0 +1,238 @@
+"""
+权限解析模块
+
+把用户的角色和工作区关系编译为整数位集（UserPermissions），按用户缓存：
+
+- 判断 (workspace_id, permission) 只需一次字典查找和按位与，不查询数据库
+- 每个用户有一个版本号，角色或工作区关系在本进程内变化时（ORM 事件）递增，
+  缓存条目版本落后时重新编译；其他进程的缓存在 TTL 后过期
+- 未命中或版本落后时使用异步会话加载，每次编译两条查询
+"""
+
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import event, literal, select
+from sqlalchemy.orm.attributes import get_history
+
+from app.config.db import AsyncSessionLocal
+from app.config.settings import settings
+from app.models.auth import RoleEnum, TokenClaims, UserRoles
+from app.models.permissions import (
+    GLOBAL_ROLE_PERMISSIONS,
+    ROLE_PERMISSIONS,
+    WORKSPACE_ROLE_PERMISSIONS,
+    Permission,
+)
+from app.models.workspace import Workspaces, WorkspaceUsers
+from app.services.api_keys import API_KEY_JTI_PREFIX
+from app.services.auth import get_workspace_claims
+
+
+@dataclass
+class UserPermissions:
+    """
+    编译后的用户权限位集
+    """
+    user_id: uuid.UUID
+    global_bits: int = 0
+    workspace_bits: Dict[uuid.UUID, int] = field(default_factory=dict)
+
+    def get(self, workspace_id: uuid.UUID) -> int:
+        return self.global_bits | self.workspace_bits.get(workspace_id, 0)
+
+    def allows(self, workspace_id: uuid.UUID, permission: Permission) -> bool:
+        return self.get(workspace_id) & permission == permission
+
+
+def compile_permissions(user_id: uuid.UUID,
+                        roles: Iterable[RoleEnum],
+                        memberships: Iterable[Tuple[uuid.UUID, str]]) -> UserPermissions:
+    """
+    把角色和工作区关系编译为位集
+
+    Args:
+        user_id: 用户ID
+        roles: 用户角色
+        memberships: (工作区ID, owner/member) 列表，同一工作区可出现多次
+    """
+    roles = list(roles)
+    global_bits = 0
+    role_bits = 0
+    for role in roles:
+        global_bits |= GLOBAL_ROLE_PERMISSIONS.get(role, 0)
+        role_bits |= ROLE_PERMISSIONS.get(role, 0)
+
+    workspace_bits: Dict[uuid.UUID, int] = {}
+    for workspace_id, relation in memberships:
+        bits = WORKSPACE_ROLE_PERMISSIONS.get(relation, 0) | role_bits
+        workspace_bits[workspace_id] = workspace_bits.get(workspace_id, 0) | bits
+    return UserPermissions(user_id=user_id, global_bits=global_bits, workspace_bits=workspace_bits)
+
+
+async def load_permissions(user_id: uuid.UUID) -> UserPermissions:
+    """
+    从数据库加载用户的角色和工作区关系并编译
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(UserRoles.role).where(UserRoles.user_id == user_id))
+        roles = result.scalars().all()
+        owned = select(Workspaces.id.label("workspace_id"), literal("owner").label("relation")).where(
+            Workspaces.owner_id == user_id, Workspaces.state != 'D'
+        )
+        joined = (
+            select(WorkspaceUsers.workspace_id, literal("member").label("relation"))
+            .join(Workspaces, Workspaces.id == WorkspaceUsers.workspace_id)
+            .where(WorkspaceUsers.user_id == user_id, WorkspaceUsers.state != 'D', Workspaces.state != 'D')
+        )
+        result = await db.execute(owned.union_all(joined))
+        return compile_permissions(user_id, roles, [(row.workspace_id, row.relation) for row in result])
+
+
+class PermissionResolver:
+    """
+    按用户缓存权限位集，带版本号失效
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 300,
+                 loader: Callable[[uuid.UUID], Awaitable[UserPermissions]] = load_permissions,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        初始化权限解析器
+
+        Args:
+            max_entries: 最多缓存的用户数量
+            ttl_seconds: 缓存有效期（秒），也是其他进程中权限变更的最长生效延迟
+            loader: 加载并编译用户权限的函数
+            clock: 单调时钟，便于测试替换
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.loader = loader
+        self.clock = clock
+        self._entries: "OrderedDict[uuid.UUID, Tuple[int, float, UserPermissions]]" = OrderedDict()
+        self._versions: Dict[uuid.UUID, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def version(self, user_id: uuid.UUID) -> int:
+        return self._versions.get(user_id, 0)
+
+    def bump(self, user_id: Optional[uuid.UUID]) -> None:
+        """
+        用户的角色或工作区关系发生变化，使其缓存失效
+        """
+        if user_id is None:
+            return
+        self._versions[user_id] = self._versions.get(user_id, 0) + 1
+        self._entries.pop(user_id, None)
+
+    async def get(self, user_id: uuid.UUID) -> UserPermissions:
+        entry = self._entries.get(user_id)
+        version = self.version(user_id)
+        if entry is not None and entry[0] == version and entry[1] > self.clock():
+            self._entries.move_to_end(user_id)
+            return entry[2]
+
+        permissions = await self.loader(user_id)
+        # 加载期间版本变化时不写入缓存，下次请求重新编译
+        if self.version(user_id) == version:
+            self._entries[user_id] = (version, self.clock() + self.ttl_seconds, permissions)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return permissions
+
+
+# 进程内共享的权限解析器
+permission_resolver = PermissionResolver(
+    max_entries=settings.PERMISSION_CACHE_SIZE,
+    ttl_seconds=settings.PERMISSION_CACHE_TTL,
+)
+
+
+# 角色或工作区关系在本进程内被修改时递增用户版本号
+@event.listens_for(UserRoles, "after_insert")
+@event.listens_for(UserRoles, "after_update")
+@event.listens_for(UserRoles, "after_delete")
+def _bump_user_roles(mapper, connection, target: UserRoles) -> None:
+    permission_resolver.bump(target.user_id)
+
+
+@event.listens_for(WorkspaceUsers, "after_insert")
+@event.listens_for(WorkspaceUsers, "after_update")
+@event.listens_for(WorkspaceUsers, "after_delete")
+def _bump_workspace_user(mapper, connection, target: WorkspaceUsers) -> None:
+    permission_resolver.bump(target.user_id)
+
+
+@event.listens_for(Workspaces, "after_insert")
+@event.listens_for(Workspaces, "after_update")
+@event.listens_for(Workspaces, "after_delete")
+def _bump_workspace_owner(mapper, connection, target: Workspaces) -> None:
+    # 所有者变更时新旧所有者都需要失效
+    for owner_id in {target.owner_id, *get_history(target, "owner_id").deleted}:
+        permission_resolver.bump(owner_id)
+
+
+async def workspace_exists(workspace_id: uuid.UUID) -> bool:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Workspaces.id).where(Workspaces.id == workspace_id, Workspaces.state != 'D')
+        )
+        return result.scalar_one_or_none() is not None
+
+
+async def check_workspace_permission(claims: TokenClaims, workspace_id: uuid.UUID, permission: Permission) -> None:
+    """
+    校验令牌在工作区上是否具有指定权限
+
+    通过时不查询数据库（权限缓存命中时）；拒绝时再确认工作区是否存在，以区分 404 和 403。
+    API Key 只能访问其所属的工作区。
+
+    Raises:
+        HTTPException: 工作区不存在时 404，无权访问时 403
+    """
+    permissions = await permission_resolver.get(claims.uid)
+    allowed = permissions.allows(workspace_id, permission)
+    if claims.jti.startswith(API_KEY_JTI_PREFIX) and claims.workspace_role(workspace_id) is None:
+        allowed = False
+    if allowed:
+        return
+
+    if not await workspace_exists(workspace_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Workspace not found"
+        )
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="Not enough permissions to access this workspace"
+    )
+
+
+def require_workspace_permission(permission: Permission):
+    """
+    生成校验当前用户在路径参数 workspace_id 对应工作区上是否具有指定权限的依赖项
+
+    Returns:
+        Callable: FastAPI 依赖项，返回当前令牌声明
+    """
+
+    async def dependency(workspace_id: str, claims: TokenClaims = Depends(get_workspace_claims)) -> TokenClaims:
+        try:
+            workspace_uuid = uuid.UUID(workspace_id)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid workspace ID format"
+            )
+        await check_workspace_permission(claims, workspace_uuid, permission)
+        return claims
+
+    return dependency
@@ -0,0 +1,176 @@
+"""
+已认证用户缓存模块
+
+get_current_user 每次请求都要根据 Token 的 sub（用户名）加载用户，
+该模块按用户名缓存校验通过的用户，未命中时使用异步会话查询，不阻塞事件循环。
+
+- 缓存条目数量有上限，超出时按最近最少使用淘汰；条目在 TTL 后过期
+- 同一用户名的并发未命中只查询一次数据库
+- 用户记录（重置密码、停用等）或用户角色发生变化时，通过 ORM 事件主动失效，
+  flush 时失效一次，事务提交后再失效一次，避免提交前并发加载的旧记录留在缓存中；
+  其他进程中的缓存在 TTL 后过期
+"""
+
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, object_session
+
+from app.config.db import AsyncSessionLocal
+from app.config.settings import settings
+from app.models.auth import User, UserRead, UserRoles
+
+PrincipalLoader = Callable[[str], Awaitable[Optional[UserRead]]]
+
+
+async def load_principal(username: str) -> Optional[UserRead]:
+    """
+    按用户名从数据库加载用户
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(User).where(User.username == username))
+        user = result.scalar_one_or_none()
+        return UserRead.model_validate(user) if user is not None else None
+
+
+class PrincipalCache:
+    """
+    已认证用户的 TTL + LRU 缓存
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 60,
+                 loader: PrincipalLoader = load_principal,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        初始化用户缓存
+
+        Args:
+            max_entries: 最多缓存的用户数量
+            ttl_seconds: 缓存有效期（秒）
+            loader: 未命中时加载用户的函数
+            clock: 单调时钟，便于测试替换
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.loader = loader
+        self.clock = clock
+        self._entries: "OrderedDict[str, Tuple[UserRead, float]]" = OrderedDict()
+        self._usernames: Dict[uuid.UUID, str] = {}
+        self._pending: Dict[str, asyncio.Future] = {}
+        # 每次失效递增，查询期间发生失效时不写入可能过期的结果
+        self._generation = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, username: str) -> Optional[UserRead]:
+        """
+        获取用户，未命中时从数据库加载；用户不存在时返回 None（不缓存）
+        """
+        entry = self._entries.get(username)
+        if entry is not None:
+            principal, expires_at = entry
+            if expires_at > self.clock():
+                self._entries.move_to_end(username)
+                return principal
+            self._discard(username)
+
+        pending = self._pending.get(username)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[username] = future
+        generation = self._generation
+        try:
+            principal = await self.loader(username)
+        except BaseException as e:
+            future.set_exception(e)
+            # 没有其他等待者时避免 "exception was never retrieved" 警告
+            future.exception()
+            raise
+        finally:
+            self._pending.pop(username, None)
+
+        if principal is not None and generation == self._generation:
+            self._store(username, principal)
+        future.set_result(principal)
+        return principal
+
+    def _store(self, username: str, principal: UserRead) -> None:
+        self._entries[username] = (principal, self.clock() + self.ttl_seconds)
+        self._entries.move_to_end(username)
+        self._usernames[principal.id] = username
+        while len(self._entries) > self.max_entries:
+            oldest, _ = next(iter(self._entries.items()))
+            self._discard(oldest)
+
+    def _discard(self, username: str) -> None:
+        entry = self._entries.pop(username, None)
+        if entry is not None:
+            self._usernames.pop(entry[0].id, None)
+
+    def invalidate(self, username: str) -> None:
+        """
+        按用户名失效
+        """
+        self._generation += 1
+        self._discard(username)
+
+    def invalidate_user(self, user_id: uuid.UUID) -> None:
+        """
+        按用户ID失效（用户名可能已被修改）
+        """
+        self._generation += 1
+        username = self._usernames.get(user_id)
+        if username is not None:
+            self._discard(username)
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._entries.clear()
+        self._usernames.clear()
+
+
+# 进程内共享的用户缓存
+principal_cache = PrincipalCache(
+    max_entries=settings.AUTH_PRINCIPAL_CACHE_SIZE,
+    ttl_seconds=settings.AUTH_PRINCIPAL_CACHE_TTL,
+)
+
+
+def _invalidate(target: object, user_id: Optional[uuid.UUID]) -> None:
+    principal_cache.invalidate_user(user_id)
+    # flush 到提交之间，其他请求仍可能读到并缓存旧记录，提交后需再次失效
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("principal_invalidations", set()).add(user_id)
+
+
+# 用户或角色在本进程内被修改时失效缓存（同步、异步会话都会触发）
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user(mapper, connection, target: User) -> None:
+    _invalidate(target, target.id)
+
+
+@event.listens_for(UserRoles, "after_insert")
+@event.listens_for(UserRoles, "after_update")
+@event.listens_for(UserRoles, "after_delete")
+def _invalidate_user_roles(mapper, connection, target: UserRoles) -> None:
+    _invalidate(target, target.user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session: Session) -> None:
+    for user_id in session.info.pop("principal_invalidations", ()):
+        principal_cache.invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_principal_invalidations(session: Session) -> None:
+    session.info.pop("principal_invalidations", None)
@@ -0,0 +1,236 @@
+"""
+字段画像服务模块
+
+该模块用于为元数据表生成字段统计信息（空值数、最小/最大值、近似去重数、高频值、数值直方图），
+结果保存在 resources_metadata_column_stats 表中，读取时无需访问源库。
+
+画像任务对源表抽取最多 PROFILING_SAMPLE_ROWS 行，以流式方式单次遍历，
+每个字段使用固定大小的草图累加，内存占用与表规模无关。
+"""
+
+import datetime
+import decimal
+import logging
+import uuid
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.config.db import AsyncSessionLocal
+from app.config.settings import settings
+from app.models.connections import ConnectionType, DataBaseConnection
+from app.models.metadata import MetaDataColumnStats, MetaDataColumnStatsRead, MetaDataTable
+from app.services.health import connector_health
+from app.services.source_engines import source_engines
+from app.utils.sketches import FrequentItems, HyperLogLog, Reservoir
+
+
+logger = logging.getLogger(__name__)
+
+
+class ColumnProfile:
+    """
+    单个字段的流式统计累加器
+    """
+
+    def __init__(self, column_name: str, top_k: int = 10, histogram_bins: int = 10):
+        self.column_name = column_name
+        self.top_k = top_k
+        self.histogram_bins = histogram_bins
+        self.rows = 0
+        self.nulls = 0
+        self.min_value: Any = None
+        self.max_value: Any = None
+        self.distinct = HyperLogLog()
+        self.frequent = FrequentItems(capacity=top_k * 8)
+        self.numeric_min: Optional[float] = None
+        self.numeric_max: Optional[float] = None
+        self.numeric_sample = Reservoir(size=1024, seed=0)
+
+    def add(self, value: Any) -> None:
+        self.rows += 1
+        if value is None:
+            self.nulls += 1
+            return
+
+        key = value if isinstance(value, (str, int, float, bool, decimal.Decimal,
+                                          datetime.date, datetime.datetime, uuid.UUID)) else str(value)
+        self.distinct.add(key)
+        self.frequent.add(key)
+        self._update_range(key)
+
+        if isinstance(value, (int, float, decimal.Decimal)) and not isinstance(value, bool):
+            number = float(value)
+            self.numeric_min = number if self.numeric_min is None else min(self.numeric_min, number)
+            self.numeric_max = number if self.numeric_max is None else max(self.numeric_max, number)
+            self.numeric_sample.add(number)
+
+    def _update_range(self, value: Any) -> None:
+        try:
+            if self.min_value is None or value < self.min_value:
+                self.min_value = value
+            if self.max_value is None or value > self.max_value:
+                self.max_value = value
+        except TypeError:
+            # 同一字段出现不可比较的类型时退化为字符串比较
+            self.min_value = min(str(self.min_value), str(value))
+            self.max_value = max(str(self.max_value), str(value))
+
+    def histogram(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        基于蓄水池样本生成等宽直方图，计数按样本比例放大到全部数值行
+        """
+        sample = self.numeric_sample.items
+        if not sample or self.numeric_min is None or self.numeric_max is None:
+            return None
+
+        low, high = self.numeric_min, self.numeric_max
+        bins = 1 if high == low else self.histogram_bins
+        width = (high - low) / bins if bins > 1 else 0.0
+        counts = [0] * bins
+        for number in sample:
+            index = min(int((number - low) / width), bins - 1) if width else 0
+            counts[index] += 1
+
+        scale = self.numeric_sample.seen / len(sample)
+        return [
+            {
+                "lower": low + i * width,
+                "upper": high if i == bins - 1 else low + (i + 1) * width,
+                "count": int(round(count * scale)),
+            }
+            for i, count in enumerate(counts)
+        ]
+
+    def to_row(self, table_id: uuid.UUID) -> Dict[str, Any]:
+        """
+        转换为统计表的一行
+        """
+        return {
+            "table_id": table_id,
+            "column_name": self.column_name,
+            "sample_rows": self.rows,
+            "null_count": self.nulls,
+            "distinct_count": self.distinct.count() if self.rows > self.nulls else 0,
+            "min_value": None if self.min_value is None else str(self.min_value),
+            "max_value": None if self.max_value is None else str(self.max_value),
+            "top_values": [
+                {"value": str(value), "count": count}
+                for value, count in self.frequent.top(self.top_k)
+            ],
+            "histogram": self.histogram(),
+            "profiled_at": datetime.datetime.now(),
+        }
+
+
+class ColumnProfilingService:
+    """
+    字段画像服务类，负责执行画像任务并读取统计结果
+    """
+
+    def __init__(self, db: AsyncSession):
+        """
+        初始化字段画像服务
+
+        Args:
+            db: 数据库会话实例
+        """
+        self.db = db
+
+    async def profile_table(self, table_id: uuid.UUID,
+                            sample_rows: Optional[int] = None) -> List[MetaDataColumnStatsRead]:
+        """
+        对元数据表执行一次画像并保存统计结果
+
+        Args:
+            table_id: 元数据表ID
+            sample_rows: 抽样行数，默认为 PROFILING_SAMPLE_ROWS
+
+        Returns:
+            List[MetaDataColumnStatsRead]: 各字段的统计信息
+        """
+        result = await self.db.execute(
+            select(MetaDataTable)
+            .options(selectinload(MetaDataTable.columns))
+            .where(MetaDataTable.id == table_id)
+        )
+        table = result.scalar_one_or_none()
+        if table is None:
+            raise ValueError(f"Metadata table '{table_id}' not found")
+
+        columns = [
+            column.column_name
+            for column in sorted(table.columns, key=lambda c: c.ordinal_position)
+            if column.state != "D"
+        ]
+        if not columns:
+            raise ValueError(f"Metadata table '{table_id}' has no columns to profile")
+
+        result = await self.db.execute(
+            select(DataBaseConnection).where(DataBaseConnection.id == table.connection_id)
+        )
+        connection = result.scalar_one_or_none()
+        if connection is None:
+            raise ValueError(f"Data connection '{table.connection_id}' not found")
+
+        profiles = [
+            ColumnProfile(name, settings.PROFILING_TOP_K, settings.PROFILING_HISTOGRAM_BINS)
+            for name in columns
+        ]
+        await self._scan(connection, table, profiles, sample_rows or settings.PROFILING_SAMPLE_ROWS)
+
+        rows = [profile.to_row(table.id) for profile in profiles]
+        await self.db.execute(delete(MetaDataColumnStats).where(MetaDataColumnStats.table_id == table.id))
+        await self.db.execute(insert(MetaDataColumnStats), rows)
+        await self.db.commit()
+        return [MetaDataColumnStatsRead.model_validate(row) for row in rows]
+
+    async def get_table_stats(self, table_id: uuid.UUID) -> List[MetaDataColumnStatsRead]:
+        """
+        读取元数据表已保存的字段统计信息
+
+        Args:
+            table_id: 元数据表ID
+
+        Returns:
+            List[MetaDataColumnStatsRead]: 各字段的统计信息
+        """
+        result = await self.db.execute(
+            select(MetaDataColumnStats)
+            .where(MetaDataColumnStats.table_id == table_id)
+            .order_by(MetaDataColumnStats.id)
+        )
+        return [MetaDataColumnStatsRead.model_validate(stats) for stats in result.scalars().all()]
+
+    async def _scan(self, connection: DataBaseConnection, table: MetaDataTable,
+                    profiles: List[ColumnProfile], sample_rows: int) -> None:
+        """
+        流式读取源表样本并累加到各字段统计
+        """
+        engine = source_engines.get_engine(connection, table.database_name)
+        preparer = engine.dialect.identifier_preparer
+        select_clause = ", ".join(preparer.quote(profile.column_name) for profile in profiles)
+        from_clause = preparer.quote(table.table_name)
+        if ConnectionType(connection.db_type) == ConnectionType.MYSQL:
+            from_clause = f"{preparer.quote(table.database_name)}.{from_clause}"
+        sql = text(f"SELECT {select_clause} FROM {from_clause} LIMIT :limit")
+
+        async with connector_health.guard(connection.id), engine.connect() as conn:
+            result = await conn.stream(sql, {"limit": sample_rows})
+            async for rows in result.partitions(1000):
+                for row in rows:
+                    for profile, value in zip(profiles, row):
+                        profile.add(value)
+
+
+async def run_profiling_job(table_id: uuid.UUID) -> None:
+    """
+    后台画像任务入口，使用独立的数据库会话
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            await ColumnProfilingService(db).profile_table(table_id)
+        except Exception:
+            logger.exception("Profiling job for metadata table %s failed", table_id)
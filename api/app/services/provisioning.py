@@ -0,0 +1,248 @@
+"""
+用户批量创建模块
+
+从 CSV 或 NDJSON 行流中批量创建用户，每批一个事务：
+
+- 逐行校验，重复的用户名或邮箱（本次上传内或库中已有）记为冲突
+- 每批一次查询找出库中已存在的用户名和邮箱
+- 只对需要创建的用户在进程池中并行哈希密码
+- 用户及其 normal_user 角色各用一条多行 INSERT 写入；
+  INSERT ... ON CONFLICT DO NOTHING RETURNING 兜底并发注册产生的冲突
+"""
+
+import csv
+import uuid
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.auth import (
+    RoleEnum,
+    User,
+    UserCreate,
+    UserProvisionItem,
+    UserProvisionResult,
+    UserRoles,
+)
+from app.services.passwords import PasswordHasher, PasswordHasherBusyError, password_hasher
+from app.utils.ndjson import LineDecodeError
+
+
+async def parse_ndjson_users(lines: AsyncIterator[Tuple[int, str]]) -> AsyncIterator[Tuple[int, object]]:
+    """
+    解析 NDJSON 行流
+
+    Yields:
+        Tuple[int, object]: (行号, UserCreate 或错误信息)
+    """
+    async for line_no, line in lines:
+        try:
+            yield line_no, UserCreate.model_validate_json(line)
+        except ValidationError as e:
+            yield line_no, str(e)
+
+
+async def parse_csv_users(lines: AsyncIterator[Tuple[int, str]]) -> AsyncIterator[Tuple[int, object]]:
+    """
+    解析 CSV 行流，第一行为表头（username,email,password,full_name）
+
+    Yields:
+        Tuple[int, object]: (行号, UserCreate 或错误信息)
+    """
+    header: Optional[List[str]] = None
+    # 同一个 csv.reader 消费整个行流，带引号的字段可以跨行；按引号奇偶判断记录是否结束，
+    # 记录完整后才交给 reader，行号取记录的起始行
+    pending: Deque[str] = deque()
+    reader = csv.reader(iter(pending.popleft, None))
+    start: Optional[int] = None
+    in_quotes = False
+    async for line_no, line in lines:
+        if start is None:
+            start = line_no
+        pending.append(line + "\n")
+        in_quotes ^= line.count('"') % 2 == 1
+        if in_quotes:
+            continue
+        record_no, start = start, None
+        values = next(reader)
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield record_no, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        row = {name: value for name, value in zip(header, values) if value != ""}
+        try:
+            yield record_no, UserCreate.model_validate(row)
+        except ValidationError as e:
+            yield record_no, str(e)
+    if start is not None:
+        yield start, "Unterminated quoted field"
+
+
+class UserProvisioningService:
+    """
+    用户批量创建服务类
+    """
+
+    def __init__(self, db: AsyncSession, batch_size: int = 500, hasher: PasswordHasher = password_hasher):
+        """
+        初始化批量创建服务
+
+        Args:
+            db: 数据库会话实例
+            batch_size: 每个事务创建的用户数量
+            hasher: 密码哈希器
+        """
+        self.db = db
+        self.batch_size = max(1, batch_size)
+        self.hasher = hasher
+
+    async def provision_users(self, rows: AsyncIterator[Tuple[int, object]]) -> UserProvisionResult:
+        """
+        批量创建用户
+
+        Args:
+            rows: (行号, UserCreate 或错误信息) 的异步迭代器
+
+        之前的批次已经提交，中途出错时不整体失败：非 UTF-8 的行记为该行无效，
+        密码哈希排队已满时当前批次回滚并逐行记为失败，两种情况都停止读取并返回已处理部分的结果。
+
+        Returns:
+            UserProvisionResult: 汇总及逐行结果（按行号排序）
+        """
+        report = UserProvisionResult()
+        # 本次上传中已出现的用户名和邮箱
+        seen_usernames: Set[str] = set()
+        seen_emails: Set[str] = set()
+        batch: List[Tuple[int, UserCreate]] = []
+
+        try:
+            try:
+                async for line_no, row in rows:
+                    report.total += 1
+                    if not isinstance(row, UserCreate):
+                        self._add(report, UserProvisionItem(line=line_no, status="invalid", error=row))
+                        continue
+                    if row.username in seen_usernames or row.email in seen_emails:
+                        self._add(report, UserProvisionItem(
+                            line=line_no, username=row.username, status="conflict",
+                            error="Duplicate username or email in upload"
+                        ))
+                        continue
+                    seen_usernames.add(row.username)
+                    seen_emails.add(row.email)
+                    batch.append((line_no, row))
+                    if len(batch) >= self.batch_size:
+                        await self._write_batch(batch, report)
+                        batch = []
+            except LineDecodeError as e:
+                report.total += 1
+                self._add(report, UserProvisionItem(
+                    line=e.line_no, status="invalid", error=f"Invalid UTF-8, upload stopped at this line: {e.reason}"
+                ))
+
+            if batch:
+                await self._write_batch(batch, report)
+        except PasswordHasherBusyError:
+            # 当前批次已回滚并逐行记为失败，其余行不再读取
+            pass
+        report.items.sort(key=lambda item: item.line)
+        return report
+
+    async def _write_batch(self, batch: List[Tuple[int, UserCreate]], report: UserProvisionResult) -> None:
+        """
+        在单个事务内创建一批用户，失败时整批回滚并记录到每一行
+        """
+        try:
+            # 一次查询找出库中已存在的用户名和邮箱
+            result = await self.db.execute(
+                select(User.username, User.email).where(or_(
+                    User.username.in_([row.username for _, row in batch]),
+                    User.email.in_([row.email for _, row in batch]),
+                ))
+            )
+            taken_usernames, taken_emails = set(), set()
+            for username, email in result:
+                taken_usernames.add(username)
+                taken_emails.add(email)
+
+            pending: List[Tuple[int, UserCreate]] = []
+            for line_no, row in batch:
+                if row.username in taken_usernames or row.email in taken_emails:
+                    self._add(report, UserProvisionItem(
+                        line=line_no, username=row.username, status="conflict",
+                        error="Username or email already registered"
+                    ))
+                else:
+                    pending.append((line_no, row))
+            if not pending:
+                return
+
+            hashed = await self.hasher.hash_many([row.password for _, row in pending])
+            user_rows = [
+                {
+                    "id": uuid.uuid4(),
+                    "username": row.username,
+                    "email": row.email,
+                    "hashed_password": hashed_password,
+                    "full_name": row.full_name,
+                    "is_active": row.is_active,
+                }
+                for (_, row), hashed_password in zip(pending, hashed)
+            ]
+            result = await self.db.execute(
+                pg_insert(User).values(user_rows).on_conflict_do_nothing().returning(User.id, User.username)
+            )
+            created: Dict[str, uuid.UUID] = {username: user_id for user_id, username in result}
+            if created:
+                await self.db.execute(insert(UserRoles).values([
+                    {"user_id": user_id, "role": RoleEnum.normal_user} for user_id in created.values()
+                ]))
+            await self.db.commit()
+        except PasswordHasherBusyError:
+            # 哈希器过载时停止上传；已提交的批次在重试时记为冲突
+            await self.db.rollback()
+            self._fail_batch(report, batch, "Password hasher is overloaded, upload stopped; retry the remaining rows")
+            raise
+        except Exception as e:
+            await self.db.rollback()
+            self._fail_batch(report, batch, str(e))
+            return
+
+        for line_no, row in pending:
+            if row.username in created:
+                self._add(report, UserProvisionItem(
+                    line=line_no, username=row.username, status="created", id=created[row.username]
+                ))
+            else:
+                self._add(report, UserProvisionItem(
+                    line=line_no, username=row.username, status="conflict",
+                    error="Username or email already registered"
+                ))
+
+    @classmethod
+    def _fail_batch(cls, report: UserProvisionResult, batch: List[Tuple[int, UserCreate]], error: str) -> None:
+        """
+        把批次中尚无结果的行记为失败
+        """
+        reported = {item.line for item in report.items}
+        for line_no, row in batch:
+            if line_no not in reported:
+                cls._add(report, UserProvisionItem(line=line_no, username=row.username, status="failed", error=error))
+
+    @staticmethod
+    def _add(report: UserProvisionResult, item: UserProvisionItem) -> None:
+        report.items.append(item)
+        if item.status == "created":
+            report.created += 1
+        elif item.status == "conflict":
+            report.conflicts += 1
+        elif item.status == "invalid":
+            report.invalid += 1
+        else:
+            report.failed += 1
@@ -0,0 +1,231 @@
+"""
+已删除资源清理模块
+
+ResourcesService.delete_resource 只把资源状态改为 DELETED，该模块负责在保留期之后物理删除这些资源，
+连同子类表记录（连接器、元数据表、目录资源）以及元数据表的字段、字段统计和工作区关联。
+
+- 按资源ID键集分页，每批一个事务，批量大小可配置，避免长时间持有表锁
+- 每批先以 FOR UPDATE SKIP LOCKED 锁定仍处于删除状态的候选行，只删除锁定的ID，避免误删刚恢复的资源
+- 批次之间休眠一段时间，降低对在线查询的影响
+- 仍被元数据表引用的连接器本轮跳过，待元数据表清理后再删除
+- 进度（批次数、删除行数、当前位置）保存在内存中，可通过接口查询
+"""
+
+import asyncio
+import datetime
+import logging
+import uuid
+from typing import List, Optional
+
+from sqlalchemy import Select, delete, exists, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.db import AsyncSessionLocal
+from app.config.settings import settings
+from app.models.catalog import CatalogItem, CatalogResource
+from app.models.connections import DataBaseConnection
+from app.models.metadata import MetaDataColumnStats, MetaDataTable, MetaDataTableColumn
+from app.models.resources import ResourcePurgeProgress, Resources, ResourcesState
+from app.models.workspace import WorkspaceResources
+from app.services.catalog import catalog_tree_cache
+
+
+logger = logging.getLogger(__name__)
+
+
+class ResourcePurgeService:
+    """
+    已删除资源清理服务类
+    """
+
+    def __init__(self, db: AsyncSession, batch_size: int = 200, throttle_seconds: float = 0.2,
+                 progress: Optional[ResourcePurgeProgress] = None):
+        """
+        初始化清理服务
+
+        Args:
+            db: 数据库会话实例
+            batch_size: 每个事务删除的资源数量
+            throttle_seconds: 批次之间的休眠时间（秒）
+            progress: 进度对象，清理过程中原地更新
+        """
+        self.db = db
+        self.batch_size = max(1, batch_size)
+        self.throttle_seconds = throttle_seconds
+        self.progress = progress or ResourcePurgeProgress()
+
+    @staticmethod
+    def purge_candidates_query(cutoff: datetime.datetime,
+                               after: Optional[uuid.UUID],
+                               limit: int) -> Select:
+        """
+        构建下一批待清理资源ID的查询，命中部分索引 ix_resources_deleted_id
+
+        Args:
+            cutoff: 保留期截止时间，早于该时间删除的资源才会被清理
+            after: 上一批最后一个资源ID
+            limit: 本批数量
+
+        Returns:
+            Select: 查询 (id, 是否仍被元数据表引用)
+        """
+        referenced = exists().where(
+            MetaDataTable.connection_id == Resources.id,
+        ).label("referenced")
+        query = (
+            select(Resources.id, referenced)
+            .where(Resources.state == ResourcesState.DELETED, Resources.updated_at < cutoff)
+            .order_by(Resources.id)
+            .limit(limit)
+        )
+        if after is not None:
+            query = query.where(Resources.id > after)
+        return query
+
+    @staticmethod
+    def lock_batch_query(ids: List[uuid.UUID], cutoff: datetime.datetime) -> Select:
+        """
+        构建锁定一批候选资源的查询：重新校验删除状态、保留期和引用关系，
+        跳过已被其他事务锁定的行（例如正在恢复的资源），只有锁定的ID才会被删除
+
+        Args:
+            ids: 候选资源ID
+            cutoff: 保留期截止时间
+
+        Returns:
+            Select: 查询锁定的资源ID
+        """
+        return (
+            select(Resources.id)
+            .where(
+                Resources.id.in_(ids),
+                Resources.state == ResourcesState.DELETED,
+                Resources.updated_at < cutoff,
+                ~exists().where(MetaDataTable.connection_id == Resources.id),
+            )
+            .with_for_update(of=Resources, skip_locked=True)
+        )
+
+    async def purge(self, retention_days: int) -> ResourcePurgeProgress:
+        """
+        清理删除时间早于保留期的资源
+
+        Args:
+            retention_days: 保留天数
+
+        Returns:
+            ResourcePurgeProgress: 清理结果
+        """
+        progress = self.progress
+        progress.running = True
+        progress.retention_days = retention_days
+        progress.cutoff = datetime.datetime.now() - datetime.timedelta(days=retention_days)
+        progress.started_at = datetime.datetime.now()
+
+        after: Optional[uuid.UUID] = None
+        while True:
+            result = await self.db.execute(
+                self.purge_candidates_query(progress.cutoff, after, self.batch_size)
+            )
+            rows = result.all()
+            if not rows:
+                break
+
+            after = rows[-1].id
+            ids = [row.id for row in rows if not row.referenced]
+            progress.skipped += len(rows) - len(ids)
+            if ids:
+                await self._delete_batch(ids, progress.cutoff)
+            progress.batches += 1
+            progress.last_id = after
+            logger.info(
+                "Purge batch %d: %d resources, %d columns deleted so far",
+                progress.batches, progress.resources_deleted, progress.columns_deleted,
+            )
+
+            if len(rows) < self.batch_size:
+                break
+            if self.throttle_seconds > 0:
+                await asyncio.sleep(self.throttle_seconds)
+
+        progress.running = False
+        progress.finished_at = datetime.datetime.now()
+        return progress
+
+    async def _delete_batch(self, ids: List[uuid.UUID], cutoff: datetime.datetime) -> None:
+        """
+        在一个事务内删除一批资源及其全部依赖记录
+
+        候选查询与删除之间资源可能已被恢复，先锁定仍满足条件的行，只删除锁定的ID
+        """
+        try:
+            result = await self.db.execute(self.lock_batch_query(ids, cutoff))
+            ids = list(result.scalars().all())
+            if not ids:
+                await self.db.commit()
+                return
+            await self.db.execute(delete(MetaDataColumnStats).where(MetaDataColumnStats.table_id.in_(ids)))
+            result = await self.db.execute(
+                delete(MetaDataTableColumn).where(MetaDataTableColumn.table_id.in_(ids))
+            )
+            columns_deleted = result.rowcount
+            await self.db.execute(delete(WorkspaceResources).where(WorkspaceResources.resource_id.in_(ids)))
+            result = await self.db.execute(
+                update(CatalogItem)
+                .where(CatalogItem.resource_id.in_(ids))
+                .values(resource_id=None)
+                .returning(CatalogItem.workspace_id)
+            )
+            catalog_workspace_ids = set(result.scalars().all())
+            for subclass in (MetaDataTable, DataBaseConnection, CatalogResource):
+                await self.db.execute(delete(subclass.__table__).where(subclass.__table__.c.id.in_(ids)))
+            result = await self.db.execute(
+                delete(Resources)
+                .where(Resources.id.in_(ids))
+                .execution_options(synchronize_session=False)
+            )
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+        for workspace_id in catalog_workspace_ids:
+            catalog_tree_cache.invalidate(workspace_id)
+        self.progress.columns_deleted += columns_deleted
+        self.progress.resources_deleted += result.rowcount
+
+
+# 最近一次（或正在进行的）清理任务进度
+_purge_progress = ResourcePurgeProgress()
+_purge_lock = asyncio.Lock()
+
+
+def get_purge_progress() -> ResourcePurgeProgress:
+    """
+    获取最近一次（或正在进行的）清理任务进度
+    """
+    return _purge_progress
+
+
+async def run_purge_job(retention_days: Optional[int] = None) -> None:
+    """
+    后台清理任务入口，使用独立的数据库会话；同一时间只运行一个清理任务
+    """
+    global _purge_progress
+    if _purge_lock.locked():
+        return
+    async with _purge_lock:
+        _purge_progress = progress = ResourcePurgeProgress()
+        async with AsyncSessionLocal() as db:
+            service = ResourcePurgeService(
+                db,
+                batch_size=settings.RESOURCE_PURGE_BATCH_SIZE,
+                throttle_seconds=settings.RESOURCE_PURGE_THROTTLE_SECONDS,
+                progress=progress,
+            )
+            try:
+                await service.purge(retention_days or settings.RESOURCE_PURGE_RETENTION_DAYS)
+            except Exception as e:
+                progress.running = False
+                progress.error = str(e)
+                progress.finished_at = datetime.datetime.now()
+                logger.exception("Resource purge job failed")
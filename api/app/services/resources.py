@@ -18,11 +18,36 @@ Service 层负责处理与 Resources 相关的业务逻辑，包括创建、查
 - 提供资源与用户关联的操作支持
 """
 
+import datetime
 import uuid
-from typing import List, Optional
-from app.config.db import AsyncSession
-from sqlalchemy import select
-from app.models.resources import Resources, ResourcesType, ResourcesState
+from typing import List, Optional, Sequence
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Select, any_, bindparam, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.orm import load_only, with_polymorphic
+from app.models.resources import (
+    Resources,
+    ResourcesType,
+    ResourcesState,
+    TypedResourceRead,
+    ResourceRead,
+    ResourceFilter,
+    ResourceBulkItemResult,
+    ResourceBulkResult,
+    TYPED_RESOURCE_READ_MODELS
+)
+from app.models.connections import DataBaseConnection
+from app.models.metadata import MetaDataTable
+from app.models.catalog import CatalogResource
+from app.models.changes import ChangeAction
+from app.services.changes import record_change
+
+# 资源类型对应的子类映射
+RESOURCE_SUBCLASSES = {
+    ResourcesType.CONNECTOR: DataBaseConnection,
+    ResourcesType.METADATA: MetaDataTable,
+    ResourcesType.CATALOG: CatalogResource,
+}
 
 
 class ResourcesService:
@@ -64,6 +89,8 @@ class ResourcesService:
             created_by=user_id,
         )
         self.db.add(db_resource)
+        await self.db.flush()
+        record_change(self.db, db_resource.type, db_resource.id, ChangeAction.CREATE, user_id)
         await self.db.commit()
         return db_resource
 
@@ -113,6 +140,77 @@ class ResourcesService:
         resources = result.scalars().all()
         return list(resources)
 
+    @staticmethod
+    def typed_resources_query(type: Optional[ResourcesType] = None) -> Select:
+        """
+        构建一次性加载各子类字段的多态查询
+
+        使用 with_polymorphic 对子表做 LEFT OUTER JOIN，返回的对象即为对应子类实例；
+        指定类型时只关联该类型的子表。SELECT 只包含响应模型用到的列，
+        连接密码、软删除标记等不返回的列不会被读取。
+
+        Args:
+            type: 资源类型筛选条件（可选）
+
+        Returns:
+            Select: 查询语句
+        """
+        if type is None:
+            subclasses = list(RESOURCE_SUBCLASSES.items())
+        elif type in RESOURCE_SUBCLASSES:
+            subclasses = [(type, RESOURCE_SUBCLASSES[type])]
+        else:
+            subclasses = []
+        entity = with_polymorphic(Resources, [cls for _, cls in subclasses]) if subclasses else Resources
+
+        options = [load_only(*(getattr(entity, name) for name in ResourceRead.model_fields))]
+        for resource_type, cls in subclasses:
+            sub_entity = getattr(entity, cls.__name__)
+            options.append(load_only(*(
+                getattr(sub_entity, name)
+                for name in TYPED_RESOURCE_READ_MODELS[resource_type].model_fields
+                if name not in ResourceRead.model_fields
+            )))
+        query = select(entity).options(*options)
+        if type is not None:
+            query = query.where(entity.type == type)
+        return query
+
+    async def get_typed_resources(self, skip: int = 0, limit: int = 100,
+                                  type: Optional[ResourcesType] = None,
+                                  state: Optional[ResourcesState] = None,
+                                  created_by: Optional[uuid.UUID] = None,
+                                  resource_ids: Optional[Sequence[uuid.UUID]] = None) -> List[TypedResourceRead]:
+        """
+        获取带子类字段的资源列表，单条SQL完成
+
+        Args:
+            skip: 跳过的记录数，默认为0
+            limit: 返回的记录数限制，默认为100
+            type: 资源类型筛选条件（可选）
+            state: 资源状态筛选条件（可选）
+            created_by: 创建者ID筛选条件（可选）
+            resource_ids: 资源ID筛选条件（可选），如租户索引给出的工作区资源
+
+        Returns:
+            List[TypedResourceRead]: 按资源类型转换后的响应模型列表
+        """
+        query = self.typed_resources_query(type)
+        if state:
+            query = query.where(Resources.state == state)
+        if created_by:
+            query = query.where(Resources.created_by == created_by)
+        if resource_ids is not None:
+            query = query.where(
+                Resources.id == any_(bindparam("resource_ids", list(resource_ids), type_=ARRAY(UUID(as_uuid=True))))
+            )
+
+        result = await self.db.execute(query.order_by(Resources.id).offset(skip).limit(limit))
+        return [
+            TYPED_RESOURCE_READ_MODELS.get(resource.type, ResourceRead).model_validate(resource)
+            for resource in result.scalars().all()
+        ]
+
     async def update_resource(self, resource_id: uuid.UUID, **kwargs) -> Optional[Resources]:
         """
         更新资源信息
@@ -135,6 +233,8 @@ class ResourcesService:
             if hasattr(db_resource, field) and field != 'id':
                 setattr(db_resource, field, value)
 
+        action = ChangeAction.DELETE if kwargs.get('state') == ResourcesState.DELETED else ChangeAction.UPDATE
+        record_change(self.db, db_resource.type, db_resource.id, action)
         await self.db.commit()
         await self.db.refresh(db_resource)
         return db_resource
@@ -152,6 +252,120 @@ class ResourcesService:
         result = await self.update_resource(resource_id, state=ResourcesState.DELETED)
         return result is not None
 
+    async def bulk_update_state(self,
+                                state: ResourcesState,
+                                ids: Optional[Sequence[uuid.UUID]] = None,
+                                filter: Optional[ResourceFilter] = None,
+                                created_by: Optional[uuid.UUID] = None,
+                                chunk_size: int = 1000) -> ResourceBulkResult:
+        """
+        批量变更资源状态，每块一条 UPDATE ... WHERE id = ANY(:ids) RETURNING，每块一个事务
+
+        已处于目标状态的资源不会被更新（updated_at 保持不变）。
+
+        Args:
+            state: 目标状态
+            ids: 资源ID列表，与 filter 二选一
+            filter: 资源筛选条件，与 ids 二选一
+            created_by: 限定创建者，其他用户的资源按不存在处理
+            chunk_size: 每块的资源数量
+
+        Returns:
+            ResourceBulkResult: 汇总及逐个资源的结果（按筛选条件操作时只包含已更新的资源）
+        """
+        report = ResourceBulkResult()
+        chunk_size = max(1, chunk_size)
+
+        if ids is not None:
+            unique_ids = list(dict.fromkeys(ids))
+            for start in range(0, len(unique_ids), chunk_size):
+                chunk = unique_ids[start:start + chunk_size]
+                updated = await self._update_state_chunk(chunk, state, created_by)
+                await self.db.commit()
+                await self._report_chunk(report, chunk, updated, state, created_by)
+            return report
+
+        # 按筛选条件：键集分页取出一块ID后更新，已更新的资源不再满足 state != 目标状态
+        after: Optional[uuid.UUID] = None
+        while True:
+            query = select(Resources.id).where(Resources.state != state)
+            if filter is not None and filter.type is not None:
+                query = query.where(Resources.type == filter.type)
+            if filter is not None and filter.state is not None:
+                query = query.where(Resources.state == filter.state)
+            if created_by is not None:
+                query = query.where(Resources.created_by == created_by)
+            if after is not None:
+                query = query.where(Resources.id > after)
+            result = await self.db.execute(query.order_by(Resources.id).limit(chunk_size))
+            chunk = list(result.scalars().all())
+            if not chunk:
+                break
+            after = chunk[-1]
+            updated = await self._update_state_chunk(chunk, state, created_by)
+            await self.db.commit()
+            report.updated += len(updated)
+            report.items.extend(ResourceBulkItemResult(id=i, status="updated", state=state) for i in updated)
+            if len(chunk) < chunk_size:
+                break
+        return report
+
+    async def _update_state_chunk(self, ids: List[uuid.UUID], state: ResourcesState,
+                                  created_by: Optional[uuid.UUID] = None) -> List[uuid.UUID]:
+        """
+        更新一块资源的状态并在同一事务内记录变更，返回实际更新的资源ID
+
+        指定 created_by 时只更新该用户创建的资源，并作为变更记录的操作者
+        """
+        query = update(Resources).where(
+            Resources.id == any_(bindparam("ids", ids, type_=ARRAY(UUID(as_uuid=True)))),
+            Resources.state != state,
+        )
+        if created_by is not None:
+            query = query.where(Resources.created_by == created_by)
+        result = await self.db.execute(
+            query
+            .values(state=state, updated_at=datetime.datetime.now())
+            .returning(Resources.id, Resources.type)
+            .execution_options(synchronize_session=False)
+        )
+        rows = result.all()
+        action = ChangeAction.DELETE if state == ResourcesState.DELETED else ChangeAction.UPDATE
+        for row in rows:
+            record_change(self.db, row.type, row.id, action, created_by)
+        return [row.id for row in rows]
+
+    async def _report_chunk(self, report: ResourceBulkResult, chunk: List[uuid.UUID],
+                            updated: List[uuid.UUID], state: ResourcesState,
+                            created_by: Optional[uuid.UUID] = None) -> None:
+        """
+        汇总一块的结果；未更新的资源再查一次以区分"已是目标状态"和"不存在"（含其他用户的资源）
+        """
+        updated_set = set(updated)
+        remaining = [i for i in chunk if i not in updated_set]
+        existing = {}
+        if remaining:
+            query = select(Resources.id, Resources.state).where(
+                Resources.id == any_(bindparam("ids", remaining, type_=ARRAY(UUID(as_uuid=True))))
+            )
+            if created_by is not None:
+                query = query.where(Resources.created_by == created_by)
+            result = await self.db.execute(query)
+            existing = {row.id: row.state for row in result}
+
+        for resource_id in chunk:
+            if resource_id in updated_set:
+                report.updated += 1
+                report.items.append(ResourceBulkItemResult(id=resource_id, status="updated", state=state))
+            elif resource_id in existing:
+                report.unchanged += 1
+                report.items.append(ResourceBulkItemResult(
+                    id=resource_id, status="unchanged", state=existing[resource_id]
+                ))
+            else:
+                report.not_found += 1
+                report.items.append(ResourceBulkItemResult(id=resource_id, status="not_found"))
+
     async def get_resources_by_type(self, type: ResourcesType, skip: int = 0, 
                               limit: int = 100) -> List[Resources]:
         """
@@ -0,0 +1,207 @@
+"""
+源库引擎缓存模块
+
+为连接器指向的源数据库（PostgreSQL / MySQL）维护共享的异步引擎，
+按 (connection_id, database) 复用连接池，避免每次查询都创建并销毁引擎。
+
+- 引擎数量有上限，超出时按最近最少使用淘汰并释放连接池
+- 连接器配置（地址、账号、密码等）变化时自动重建引擎
+- 更新或删除连接器时调用 invalidate 主动失效
+- 健康探测使用不经过缓存的无连接池引擎，不挤占查询使用的连接池
+"""
+
+import asyncio
+import uuid
+from collections import OrderedDict
+from typing import Optional, Set, Tuple
+
+from sqlalchemy.engine import URL
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.config.settings import settings
+from app.models.connections import ConnectionType, DataBaseConnection
+from app.utils.sercret import get_decrypted_password
+
+EngineKey = Tuple[uuid.UUID, Optional[str]]
+
+
+# 可通过 SQLAlchemy 异步引擎访问的源库驱动
+SOURCE_DRIVERS = {
+    ConnectionType.POSTGRESQL: "postgresql+asyncpg",
+    ConnectionType.MYSQL: "mysql+aiomysql",
+}
+
+# 各驱动的建连超时参数名
+CONNECT_TIMEOUT_ARGS = {
+    ConnectionType.POSTGRESQL: "timeout",
+    ConnectionType.MYSQL: "connect_timeout",
+}
+
+
+def build_source_url(db_connection: DataBaseConnection, database: Optional[str] = None) -> URL:
+    """
+    根据连接器配置构建源库的异步连接URL（密码已解密）
+
+    Args:
+        db_connection: 数据库连接器
+        database: 要连接的数据库，默认为连接器配置的数据库
+
+    Returns:
+        URL: SQLAlchemy 连接URL
+    """
+    db_type = ConnectionType(db_connection.db_type)
+    if db_type not in SOURCE_DRIVERS:
+        raise ValueError(f"Unsupported database type: {db_type.value}")
+    return URL.create(
+        SOURCE_DRIVERS[db_type],
+        username=db_connection.username,
+        password=get_decrypted_password(db_connection.password, settings.DATASOURCE_KEY),
+        host=db_connection.host,
+        port=db_connection.port,
+        database=database or db_connection.database,
+    )
+
+
+def create_probe_engine(db_connection: DataBaseConnection,
+                        connect_timeout: int = settings.SOURCE_ENGINE_CONNECT_TIMEOUT) -> AsyncEngine:
+    """
+    创建不带连接池的源库引擎，每次 connect 都新建连接，用后需调用 dispose
+
+    Args:
+        db_connection: 数据库连接器
+        connect_timeout: 建立连接的超时时间（秒）
+
+    Returns:
+        AsyncEngine: 使用 NullPool 的异步引擎
+    """
+    return create_async_engine(
+        build_source_url(db_connection),
+        poolclass=NullPool,
+        connect_args={CONNECT_TIMEOUT_ARGS[ConnectionType(db_connection.db_type)]: connect_timeout},
+    )
+
+
+class SourceEngineCache:
+    """
+    源库异步引擎缓存
+    """
+
+    def __init__(self, max_engines: int = 32, pool_size: int = 2,
+                 max_overflow: int = 3, pool_recycle: int = 1800, connect_timeout: int = 10):
+        """
+        初始化引擎缓存
+
+        Args:
+            max_engines: 最多同时保留的引擎（连接池）数量
+            pool_size: 每个引擎的常驻连接数
+            max_overflow: 每个引擎允许的额外连接数
+            pool_recycle: 连接回收时间（秒）
+            connect_timeout: 建立连接的超时时间（秒）
+        """
+        self.max_engines = max(1, max_engines)
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.pool_recycle = pool_recycle
+        self.connect_timeout = connect_timeout
+        self._engines: "OrderedDict[EngineKey, Tuple[tuple, AsyncEngine]]" = OrderedDict()
+        self._disposing: Set[asyncio.Task] = set()
+
+    @staticmethod
+    def _fingerprint(db_connection: DataBaseConnection) -> tuple:
+        """
+        连接器配置指纹，任一字段变化都需要重建引擎
+        """
+        return (
+            str(db_connection.db_type),
+            db_connection.host,
+            db_connection.port,
+            db_connection.database,
+            db_connection.username,
+            db_connection.password,
+        )
+
+    def get_engine(self, db_connection: DataBaseConnection, database: Optional[str] = None) -> AsyncEngine:
+        """
+        获取连接器对应的异步引擎，不存在或配置已变化时创建
+
+        Args:
+            db_connection: 数据库连接器
+            database: 要连接的数据库，默认为连接器配置的数据库
+
+        Returns:
+            AsyncEngine: 可复用的异步引擎
+        """
+        key = (db_connection.id, database or db_connection.database)
+        fingerprint = self._fingerprint(db_connection)
+
+        entry = self._engines.get(key)
+        if entry is not None:
+            if entry[0] == fingerprint:
+                self._engines.move_to_end(key)
+                return entry[1]
+            self._discard(key)
+
+        url = build_source_url(db_connection, database)
+        engine = create_async_engine(
+            url,
+            pool_size=self.pool_size,
+            max_overflow=self.max_overflow,
+            pool_recycle=self.pool_recycle,
+            pool_timeout=self.connect_timeout,
+            pool_pre_ping=True,
+            connect_args={CONNECT_TIMEOUT_ARGS[ConnectionType(db_connection.db_type)]: self.connect_timeout},
+        )
+        self._engines[key] = (fingerprint, engine)
+        while len(self._engines) > self.max_engines:
+            self._discard(next(iter(self._engines)))
+        return engine
+
+    async def invalidate(self, connection_id: uuid.UUID) -> None:
+        """
+        失效某个连接器的全部引擎
+
+        Args:
+            connection_id: 连接器ID
+        """
+        keys = [key for key in self._engines if key[0] == connection_id]
+        engines = [self._engines.pop(key)[1] for key in keys]
+        for engine in engines:
+            await engine.dispose()
+
+    async def dispose_all(self) -> None:
+        """
+        释放全部引擎，应用关闭时调用
+        """
+        engines = [engine for _, engine in self._engines.values()]
+        self._engines.clear()
+        for engine in engines:
+            await engine.dispose()
+        if self._disposing:
+            await asyncio.gather(*self._disposing, return_exceptions=True)
+
+    def __len__(self) -> int:
+        return len(self._engines)
+
+    def _discard(self, key: EngineKey) -> None:
+        """
+        移除引擎并在后台释放其连接池；已借出的连接归还时会被直接关闭
+        """
+        _, engine = self._engines.pop(key)
+        try:
+            task = asyncio.get_running_loop().create_task(engine.dispose())
+        except RuntimeError:
+            # 没有运行中的事件循环时，引擎被回收时连接池随之释放
+            return
+        self._disposing.add(task)
+        task.add_done_callback(self._disposing.discard)
+
+
+# 全局共享的源库引擎缓存
+source_engines = SourceEngineCache(
+    max_engines=settings.SOURCE_ENGINE_CACHE_SIZE,
+    pool_size=settings.SOURCE_ENGINE_POOL_SIZE,
+    max_overflow=settings.SOURCE_ENGINE_MAX_OVERFLOW,
+    pool_recycle=settings.SOURCE_ENGINE_POOL_RECYCLE,
+    connect_timeout=settings.SOURCE_ENGINE_CONNECT_TIMEOUT,
+)
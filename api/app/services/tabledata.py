@@ -4,7 +4,8 @@
 该模块提供基于元数据配置的数据查询功能。
 """
 
-from typing import Dict, Any
+import uuid
+from typing import Dict, Any, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from app.models.metadata import QueryParams
@@ -29,7 +30,9 @@ class TableDataService:
     async def query_table_data(
         self, 
         table_name: str, 
-        query_params: QueryParams
+        query_params: QueryParams,
+        connection_id: Optional[uuid.UUID] = None,
+        database_name: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         根据元数据配置查询表格数据
@@ -37,12 +40,16 @@ class TableDataService:
         Args:
             table_name: 表名
             query_params: 查询参数
+            connection_id: 连接器ID（可选，用于消除同名表歧义）
+            database_name: 数据库名（可选，用于消除同名表歧义）
 
         Returns:
             Dict[str, Any]: 查询结果，包括数据、总数、分页信息等
         """
         # 获取表配置
-        table_config = await self.metadata_service.get_metadata_table_by_name(table_name)
+        table_config = await self.metadata_service.get_metadata_table_by_name(
+            table_name, connection_id=connection_id, database_name=database_name
+        )
         if not table_config:
             raise ValueError(f"Table configuration for '{table_name}' not found")
         
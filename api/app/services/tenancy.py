@@ -0,0 +1,390 @@
+"""
+租户索引模块
+
+在进程内维护工作区的租户关系，资源范围和变更可见性判断不查询数据库：
+
+- 用户 → 可访问的工作区ID（拥有或加入），工作区 → 未删除的资源ID，均为有序数组，用二分查找判断
+- 启动时从数据库全量加载，之后由后台任务定期重建，覆盖其他进程及 Core 批量语句的修改
+- 本进程内通过 ORM 写入的修改在事务提交后增量应用，回滚时丢弃
+- 首次加载完成前回退为查询数据库
+"""
+
+import asyncio
+import logging
+import uuid
+from bisect import bisect_left, insort
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import Select, event, or_, select
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+
+from app.config.db import AsyncSessionLocal
+from app.config.settings import settings
+from app.models.resources import Resources
+from app.models.workspace import Workspaces, WorkspaceResources, WorkspaceUsers
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TenancySnapshot:
+    """从数据库加载的租户关系"""
+    owners: List[Tuple[uuid.UUID, uuid.UUID]] = field(default_factory=list)  # (工作区ID, 所有者ID)
+    members: List[Tuple[uuid.UUID, uuid.UUID]] = field(default_factory=list)  # (工作区ID, 用户ID)
+    resources: List[Tuple[uuid.UUID, uuid.UUID]] = field(default_factory=list)  # (工作区ID, 资源ID)
+
+
+async def load_tenancy() -> TenancySnapshot:
+    """
+    加载全部未删除的工作区、成员关系和资源关系（删除中工作区的成员和资源不会被访问到）
+    """
+    async with AsyncSessionLocal() as db:
+        owners = await db.execute(select(Workspaces.id, Workspaces.owner_id).where(Workspaces.state != 'D'))
+        members = await db.execute(
+            select(WorkspaceUsers.workspace_id, WorkspaceUsers.user_id).where(WorkspaceUsers.state != 'D')
+        )
+        resources = await db.execute(
+            select(WorkspaceResources.workspace_id, WorkspaceResources.resource_id)
+            .where(WorkspaceResources.state != 'D')
+        )
+        return TenancySnapshot(
+            owners=[tuple(row) for row in owners],
+            members=[tuple(row) for row in members],
+            resources=[tuple(row) for row in resources],
+        )
+
+
+def _contains(ids: List[uuid.UUID], value: uuid.UUID) -> bool:
+    i = bisect_left(ids, value)
+    return i < len(ids) and ids[i] == value
+
+
+def _insert(ids: List[uuid.UUID], value: uuid.UUID) -> None:
+    if not _contains(ids, value):
+        insort(ids, value)
+
+
+def _remove(ids: List[uuid.UUID], value: uuid.UUID) -> None:
+    i = bisect_left(ids, value)
+    if i < len(ids) and ids[i] == value:
+        del ids[i]
+
+
+class _Tables:
+    """一份完整的租户关系索引"""
+
+    def __init__(self):
+        self.owners: Dict[uuid.UUID, uuid.UUID] = {}
+        self.members: Dict[uuid.UUID, Set[uuid.UUID]] = {}
+        # 用户 → 可访问的工作区（有序）
+        self.user_workspaces: Dict[uuid.UUID, List[uuid.UUID]] = {}
+        # 工作区 → 资源（有序）
+        self.workspace_resources: Dict[uuid.UUID, List[uuid.UUID]] = {}
+
+    def _reindex_user(self, user_id: uuid.UUID, workspace_id: uuid.UUID) -> None:
+        ids = self.user_workspaces.setdefault(user_id, [])
+        if self.owners.get(workspace_id) == user_id or user_id in self.members.get(workspace_id, ()):
+            _insert(ids, workspace_id)
+        else:
+            _remove(ids, workspace_id)
+            if not ids:
+                del self.user_workspaces[user_id]
+
+    def set_owner(self, workspace_id: uuid.UUID, owner_id: uuid.UUID) -> None:
+        previous = self.owners.get(workspace_id)
+        self.owners[workspace_id] = owner_id
+        if previous is not None and previous != owner_id:
+            self._reindex_user(previous, workspace_id)
+        self._reindex_user(owner_id, workspace_id)
+
+    def remove_workspace(self, workspace_id: uuid.UUID) -> None:
+        owner_id = self.owners.pop(workspace_id, None)
+        users = self.members.pop(workspace_id, set())
+        self.workspace_resources.pop(workspace_id, None)
+        for user_id in users | ({owner_id} if owner_id else set()):
+            self._reindex_user(user_id, workspace_id)
+
+    def add_member(self, workspace_id: uuid.UUID, user_id: uuid.UUID) -> None:
+        self.members.setdefault(workspace_id, set()).add(user_id)
+        self._reindex_user(user_id, workspace_id)
+
+    def remove_member(self, workspace_id: uuid.UUID, user_id: uuid.UUID) -> None:
+        users = self.members.get(workspace_id)
+        if users is not None:
+            users.discard(user_id)
+            if not users:
+                del self.members[workspace_id]
+        self._reindex_user(user_id, workspace_id)
+
+    def add_resource(self, workspace_id: uuid.UUID, resource_id: uuid.UUID) -> None:
+        _insert(self.workspace_resources.setdefault(workspace_id, []), resource_id)
+
+    def remove_resource(self, workspace_id: uuid.UUID, resource_id: uuid.UUID) -> None:
+        ids = self.workspace_resources.get(workspace_id)
+        if ids is not None:
+            _remove(ids, resource_id)
+            if not ids:
+                del self.workspace_resources[workspace_id]
+
+    @classmethod
+    def build(cls, snapshot: TenancySnapshot) -> "_Tables":
+        tables = cls()
+        for workspace_id, owner_id in snapshot.owners:
+            tables.owners[workspace_id] = owner_id
+        for workspace_id, user_id in snapshot.members:
+            tables.members.setdefault(workspace_id, set()).add(user_id)
+
+        user_workspaces: Dict[uuid.UUID, Set[uuid.UUID]] = {}
+        for workspace_id, owner_id in tables.owners.items():
+            user_workspaces.setdefault(owner_id, set()).add(workspace_id)
+        for workspace_id, users in tables.members.items():
+            for user_id in users:
+                user_workspaces.setdefault(user_id, set()).add(workspace_id)
+        tables.user_workspaces = {user_id: sorted(ids) for user_id, ids in user_workspaces.items()}
+
+        workspace_resources: Dict[uuid.UUID, Set[uuid.UUID]] = {}
+        for workspace_id, resource_id in snapshot.resources:
+            workspace_resources.setdefault(workspace_id, set()).add(resource_id)
+        tables.workspace_resources = {ws_id: sorted(ids) for ws_id, ids in workspace_resources.items()}
+        return tables
+
+
+# 增量修改：(操作名, 参数)
+TenancyChange = Tuple[str, tuple]
+
+
+class TenancyIndex:
+    """
+    进程内的租户关系索引
+    """
+
+    def __init__(self, refresh_seconds: float = 300,
+                 loader: Callable[[], Awaitable[TenancySnapshot]] = load_tenancy):
+        """
+        初始化租户索引
+
+        Args:
+            refresh_seconds: 从数据库重建索引的间隔（秒），也是其他进程修改的最长生效延迟
+            loader: 加载全部租户关系的函数
+        """
+        self.refresh_seconds = refresh_seconds
+        self.loader = loader
+        self._tables = _Tables()
+        self._ready = False
+        # 重建期间应用的增量修改，重建完成后在新索引上重放
+        self._replay: Optional[List[TenancyChange]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    def apply(self, changes: List[TenancyChange]) -> None:
+        """
+        应用已提交的增量修改
+        """
+        for name, args in changes:
+            getattr(self._tables, name)(*args)
+        if self._replay is not None:
+            self._replay.extend(changes)
+
+    def set_owner(self, workspace_id: uuid.UUID, owner_id: uuid.UUID) -> None:
+        self.apply([("set_owner", (workspace_id, owner_id))])
+
+    def remove_workspace(self, workspace_id: uuid.UUID) -> None:
+        self.apply([("remove_workspace", (workspace_id,))])
+
+    def add_members(self, workspace_id: uuid.UUID, user_ids: List[uuid.UUID]) -> None:
+        self.apply([("add_member", (workspace_id, user_id)) for user_id in user_ids])
+
+    def remove_members(self, workspace_id: uuid.UUID, user_ids: List[uuid.UUID]) -> None:
+        self.apply([("remove_member", (workspace_id, user_id)) for user_id in user_ids])
+
+    def add_resources(self, workspace_id: uuid.UUID, resource_ids: List[uuid.UUID]) -> None:
+        self.apply([("add_resource", (workspace_id, resource_id)) for resource_id in resource_ids])
+
+    def remove_resources(self, workspace_id: uuid.UUID, resource_ids: List[uuid.UUID]) -> None:
+        self.apply([("remove_resource", (workspace_id, resource_id)) for resource_id in resource_ids])
+
+    def has_workspace(self, workspace_id: uuid.UUID) -> bool:
+        return workspace_id in self._tables.owners
+
+    def has_access(self, user_id: uuid.UUID, workspace_id: uuid.UUID) -> bool:
+        """
+        判断用户是否拥有或加入了工作区
+        """
+        return _contains(self._tables.user_workspaces.get(user_id, []), workspace_id)
+
+    def workspaces_of(self, user_id: uuid.UUID) -> List[uuid.UUID]:
+        """
+        用户可访问的工作区ID（有序）
+        """
+        return list(self._tables.user_workspaces.get(user_id, []))
+
+    def resources_of(self, workspace_id: uuid.UUID) -> List[uuid.UUID]:
+        """
+        工作区内未删除的资源ID（有序）
+        """
+        return list(self._tables.workspace_resources.get(workspace_id, []))
+
+    def can_see_resource(self, user_id: uuid.UUID, resource_id: uuid.UUID) -> bool:
+        """
+        判断资源是否位于用户可访问的某个工作区内
+        """
+        return any(
+            _contains(self._tables.workspace_resources.get(workspace_id, []), resource_id)
+            for workspace_id in self._tables.user_workspaces.get(user_id, [])
+        )
+
+    def visible_resources(self, user_id: uuid.UUID) -> List[uuid.UUID]:
+        """
+        用户可访问的全部工作区内的资源ID（有序去重）
+        """
+        ids: Set[uuid.UUID] = set()
+        for workspace_id in self._tables.user_workspaces.get(user_id, []):
+            ids.update(self._tables.workspace_resources.get(workspace_id, ()))
+        return sorted(ids)
+
+    async def refresh(self) -> None:
+        """
+        从数据库重建索引
+        """
+        self._replay = []
+        try:
+            tables = _Tables.build(await self.loader())
+            for name, args in self._replay:
+                getattr(tables, name)(*args)
+        finally:
+            self._replay = None
+        self._tables = tables
+        self._ready = True
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Failed to refresh tenancy index")
+            await asyncio.sleep(self.refresh_seconds)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# 进程内共享的租户索引
+tenancy_index = TenancyIndex(refresh_seconds=settings.TENANCY_INDEX_REFRESH_SECONDS)
+
+
+def _is_live(target) -> bool:
+    return target.state != 'D'
+
+
+def collect_changes(session: Session) -> List[TenancyChange]:
+    """
+    从待刷新的 ORM 对象中收集租户关系的修改（在 after_flush 中调用，此时 new/dirty/deleted 仍为刷新前的状态）
+    """
+    changes: List[TenancyChange] = []
+    for target in session.new:
+        if isinstance(target, Workspaces):
+            changes.append(("set_owner", (target.id, target.owner_id)))
+        elif isinstance(target, WorkspaceUsers) and _is_live(target):
+            changes.append(("add_member", (target.workspace_id, target.user_id)))
+        elif isinstance(target, WorkspaceResources) and _is_live(target):
+            changes.append(("add_resource", (target.workspace_id, target.resource_id)))
+
+    for target in session.dirty:
+        if isinstance(target, Workspaces):
+            if get_history(target, "owner_id").has_changes():
+                changes.append(("set_owner", (target.id, target.owner_id)))
+        elif isinstance(target, (WorkspaceUsers, WorkspaceResources)):
+            key = "user_id" if isinstance(target, WorkspaceUsers) else "resource_id"
+            name = "member" if isinstance(target, WorkspaceUsers) else "resource"
+            old_ws = get_history(target, "workspace_id").deleted or [target.workspace_id]
+            old_id = get_history(target, key).deleted or [getattr(target, key)]
+            changes.append((f"remove_{name}", (old_ws[0], old_id[0])))
+            if _is_live(target):
+                changes.append((f"add_{name}", (target.workspace_id, getattr(target, key))))
+
+    for target in session.deleted:
+        if isinstance(target, Workspaces):
+            changes.append(("remove_workspace", (target.id,)))
+        elif isinstance(target, WorkspaceUsers):
+            changes.append(("remove_member", (target.workspace_id, target.user_id)))
+        elif isinstance(target, WorkspaceResources):
+            changes.append(("remove_resource", (target.workspace_id, target.resource_id)))
+    return changes
+
+
+# 本进程的 ORM 修改在提交后应用到索引，回滚时丢弃
+@event.listens_for(Session, "after_flush")
+def _collect_tenancy_changes(session: Session, flush_context) -> None:
+    changes = collect_changes(session)
+    if changes:
+        session.info.setdefault("tenancy_changes", []).extend(changes)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_tenancy_changes(session: Session) -> None:
+    changes = session.info.pop("tenancy_changes", None)
+    if changes:
+        tenancy_index.apply(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_tenancy_changes(session: Session) -> None:
+    session.info.pop("tenancy_changes", None)
+
+
+def workspaces_visible_to(user_id: Optional[uuid.UUID]) -> Select:
+    """
+    用户拥有或加入的（未删除的）工作区ID
+    """
+    owned = select(Workspaces.id).where(Workspaces.owner_id == user_id, Workspaces.state != 'D')
+    joined = (
+        select(WorkspaceUsers.workspace_id)
+        .join(Workspaces, Workspaces.id == WorkspaceUsers.workspace_id)
+        .where(WorkspaceUsers.user_id == user_id, WorkspaceUsers.state != 'D', Workspaces.state != 'D')
+    )
+    return owned.union_all(joined)
+
+
+def resources_visible_to(user_id: Optional[uuid.UUID]):
+    """
+    资源对用户可见的条件：由该用户创建，或位于其拥有或加入的（未删除的）工作区内
+    """
+    shared = select(WorkspaceResources.resource_id).where(
+        WorkspaceResources.state != 'D',
+        WorkspaceResources.workspace_id.in_(workspaces_visible_to(user_id)),
+    )
+    return or_(Resources.created_by == user_id, Resources.id.in_(shared))
+
+
+async def workspace_resource_ids(workspace_id: uuid.UUID) -> List[uuid.UUID]:
+    """
+    工作区内未删除的资源ID，索引就绪时不查询数据库
+    """
+    if tenancy_index.ready:
+        return tenancy_index.resources_of(workspace_id)
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(WorkspaceResources.resource_id).where(
+                WorkspaceResources.workspace_id == workspace_id,
+                WorkspaceResources.state != 'D',
+            ).order_by(WorkspaceResources.resource_id)
+        )
+        return list(result.scalars().all())
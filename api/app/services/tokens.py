@@ -0,0 +1,256 @@
+"""
+访问令牌吊销模块
+
+访问令牌是无状态的，吊销通过 revoked_tokens 表记录令牌的 jti 实现。
+每个进程在内存中维护一个布隆过滤器：
+
+- 绝大多数请求的 jti 不在过滤器中，直接放行，不查询数据库
+- 命中过滤器（已吊销或误判）时再精确确认，已确认的吊销结果缓存在内存中
+- 后台定期从数据库重建过滤器，加载其他进程吊销的令牌并丢弃已过期的记录；
+  其他进程吊销的令牌最多在一个刷新周期后生效
+- 用户被停用时按用户吊销：吊销表中记录一条 jti 为 "user:<用户ID>" 的记录，
+  签发时间不晚于吊销时间的令牌全部失效（per-user not-before），同样随刷新加载到各进程
+"""
+
+import asyncio
+import datetime
+import logging
+import uuid
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import event, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+
+from app.config.db import AsyncSessionLocal
+from app.config.settings import settings
+from app.models.auth import RevokedToken, TokenClaims, User
+from app.utils.sketches import BloomFilter
+
+
+logger = logging.getLogger(__name__)
+
+# 按用户吊销的记录的 jti 前缀
+USER_REVOCATION_PREFIX = "user:"
+
+
+async def load_revoked_jtis() -> list[str]:
+    """
+    加载尚未过期的已吊销令牌
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(RevokedToken.jti).where(RevokedToken.expires_at > datetime.datetime.now())
+        )
+        return list(result.scalars().all())
+
+
+async def load_user_not_before() -> Dict[uuid.UUID, float]:
+    """
+    加载尚未过期的按用户吊销记录：用户ID -> 吊销时间（时间戳）
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(RevokedToken.user_id, RevokedToken.revoked_at).where(
+                RevokedToken.jti.startswith(USER_REVOCATION_PREFIX),
+                RevokedToken.expires_at > datetime.datetime.now(),
+            )
+        )
+        return {user_id: revoked_at.timestamp() for user_id, revoked_at in result}
+
+
+async def is_jti_revoked(jti: str) -> bool:
+    """
+    精确确认令牌是否已吊销
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(RevokedToken.jti).where(RevokedToken.jti == jti))
+        return result.scalar_one_or_none() is not None
+
+
+class RevocationList:
+    """
+    已吊销令牌的布隆过滤器 + 精确确认
+    """
+
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.001,
+                 refresh_seconds: float = 60,
+                 loader: Callable[[], Awaitable[Iterable[str]]] = load_revoked_jtis,
+                 confirm: Callable[[str], Awaitable[bool]] = is_jti_revoked,
+                 user_loader: Callable[[], Awaitable[Dict[uuid.UUID, float]]] = load_user_not_before):
+        """
+        初始化吊销列表
+
+        Args:
+            capacity: 过滤器容量（超出后误判率上升，直到下次重建）
+            error_rate: 目标误判率
+            refresh_seconds: 从数据库重建过滤器的间隔（秒）
+            loader: 加载全部未过期吊销记录的函数
+            confirm: 精确确认单个 jti 的函数
+            user_loader: 加载全部未过期的按用户吊销记录的函数
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.refresh_seconds = refresh_seconds
+        self.loader = loader
+        self.confirm = confirm
+        self.user_loader = user_loader
+        self._filter = BloomFilter(capacity, error_rate)
+        self._confirmed: Set[str] = set()
+        self._not_before: Dict[uuid.UUID, float] = {}
+        # 重建期间新增的吊销记录，重建完成后在新过滤器上重放（加载结果可能不包含这些记录）
+        self._replay: Optional[List[str]] = None
+        self._user_replay: Optional[Dict[uuid.UUID, float]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, jti: str) -> None:
+        """
+        记录本进程吊销的令牌，立即生效
+        """
+        self._filter.add(jti)
+        self._confirmed.add(jti)
+        if self._replay is not None:
+            self._replay.append(jti)
+
+    def revoke_user(self, user_id: uuid.UUID, revoked_at: float) -> None:
+        """
+        记录本进程按用户吊销的令牌（签发时间不晚于 revoked_at），立即生效
+        """
+        self._not_before[user_id] = max(revoked_at, self._not_before.get(user_id, revoked_at))
+        if self._user_replay is not None:
+            self._user_replay[user_id] = self._not_before[user_id]
+
+    def is_user_revoked(self, user_id: uuid.UUID, issued_at: int) -> bool:
+        """
+        判断令牌是否在用户被吊销（停用）之前签发
+        """
+        not_before = self._not_before.get(user_id)
+        return not_before is not None and issued_at <= not_before
+
+    async def is_revoked(self, jti: str) -> bool:
+        if jti not in self._filter:
+            return False
+        if jti in self._confirmed:
+            return True
+        if await self.confirm(jti):
+            self.add(jti)
+            return True
+        return False
+
+    async def refresh(self) -> None:
+        """
+        从数据库重建过滤器
+        """
+        self._replay = replay = []
+        self._user_replay = user_replay = {}
+        try:
+            jtis = list(await self.loader())
+            not_before = dict(await self.user_loader())
+        finally:
+            self._replay = None
+            self._user_replay = None
+        bloom = BloomFilter(max(self.capacity, len(jtis) + len(replay)), self.error_rate)
+        for jti in jtis:
+            bloom.add(jti)
+        for jti in replay:
+            bloom.add(jti)
+        self._filter = bloom
+        self._confirmed = self._confirmed.intersection(jtis).union(replay)
+        for user_id, revoked_at in user_replay.items():
+            not_before[user_id] = max(revoked_at, not_before.get(user_id, revoked_at))
+        self._not_before = not_before
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Failed to refresh token revocation list")
+            await asyncio.sleep(self.refresh_seconds)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+async def revoke_token(db: AsyncSession, claims: TokenClaims) -> None:
+    """
+    吊销令牌：写入吊销表并立即加入本进程的吊销列表
+    """
+    db.add(RevokedToken(
+        jti=claims.jti,
+        user_id=claims.uid,
+        expires_at=datetime.datetime.fromtimestamp(claims.exp),
+    ))
+    await db.commit()
+    revocation_list.add(claims.jti)
+
+
+# 进程内共享的吊销列表
+revocation_list = RevocationList(
+    capacity=settings.TOKEN_REVOCATION_CAPACITY,
+    error_rate=settings.TOKEN_REVOCATION_ERROR_RATE,
+    refresh_seconds=settings.TOKEN_REVOCATION_REFRESH_SECONDS,
+)
+
+
+def collect_deactivated_users(session: Session) -> List[uuid.UUID]:
+    """
+    待刷新对象中由启用改为停用的用户
+    """
+    return [
+        target.id for target in session.dirty
+        if isinstance(target, User) and True in get_history(target, "is_active").deleted
+        and not target.is_active
+    ]
+
+
+# 停用用户时在同一事务内写入按用户吊销的记录，提交后在本进程立即生效，回滚时丢弃
+@event.listens_for(Session, "before_flush")
+def _revoke_deactivated_users(session: Session, flush_context, instances) -> None:
+    user_ids = collect_deactivated_users(session)
+    if not user_ids:
+        return
+    now = datetime.datetime.now()
+    rows = [
+        {
+            "jti": f"{USER_REVOCATION_PREFIX}{user_id}",
+            "user_id": user_id,
+            "revoked_at": now,
+            "expires_at": now + datetime.timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+        }
+        for user_id in user_ids
+    ]
+    statement = pg_insert(RevokedToken).values(rows)
+    # 通过连接执行，避免在 flush 过程中触发自动 flush
+    session.connection().execute(statement.on_conflict_do_update(
+        index_elements=[RevokedToken.jti],
+        set_={"revoked_at": statement.excluded.revoked_at, "expires_at": statement.excluded.expires_at},
+    ))
+    pending = session.info.setdefault("revoked_users", {})
+    for user_id in user_ids:
+        pending[user_id] = now.timestamp()
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_revoked_users(session: Session) -> None:
+    for user_id, revoked_at in session.info.pop("revoked_users", {}).items():
+        revocation_list.revoke_user(user_id, revoked_at)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_revoked_users(session: Session) -> None:
+    session.info.pop("revoked_users", None)
@@ -11,12 +11,30 @@ Workspaces 服务模块
 - 提供多租户环境下的数据隔离和权限控制支持
 """
 
+import datetime
 import uuid
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import select
-from app.models.workspace import Workspaces, WorkspaceCreate, WorkspaceRead, WorkspaceUpdate,WorkspaceUsers
+from typing import List, Optional, Sequence
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Select, any_, bindparam, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, UUID, insert as pg_insert
+from app.models.workspace import (
+    Workspaces,
+    WorkspaceBulkResult,
+    WorkspaceCreate,
+    WorkspaceRead,
+    WorkspaceResources,
+    WorkspaceUpdate,
+    WorkspaceUsers,
+)
 from app.models.auth import User
+from app.models.resources import Resources, ResourcesState
+from app.models.changes import ChangeAction
+from app.services.changes import WORKSPACE_ENTITY, record_change
+from app.services.permissions import permission_resolver
+from app.services.tenancy import resources_visible_to, tenancy_index
+from app.services.workspace_deletion import mark_workspace_deleted
+from app.utils.pagination import paginate
+from app.utils.schema import PageResponse
 
 
 class WorkspaceService:
@@ -24,7 +42,7 @@ class WorkspaceService:
     Workspace服务类，提供对工作区的完整CRUD操作
     """
 
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         """
         初始化Workspace服务
 
@@ -33,7 +51,7 @@ class WorkspaceService:
         """
         self.db = db
 
-    def create_workspace(self, workspace: WorkspaceCreate, owner_id: uuid.UUID) -> WorkspaceRead:
+    async def create_workspace(self, workspace: WorkspaceCreate, owner_id: uuid.UUID) -> WorkspaceRead:
         """
         创建新的工作区
 
@@ -49,11 +67,13 @@ class WorkspaceService:
             owner_id=owner_id
         )
         self.db.add(db_workspace)
-        self.db.commit()
-        self.db.refresh(db_workspace)
+        await self.db.flush()
+        record_change(self.db, WORKSPACE_ENTITY, db_workspace.id, ChangeAction.CREATE, owner_id)
+        await self.db.commit()
+        await self.db.refresh(db_workspace)
         return WorkspaceRead.model_validate(db_workspace)
 
-    def get_workspace(self, workspace_id: uuid.UUID) -> Optional[WorkspaceRead]:
+    async def get_workspace(self, workspace_id: uuid.UUID) -> Optional[WorkspaceRead]:
         """
         根据ID获取单个工作区
 
@@ -63,13 +83,13 @@ class WorkspaceService:
         Returns:
             WorkspaceRead: 工作区读取模型，如果未找到则返回None
         """
-        result = self.db.execute(select(Workspaces).where(Workspaces.id == workspace_id))
+        result = await self.db.execute(select(Workspaces).where(Workspaces.id == workspace_id, Workspaces.state != 'D'))
         workspace = result.scalar_one_or_none()
         if workspace:
             return WorkspaceRead.model_validate(workspace)
         return None
 
-    def get_workspaces(self, skip: int = 0, limit: int = 100) -> List[WorkspaceRead]:
+    async def get_workspaces(self, skip: int = 0, limit: int = 100) -> List[WorkspaceRead]:
         """
         获取工作区列表，支持分页
 
@@ -80,11 +100,11 @@ class WorkspaceService:
         Returns:
             List[WorkspaceRead]: 工作区读取模型列表
         """
-        result = self.db.execute(select(Workspaces).offset(skip).limit(limit))
+        result = await self.db.execute(select(Workspaces).where(Workspaces.state != 'D').offset(skip).limit(limit))
         workspaces = result.scalars().all()
         return [WorkspaceRead.model_validate(ws) for ws in workspaces]
 
-    def get_workspaces_by_owner(self, owner_id: uuid.UUID, skip: int, limit: int) -> List[WorkspaceRead]:
+    async def get_workspaces_by_owner(self, owner_id: uuid.UUID, skip: int, limit: int) -> List[WorkspaceRead]:
         """
         根据所有者ID获取工作区列表
 
@@ -94,12 +114,35 @@ class WorkspaceService:
         Returns:
             List[WorkspaceRead]: 指定所有者的工作区读取模型列表
         """
-        result = self.db.execute(select(Workspaces).where(Workspaces.owner_id == owner_id).offset(skip).limit(limit))
+        result = await self.db.execute(select(Workspaces).where(Workspaces.owner_id == owner_id, Workspaces.state != 'D').offset(skip).limit(limit))
         workspaces = result.scalars().all()
         return [WorkspaceRead.model_validate(ws) for ws in workspaces]
 
 
-    def get_joined_workspaces_by_user(self, user_id: uuid.UUID, skip: int, limit: int) -> List[WorkspaceRead]:
+    async def page_workspaces_by_owner(self, owner_id: uuid.UUID, limit: int = 100, skip: int = 0,
+                                       cursor: Optional[str] = None) -> PageResponse[WorkspaceRead]:
+        """
+        分页获取所有者的工作区，按创建时间排序，总数由 COUNT(*) 计算
+
+        Args:
+            owner_id: 所有者的用户ID
+            limit: 每页记录数
+            skip: 偏移量，仅在未传入游标时使用
+            cursor: 上一页返回的游标，传入时按键集分页
+
+        Returns:
+            PageResponse[WorkspaceRead]: 分页结果
+
+        Raises:
+            ValueError: 游标格式错误
+        """
+        stmt = select(Workspaces).where(Workspaces.owner_id == owner_id, Workspaces.state != 'D')
+        return await paginate(
+            self.db, stmt, [Workspaces.created_at, Workspaces.id], WorkspaceRead,
+            limit=limit, skip=skip, cursor=cursor
+        )
+
+    async def get_joined_workspaces_by_user(self, user_id: uuid.UUID, skip: int, limit: int) -> List[WorkspaceRead]:
         """
         根据用户的ID获取用户加入的工作区列表
         Args:
@@ -107,11 +150,11 @@ class WorkspaceService:
         Returns:
             List[WorkspaceRead]: 用户加入的工作区读取模型列表
         """
-        result = self.db.execute(select(Workspaces).join(WorkspaceUsers).where(WorkspaceUsers.user_id == user_id).offset(skip).limit(limit))
+        result = await self.db.execute(select(Workspaces).join(WorkspaceUsers).where(WorkspaceUsers.user_id == user_id, Workspaces.state != 'D').offset(skip).limit(limit))
         workspaces = result.scalars().all()
         return [WorkspaceRead.model_validate(ws) for ws in workspaces]
 
-    def update_workspace(self, workspace_id: uuid.UUID, workspace_update: WorkspaceUpdate) -> Optional[WorkspaceRead]:
+    async def update_workspace(self, workspace_id: uuid.UUID, workspace_update: WorkspaceUpdate) -> Optional[WorkspaceRead]:
         """
         更新工作区
 
@@ -123,7 +166,7 @@ class WorkspaceService:
             WorkspaceRead: 更新后的工作区读取模型，如果未找到则返回None
         """
         # 获取要更新的工作区
-        result = self.db.execute(select(Workspaces).where(Workspaces.id == workspace_id))
+        result = await self.db.execute(select(Workspaces).where(Workspaces.id == workspace_id, Workspaces.state != 'D'))
         db_workspace = result.scalar_one_or_none()
         
         if not db_workspace:
@@ -134,26 +177,173 @@ class WorkspaceService:
         for field, value in update_data.items():
             setattr(db_workspace, field, value)
 
-        self.db.commit()
-        self.db.refresh(db_workspace)
+        record_change(self.db, WORKSPACE_ENTITY, workspace_id, ChangeAction.UPDATE)
+        await self.db.commit()
+        await self.db.refresh(db_workspace)
         return WorkspaceRead.model_validate(db_workspace)
 
-    def delete_workspace(self, workspace_id: uuid.UUID) -> bool:
+    async def delete_workspace(self, workspace_id: uuid.UUID, actor_id: Optional[uuid.UUID] = None) -> bool:
         """
-        删除工作区
+        删除工作区：立即标记为删除中，依赖记录由后台任务 run_workspace_deletion 分批删除
 
         Args:
             workspace_id: 要删除的工作区UUID
+            actor_id: 操作人ID
 
         Returns:
-            bool: 删除成功返回True，否则返回False
+            bool: 标记成功返回True，工作区不存在或已在删除中返回False
         """
-        result = self.db.execute(select(Workspaces).where(Workspaces.id == workspace_id))
-        workspace = result.scalar_one_or_none()
-        
-        if not workspace:
-            return False
+        return await mark_workspace_deleted(self.db, workspace_id, actor_id)
+
+    async def add_members(self, workspace_id: uuid.UUID, user_ids: Sequence[uuid.UUID],
+                          actor_id: Optional[uuid.UUID] = None, chunk_size: int = 1000) -> WorkspaceBulkResult:
+        """
+        批量添加工作区成员，已是成员的用户不变，已移除的成员恢复
+
+        Args:
+            workspace_id: 工作区ID
+            user_ids: 用户ID列表
+            actor_id: 操作人ID
+            chunk_size: 每条语句的行数
+
+        Returns:
+            WorkspaceBulkResult: 添加结果
+        """
+        report = await self._bulk_add(WorkspaceUsers, WorkspaceUsers.user_id, "user_id",
+                                      select(User.id), User.id, workspace_id, user_ids, chunk_size)
+        await self._finish_bulk(report, workspace_id, actor_id)
+        return report
+
+    async def remove_members(self, workspace_id: uuid.UUID, user_ids: Sequence[uuid.UUID],
+                             actor_id: Optional[uuid.UUID] = None, chunk_size: int = 1000) -> WorkspaceBulkResult:
+        """
+        批量移除工作区成员（标记为已删除）
+        """
+        report = await self._bulk_remove(WorkspaceUsers, WorkspaceUsers.user_id, workspace_id, user_ids, chunk_size)
+        await self._finish_bulk(report, workspace_id, actor_id)
+        return report
+
+    async def add_resources(self, workspace_id: uuid.UUID, resource_ids: Sequence[uuid.UUID],
+                            actor_id: Optional[uuid.UUID] = None, chunk_size: int = 1000,
+                            unrestricted: bool = False) -> WorkspaceBulkResult:
+        """
+        批量把资源分配到工作区，已删除的资源记为不存在
+
+        操作人只能分配自己创建的资源，或已在其可访问的工作区内的资源，其余记为不存在，
+        不能借此把其他租户的资源挂到自己的工作区中读取
+
+        Args:
+            unrestricted: 不限制资源归属（超级管理员）
+        """
+        lookup = select(Resources.id).where(Resources.state != ResourcesState.DELETED)
+        if not unrestricted:
+            lookup = lookup.where(resources_visible_to(actor_id))
+        report = await self._bulk_add(
+            WorkspaceResources, WorkspaceResources.resource_id, "resource_id",
+            lookup, Resources.id, workspace_id, resource_ids, chunk_size
+        )
+        await self._finish_bulk(report, workspace_id, actor_id)
+        return report
+
+    async def remove_resources(self, workspace_id: uuid.UUID, resource_ids: Sequence[uuid.UUID],
+                               actor_id: Optional[uuid.UUID] = None, chunk_size: int = 1000) -> WorkspaceBulkResult:
+        """
+        批量把资源移出工作区（标记为已删除）
+        """
+        report = await self._bulk_remove(WorkspaceResources, WorkspaceResources.resource_id,
+                                         workspace_id, resource_ids, chunk_size)
+        await self._finish_bulk(report, workspace_id, actor_id)
+        return report
+
+    async def _bulk_add(self, model, key_column, key: str, lookup: Select, lookup_column,
+                        workspace_id: uuid.UUID, ids: Sequence[uuid.UUID], chunk_size: int) -> WorkspaceBulkResult:
+        """
+        每块一次存在性查询和一条多行 INSERT ... ON CONFLICT，每块一个事务
+
+        冲突时只恢复已删除的行（WHERE state = 'D'），未删除的行保持不变、不会返回
+        """
+        unique_ids = list(dict.fromkeys(ids))
+        report = WorkspaceBulkResult(requested=len(unique_ids))
+        chunk_size = max(1, chunk_size)
+        for start in range(0, len(unique_ids), chunk_size):
+            chunk = unique_ids[start:start + chunk_size]
+            # 先过滤不存在的ID，避免外键错误使整块失败
+            result = await self.db.execute(
+                lookup.where(lookup_column == any_(bindparam("ids", chunk, type_=ARRAY(UUID(as_uuid=True)))))
+            )
+            existing = set(result.scalars().all())
+            valid = [i for i in chunk if i in existing]
+            report.not_found += len(chunk) - len(valid)
+            if not valid:
+                continue
+
+            now = datetime.datetime.now()
+            stmt = pg_insert(model).values([
+                {"id": uuid.uuid4(), "workspace_id": workspace_id, key: i, "state": 'A',
+                 "created_at": now, "updated_at": now}
+                for i in valid
+            ])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[model.workspace_id, key_column],
+                set_={"state": 'A', "updated_at": now},
+                where=model.state == 'D',
+            ).returning(key_column)
+            result = await self.db.execute(stmt)
+            added = list(result.scalars().all())
+            await self.db.commit()
+
+            report.added += len(added)
+            report.unchanged += len(valid) - len(added)
+            self._sync_index(model, workspace_id, added, removed=False)
+        return report
+
+    async def _bulk_remove(self, model, key_column, workspace_id: uuid.UUID,
+                           ids: Sequence[uuid.UUID], chunk_size: int) -> WorkspaceBulkResult:
+        """
+        每块一条 UPDATE ... SET state = 'D' WHERE key = ANY(:ids) RETURNING，每块一个事务
+        """
+        unique_ids = list(dict.fromkeys(ids))
+        report = WorkspaceBulkResult(requested=len(unique_ids))
+        chunk_size = max(1, chunk_size)
+        for start in range(0, len(unique_ids), chunk_size):
+            chunk = unique_ids[start:start + chunk_size]
+            result = await self.db.execute(
+                update(model)
+                .where(
+                    model.workspace_id == workspace_id,
+                    key_column == any_(bindparam("ids", chunk, type_=ARRAY(UUID(as_uuid=True)))),
+                    model.state != 'D',
+                )
+                .values(state='D', updated_at=datetime.datetime.now())
+                .returning(key_column)
+            )
+            removed = list(result.scalars().all())
+            await self.db.commit()
+
+            report.removed += len(removed)
+            report.unchanged += len(chunk) - len(removed)
+            self._sync_index(model, workspace_id, removed, removed=True)
+        return report
+
+    @staticmethod
+    def _sync_index(model, workspace_id: uuid.UUID, ids: List[uuid.UUID], removed: bool) -> None:
+        # Core 语句不会触发 ORM 事件，提交后直接更新租户索引和权限缓存
+        if not ids:
+            return
+        if model is WorkspaceUsers:
+            if removed:
+                tenancy_index.remove_members(workspace_id, ids)
+            else:
+                tenancy_index.add_members(workspace_id, ids)
+            for user_id in ids:
+                permission_resolver.bump(user_id)
+        elif removed:
+            tenancy_index.remove_resources(workspace_id, ids)
+        else:
+            tenancy_index.add_resources(workspace_id, ids)
 
-        self.db.delete(workspace)
-        self.db.commit()
-        return True
\ No newline at end of file
+    async def _finish_bulk(self, report: WorkspaceBulkResult, workspace_id: uuid.UUID,
+                           actor_id: Optional[uuid.UUID]) -> None:
+        if report.added or report.removed:
+            record_change(self.db, WORKSPACE_ENTITY, workspace_id, ChangeAction.UPDATE, actor_id)
+            await self.db.commit()
@@ -0,0 +1,285 @@
+"""
+工作区后台删除模块
+
+删除工作区时只把状态标记为 D（删除中）并吊销其 API Key，请求立即返回；
+依赖记录由后台任务分批删除，最后删除工作区本身：
+
+- 依次清理 API Key、成员、资源关联、目录项（目录资源和闭包表路径随目录项删除），每张表按ID键集分页
+- 每批一个短事务，批次之间休眠，不会长时间锁住在线查询使用的表
+- 删除中的工作区对所有查询不可见；进程崩溃后，启动时从状态为 D 的工作区继续删除，
+  每批删除都是幂等的，从头重新扫描即可
+- 进度保存在内存中，可通过接口查询
+"""
+
+import asyncio
+import datetime
+import logging
+import uuid
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.db import AsyncSessionLocal
+from app.config.settings import settings
+from app.models.api_keys import ApiKey
+from app.models.catalog import CatalogItem, CatalogItemClosure, CatalogResource
+from app.models.changes import ChangeAction
+from app.models.resources import Resources
+from app.models.workspace import (
+    WorkspaceDeletionProgress,
+    WorkspaceResources,
+    Workspaces,
+    WorkspaceUsers,
+)
+from app.services.api_keys import api_key_resolver
+from app.services.catalog import catalog_tree_cache
+from app.services.changes import WORKSPACE_ENTITY, record_change
+from app.services.permissions import permission_resolver
+from app.services.tenancy import tenancy_index
+
+
+logger = logging.getLogger(__name__)
+
+
+async def mark_workspace_deleted(db: AsyncSession, workspace_id: uuid.UUID,
+                                 actor_id: Optional[uuid.UUID] = None) -> bool:
+    """
+    把工作区标记为删除中并吊销其 API Key，一个事务内完成
+
+    Returns:
+        bool: 工作区存在且未处于删除中时返回 True
+    """
+    result = await db.execute(
+        update(Workspaces)
+        .where(Workspaces.id == workspace_id, Workspaces.state != 'D')
+        .values(state='D', updated_at=datetime.datetime.now())
+        .returning(Workspaces.owner_id)
+    )
+    owner_id = result.scalar_one_or_none()
+    if owner_id is None:
+        await db.rollback()
+        return False
+    result = await db.execute(
+        update(ApiKey)
+        .where(ApiKey.workspace_id == workspace_id, ApiKey.revoked_at.is_(None))
+        .values(revoked_at=datetime.datetime.now())
+        .returning(ApiKey.prefix)
+    )
+    prefixes = list(result.scalars().all())
+    result = await db.execute(
+        select(WorkspaceUsers.user_id).where(WorkspaceUsers.workspace_id == workspace_id)
+    )
+    member_ids = list(result.scalars().all())
+    record_change(db, WORKSPACE_ENTITY, workspace_id, ChangeAction.DELETE, actor_id)
+    await db.commit()
+
+    # Core 语句不会触发 ORM 事件，提交后直接更新租户索引和权限缓存
+    tenancy_index.remove_workspace(workspace_id)
+    catalog_tree_cache.invalidate(workspace_id)
+    for prefix in prefixes:
+        api_key_resolver.invalidate(prefix)
+    for user_id in {owner_id, *member_ids}:
+        permission_resolver.bump(user_id)
+    return True
+
+
+class WorkspaceDeletionService:
+    """
+    工作区依赖记录分批删除服务类
+    """
+
+    def __init__(self, db: AsyncSession, batch_size: int = 500, throttle_seconds: float = 0.1,
+                 progress: Optional[WorkspaceDeletionProgress] = None):
+        """
+        初始化删除服务
+
+        Args:
+            db: 数据库会话实例
+            batch_size: 每个事务删除的行数
+            throttle_seconds: 批次之间的休眠时间（秒）
+            progress: 进度对象，删除过程中原地更新
+        """
+        self.db = db
+        self.batch_size = max(1, batch_size)
+        self.throttle_seconds = throttle_seconds
+        self.progress = progress
+
+    async def delete_workspace(self, workspace_id: uuid.UUID) -> WorkspaceDeletionProgress:
+        """
+        删除已标记为删除中的工作区及其全部依赖记录
+
+        Returns:
+            WorkspaceDeletionProgress: 删除结果
+        """
+        progress = self.progress or WorkspaceDeletionProgress(workspace_id=workspace_id)
+        self.progress = progress
+        progress.running = True
+        progress.started_at = datetime.datetime.now()
+
+        result = await self.db.execute(
+            select(Workspaces.owner_id).where(Workspaces.id == workspace_id, Workspaces.state == 'D')
+        )
+        progress.owner_id = result.scalar_one_or_none()
+        if progress.owner_id is not None:
+            for model in (ApiKey, WorkspaceUsers, WorkspaceResources):
+                await self._delete_rows(model, workspace_id)
+            await self._detach_catalog_items(workspace_id)
+            await self._delete_rows(CatalogItem, workspace_id)
+
+            progress.phase = Workspaces.__tablename__
+            await self.db.execute(delete(Workspaces).where(Workspaces.id == workspace_id, Workspaces.state == 'D'))
+            await self.db.commit()
+
+        progress.phase = None
+        progress.running = False
+        progress.finished_at = datetime.datetime.now()
+        return progress
+
+    async def _next_batch(self, model, workspace_id: uuid.UUID, after: Optional[uuid.UUID],
+                          *criteria) -> List[uuid.UUID]:
+        query = select(model.id).where(model.workspace_id == workspace_id, *criteria)
+        if after is not None:
+            query = query.where(model.id > after)
+        result = await self.db.execute(query.order_by(model.id).limit(self.batch_size))
+        return list(result.scalars().all())
+
+    async def _throttle(self) -> None:
+        self.progress.batches += 1
+        if self.throttle_seconds > 0:
+            await asyncio.sleep(self.throttle_seconds)
+
+    async def _detach_catalog_items(self, workspace_id: uuid.UUID) -> None:
+        """
+        断开目录项之间的父子引用，之后目录项可按任意顺序分批删除
+        """
+        self.progress.phase = CatalogItem.__tablename__
+        after: Optional[uuid.UUID] = None
+        while True:
+            ids = await self._next_batch(CatalogItem, workspace_id, after, CatalogItem.parent_id.is_not(None))
+            if not ids:
+                break
+            after = ids[-1]
+            await self.db.execute(update(CatalogItem).where(CatalogItem.id.in_(ids)).values(parent_id=None))
+            await self.db.commit()
+            await self._throttle()
+
+    async def _delete_rows(self, model, workspace_id: uuid.UUID) -> None:
+        """
+        按ID键集分页删除工作区在某张表中的记录，每批一个事务
+        """
+        table = model.__tablename__
+        self.progress.phase = table
+        after: Optional[uuid.UUID] = None
+        while True:
+            ids = await self._next_batch(model, workspace_id, after)
+            if not ids:
+                break
+            after = ids[-1]
+            try:
+                if model is CatalogItem:
+                    await self._delete_catalog_resources(ids)
+                    await self.db.execute(delete(CatalogItemClosure).where(or_(
+                        CatalogItemClosure.ancestor_id.in_(ids), CatalogItemClosure.descendant_id.in_(ids)
+                    )))
+                result = await self.db.execute(
+                    delete(model).where(model.id.in_(ids)).execution_options(synchronize_session=False)
+                )
+                await self.db.commit()
+            except Exception:
+                await self.db.rollback()
+                raise
+            self.progress.rows_deleted[table] = self.progress.rows_deleted.get(table, 0) + result.rowcount
+            logger.info("Workspace %s deletion: %d rows deleted from %s", workspace_id, result.rowcount, table)
+            await self._throttle()
+
+    async def _delete_catalog_resources(self, item_ids: List[uuid.UUID]) -> None:
+        """
+        删除挂在目录项上的目录资源（子类表和资源基表）及其引用
+        """
+        result = await self.db.execute(
+            select(CatalogResource.id).where(CatalogResource.catalog_item_id.in_(item_ids))
+        )
+        resource_ids = list(result.scalars().all())
+        if not resource_ids:
+            return
+        await self.db.execute(delete(WorkspaceResources).where(WorkspaceResources.resource_id.in_(resource_ids)))
+        await self.db.execute(
+            update(CatalogItem).where(CatalogItem.resource_id.in_(resource_ids)).values(resource_id=None)
+        )
+        await self.db.execute(
+            delete(CatalogResource.__table__).where(CatalogResource.__table__.c.id.in_(resource_ids))
+        )
+        await self.db.execute(
+            delete(Resources).where(Resources.id.in_(resource_ids)).execution_options(synchronize_session=False)
+        )
+
+
+# 各工作区最近一次（或正在进行的）删除任务进度
+_deletion_progress: Dict[uuid.UUID, WorkspaceDeletionProgress] = {}
+_running: Set[uuid.UUID] = set()
+_tasks: Set[asyncio.Task] = set()
+
+
+async def get_deletion_progress(db: AsyncSession, workspace_id: uuid.UUID) -> Optional[WorkspaceDeletionProgress]:
+    """
+    获取工作区删除任务的进度：优先返回本进程中的进度，
+    否则工作区仍处于删除中时返回未运行的进度（任务在其他进程中运行或等待继续）
+
+    Returns:
+        Optional[WorkspaceDeletionProgress]: 没有删除记录时返回 None
+    """
+    progress = _deletion_progress.get(workspace_id)
+    if progress is not None:
+        return progress
+    result = await db.execute(
+        select(Workspaces.owner_id).where(Workspaces.id == workspace_id, Workspaces.state == 'D')
+    )
+    owner_id = result.scalar_one_or_none()
+    if owner_id is None:
+        return None
+    return WorkspaceDeletionProgress(workspace_id=workspace_id, owner_id=owner_id)
+
+
+async def run_workspace_deletion(workspace_id: uuid.UUID) -> None:
+    """
+    后台删除任务入口，使用独立的数据库会话；同一工作区在本进程内只运行一个任务
+    """
+    if workspace_id in _running:
+        return
+    _running.add(workspace_id)
+    progress = WorkspaceDeletionProgress(workspace_id=workspace_id)
+    _deletion_progress[workspace_id] = progress
+    try:
+        async with AsyncSessionLocal() as db:
+            service = WorkspaceDeletionService(
+                db,
+                batch_size=settings.WORKSPACE_DELETE_BATCH_SIZE,
+                throttle_seconds=settings.WORKSPACE_DELETE_THROTTLE_SECONDS,
+                progress=progress,
+            )
+            await service.delete_workspace(workspace_id)
+    except Exception as e:
+        progress.running = False
+        progress.error = str(e)
+        progress.finished_at = datetime.datetime.now()
+        logger.exception("Workspace %s deletion failed", workspace_id)
+    finally:
+        _running.discard(workspace_id)
+
+
+async def resume_workspace_deletions() -> List[uuid.UUID]:
+    """
+    继续删除处于删除中状态的工作区（应用启动时调用）
+
+    Returns:
+        List[uuid.UUID]: 已提交后台任务的工作区ID
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(Workspaces.id).where(Workspaces.state == 'D'))
+        workspace_ids = list(result.scalars().all())
+    for workspace_id in workspace_ids:
+        task = asyncio.create_task(run_workspace_deletion(workspace_id))
+        _tasks.add(task)
+        task.add_done_callback(_tasks.discard)
+    return workspace_ids
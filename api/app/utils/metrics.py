@@ -0,0 +1,66 @@
+"""
+进程内运行指标
+
+- LatencyHistogram: 固定分桶的耗时直方图，内存占用与样本数无关
+"""
+
+import bisect
+import math
+from typing import Any, Dict, Optional, Sequence
+
+
+# 默认分桶上界（毫秒）
+DEFAULT_LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class LatencyHistogram:
+    """
+    耗时直方图，按分桶累计样本数，分位数取所在分桶的上界
+    """
+
+    def __init__(self, buckets_ms: Sequence[float] = DEFAULT_LATENCY_BUCKETS_MS):
+        self.bounds = sorted(buckets_ms)
+        self.counts = [0] * (len(self.bounds) + 1)  # 最后一个桶为 +Inf
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, elapsed_ms: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, elapsed_ms)] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """
+        估算分位数
+
+        Args:
+            q: 分位点，取值 0~1
+
+        Returns:
+            float: 分位数所在分桶的上界（毫秒），超出最大分桶时返回最大观测值；无样本时返回None
+        """
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return self.bounds[index] if index < len(self.bounds) else self.max_ms
+        return self.max_ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else None,
+            "max_ms": self.max_ms if self.count else None,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "buckets": [
+                {"le": bound, "count": bucket_count}  # le 为 None 表示 +Inf
+                for bound, bucket_count in zip(list(self.bounds) + [None], self.counts)
+            ],
+        }
@@ -0,0 +1,65 @@
+"""
+NDJSON 工具函数
+
+提供按行增量解析与序列化 NDJSON（每行一个 JSON 对象）的能力，
+用于大批量导入导出时保持内存占用恒定。
+"""
+
+import json
+from typing import Any, AsyncIterable, AsyncIterator, Tuple
+
+from fastapi.encoders import jsonable_encoder
+
+
+class LineDecodeError(UnicodeDecodeError):
+    """
+    某一行不是合法的 UTF-8，附带行号
+    """
+
+    def __init__(self, line_no: int, error: UnicodeDecodeError):
+        super().__init__(error.encoding, error.object, error.start, error.end, error.reason)
+        self.line_no = line_no
+
+
+def _decode_line(line_no: int, raw: bytes) -> str:
+    try:
+        return raw.decode("utf-8").strip()
+    except UnicodeDecodeError as e:
+        raise LineDecodeError(line_no, e) from e
+
+
+def dumps_line(obj: Any) -> str:
+    """
+    将对象序列化为单行 JSON（包含结尾换行符）
+    """
+    return json.dumps(jsonable_encoder(obj), ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[Tuple[int, str]]:
+    """
+    将字节流按换行符切分为文本行
+
+    Args:
+        chunks: 异步字节块迭代器，例如 ``request.stream()``
+
+    Yields:
+        Tuple[int, str]: (行号, 行内容)，行号从1开始，空行会被跳过
+
+    Raises:
+        LineDecodeError: 某一行不是合法的 UTF-8
+    """
+    buffer = b""
+    line_no = 0
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for raw in lines:
+            line_no += 1
+            line = _decode_line(line_no, raw)
+            if line:
+                yield line_no, line
+    if buffer.strip():
+        line_no += 1
+        yield line_no, _decode_line(line_no, buffer)
@@ -0,0 +1,131 @@
+"""
+分页工具函数
+
+键集分页（keyset pagination）使用上一页最后一行的排序键作为游标，
+查询条件为 "排序键 > 游标"，翻页代价与页码无关。游标对客户端不透明。
+paginate 在此基础上生成通用的 PageResponse：总数由一条 COUNT(*) 计算，
+当前页多取一行判断是否还有下一页，同时支持偏移分页和游标分页。
+"""
+
+import base64
+import datetime
+import json
+import uuid
+from typing import Any, Dict, Optional, Sequence, Type
+
+from pydantic import BaseModel
+from sqlalchemy import Select, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.utils.schema import PageResponse
+
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    """
+    将排序键编码为不透明游标
+
+    Args:
+        values: 排序键，值需可被 JSON 序列化（UUID/时间请先转为字符串）
+
+    Returns:
+        str: URL 安全的游标字符串
+    """
+    raw = json.dumps(values, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    解码游标
+
+    Raises:
+        ValueError: 游标格式错误
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, dict):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return value
+
+
+def _from_json(column, value: Any) -> Any:
+    python_type = column.type.python_type
+    if value is None or isinstance(value, python_type):
+        return value
+    if python_type in (datetime.datetime, datetime.date):
+        return python_type.fromisoformat(value)
+    return python_type(value)
+
+
+async def paginate(db: AsyncSession,
+                   stmt: Select,
+                   keys: Sequence[Any],
+                   item_model: Type[BaseModel],
+                   limit: int = 100,
+                   skip: int = 0,
+                   cursor: Optional[str] = None) -> PageResponse:
+    """
+    对单实体查询分页，返回 PageResponse
+
+    Args:
+        db: 异步数据库会话
+        stmt: 查询单个 ORM 实体的语句（不含排序和分页）
+        keys: 排序键列，最后一列需唯一（如主键），用于键集分页
+        item_model: 条目的响应模型
+        limit: 每页记录数
+        skip: 偏移量，仅在未传入游标时使用
+        cursor: 上一页返回的 next_cursor，传入时按键集分页
+
+    Returns:
+        PageResponse: 当前页数据、总数及下一页游标
+
+    Raises:
+        ValueError: 游标格式错误
+    """
+    total = (await db.execute(
+        select(func.count()).select_from(stmt.order_by(None).subquery())
+    )).scalar_one()
+
+    page_stmt = stmt.order_by(*keys)
+    if cursor:
+        values = decode_cursor(cursor).get("k")
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError("Invalid cursor")
+        try:
+            values = [_from_json(key, value) for key, value in zip(keys, values)]
+        except (TypeError, ValueError) as e:
+            raise ValueError("Invalid cursor") from e
+        page_stmt = page_stmt.where(tuple_(*keys) > tuple_(*values))
+    else:
+        page_stmt = page_stmt.offset(skip)
+
+    # 多取一行用于判断是否还有下一页
+    result = await db.execute(page_stmt.limit(limit + 1))
+    rows = list(result.scalars().all())
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_next:
+        last = rows[-1]
+        next_cursor = encode_cursor({"k": [_to_json(getattr(last, key.key)) for key in keys]})
+    return PageResponse[item_model](
+        items=[item_model.model_validate(row) for row in rows],
+        total=total,
+        page=None if cursor else skip // limit + 1,
+        size=limit,
+        has_next=has_next,
+        has_prev=bool(cursor) or skip > 0,
+        next_cursor=next_cursor,
+    )
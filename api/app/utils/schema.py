@@ -13,8 +13,9 @@ class BaseResponse(BaseModel, Generic[T]):
 # 分页响应模型
 class PageResponse(BaseModel, Generic[T]):
     items: List[T]
-    total: int
-    page: int
+    total: Optional[int] = None  # 总数，只按游标翻页、不统计总数的列表为空
+    page: Optional[int] = None  # 偏移分页时的页码，游标分页时为空
     size: int
     has_next: bool
-    has_prev: bool
\ No newline at end of file
+    has_prev: bool
+    next_cursor: Optional[str] = None  # 下一页游标，没有下一页时为空
@@ -0,0 +1,137 @@
+"""
+流式统计草图（Sketch）
+
+用于单次遍历数据时以固定内存估算统计量：
+- HyperLogLog: 近似去重计数
+- FrequentItems: Misra-Gries 高频项（Top-K）
+- Reservoir: 蓄水池抽样
+- BloomFilter: 布隆过滤器，近似成员判断（无假阴性）
+"""
+
+import hashlib
+import math
+import random
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class HyperLogLog:
+    """
+    HyperLogLog 近似去重计数，precision=12 时使用 4KB 寄存器，标准误差约 1.6%
+    """
+
+    def __init__(self, precision: int = 12):
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = bytearray(self.m)
+        self._suffix_bits = 64 - precision
+
+    @staticmethod
+    def _hash(value: Any) -> int:
+        data = value if isinstance(value, bytes) else str(value).encode("utf-8")
+        return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
+
+    def add(self, value: Any) -> None:
+        x = self._hash(value)
+        index = x >> self._suffix_bits
+        w = x & ((1 << self._suffix_bits) - 1)
+        rank = self._suffix_bits - w.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog") -> None:
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog with different precision")
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+
+    def count(self) -> int:
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        # 小基数修正（线性计数）
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+class FrequentItems:
+    """
+    Misra-Gries 高频项统计，最多保留 capacity 个计数器，计数为下界估计
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = max(1, capacity)
+        self.counters: Dict[Any, int] = {}
+
+    def add(self, value: Any) -> None:
+        if value in self.counters:
+            self.counters[value] += 1
+        elif len(self.counters) < self.capacity:
+            self.counters[value] = 1
+        else:
+            # 所有计数器减一，删除归零项；均摊复杂度 O(1)
+            for key in list(self.counters):
+                self.counters[key] -= 1
+                if self.counters[key] == 0:
+                    del self.counters[key]
+
+    def top(self, k: int) -> List[Tuple[Any, int]]:
+        return sorted(self.counters.items(), key=lambda item: item[1], reverse=True)[:k]
+
+
+class Reservoir:
+    """
+    蓄水池抽样，保留最多 size 个均匀样本
+    """
+
+    def __init__(self, size: int = 1024, seed: Optional[int] = None):
+        self.size = max(1, size)
+        self.seen = 0
+        self.items: List[Any] = []
+        self._random = random.Random(seed)
+
+    def add(self, value: Any) -> None:
+        self.seen += 1
+        if len(self.items) < self.size:
+            self.items.append(value)
+        else:
+            j = self._random.randrange(self.seen)
+            if j < self.size:
+                self.items[j] = value
+
+
+class BloomFilter:
+    """
+    布隆过滤器，判断"可能存在"或"一定不存在"；按容量和误判率计算位数组大小和哈希次数
+    """
+
+    def __init__(self, capacity: int = 10000, error_rate: float = 0.001):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value: Any):
+        # 双重哈希：g_i(x) = h1(x) + i * h2(x)
+        data = value if isinstance(value, bytes) else str(value).encode("utf-8")
+        digest = hashlib.blake2b(data, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, value: Any) -> None:
+        for pos in self._positions(value):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, value: Any) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(value))
@@ -1,9 +1,17 @@
 from fastapi import FastAPI
 from app.router import auth, resources, workspace
-from app.router.metadata import router as metadata_router
+from app.router.metadata import catalog_router as metadata_catalog_router, router as metadata_router
+from app.router.changes import router as changes_router
 from typing import Union
 from app.config.settings import settings
-from app.config.db import engine, Base
+from app.services.api_keys import api_key_resolver
+from app.services.changes import change_feed
+from app.services.health import connector_health
+from app.services.passwords import password_hasher
+from app.services.source_engines import source_engines
+from app.services.tenancy import tenancy_index
+from app.services.tokens import revocation_list
+from app.services.workspace_deletion import resume_workspace_deletions
 from contextlib import asynccontextmanager
 from collections.abc import AsyncIterator
 
@@ -15,13 +23,30 @@ origins = ["*"]
 # -------------------- DB --------------------
 @asynccontextmanager
 async def lifespan(_: FastAPI) -> AsyncIterator[None]:
-    Base.metadata.create_all(engine)
+    # 表结构由 Alembic 迁移管理（alembic upgrade head），启动时不再 create_all，
+    # 避免在迁移之前建出缺少部分索引、触发器等对象的表
+    if settings.CONNECTOR_HEALTH_ENABLED:
+        connector_health.start()
+    revocation_list.start()
+    api_key_resolver.start()
+    tenancy_index.start()
+    # 继续上次未完成的工作区删除
+    await resume_workspace_deletions()
     yield
+    await tenancy_index.stop()
+    await revocation_list.stop()
+    await api_key_resolver.stop()
+    await connector_health.stop()
+    await change_feed.stop()
+    password_hasher.shutdown()
+    # 释放源库连接池
+    await source_engines.dispose_all()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
-    description=settings.DESCRIPTION
+    description=settings.DESCRIPTION,
+    lifespan=lifespan
 )
 
 # 添加 CORS 中间件，解决跨域请求问题
@@ -37,6 +62,8 @@ app.include_router(auth.router, prefix="/auth", tags=["auth"])
 app.include_router(resources.router, prefix="/resources", tags=["resources"])
 app.include_router(workspace.router, prefix="/workspaces", tags=["workspace"])
 app.include_router(metadata_router, prefix="/resources", tags=["metadata"])
+app.include_router(metadata_catalog_router, prefix="/resources", tags=["metadata"])
+app.include_router(changes_router, prefix="/changes", tags=["changes"])
 
 @app.get("/")
 async def root():
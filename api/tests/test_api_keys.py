@@ -0,0 +1,120 @@
+"""
+API Key 测试用例
+
+该模块测试 Key 的生成与解析、HMAC 校验、解析结果缓存以及最近使用时间的批量回写。
+"""
+
+import datetime
+import pytest
+import uuid
+from unittest.mock import AsyncMock
+
+from fastapi import HTTPException
+
+from app.services import auth as auth_module
+from app.services.api_keys import (
+    ApiKeyResolver,
+    ResolvedApiKey,
+    generate_api_key,
+    hash_api_key,
+    parse_api_key,
+)
+
+
+def resolved_key(key, **overrides):
+    values = dict(
+        id=uuid.uuid4(),
+        key_hash=hash_api_key(key),
+        user_id=uuid.uuid4(),
+        username="etl",
+        is_active=True,
+        workspace_id=uuid.uuid4(),
+        created_at=datetime.datetime(2025, 1, 1),
+        expires_at=None,
+        revoked_at=None,
+    )
+    values.update(overrides)
+    return ResolvedApiKey(**values)
+
+
+def test_generate_and_parse_api_key():
+    """测试生成的 Key 可解析出前缀，格式错误时返回 None"""
+    prefix, key = generate_api_key()
+    assert key.startswith("dpk_")
+    assert parse_api_key(key) == prefix
+    assert parse_api_key("dpk_nodot") is None
+    assert parse_api_key("Bearer xyz") is None
+
+
+@pytest.mark.asyncio
+async def test_resolve_caches_by_prefix_and_checks_hmac():
+    """测试校验结果按前缀缓存，摘要不符时拒绝"""
+    prefix, key = generate_api_key()
+    record = resolved_key(key)
+    loader = AsyncMock(return_value=record)
+    resolver = ApiKeyResolver(loader=loader, writer=AsyncMock())
+
+    claims = await resolver.resolve(key)
+    assert claims.uid == record.user_id and claims.sub == "etl"
+    assert claims.workspace_role(record.workspace_id) == "member" and claims.ws_complete
+    await resolver.resolve(key)
+    loader.assert_awaited_once_with(prefix)
+
+    assert await resolver.resolve(f"dpk_{prefix}.wrong-secret") is None
+
+
+@pytest.mark.asyncio
+async def test_resolve_rejects_revoked_expired_and_inactive():
+    """测试已吊销、已过期或用户已停用的 Key 被拒绝"""
+    past = datetime.datetime.now() - datetime.timedelta(days=1)
+    for overrides in ({"revoked_at": past}, {"expires_at": past}, {"is_active": False}):
+        _, key = generate_api_key()
+        resolver = ApiKeyResolver(loader=AsyncMock(return_value=resolved_key(key, **overrides)), writer=AsyncMock())
+        assert await resolver.resolve(key) is None
+
+
+@pytest.mark.asyncio
+async def test_last_used_is_written_in_batches():
+    """测试最近使用时间合并后一次回写，失败时保留在缓冲中"""
+    keys = [generate_api_key()[1] for _ in range(2)]
+    records = {parse_api_key(k): resolved_key(k) for k in keys}
+    writer = AsyncMock(side_effect=[RuntimeError("db down"), None])
+    resolver = ApiKeyResolver(loader=AsyncMock(side_effect=lambda p: records[p]), writer=writer)
+
+    for key in keys + keys:
+        await resolver.resolve(key)
+
+    with pytest.raises(RuntimeError):
+        await resolver.flush()
+    await resolver.flush()
+    written = writer.await_args_list[1].args[0]
+    assert set(written) == {r.id for r in records.values()}
+    await resolver.flush()
+    assert writer.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_bearer_api_key_resolves_claims(monkeypatch):
+    """测试以 Bearer 方式携带的 API Key 可通过令牌校验依赖"""
+    _, key = generate_api_key()
+    resolver = ApiKeyResolver(loader=AsyncMock(return_value=resolved_key(key)), writer=AsyncMock())
+    monkeypatch.setattr(auth_module, "api_key_resolver", resolver)
+
+    claims = await auth_module.get_workspace_claims(key)
+    assert claims.jti.startswith("apikey:")
+    with pytest.raises(HTTPException):
+        await auth_module.get_workspace_claims(key + "x")
+
+
+@pytest.mark.asyncio
+async def test_api_key_rejected_outside_workspace_routes(monkeypatch):
+    """测试 API Key 不能通过非工作区路由使用的令牌校验依赖"""
+    _, key = generate_api_key()
+    resolver = ApiKeyResolver(loader=AsyncMock(return_value=resolved_key(key)), writer=AsyncMock())
+    monkeypatch.setattr(auth_module, "api_key_resolver", resolver)
+
+    with pytest.raises(HTTPException) as claims_error:
+        await auth_module.get_current_claims(key)
+    with pytest.raises(HTTPException) as user_error:
+        await auth_module.get_current_user(key)
+    assert claims_error.value.status_code == user_error.value.status_code == 403
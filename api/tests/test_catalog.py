@@ -0,0 +1,287 @@
+"""
+工作区目录测试用例
+
+该模块使用模拟会话测试目录闭包表的维护（创建、移动、防止成环）、子树、面包屑和计数查询的SQL形态，
+以及整个工作区目录树的组装和缓存失效。
+"""
+
+import datetime
+import pytest
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+
+from sqlalchemy.dialects import postgresql
+
+from app.models.catalog import CatalogItem, CatalogItemCreate, CatalogItemType
+from app.services import catalog as catalog_module
+from app.services.catalog import CatalogService, CatalogTreeCache, build_catalog_tree, catalog_tree_query
+
+WS = uuid.UUID(int=10)
+USER = uuid.UUID(int=1)
+ROOT = uuid.UUID(int=100)
+FOLDER = uuid.UUID(int=101)
+REPORT = uuid.UUID(int=102)
+
+
+def scalars_result(values):
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = values
+    result.scalar_one_or_none.return_value = values[0] if values else None
+    return result
+
+
+def item_row(item_id, parent_id=None, type=CatalogItemType.FOLDER, order=0):
+    now = datetime.datetime.now()
+    return {
+        "id": item_id, "name": f"item-{item_id.int}", "description": None, "type": type.value,
+        "workspace_id": WS, "parent_id": parent_id, "resource_id": None, "order": order,
+        "is_active": True, "created_by": USER, "created_at": now, "updated_at": now,
+    }
+
+
+def make_item(item_id, parent_id=None, type=CatalogItemType.FOLDER):
+    return CatalogItem(**item_row(item_id, parent_id, type))
+
+
+def statements(mock_db):
+    return [str(c[0][0].compile(dialect=postgresql.dialect())) for c in mock_db.execute.call_args_list]
+
+
+def make_db(results):
+    mock_db = AsyncMock()
+    mock_db.add = MagicMock()
+    mock_db.execute = AsyncMock(side_effect=results)
+    return mock_db
+
+
+@pytest.mark.asyncio
+async def test_create_item_inserts_closure_paths():
+    """测试创建目录项时插入自身路径和父节点全部祖先路径"""
+    mock_db = make_db([MagicMock(), scalars_result([make_item(FOLDER, ROOT)]), MagicMock()])
+
+    async def flush():
+        item = mock_db.add.call_args[0][0]
+        item.id = REPORT
+        item.created_at = item.updated_at = datetime.datetime.now()
+    mock_db.flush = AsyncMock(side_effect=flush)
+
+    created = await CatalogService(mock_db).create_item(
+        WS, CatalogItemCreate(name="r", type=CatalogItemType.REPORT, parent_id=FOLDER), USER
+    )
+
+    sql = statements(mock_db)
+    assert "pg_advisory_xact_lock" in sql[0]
+    assert sql[2].startswith("INSERT INTO catalog_item_closure (ancestor_id, descendant_id, depth)")
+    assert "UNION ALL" in sql[2]
+    assert "catalog_item_closure.depth + %(depth_1)s" in sql[2]
+    assert created.id == REPORT and created.parent_id == FOLDER
+    mock_db.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_create_root_item_inserts_only_self_path():
+    """测试创建根级目录项时只插入自身路径"""
+    mock_db = make_db([MagicMock(), MagicMock()])
+
+    async def flush():
+        item = mock_db.add.call_args[0][0]
+        item.id = ROOT
+        item.created_at = item.updated_at = datetime.datetime.now()
+    mock_db.flush = AsyncMock(side_effect=flush)
+
+    await CatalogService(mock_db).create_item(WS, CatalogItemCreate(name="root", type=CatalogItemType.FOLDER), USER)
+
+    sql = statements(mock_db)
+    assert sql[1].startswith("INSERT INTO catalog_item_closure")
+    assert "UNION" not in sql[1]
+
+
+@pytest.mark.asyncio
+async def test_create_item_with_missing_parent_rolls_back():
+    """测试父目录项不在该工作区时回滚并报错"""
+    mock_db = make_db([MagicMock(), scalars_result([])])
+
+    with pytest.raises(ValueError):
+        await CatalogService(mock_db).create_item(
+            WS, CatalogItemCreate(name="r", type=CatalogItemType.REPORT, parent_id=FOLDER), USER
+        )
+    mock_db.add.assert_not_called()
+    mock_db.rollback.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_move_item_rewrites_paths_to_subtree():
+    """测试移动目录项时删除子树外祖先的路径，再插入新祖先与子树的组合"""
+    item = make_item(FOLDER, ROOT)
+    mock_db = make_db([
+        MagicMock(),                                 # advisory lock
+        scalars_result([item]),                      # 目录项
+        scalars_result([make_item(REPORT)]),         # 新父目录项
+        scalars_result([]),                          # 新父节点不在子树中
+        MagicMock(),                                 # DELETE
+        MagicMock(),                                 # INSERT
+        MagicMock(),                                 # UPDATE parent_id
+    ])
+
+    moved = await CatalogService(mock_db).move_item(WS, FOLDER, REPORT)
+
+    sql = statements(mock_db)
+    assert sql[3].startswith("SELECT catalog_item_closure.depth")
+    assert sql[4].startswith("DELETE FROM catalog_item_closure")
+    assert "catalog_item_closure.descendant_id IN (SELECT" in sql[4]
+    assert "catalog_item_closure.ancestor_id NOT IN (SELECT" in sql[4]
+    assert sql[5].startswith("INSERT INTO catalog_item_closure")
+    assert "catalog_item_closure_1.depth + catalog_item_closure_2.depth + %(param_1)s" in sql[5]
+    assert sql[6].startswith("UPDATE catalog_items SET parent_id=")
+    mock_db.commit.assert_awaited_once()
+    mock_db.refresh.assert_awaited_once_with(item)
+    assert moved.id == FOLDER
+
+
+@pytest.mark.asyncio
+async def test_move_item_to_root_only_deletes_paths():
+    """测试移动到根级时只删除外部祖先路径"""
+    mock_db = make_db([MagicMock(), scalars_result([make_item(FOLDER, ROOT)]), MagicMock(), MagicMock()])
+
+    await CatalogService(mock_db).move_item(WS, FOLDER, None)
+
+    sql = statements(mock_db)
+    assert sql[2].startswith("DELETE FROM catalog_item_closure")
+    assert sql[3].startswith("UPDATE catalog_items")
+
+
+@pytest.mark.asyncio
+async def test_move_item_under_descendant_is_rejected():
+    """测试不能把目录项移动到自身的后代下"""
+    mock_db = make_db([
+        MagicMock(),
+        scalars_result([make_item(ROOT)]),
+        scalars_result([make_item(REPORT, FOLDER)]),
+        scalars_result([2]),                         # ROOT 是 REPORT 的祖先
+    ])
+
+    with pytest.raises(ValueError):
+        await CatalogService(mock_db).move_item(WS, ROOT, REPORT)
+    mock_db.rollback.assert_awaited_once()
+    mock_db.commit.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_move_missing_item_returns_none():
+    """测试目录项不存在时返回 None"""
+    mock_db = make_db([MagicMock(), scalars_result([])])
+
+    assert await CatalogService(mock_db).move_item(WS, FOLDER, None) is None
+    mock_db.commit.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_tree_queries_use_single_closure_lookup():
+    """测试子树、面包屑和计数各只需一条闭包表查询"""
+    subtree = MagicMock()
+    subtree.__iter__.return_value = iter([(make_item(FOLDER, ROOT), 0), (make_item(REPORT, FOLDER), 1)])
+    count = MagicMock()
+    count.scalar_one.return_value = 7
+    mock_db = make_db([subtree, scalars_result([make_item(ROOT), make_item(FOLDER, ROOT)]), count])
+    service = CatalogService(mock_db)
+
+    items = await service.get_subtree(WS, FOLDER, max_depth=3)
+    ancestors = await service.get_ancestors(WS, FOLDER)
+    reports = await service.count_descendants(WS, FOLDER)
+
+    assert [(i.id, i.depth) for i in items] == [(FOLDER, 0), (REPORT, 1)]
+    assert [i.id for i in ancestors] == [ROOT, FOLDER]
+    assert reports == 7
+    sql = statements(mock_db)
+    assert "catalog_item_closure.ancestor_id = %(ancestor_id_1)s" in sql[0]
+    assert "catalog_item_closure.depth <= %(depth_1)s" in sql[0]
+    assert "catalog_item_closure.descendant_id = %(descendant_id_1)s" in sql[1]
+    assert "ORDER BY catalog_item_closure.depth DESC" in sql[1]
+    assert sql[2].startswith("SELECT count(*)")
+    assert "catalog_item_closure.depth > %(depth_1)s" in sql[2]
+    assert "catalog_items.type = %(type_1)s" in sql[2]
+
+
+def test_build_catalog_tree_nests_items_in_input_order():
+    """测试一次遍历组装嵌套树，同级保持查询的排序，父目录项停用的子树被忽略"""
+    hidden = uuid.UUID(int=200)
+    rows = [
+        item_row(ROOT, order=0),
+        item_row(REPORT, FOLDER, CatalogItemType.REPORT, order=0),
+        item_row(uuid.UUID(int=201), hidden, order=0),   # 父目录项已停用
+        item_row(FOLDER, ROOT, order=1),
+        item_row(uuid.UUID(int=103), ROOT, CatalogItemType.REPORT, order=2),
+        item_row(uuid.UUID(int=104), order=5),
+    ]
+
+    tree = build_catalog_tree(rows)
+
+    assert [node.id for node in tree] == [ROOT, uuid.UUID(int=104)]
+    assert [node.id for node in tree[0].children] == [FOLDER, uuid.UUID(int=103)]
+    assert [node.id for node in tree[0].children[0].children] == [REPORT]
+    assert tree[1].children == []
+
+
+def test_catalog_tree_query_loads_active_items_in_one_statement():
+    """测试目录树用一条按工作区过滤、按排序字段排列的查询加载"""
+    sql = str(catalog_tree_query(WS).compile(dialect=postgresql.dialect()))
+
+    assert sql.startswith("SELECT catalog_items.id, catalog_items.name")
+    assert "catalog_items.workspace_id = %(workspace_id_1)s" in sql
+    assert "catalog_items.is_active IS NOT false" in sql
+    assert sql.endswith("ORDER BY catalog_items.\"order\", catalog_items.name, catalog_items.id")
+
+
+@pytest.mark.asyncio
+async def test_catalog_tree_cache_hits_until_invalidated():
+    """测试目录树按工作区缓存，失效或过期后重新加载"""
+    now = [0.0]
+    loader = AsyncMock(side_effect=lambda ws: build_catalog_tree([item_row(ROOT)]))
+    cache = CatalogTreeCache(ttl_seconds=10, loader=loader, clock=lambda: now[0])
+
+    first = await cache.get(WS)
+    assert await cache.get(WS) is first
+    assert loader.await_count == 1
+
+    cache.invalidate(WS)
+    await cache.get(WS)
+    assert loader.await_count == 2
+
+    now[0] = 11
+    await cache.get(WS)
+    assert loader.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_catalog_tree_cache_skips_write_when_invalidated_during_load():
+    """测试加载期间目录发生变化时不缓存旧树"""
+    cache = CatalogTreeCache()
+
+    async def loader(ws):
+        cache.invalidate(ws)
+        return []
+    cache.loader = loader
+
+    await cache.get(WS)
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_catalog_writes_invalidate_tree_cache(monkeypatch):
+    """测试创建和移动目录项提交后使工作区目录树失效"""
+    cache = CatalogTreeCache()
+    monkeypatch.setattr(catalog_module, "catalog_tree_cache", cache)
+    mock_db = make_db([MagicMock(), MagicMock(), MagicMock(), scalars_result([make_item(FOLDER, ROOT)]),
+                       MagicMock(), MagicMock()])
+
+    async def flush():
+        item = mock_db.add.call_args[0][0]
+        item.id = ROOT
+        item.created_at = item.updated_at = datetime.datetime.now()
+    mock_db.flush = AsyncMock(side_effect=flush)
+    service = CatalogService(mock_db)
+
+    await service.create_item(WS, CatalogItemCreate(name="root", type=CatalogItemType.FOLDER), USER)
+    assert cache.version(WS) == 1
+    await service.move_item(WS, FOLDER, None)
+    assert cache.version(WS) == 2
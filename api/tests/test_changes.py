@@ -0,0 +1,196 @@
+"""
+资源变更订阅测试用例
+
+该模块测试变更日志的写入、通知分发、订阅者溢出处理以及 SSE 事件流的续传与去重。
+"""
+
+import asyncio
+import datetime
+import json
+import pytest
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateTable
+
+from app.models.changes import ChangeAction, ResourceChangeLog, ResourceChangeRead
+from app.models.resources import ResourcesType
+from app.services import changes as changes_module
+from app.services.changes import (
+    ChangeFeed, ResourceChangeService, change_visible_to, format_event, record_change, stream_changes,
+)
+from app.services.tenancy import TenancyIndex, TenancySnapshot
+
+
+def change(change_id, action=ChangeAction.UPDATE):
+    return ResourceChangeRead(
+        id=change_id,
+        entity="connector",
+        entity_id=uuid.UUID(int=change_id),
+        action=action,
+        created_at=datetime.datetime(2025, 1, 1),
+    )
+
+
+class IdleFeed(ChangeFeed):
+    """不建立 LISTEN 连接的分发器"""
+
+    def subscribe(self, visible=None):
+        subscription = super().subscribe(visible)
+        self._task.cancel()
+        return subscription
+
+    async def _listen(self):
+        await asyncio.sleep(3600)
+
+
+def test_record_change_adds_log_entry():
+    """测试变更日志加入当前会话，实体名使用资源类型值"""
+    db = MagicMock()
+    actor = uuid.uuid4()
+    entry = record_change(db, ResourcesType.METADATA, uuid.UUID(int=1), ChangeAction.DELETE, actor)
+    db.add.assert_called_once_with(entry)
+    assert (entry.entity, entry.action, entry.actor_id) == ("metadata", "delete", actor)
+
+
+def test_change_log_table_ddl():
+    """测试变更日志表使用自增主键作为续传标记"""
+    ddl = str(CreateTable(ResourceChangeLog.__table__).compile(dialect=postgresql.dialect()))
+    assert "id BIGSERIAL NOT NULL" in ddl
+
+
+@pytest.mark.asyncio
+async def test_feed_fans_out_and_closes_slow_subscriber():
+    """测试通知分发到每个订阅者，队列已满的订阅者被关闭"""
+    feed = IdleFeed(dsn="postgresql://localhost/db", queue_size=1)
+    fast, slow = feed.subscribe(), feed.subscribe()
+
+    payload = change(1).model_dump_json()
+    feed._on_notify(None, 0, "resource_changes", payload)
+    assert (await fast.get()).id == 1
+
+    feed._on_notify(None, 0, "resource_changes", change(2).model_dump_json())
+    assert len(feed) == 1  # slow 的队列已满，被移除
+    assert await slow.get() is None
+    assert (await fast.get()).id == 2
+
+    feed._on_notify(None, 0, "resource_changes", "not json")
+    assert fast.queue.empty()
+    await feed.stop()
+
+
+@pytest.mark.asyncio
+async def test_stream_replays_then_goes_live_without_duplicates():
+    """测试先补发续传标记之后的记录，再转发实时通知并跳过重复"""
+    feed = IdleFeed(dsn="postgresql://localhost/db")
+    history = [change(i) for i in range(6, 11)]
+    calls = []
+
+    async def load_batch(after, limit):
+        calls.append(after)
+        rows = [c for c in history if c.id > after][:limit]
+        if after == 5:
+            # 补发期间提交的变更同时出现在日志表和通知中
+            feed.publish(change(9))
+            feed.publish(change(11))
+        return rows
+
+    events = []
+    stream = stream_changes(feed, 5, load_batch, batch_size=3, keepalive_seconds=0.01)
+    async for event in stream:
+        events.append(event)
+        if event.startswith(": keep-alive"):
+            feed.close_all()
+
+    ids = [json.loads(e.split("data: ", 1)[1])["id"] for e in events if e.startswith("id:")]
+    assert ids == [6, 7, 8, 9, 10, 11]
+    assert calls == [5, 8]
+    assert len(feed) == 0
+    await feed.stop()
+
+
+@pytest.mark.asyncio
+async def test_stream_resume_looks_back_for_late_commits():
+    """测试续传时回看窗口补发乱序提交的变更，实时通知不按续传标记过滤，事件ID为已发送的最大ID"""
+    feed = IdleFeed(dsn="postgresql://localhost/db")
+    # 客户端上次收到 10；7 在其之后才提交
+    history = [change(i) for i in (7, 11)]
+    calls = []
+
+    async def load_batch(after, limit):
+        calls.append(after)
+        if after == 5:
+            feed.publish(change(11))      # 与补发重复
+            feed.publish(change(8))       # 订阅之后提交的较小ID
+        return [c for c in history if c.id > after][:limit]
+
+    events = []
+    async for event in stream_changes(feed, 10, load_batch, batch_size=10, keepalive_seconds=0.01, lookback=5):
+        events.append(event)
+        if event.startswith(": keep-alive"):
+            feed.close_all()
+
+    sent = [(int(e.split("\n", 1)[0][4:]), json.loads(e.split("data: ", 1)[1])["id"])
+            for e in events if e.startswith("id:")]
+    assert calls == [5]
+    assert sent == [(10, 7), (11, 11), (11, 8)]
+    await feed.stop()
+
+
+@pytest.mark.asyncio
+async def test_get_changes_filters_by_tenant():
+    """测试非超级管理员只查询自己操作的、可访问工作区的和对其可见的资源的变更"""
+    user = uuid.uuid4()
+    mock_db = AsyncMock()
+    mock_db.execute = AsyncMock(return_value=MagicMock())
+    service = ResourceChangeService(mock_db)
+
+    await service.get_changes(after=5, user_id=user)
+    await service.get_changes(after=5)
+
+    scoped, unscoped = [str(c[0][0].compile(dialect=postgresql.dialect())) for c in mock_db.execute.call_args_list]
+    assert "resource_change_log.actor_id = %(actor_id_1)s" in scoped
+    assert "resource_change_log.entity = %(entity_1)s AND (resource_change_log.entity_id IN (SELECT workspaces.id" in scoped
+    assert "resources.created_by = %(created_by_1)s" in scoped
+    assert "workspace_users.user_id = %(user_id_1)s" in scoped
+    assert "actor_id" not in unscoped.split("WHERE", 1)[1]
+
+
+@pytest.mark.asyncio
+async def test_feed_only_delivers_visible_changes(monkeypatch):
+    """测试实时通知按租户索引和通知中的所有者过滤，不可见的变更不会占用订阅者的队列"""
+    user, other = uuid.UUID(int=1), uuid.UUID(int=2)
+    ws, shared, private = uuid.UUID(int=10), uuid.UUID(int=100), uuid.UUID(int=101)
+    index = TenancyIndex(loader=AsyncMock(return_value=TenancySnapshot(
+        owners=[(ws, other)], members=[(ws, user)], resources=[(ws, shared)],
+    )))
+    await index.refresh()
+    monkeypatch.setattr(changes_module, "tenancy_index", index)
+
+    feed = IdleFeed(dsn="postgresql://localhost/db", queue_size=10)
+    subscription = feed.subscribe(change_visible_to(user))
+
+    def notify(change_id, entity, entity_id, owner_id):
+        payload = change(change_id).model_dump(mode="json")
+        payload.update(entity=entity, entity_id=str(entity_id), owner_id=owner_id and str(owner_id))
+        feed._on_notify(None, 0, "resource_changes", json.dumps(payload))
+
+    notify(1, "connector", shared, other)       # 位于已加入的工作区
+    notify(2, "connector", private, other)      # 其他租户的资源
+    notify(3, "connector", uuid.uuid4(), user)  # 自己创建的资源
+    notify(4, "workspace", ws, other)           # 已加入的工作区
+    notify(5, "workspace", uuid.uuid4(), None)  # 其他工作区
+
+    received = []
+    while not subscription.queue.empty():
+        received.append((await subscription.get()).id)
+    assert received == [1, 3, 4]
+    await feed.stop()
+
+
+def test_format_event():
+    """测试 SSE 事件格式"""
+    event = format_event(change(42, ChangeAction.CREATE))
+    assert event.startswith("id: 42\nevent: change\ndata: {")
+    assert event.endswith("\n\n")
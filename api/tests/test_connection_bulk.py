@@ -0,0 +1,153 @@
+"""
+连接器批量测试用例
+
+该模块包含对批量连接测试并发、超时、结果流和访问范围的测试，使用替换的探测函数而不连接真实源库。
+"""
+
+import asyncio
+import pytest
+import uuid
+from types import SimpleNamespace
+
+from unittest.mock import AsyncMock, MagicMock
+
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+from sqlalchemy.dialects import postgresql
+
+from app.config.db import get_async_db
+from app.config.settings import settings
+from app.models.auth import TokenClaims, User
+from app.models.connections import ConnectionType, DataConnectionBulkTest
+from app.models.permissions import Permission
+from app.router import resources as resources_router
+from app.services.auth import get_current_claims, get_current_user
+from app.services.connections import DataConnectionService, run_connection_tests
+from app.utils.sercret import set_encrypted_password
+
+
+@pytest.fixture(autouse=True)
+def datasource_key(monkeypatch):
+    # 密码加解密依赖 DATASOURCE_KEY，不依赖运行环境是否配置
+    monkeypatch.setattr(settings, "DATASOURCE_KEY", "test-datasource-key")
+
+
+def make_connection(host: str):
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        name=host,
+        db_type=ConnectionType.POSTGRESQL,
+        host=host,
+        port=5432,
+        database="db",
+        username="reader",
+        password=set_encrypted_password("secret", settings.DATASOURCE_KEY),
+    )
+
+
+def test_bulk_test_requires_exactly_one_target():
+    """测试 connection_ids 与 workspace_id 必须二选一"""
+    with pytest.raises(ValidationError):
+        DataConnectionBulkTest()
+    with pytest.raises(ValidationError):
+        DataConnectionBulkTest(connection_ids=[uuid.uuid4()], workspace_id=uuid.uuid4())
+    assert DataConnectionBulkTest(workspace_id=uuid.uuid4()).connection_ids is None
+
+
+@pytest.mark.asyncio
+async def test_results_stream_in_completion_order_with_timeouts():
+    """测试结果按完成顺序返回，超时与失败互不影响"""
+    delays = {"fast": 0, "slow": 0.05, "hang": 10}
+    seen_passwords = set()
+
+    async def probe(config):
+        seen_passwords.add(config.password)
+        if config.host == "broken":
+            raise OSError("connection refused")
+        await asyncio.sleep(delays[config.host])
+
+    connections = [make_connection(host) for host in ("hang", "slow", "broken", "fast")]
+    results = [r async for r in run_connection_tests(connections, concurrency=4, timeout=0.2, probe=probe)]
+
+    assert [r.name for r in results] == ["broken", "fast", "slow", "hang"]
+    assert [r.success for r in results] == [False, True, True, False]
+    assert results[0].error == "connection refused"
+    assert results[3].error.startswith("Timed out")
+    assert seen_passwords == {"secret"}
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded():
+    """测试同时进行的测试数量不超过上限"""
+    running = 0
+    peak = 0
+
+    async def probe(config):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    connections = [make_connection(f"host{i}") for i in range(20)]
+    results = [r async for r in run_connection_tests(connections, concurrency=3, timeout=1, probe=probe)]
+
+    assert len(results) == 20
+    assert all(r.success for r in results)
+    assert peak == 3
+
+
+@pytest.mark.asyncio
+async def test_connections_for_test_scoped_to_visible_resources():
+    """测试按ID取连接器时可限定为用户创建或位于其工作区内的连接器"""
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = []
+    db = AsyncMock()
+    db.execute = AsyncMock(return_value=result)
+
+    await DataConnectionService(db).get_connections_for_test([uuid.uuid4()], visible_to=uuid.uuid4())
+
+    sql = str(db.execute.call_args[0][0].compile(dialect=postgresql.dialect()))
+    assert "resources.created_by = %(created_by_1)s" in sql
+    assert "workspace_resources.resource_id" in sql
+    assert "workspace_users.user_id" in sql
+
+
+def test_bulk_test_route_checks_access(monkeypatch):
+    """测试按工作区测试需要 RESOURCE_READ 权限，按ID测试只包含可见的连接器，超级管理员不受限"""
+    from main import app
+
+    user_id = uuid.uuid4()
+    roles = []
+    load = AsyncMock(return_value=[])
+    check = AsyncMock()
+    monkeypatch.setattr(DataConnectionService, "get_connections_for_test", load)
+    monkeypatch.setattr(resources_router, "check_workspace_permission", check)
+    app.dependency_overrides[get_current_user] = lambda: User(id=user_id, username="alice", email="a@example.com")
+    app.dependency_overrides[get_current_claims] = lambda: TokenClaims(
+        sub="alice", uid=user_id, roles=roles, jti="t1", iat=0, exp=0
+    )
+    app.dependency_overrides[get_async_db] = lambda: AsyncMock()
+    workspace_id, connection_id = uuid.uuid4(), uuid.uuid4()
+    try:
+        client = TestClient(app)
+        url = "/resources/connectors/test/bulk"
+
+        assert client.post(url, json={"workspace_id": str(workspace_id)}).status_code == 200
+        assert check.await_args[0][1:] == (workspace_id, Permission.RESOURCE_READ)
+        assert load.await_args[0] == (None, workspace_id, None)
+
+        resp = client.post(url, json={"connection_ids": [str(connection_id)]})
+        assert load.await_args[0] == ([connection_id], None, user_id)
+        assert '"Data connection not found"' in resp.text
+
+        roles.append("superadmin")
+        client.post(url, json={"connection_ids": [str(connection_id)]})
+        assert load.await_args[0] == ([connection_id], None, None)
+
+        check.side_effect = HTTPException(status_code=403, detail="Not enough permissions to access this workspace")
+        assert client.post(url, json={"workspace_id": str(workspace_id)}).status_code == 403
+        assert load.await_count == 3
+    finally:
+        app.dependency_overrides.clear()
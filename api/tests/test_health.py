@@ -0,0 +1,206 @@
+"""
+连接器健康检查测试用例
+
+该模块包含对耗时直方图、熔断器和健康检查器的测试，不依赖真实源库。
+"""
+
+import asyncio
+import pytest
+import uuid
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from sqlalchemy.pool import NullPool
+
+from app.config.settings import settings
+from app.models.connections import ConnectionType
+from app.services import metadata as metadata_module
+from app.services.health import CircuitBreaker, CircuitOpenError, ConnectorHealthMonitor
+from app.services.source_engines import create_probe_engine, source_engines
+from app.utils.metrics import LatencyHistogram
+from app.utils.sercret import set_encrypted_password
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FailingEngine:
+    def __init__(self):
+        self.dispose = AsyncMock()
+
+    def connect(self):
+        raise OSError("connection refused")
+
+
+def test_latency_histogram_percentiles():
+    """测试直方图分位数取分桶上界"""
+    histogram = LatencyHistogram(buckets_ms=(10, 100, 1000))
+    for _ in range(90):
+        histogram.observe(5)
+    for _ in range(10):
+        histogram.observe(500)
+
+    assert histogram.percentile(0.5) == 10
+    assert histogram.percentile(0.95) == 1000
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 100
+    assert [bucket["count"] for bucket in snapshot["buckets"]] == [90, 0, 10, 0]
+    assert LatencyHistogram().percentile(0.5) is None
+
+
+def test_circuit_breaker_opens_and_half_opens():
+    """测试熔断器连续失败后打开，冷却后只放行一次试探调用"""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock)
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    clock.now = 31
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+
+    # 试探失败重新打开
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now = 62
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_circuit_breaker_peek_does_not_take_trial():
+    """测试预检不占用半开状态的试探机会，试探长时间无结果时重新打开"""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=clock)
+    breaker.record_failure()
+    assert not breaker.peek()
+
+    clock.now = 31
+    assert breaker.peek() and breaker.peek()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow()
+    assert not breaker.peek() and not breaker.allow()
+
+    # 试探调用没有回报结果，超过冷却时间后重新打开，再过冷却时间放行新的试探
+    clock.now = 61
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.peek()
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now = 91
+    assert breaker.allow()
+
+
+@pytest.mark.asyncio
+async def test_guard_releases_cancelled_trial():
+    """测试试探调用被取消时归还试探机会，预检之后的调用仍可试探"""
+    clock = FakeClock()
+    monitor = ConnectorHealthMonitor(failure_threshold=1, reset_timeout=30, clock=clock)
+    connection_id = uuid.uuid4()
+    breaker = monitor.health(connection_id).breaker
+    breaker.record_failure()
+    clock.now = 31
+
+    monitor.check_available(connection_id)
+    with pytest.raises(asyncio.CancelledError):
+        async with monitor.guard(connection_id):
+            raise asyncio.CancelledError()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    monitor.check_available(connection_id)
+    async with monitor.guard(connection_id):
+        pass
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_guard_fails_fast_when_circuit_open():
+    """测试熔断器打开后 guard 直接失败，非源库错误不计入失败"""
+    monitor = ConnectorHealthMonitor(failure_threshold=1, reset_timeout=30, clock=FakeClock())
+    connection_id = uuid.uuid4()
+
+    with pytest.raises(ValueError):
+        async with monitor.guard(connection_id):
+            raise ValueError("bad sql")
+    assert monitor.health(connection_id).breaker.state == CircuitBreaker.CLOSED
+
+    with pytest.raises(OSError):
+        async with monitor.guard(connection_id):
+            raise OSError("connection refused")
+
+    with pytest.raises(CircuitOpenError) as exc_info:
+        async with monitor.guard(connection_id):
+            pytest.fail("guarded call should not run")
+    assert exc_info.value.retry_after == 30
+
+
+@pytest.mark.asyncio
+async def test_check_connection_records_failures(monkeypatch):
+    """测试探测失败计入错误率并打开熔断器"""
+    engines = []
+
+    def engine_factory(connection):
+        engines.append(FailingEngine())
+        return engines[-1]
+
+    shared = MagicMock(side_effect=AssertionError("probe must not use the shared engine cache"))
+    monkeypatch.setattr(source_engines, "get_engine", shared)
+    monitor = ConnectorHealthMonitor(failure_threshold=2, clock=FakeClock(), engine_factory=engine_factory)
+    connection = SimpleNamespace(id=uuid.uuid4())
+
+    for _ in range(2):
+        error = await monitor.check_connection(connection)
+        assert isinstance(error, OSError)
+
+    [status] = monitor.snapshot(connection.id)
+    assert status.checks == 2
+    assert status.error_rate == 1.0
+    assert status.circuit_state == CircuitBreaker.OPEN
+    assert status.last_error == "connection refused"
+    with pytest.raises(CircuitOpenError):
+        monitor.check_available(connection.id)
+    # 每次探测一个独立引擎，用后释放
+    assert len(engines) == 2
+    for engine in engines:
+        engine.dispose.assert_awaited_once()
+    shared.assert_not_called()
+
+
+def test_probe_engine_is_unpooled(monkeypatch):
+    """测试探测引擎不带连接池，每次探测都是真实建连"""
+    monkeypatch.setattr(settings, "DATASOURCE_KEY", "test-datasource-key")
+    connection = SimpleNamespace(
+        id=uuid.uuid4(), db_type=ConnectionType.POSTGRESQL, host="db", port=5432, database="shop",
+        username="reader", password=set_encrypted_password("secret", settings.DATASOURCE_KEY),
+    )
+    engine = create_probe_engine(connection, connect_timeout=3)
+    assert isinstance(engine.pool, NullPool)
+    assert engine.url.host == "db" and engine.url.password == "secret"
+
+
+@pytest.mark.asyncio
+async def test_read_source_columns_propagates_open_circuit(monkeypatch):
+    """测试读取源库字段时熔断错误向上抛出，而不是当作读取失败返回 None"""
+    monitor = ConnectorHealthMonitor(failure_threshold=1, reset_timeout=30, clock=FakeClock())
+    connection = SimpleNamespace(id=uuid.uuid4(), db_type=ConnectionType.POSTGRESQL, database="db")
+    monitor.health(connection.id).breaker.record_failure()
+    monkeypatch.setattr(metadata_module, "connector_health", monitor)
+    monkeypatch.setattr(metadata_module.source_engines, "get_engine", lambda *args: FailingEngine())
+    result = MagicMock()
+    result.scalar_one_or_none.return_value = connection
+    mock_db = AsyncMock()
+    mock_db.execute = AsyncMock(return_value=result)
+
+    with pytest.raises(CircuitOpenError):
+        await metadata_module.MetaDataTableService(mock_db).get_table_columns_info_by_(
+            connection.id, "orders", None, "db"
+        )
@@ -0,0 +1,251 @@
+"""
+元数据导入导出测试用例
+
+该模块包含对 NDJSON 解析和 MetaDataTransferService 批处理逻辑的测试。
+"""
+
+import datetime
+import json
+import pytest
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.config.db import get_async_db
+from app.models.auth import TokenClaims, UserRead
+from app.models.changes import ResourceChangeLog
+from app.models.metadata import MetaDataImportResult, MetaDataTable, MetaDataTableCreate
+from app.models.permissions import Permission
+from app.models.resources import ResourcesState
+from app.router import metadata as metadata_router_module
+from app.services.auth import get_current_claims, get_current_user
+from app.services.metadata import MetaDataTableService
+from app.services.metadata_transfer import MetaDataTransferService
+from app.services.resources import ResourcesService
+from app.utils.ndjson import LineDecodeError, dumps_line, iter_lines
+from main import app
+
+
+@pytest.fixture
+def client():
+    """跳过认证的测试客户端（不运行 lifespan）"""
+    now = datetime.datetime.now()
+    user = UserRead(id=uuid.uuid4(), username="tester", email="tester@example.com", created_at=now, updated_at=now)
+    app.dependency_overrides[get_current_user] = lambda: user
+    app.dependency_overrides[get_current_claims] = lambda: TokenClaims(
+        sub=user.username, uid=user.id, jti="t1", iat=0, exp=0
+    )
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+async def _chunks(*parts: bytes):
+    """模拟请求体字节流"""
+    for part in parts:
+        yield part
+
+
+async def _collect(lines):
+    return [item async for item in lines]
+
+
+def _table_line(table_name: str, connection_id: uuid.UUID) -> str:
+    return json.dumps({
+        "name": table_name,
+        "database_name": "test_db",
+        "table_name": table_name,
+        "connection_id": str(connection_id),
+        "columns": [{"column_name": "id", "data_type": "integer", "ordinal_position": 1}],
+    })
+
+
+@pytest.mark.asyncio
+async def test_iter_lines_across_chunk_boundaries():
+    """测试跨字节块的行切分"""
+    lines = await _collect(iter_lines(_chunks(b'{"a":', b'1}\n\n{"b"', b':2}\n{"c":3}')))
+    assert lines == [(1, '{"a":1}'), (3, '{"b":2}'), (4, '{"c":3}')]
+
+
+@pytest.mark.asyncio
+async def test_iter_lines_reports_undecodable_line_number():
+    """测试非 UTF-8 的行抛出带行号的解码错误"""
+    with pytest.raises(LineDecodeError) as exc:
+        await _collect(iter_lines(_chunks(b'{"a":1}\n\n\xff\xfe\n')))
+    assert exc.value.line_no == 3
+    assert isinstance(exc.value, UnicodeDecodeError)
+
+
+def test_dumps_line_is_single_line():
+    """测试序列化结果为单行"""
+    line = dumps_line({"id": uuid.UUID(int=1), "text": "多行\n文本"})
+    assert line.endswith("\n")
+    assert line.count("\n") == 1
+    assert json.loads(line)["text"] == "多行\n文本"
+
+
+def _fake_export(monkeypatch):
+    """替换导出会话和导出方法，返回记录的导出参数"""
+    session = MagicMock()
+    session.__aenter__ = AsyncMock(return_value=AsyncMock())
+    session.__aexit__ = AsyncMock(return_value=False)
+    monkeypatch.setattr(metadata_router_module, "AsyncSessionLocal", lambda: session)
+
+    calls = []
+
+    async def export_tables(self, connection_id=None, workspace_id=None, created_by=None):
+        calls.append((connection_id, workspace_id, created_by))
+        yield dumps_line({"table_name": "t1"})
+    monkeypatch.setattr(MetaDataTransferService, "export_tables", export_tables)
+    return calls
+
+
+def test_export_route_does_not_collide_with_resource_routes(client, monkeypatch):
+    """测试导出接口位于 /resources/metadata-catalog/export，不与资源路由的 /metadata/{metadata_id} 冲突"""
+    _fake_export(monkeypatch)
+
+    resp = client.get("/resources/metadata-catalog/export")
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    assert json.loads(resp.text.splitlines()[0]) == {"table_name": "t1"}
+
+
+def test_export_is_scoped_to_creator_or_workspace_permission(client, monkeypatch):
+    """测试未指定工作区时只导出当前用户创建的表，指定工作区时需要 RESOURCE_READ 权限"""
+    calls = _fake_export(monkeypatch)
+    check = AsyncMock()
+    monkeypatch.setattr(metadata_router_module, "check_workspace_permission", check)
+    connection_id, workspace_id = uuid.uuid4(), uuid.uuid4()
+    url = "/resources/metadata-catalog/export"
+
+    assert client.get(url, params={"connection_id": str(connection_id)}).status_code == 200
+    user_id = calls[0][2]
+    assert calls[0] == (connection_id, None, user_id) and user_id is not None
+    check.assert_not_awaited()
+
+    assert client.get(url, params={"workspace_id": str(workspace_id)}).status_code == 200
+    assert calls[1] == (None, workspace_id, None)
+    assert check.await_args[0][1:] == (workspace_id, Permission.RESOURCE_READ)
+
+    check.side_effect = HTTPException(status_code=403, detail="Not enough permissions to access this workspace")
+    assert client.get(url, params={"workspace_id": str(workspace_id)}).status_code == 403
+    assert len(calls) == 2
+
+
+def test_resource_metadata_routes_keep_resource_handlers(client, monkeypatch):
+    """测试 /resources/metadata/{metadata_id} 仍由资源路由处理，不被元数据路由遮蔽"""
+    monkeypatch.setattr(ResourcesService, "get_resource", AsyncMock(return_value=None))
+    monkeypatch.setattr(MetaDataTableService, "get_metadata_table", AsyncMock(return_value=None))
+    app.dependency_overrides[get_async_db] = lambda: AsyncMock()
+
+    resp = client.get(f"/resources/metadata/{uuid.uuid4()}")
+
+    assert resp.status_code == 404
+    assert resp.json()["detail"] == "Metadata not found"
+    ResourcesService.get_resource.assert_awaited_once()
+    MetaDataTableService.get_metadata_table.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_import_tables_batches_and_reports_invalid_lines():
+    """测试按批次写入并逐行报告解析错误"""
+    connection_id = uuid.uuid4()
+    body = "\n".join([
+        _table_line("t1", connection_id),
+        "not json",
+        _table_line("t2", connection_id),
+        _table_line("t3", connection_id),
+    ]).encode("utf-8")
+
+    service = MetaDataTransferService(AsyncMock(), batch_size=2)
+    service._write_batch = AsyncMock()
+
+    report = await service.import_tables(iter_lines(_chunks(body)), uuid.uuid4())
+
+    assert report.total == 4
+    assert report.failed == 1
+    assert report.errors[0].line == 2
+    # 3 个有效行，批大小为 2，应写入两批
+    assert service._write_batch.await_count == 2
+    first_batch = service._write_batch.call_args_list[0][0][0]
+    assert [line_no for line_no, _ in first_batch] == [1, 3]
+
+
+@pytest.mark.asyncio
+async def test_import_tables_reports_undecodable_line():
+    """测试中途出现非 UTF-8 的行时记为该行错误，已解析的行照常写入，不再整体失败"""
+    connection_id = uuid.uuid4()
+    body = "\n".join([_table_line("t1", connection_id), _table_line("t2", connection_id)]).encode("utf-8")
+
+    service = MetaDataTransferService(AsyncMock(), batch_size=1)
+    service._write_batch = AsyncMock()
+
+    tail = _table_line("t3", connection_id).encode("utf-8")
+    report = await service.import_tables(iter_lines(_chunks(body, b"\n\xff\n", tail)), uuid.uuid4())
+
+    assert service._write_batch.await_count == 2
+    assert report.total == 3
+    assert report.failed == 1
+    assert report.errors[0].line == 3
+
+
+def _write_db(connection_ids, existing=()):
+    """模拟 _write_batch 的会话：先查连接器，再查已存在的表"""
+    connections = MagicMock()
+    connections.scalars.return_value.all.return_value = list(connection_ids)
+    tables = MagicMock()
+    tables.scalars.return_value.all.return_value = list(existing)
+    db = AsyncMock()
+    db.add = MagicMock()
+    db.expunge_all = MagicMock()
+    db.execute = AsyncMock(side_effect=[connections, tables, MagicMock(), MagicMock()])
+    return db
+
+
+@pytest.mark.asyncio
+async def test_write_batch_counts_duplicates_after_commit_and_records_changes():
+    """测试批内重复行在提交后才计为更新，并为每个写入的表记录变更日志"""
+    connection_id = uuid.uuid4()
+    line = _table_line("t1", connection_id)
+    batch = [(1, MetaDataTableCreate.model_validate_json(line)), (2, MetaDataTableCreate.model_validate_json(line))]
+    user_id = uuid.uuid4()
+
+    db = _write_db([connection_id])
+    report = MetaDataImportResult(total=2)
+    await MetaDataTransferService(db)._write_batch(batch, user_id, report)
+
+    assert (report.created, report.updated, report.failed) == (1, 1, 0)
+    changes = [c[0][0] for c in db.add.call_args_list if isinstance(c[0][0], ResourceChangeLog)]
+    assert [(c.entity, c.action, c.actor_id) for c in changes] == [("metadata", "create", user_id)]
+
+    db = _write_db([connection_id])
+    db.commit.side_effect = RuntimeError("boom")
+    report = MetaDataImportResult(total=2)
+    await MetaDataTransferService(db)._write_batch(batch, user_id, report)
+
+    assert (report.created, report.updated, report.failed) == (0, 0, 2)
+    assert [error.line for error in report.errors] == [1, 2]
+    db.rollback.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_write_batch_prefers_live_table_over_deleted_duplicate():
+    """测试同一键同时存在已删除和未删除的表时更新未删除的表，不恢复已删除的表"""
+    connection_id = uuid.uuid4()
+    item = MetaDataTableCreate.model_validate_json(_table_line("t1", connection_id))
+    common = dict(connection_id=connection_id, database_name="test_db", table_name="t1", name="t1")
+    live = MetaDataTable(id=uuid.uuid4(), state=ResourcesState.ACTIVE, deleted=False, **common)
+    deleted = MetaDataTable(id=uuid.uuid4(), state=ResourcesState.DELETED, deleted=True, **common)
+
+    for rows in ([live, deleted], [deleted, live]):
+        live.state, deleted.state = ResourcesState.ACTIVE, ResourcesState.DELETED
+        db = _write_db([connection_id], rows)
+        report = MetaDataImportResult(total=1)
+        await MetaDataTransferService(db)._write_batch([(1, item)], uuid.uuid4(), report)
+
+        assert (report.created, report.updated, report.failed) == (0, 1, 0)
+        assert deleted.state == ResourcesState.DELETED
+        changes = [c[0][0] for c in db.add.call_args_list if isinstance(c[0][0], ResourceChangeLog)]
+        assert [c.entity_id for c in changes] == [live.id]
@@ -0,0 +1,95 @@
+"""
+通用分页测试用例
+
+该模块测试 paginate 的 COUNT 查询、偏移分页、游标分页及游标校验。
+"""
+
+import datetime
+import pytest
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.models.workspace import WorkspaceRead, Workspaces
+from app.utils.pagination import decode_cursor, encode_cursor, paginate
+
+
+OWNER_ID = uuid.uuid4()
+
+
+def _workspace(i: int) -> Workspaces:
+    created_at = datetime.datetime(2024, 1, 1) + datetime.timedelta(minutes=i)
+    return Workspaces(
+        id=uuid.UUID(int=i + 1),
+        name=f"ws{i}",
+        owner_id=OWNER_ID,
+        created_at=created_at,
+        updated_at=created_at,
+    )
+
+
+def _db(total: int, rows):
+    count_result = MagicMock()
+    count_result.scalar_one.return_value = total
+    page_result = MagicMock()
+    page_result.scalars.return_value.all.return_value = rows
+    db = AsyncMock()
+    db.execute = AsyncMock(side_effect=[count_result, page_result])
+    return db
+
+
+def _sql(db, index: int) -> str:
+    query = db.execute.call_args_list[index][0][0]
+    return str(query.compile(dialect=postgresql.dialect()))
+
+
+KEYS = [Workspaces.created_at, Workspaces.id]
+STMT = select(Workspaces).where(Workspaces.owner_id == OWNER_ID)
+
+
+@pytest.mark.asyncio
+async def test_offset_page_counts_with_single_query():
+    """测试总数来自一条 COUNT(*)，当前页多取一行判断下一页"""
+    rows = [_workspace(i) for i in range(3)]
+    db = _db(total=10, rows=rows)
+
+    page = await paginate(db, STMT, KEYS, WorkspaceRead, limit=2, skip=4)
+
+    assert "count(*)" in _sql(db, 0)
+    assert "LIMIT" in _sql(db, 1) and "OFFSET" in _sql(db, 1)
+    assert db.execute.await_count == 2
+    assert (page.total, page.page, page.size) == (10, 3, 2)
+    assert [item.name for item in page.items] == ["ws0", "ws1"]
+    assert page.has_next and page.has_prev
+    assert decode_cursor(page.next_cursor)["k"] == [rows[1].created_at.isoformat(), str(rows[1].id)]
+
+
+@pytest.mark.asyncio
+async def test_cursor_page_uses_keyset_condition():
+    """测试传入游标时按 (created_at, id) 键集分页，不使用 OFFSET"""
+    last = _workspace(1)
+    cursor = encode_cursor({"k": [last.created_at.isoformat(), str(last.id)]})
+    db = _db(total=3, rows=[_workspace(2)])
+
+    page = await paginate(db, STMT, KEYS, WorkspaceRead, limit=2, skip=50, cursor=cursor)
+
+    sql = _sql(db, 1)
+    assert "(workspaces.created_at, workspaces.id) >" in sql
+    assert "OFFSET" not in sql
+    assert page.page is None
+    assert page.has_prev and not page.has_next
+    assert page.next_cursor is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("cursor", [
+    "not-a-cursor",
+    encode_cursor({"k": ["2024-01-01T00:00:00"]}),
+    encode_cursor({"k": ["yesterday", str(uuid.uuid4())]}),
+])
+async def test_invalid_cursor_raises_value_error(cursor):
+    """测试格式错误的游标抛出 ValueError"""
+    with pytest.raises(ValueError):
+        await paginate(_db(total=0, rows=[]), STMT, KEYS, WorkspaceRead, cursor=cursor)
@@ -0,0 +1,96 @@
+"""
+密码哈希测试用例
+
+该模块测试进程池中的哈希与校验，以及排队已满时的过载保护。
+"""
+
+import asyncio
+import pytest
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.passwords import PasswordHasher, PasswordHasherBusyError
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_in_process_pool():
+    """测试在工作进程中哈希并校验密码"""
+    hasher = PasswordHasher(max_workers=1)
+    try:
+        hashed = await hasher.hash("s3cret")
+        assert hashed != "s3cret"
+        assert await hasher.verify("s3cret", hashed)
+        assert not await hasher.verify("wrong", hashed)
+    finally:
+        hasher.shutdown()
+    assert hasher.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_rejects_when_queue_is_full():
+    """测试排队任务达到上限时立即拒绝，而不是继续排队"""
+    hasher = PasswordHasher(max_workers=1, max_pending=2, retry_after=3,
+                            executor_factory=lambda n: ThreadPoolExecutor(max_workers=n))
+    try:
+        tasks = [asyncio.create_task(hasher.hash("pw")) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert hasher.pending == 2
+        with pytest.raises(PasswordHasherBusyError) as exc:
+            await hasher.hash("pw")
+        assert exc.value.retry_after == 3
+
+        await asyncio.gather(*tasks)
+        assert hasher.pending == 0
+        await hasher.hash("pw")
+    finally:
+        hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_hash_many_limits_tasks_in_flight():
+    """测试批量哈希按工作进程数分轮提交，结果与输入顺序一致"""
+    hasher = PasswordHasher(max_workers=2, max_pending=2,
+                            executor_factory=lambda n: ThreadPoolExecutor(max_workers=n))
+    passwords = [f"pw{i}" for i in range(40)]
+    try:
+        hashed = await hasher.hash_many(passwords)
+        assert len(hashed) == len(passwords)
+        assert await hasher.verify("pw0", hashed[0])
+        assert await hasher.verify("pw39", hashed[-1])
+        assert await hasher.hash_many([]) == []
+    finally:
+        hasher.shutdown()
+    assert hasher.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_keeps_slot_until_task_finishes():
+    """测试调用方被取消后，执行中的任务结束前仍占用排队名额"""
+    started, release = threading.Event(), threading.Event()
+
+    def slow(password):
+        started.set()
+        release.wait(5)
+        return password
+
+    hasher = PasswordHasher(max_workers=1, max_pending=1,
+                            executor_factory=lambda n: ThreadPoolExecutor(max_workers=n))
+    try:
+        task = asyncio.create_task(hasher._submit(slow, "pw"))
+        await asyncio.to_thread(started.wait, 5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert hasher.pending == 1
+        with pytest.raises(PasswordHasherBusyError):
+            await hasher.hash("pw")
+
+        release.set()
+        for _ in range(100):
+            if hasher.pending == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert hasher.pending == 0
+    finally:
+        release.set()
+        hasher.shutdown()
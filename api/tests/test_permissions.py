@@ -0,0 +1,144 @@
+"""
+权限解析测试用例
+
+该模块测试角色与工作区关系编译为位集、按用户版本号失效的缓存以及工作区权限依赖项和资源列表的工作区权限校验。
+"""
+
+import pytest
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.config.db import get_async_db
+from app.models.auth import RoleEnum, TokenClaims, User, UserRoles
+from app.models.permissions import Permission
+from app.models.workspace import Workspaces, WorkspaceUsers
+from app.router import resources as resources_router
+from app.services import permissions as permissions_module
+from app.services.auth import get_current_claims, get_current_user
+from app.services.permissions import PermissionResolver, compile_permissions, require_workspace_permission
+
+USER_ID = uuid.UUID(int=1)
+OWNED = uuid.UUID(int=10)
+JOINED = uuid.UUID(int=11)
+OTHER = uuid.UUID(int=12)
+
+
+def claims(jti="t1", ws=None):
+    return TokenClaims(sub="alice", uid=USER_ID, jti=jti, iat=0, exp=0, ws=ws or {})
+
+
+def test_compile_permissions():
+    """测试工作区关系和角色权限按位合并，全局角色对所有工作区生效"""
+    perms = compile_permissions(USER_ID, [RoleEnum.data_engineer], [(OWNED, "owner"), (JOINED, "member")])
+    assert perms.allows(OWNED, Permission.WORKSPACE_DELETE)
+    assert perms.allows(JOINED, Permission.WORKSPACE_READ | Permission.RESOURCE_WRITE)
+    assert not perms.allows(JOINED, Permission.WORKSPACE_UPDATE)
+    assert perms.get(OTHER) == 0
+
+    admin = compile_permissions(USER_ID, [RoleEnum.superadmin], [])
+    assert admin.allows(OTHER, Permission.ALL)
+
+
+@pytest.mark.asyncio
+async def test_resolver_caches_until_version_bump(monkeypatch):
+    """测试权限按用户缓存，角色或成员关系变更的 ORM 事件使其重新编译"""
+    loader = AsyncMock(side_effect=lambda uid: compile_permissions(uid, [], [(OWNED, "owner")]))
+    resolver = PermissionResolver(loader=loader)
+    monkeypatch.setattr(permissions_module, "permission_resolver", resolver)
+
+    await resolver.get(USER_ID)
+    await resolver.get(USER_ID)
+    assert loader.await_count == 1
+
+    permissions_module._bump_workspace_user(None, None, WorkspaceUsers(user_id=USER_ID, workspace_id=JOINED))
+    await resolver.get(USER_ID)
+    assert loader.await_count == 2
+
+    permissions_module._bump_user_roles(None, None, UserRoles(user_id=USER_ID, role=RoleEnum.data_analyst))
+    assert len(resolver) == 0
+    assert resolver.version(USER_ID) == 2
+
+
+@pytest.mark.asyncio
+async def test_resolver_skips_cache_when_bumped_during_load():
+    """测试加载期间版本变化时不写入缓存"""
+    resolver = PermissionResolver()
+
+    async def loader(uid):
+        resolver.bump(uid)
+        return compile_permissions(uid, [], [])
+
+    resolver.loader = loader
+    await resolver.get(USER_ID)
+    assert len(resolver) == 0
+
+
+@pytest.mark.asyncio
+async def test_require_workspace_permission(monkeypatch):
+    """测试依赖项放行、拒绝（403/404）和格式错误（400），API Key 只能访问所属工作区"""
+    resolver = PermissionResolver(loader=AsyncMock(return_value=compile_permissions(
+        USER_ID, [], [(OWNED, "owner"), (JOINED, "member")]
+    )))
+    exists = AsyncMock(side_effect=lambda ws: ws != OTHER)
+    monkeypatch.setattr(permissions_module, "permission_resolver", resolver)
+    monkeypatch.setattr(permissions_module, "workspace_exists", exists)
+
+    check_update = require_workspace_permission(Permission.WORKSPACE_UPDATE)
+    assert (await check_update(str(OWNED), claims())).uid == USER_ID
+    exists.assert_not_awaited()
+
+    with pytest.raises(HTTPException) as exc:
+        await check_update(str(JOINED), claims())
+    assert exc.value.status_code == 403
+    with pytest.raises(HTTPException) as exc:
+        await check_update(str(OTHER), claims())
+    assert exc.value.status_code == 404
+    with pytest.raises(HTTPException) as exc:
+        await check_update("not-a-uuid", claims())
+    assert exc.value.status_code == 400
+
+    api_key = claims(jti="apikey:1", ws={str(JOINED): "member"})
+    check_read = require_workspace_permission(Permission.WORKSPACE_READ)
+    await check_read(str(JOINED), api_key)
+    with pytest.raises(HTTPException) as exc:
+        await check_read(str(OWNED), api_key)
+    assert exc.value.status_code == 403
+
+
+def test_read_resources_requires_resource_read(monkeypatch):
+    """测试按工作区列出资源需要该工作区的 RESOURCE_READ 权限，资源范围来自租户索引"""
+    from main import app
+
+    resolver = PermissionResolver(loader=AsyncMock(return_value=compile_permissions(
+        USER_ID, [], [(JOINED, "member")]
+    )))
+    monkeypatch.setattr(permissions_module, "permission_resolver", resolver)
+    monkeypatch.setattr(permissions_module, "workspace_exists", AsyncMock(side_effect=lambda ws: ws != OTHER))
+    resource_ids = AsyncMock(return_value=[])
+    monkeypatch.setattr(resources_router, "workspace_resource_ids", resource_ids)
+    app.dependency_overrides[get_current_user] = lambda: User(id=USER_ID, username="alice", email="a@example.com")
+    app.dependency_overrides[get_current_claims] = lambda: claims()
+    mock_db = AsyncMock()
+    mock_db.execute.return_value = MagicMock()
+    app.dependency_overrides[get_async_db] = lambda: mock_db
+    try:
+        client = TestClient(app)
+        codes = {ws: client.get("/resources/", params={"workspace_id": str(ws)}).status_code
+                 for ws in (JOINED, OWNED, OTHER)}
+    finally:
+        app.dependency_overrides.clear()
+
+    assert codes == {JOINED: 200, OWNED: 403, OTHER: 404}
+    resource_ids.assert_awaited_once_with(JOINED)
+
+
+def test_workspace_change_bumps_owner(monkeypatch):
+    """测试工作区变更时所有者的权限失效"""
+    resolver = PermissionResolver()
+    monkeypatch.setattr(permissions_module, "permission_resolver", resolver)
+    workspace = Workspaces(name="w", owner_id=USER_ID)
+    permissions_module._bump_workspace_owner(None, None, workspace)
+    assert resolver.version(USER_ID) == 1
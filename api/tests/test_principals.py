@@ -0,0 +1,164 @@
+"""
+已认证用户缓存测试用例
+
+该模块使用模拟加载函数和时钟测试缓存命中、过期、淘汰、并发合并以及 ORM 事件失效。
+"""
+
+import asyncio
+import datetime
+import pytest
+import uuid
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.models.auth import User, UserRead, UserRoles
+from app.services import auth as auth_module
+from app.services import principals as principals_module
+from app.services.principals import PrincipalCache
+
+
+def principal(username, is_active=True):
+    now = datetime.datetime(2025, 1, 1)
+    return UserRead(id=uuid.uuid5(uuid.NAMESPACE_DNS, username), username=username,
+                    email=f"{username}@example.com", is_active=is_active, created_at=now, updated_at=now)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def counting_loader(users):
+    calls = []
+
+    async def loader(username):
+        calls.append(username)
+        await asyncio.sleep(0)
+        return users.get(username)
+
+    return loader, calls
+
+
+@pytest.mark.asyncio
+async def test_cache_hits_until_ttl_expires():
+    """测试命中时不查询数据库，过期后重新加载"""
+    loader, calls = counting_loader({"alice": principal("alice")})
+    clock = FakeClock()
+    cache = PrincipalCache(ttl_seconds=10, loader=loader, clock=clock)
+
+    assert (await cache.get("alice")).username == "alice"
+    await cache.get("alice")
+    assert calls == ["alice"]
+
+    clock.now = 11
+    await cache.get("alice")
+    assert calls == ["alice", "alice"]
+
+
+@pytest.mark.asyncio
+async def test_cache_evicts_least_recently_used_and_skips_missing():
+    """测试超出容量时淘汰最近最少使用的条目，不存在的用户不缓存"""
+    users = {name: principal(name) for name in ("a", "b", "c")}
+    loader, calls = counting_loader(users)
+    cache = PrincipalCache(max_entries=2, loader=loader, clock=FakeClock())
+
+    await cache.get("a")
+    await cache.get("b")
+    await cache.get("a")
+    await cache.get("c")  # 淘汰 b
+    assert len(cache) == 2
+    assert await cache.get("ghost") is None
+    assert len(cache) == 2
+
+    calls.clear()
+    await cache.get("b")
+    assert calls == ["b"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_load_once():
+    """测试同一用户名的并发未命中只加载一次"""
+    loader, calls = counting_loader({"alice": principal("alice")})
+    cache = PrincipalCache(loader=loader, clock=FakeClock())
+
+    results = await asyncio.gather(*(cache.get("alice") for _ in range(5)))
+    assert calls == ["alice"]
+    assert all(r.username == "alice" for r in results)
+
+
+@pytest.mark.asyncio
+async def test_invalidation_during_load_is_not_overwritten():
+    """测试加载期间发生失效时不写入可能过期的结果"""
+    release = asyncio.Event()
+
+    async def loader(username):
+        await release.wait()
+        return principal(username)
+
+    cache = PrincipalCache(loader=loader, clock=FakeClock())
+    task = asyncio.create_task(cache.get("alice"))
+    await asyncio.sleep(0)
+    cache.invalidate_user(uuid.uuid4())
+    release.set()
+    await task
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_orm_events_invalidate_cached_user(monkeypatch):
+    """测试用户或角色变更的 ORM 事件使缓存失效"""
+    loader, calls = counting_loader({"alice": principal("alice")})
+    cache = PrincipalCache(loader=loader, clock=FakeClock())
+    monkeypatch.setattr(principals_module, "principal_cache", cache)
+
+    cached = await cache.get("alice")
+    principals_module._invalidate_user(None, None, User(id=cached.id, username="alice"))
+    assert len(cache) == 0
+
+    await cache.get("alice")
+    principals_module._invalidate_user_roles(None, None, UserRoles(user_id=cached.id))
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_user_changes_invalidate_again_after_commit(monkeypatch):
+    """测试 flush 后到提交前重新缓存的旧记录在事务提交后再次失效，回滚时不再处理"""
+    loader, _ = counting_loader({"alice": principal("alice")})
+    cache = PrincipalCache(loader=loader, clock=FakeClock())
+    monkeypatch.setattr(principals_module, "principal_cache", cache)
+    cached = await cache.get("alice")
+    session = Session()
+    user = User(id=cached.id, username="alice")
+    session.add(user)
+
+    principals_module._invalidate_user(None, None, user)
+    assert len(cache) == 0
+    await cache.get("alice")  # 并发请求在提交前读到旧记录
+    assert len(cache) == 1
+
+    principals_module._invalidate_committed_users(session)
+    assert len(cache) == 0
+    assert "principal_invalidations" not in session.info
+
+    principals_module._invalidate_user(None, None, user)
+    principals_module._discard_principal_invalidations(session)
+    assert "principal_invalidations" not in session.info
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_rejects_inactive_user(monkeypatch):
+    """测试已停用的用户无法通过认证"""
+    loader, _ = counting_loader({"alice": principal("alice"), "bob": principal("bob", is_active=False)})
+    monkeypatch.setattr(auth_module, "principal_cache", PrincipalCache(loader=loader, clock=FakeClock()))
+
+    def token(sub):
+        return auth_module.AuthService().create_access_token({"sub": sub, "uid": str(principal(sub).id)})
+
+    assert (await auth_module.get_current_user(token("alice"))).username == "alice"
+    with pytest.raises(HTTPException) as exc:
+        await auth_module.get_current_user(token("bob"))
+    assert exc.value.status_code == 401
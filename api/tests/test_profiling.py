@@ -0,0 +1,79 @@
+"""
+字段画像测试用例
+
+该模块包含对流式统计草图和字段统计累加器的测试。
+"""
+
+import pytest
+
+from app.services.profiling import ColumnProfile
+from app.utils.sketches import FrequentItems, HyperLogLog, Reservoir
+
+
+def test_hyperloglog_estimate_within_error():
+    """测试 HyperLogLog 近似去重误差"""
+    hll = HyperLogLog()
+    for i in range(50000):
+        hll.add(i)
+        hll.add(i)  # 重复值不应影响结果
+    assert abs(hll.count() - 50000) / 50000 < 0.05
+
+
+def test_hyperloglog_small_cardinality_and_merge():
+    """测试小基数修正与合并"""
+    a, b = HyperLogLog(), HyperLogLog()
+    for i in range(10):
+        a.add(f"a{i}")
+        b.add(f"b{i}")
+    assert a.count() == 10
+    a.merge(b)
+    assert a.count() == 20
+
+    with pytest.raises(ValueError):
+        a.merge(HyperLogLog(precision=10))
+
+
+def test_frequent_items_keeps_heavy_hitters():
+    """测试高频项统计保留高频值"""
+    frequent = FrequentItems(capacity=8)
+    for i in range(10000):
+        frequent.add("hot" if i % 3 == 0 else f"cold{i}")
+    assert frequent.top(1)[0][0] == "hot"
+    assert len(frequent.counters) <= 8
+
+
+def test_reservoir_is_bounded():
+    """测试蓄水池抽样大小上限"""
+    reservoir = Reservoir(size=100, seed=1)
+    for i in range(10000):
+        reservoir.add(i)
+    assert len(reservoir.items) == 100
+    assert reservoir.seen == 10000
+
+
+def test_column_profile_statistics():
+    """测试字段统计累加结果"""
+    profile = ColumnProfile("amount", top_k=3, histogram_bins=4)
+    for value in [None, 1, 2, 2, 3, 4, None, 2]:
+        profile.add(value)
+
+    row = profile.to_row(table_id=None)
+    assert row["sample_rows"] == 8
+    assert row["null_count"] == 2
+    assert row["distinct_count"] == 4
+    assert row["min_value"] == "1"
+    assert row["max_value"] == "4"
+    assert row["top_values"][0] == {"value": "2", "count": 3}
+    assert [bucket["count"] for bucket in row["histogram"]] == [1, 3, 1, 1]
+    assert row["histogram"][0]["lower"] == 1.0
+    assert row["histogram"][-1]["upper"] == 4.0
+
+
+def test_column_profile_mixed_types():
+    """测试不可比较类型退化为字符串比较"""
+    profile = ColumnProfile("mixed")
+    for value in ["b", 10, {"k": 1}]:
+        profile.add(value)
+    row = profile.to_row(table_id=None)
+    assert row["distinct_count"] == 3
+    assert row["histogram"][0]["count"] == 1
@@ -0,0 +1,186 @@
+"""
+用户批量创建测试用例
+
+该模块测试 CSV/NDJSON 解析，以及 UserProvisioningService 的冲突检测、批量写入和逐行结果。
+"""
+
+import json
+import pytest
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+
+from app.services.passwords import PasswordHasherBusyError
+from app.services.provisioning import UserProvisioningService, parse_csv_users, parse_ndjson_users
+from app.utils.ndjson import iter_lines
+
+
+async def _chunks(*parts: bytes):
+    """模拟请求体字节流"""
+    for part in parts:
+        yield part
+
+
+async def _collect(rows):
+    return [item async for item in rows]
+
+
+class FakeHasher:
+    """记录调用的哈希器"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def hash_many(self, passwords):
+        self.calls.append(list(passwords))
+        return [f"hashed:{p}" for p in passwords]
+
+
+def _result(rows):
+    result = MagicMock()
+    result.__iter__.return_value = iter(rows)
+    return result
+
+
+def _user_line(name: str, email: str = None) -> str:
+    return json.dumps({"username": name, "email": email or f"{name}@example.com", "password": "pw"})
+
+
+@pytest.mark.asyncio
+async def test_parse_csv_users_with_header():
+    """测试 CSV 按表头解析，列数不符的行记为错误"""
+    body = b"username,email,password,full_name\nalice,alice@example.com,pw,\"Alice, A\"\nbob,bob@example.com\n"
+    rows = await _collect(parse_csv_users(iter_lines(_chunks(body))))
+    assert rows[0][0] == 2
+    assert rows[0][1].username == "alice"
+    assert rows[0][1].full_name == "Alice, A"
+    assert rows[1][0] == 3
+    assert isinstance(rows[1][1], str)
+
+
+@pytest.mark.asyncio
+async def test_parse_csv_users_quoted_newline():
+    """测试带引号的字段可以跨行，行号取记录起始行，未闭合的引号记为错误"""
+    body = (b"username,email,password,full_name\n"
+            b"alice,alice@example.com,pw,\"Alice\nSmith\"\n"
+            b"bob,bob@example.com,pw,Bob\n"
+            b"carol,carol@example.com,pw,\"Carol\n")
+    rows = await _collect(parse_csv_users(iter_lines(_chunks(body))))
+    assert rows[0][0] == 2
+    assert rows[0][1].full_name == "Alice\nSmith"
+    assert rows[1][0] == 4
+    assert rows[1][1].username == "bob"
+    assert rows[2] == (5, "Unterminated quoted field")
+
+
+@pytest.mark.asyncio
+async def test_parse_ndjson_users_reports_invalid_rows():
+    """测试 NDJSON 解析，无效行返回错误信息"""
+    body = f"{_user_line('alice')}\nnot json\n".encode("utf-8")
+    rows = await _collect(parse_ndjson_users(iter_lines(_chunks(body))))
+    assert rows[0][1].username == "alice"
+    assert isinstance(rows[1][1], str)
+
+
+@pytest.mark.asyncio
+async def test_provision_users_reports_each_row():
+    """测试每批一次冲突查询、一次批量哈希，并按行返回结果"""
+    body = "\n".join([
+        _user_line("alice"),
+        _user_line("taken"),
+        _user_line("alice", "other@example.com"),
+        "{}",
+        _user_line("racer"),
+    ]).encode("utf-8")
+
+    alice_id = uuid.uuid4()
+    db = AsyncMock()
+    db.execute.side_effect = [
+        # 冲突查询：taken 已存在
+        _result([("taken", "taken@example.com")]),
+        # 插入用户：racer 被并发注册抢先，未返回
+        _result([(alice_id, "alice")]),
+        # 插入角色
+        MagicMock(),
+    ]
+    hasher = FakeHasher()
+    service = UserProvisioningService(db, batch_size=10, hasher=hasher)
+
+    report = await service.provision_users(parse_ndjson_users(iter_lines(_chunks(body))))
+
+    assert report.total == 5
+    assert (report.created, report.conflicts, report.invalid, report.failed) == (1, 3, 1, 0)
+    assert [item.status for item in report.items] == ["created", "conflict", "conflict", "invalid", "conflict"]
+    assert report.items[0].id == alice_id
+    assert hasher.calls == [["pw", "pw"]]
+    assert db.execute.await_count == 3
+    db.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_provision_users_marks_failed_batch():
+    """测试写入失败时回滚整批并标记为 failed，后续批次继续写入"""
+    body = "\n".join([_user_line("a"), _user_line("b"), _user_line("c")]).encode("utf-8")
+
+    c_id = uuid.uuid4()
+    db = AsyncMock()
+    db.execute.side_effect = [
+        _result([]),
+        RuntimeError("connection lost"),
+        _result([]),
+        _result([(c_id, "c")]),
+        MagicMock(),
+    ]
+    service = UserProvisioningService(db, batch_size=2, hasher=FakeHasher())
+
+    report = await service.provision_users(parse_ndjson_users(iter_lines(_chunks(body))))
+
+    assert [item.status for item in report.items] == ["failed", "failed", "created"]
+    assert report.items[0].error == "connection lost"
+    db.rollback.assert_awaited_once()
+    db.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_provision_users_stops_on_busy_hasher():
+    """测试哈希器过载时回滚当前批次并逐行标记为 failed，停止读取并返回已提交部分的结果"""
+    body = "\n".join([_user_line("a"), _user_line("b"), _user_line("c")]).encode("utf-8")
+    hasher = FakeHasher()
+    hasher.hash_many = AsyncMock(side_effect=[["hashed:pw"], PasswordHasherBusyError(retry_after=3)])
+    a_id = uuid.uuid4()
+    db = AsyncMock()
+    db.execute.side_effect = [
+        _result([]),
+        _result([(a_id, "a")]),
+        MagicMock(),
+        _result([]),
+    ]
+    service = UserProvisioningService(db, batch_size=1, hasher=hasher)
+
+    report = await service.provision_users(parse_ndjson_users(iter_lines(_chunks(body))))
+
+    assert report.total == 2
+    assert [(item.line, item.status) for item in report.items] == [(1, "created"), (2, "failed")]
+    assert "overloaded" in report.items[1].error
+    db.commit.assert_awaited_once()
+    db.rollback.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_provision_users_stops_on_invalid_utf8():
+    """测试遇到非 UTF-8 的行时记为该行无效，已读取的行照常写入，之后的行不再读取"""
+    body = (_user_line("a") + "\n").encode("utf-8") + b"\xff\xfe\n" + _user_line("b").encode("utf-8")
+    a_id = uuid.uuid4()
+    db = AsyncMock()
+    db.execute.side_effect = [
+        _result([]),
+        _result([(a_id, "a")]),
+        MagicMock(),
+    ]
+    service = UserProvisioningService(db, batch_size=10, hasher=FakeHasher())
+
+    report = await service.provision_users(parse_ndjson_users(iter_lines(_chunks(body))))
+
+    assert report.total == 2
+    assert [(item.line, item.status) for item in report.items] == [(1, "created"), (2, "invalid")]
+    assert report.items[1].error.startswith("Invalid UTF-8")
+    db.commit.assert_awaited_once()
@@ -0,0 +1,173 @@
+"""
+已删除资源清理测试用例
+
+该模块使用模拟会话测试清理任务的分批、事务提交、跳过仍被引用的连接器和进度统计。
+"""
+
+import datetime
+import pytest
+import uuid
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+
+from app.models.auth import TokenClaims, UserRead
+from app.router import resources as resources_router
+from app.services import purge as purge_module
+from app.services.auth import get_current_claims, get_current_user
+from app.services.purge import ResourcePurgeService
+from main import app
+
+
+def candidates(*rows):
+    result = MagicMock()
+    result.all.return_value = [SimpleNamespace(id=row_id, referenced=referenced) for row_id, referenced in rows]
+    return result
+
+
+def locked(*ids):
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = list(ids)
+    return result
+
+
+def deleted(rowcount):
+    result = MagicMock()
+    result.rowcount = rowcount
+    return result
+
+
+@pytest.mark.asyncio
+async def test_purge_deletes_in_keyset_batches(monkeypatch):
+    """测试按批清理、每批提交一次并在批次间休眠"""
+    ids = [uuid.UUID(int=i) for i in range(1, 5)]
+    sleeps = []
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(purge_module.asyncio, "sleep", fake_sleep)
+
+    executed = []
+    resources_deleted = iter([1, 2])
+    batch_results = iter([
+        candidates((ids[0], False), (ids[1], True)),  # ids[1] 仍被元数据表引用
+        candidates((ids[2], False), (ids[3], False)),
+        candidates(),
+    ])
+    lock_results = iter([locked(ids[0]), locked(ids[2], ids[3])])
+
+    async def execute(statement, *args):
+        executed.append(statement)
+        if statement.is_select and statement._for_update_arg is not None:
+            return next(lock_results)
+        if statement.is_select:
+            return next(batch_results)
+        table = statement.table.name
+        if table == "resources_metadata_table_columns":
+            return deleted(3)
+        if table == "resources":
+            return deleted(next(resources_deleted))
+        return deleted(0)
+
+    mock_db = AsyncMock()
+    mock_db.execute = AsyncMock(side_effect=execute)
+    service = ResourcePurgeService(mock_db, batch_size=2, throttle_seconds=0.5)
+
+    progress = await service.purge(retention_days=30)
+
+    assert mock_db.commit.await_count == 2
+    assert sleeps == [0.5, 0.5]
+    assert progress.batches == 2
+    assert progress.skipped == 1
+    assert progress.resources_deleted == 3
+    assert progress.columns_deleted == 6
+    assert progress.last_id == ids[3]
+    assert not progress.running and progress.finished_at is not None
+
+    selects = [str(s.compile(dialect=postgresql.dialect())) for s in executed
+               if s.is_select and s._for_update_arg is None]
+    assert "resources.id >" not in selects[0]
+    assert "resources.id >" in selects[1]
+
+
+@pytest.mark.asyncio
+async def test_purge_rolls_back_failed_batch():
+    """测试批次失败时回滚并抛出异常"""
+    mock_db = AsyncMock()
+    mock_db.execute = AsyncMock(side_effect=[candidates((uuid.uuid4(), False)), RuntimeError("lock timeout")])
+    service = ResourcePurgeService(mock_db, batch_size=10, throttle_seconds=0)
+
+    with pytest.raises(RuntimeError):
+        await service.purge(retention_days=7)
+
+    mock_db.rollback.assert_awaited_once()
+    mock_db.commit.assert_not_awaited()
+    assert service.progress.resources_deleted == 0
+
+
+@pytest.mark.asyncio
+async def test_purge_deletes_only_locked_ids():
+    """测试只删除锁定成功的资源，已恢复或被其他事务锁定的资源不会被删除"""
+    kept, purged = uuid.UUID(int=1), uuid.UUID(int=2)
+    mock_db = AsyncMock()
+    mock_db.execute = AsyncMock(side_effect=[candidates((kept, False), (purged, False)), locked(purged)]
+                                + [deleted(1)] * 8)
+    service = ResourcePurgeService(mock_db, batch_size=10, throttle_seconds=0)
+
+    await service.purge(retention_days=7)
+
+    sql = [str(c[0][0].compile(dialect=postgresql.dialect())) for c in mock_db.execute.call_args_list]
+    assert "FOR UPDATE OF resources SKIP LOCKED" in sql[1]
+    assert "resources.state = %(state_1)s" in sql[1]
+    assert "NOT (EXISTS (SELECT" in sql[1]
+    delete_resources = mock_db.execute.call_args_list[-1][0][0]
+    assert delete_resources.table.name == "resources"
+    assert list(delete_resources.compile().params.values()) == [[purged]]
+    mock_db.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_purge_commits_empty_lock():
+    """测试候选资源全部被恢复或锁定时直接结束本批事务"""
+    mock_db = AsyncMock()
+    mock_db.execute = AsyncMock(side_effect=[candidates((uuid.uuid4(), False)), locked()])
+    service = ResourcePurgeService(mock_db, batch_size=10, throttle_seconds=0)
+
+    progress = await service.purge(retention_days=7)
+
+    assert mock_db.execute.await_count == 2
+    mock_db.commit.assert_awaited_once()
+    assert progress.resources_deleted == 0
+
+
+def test_purge_candidates_query_filters_retention():
+    """测试候选查询只选择保留期之前删除的资源"""
+    cutoff = datetime.datetime(2025, 1, 1)
+    query = ResourcePurgeService.purge_candidates_query(cutoff, uuid.uuid4(), 100)
+    sql = str(query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    assert "resources.state = 'DELETED'" in sql
+    assert "resources.updated_at < '2025-01-01 00:00:00'" in sql
+    assert "ORDER BY resources.id" in sql
+
+
+@pytest.mark.parametrize("roles, expected", [(["normal_user"], 403), (["superadmin"], 202)])
+def test_purge_route_requires_superadmin(monkeypatch, roles, expected):
+    """测试只有超级管理员可以提交清理任务"""
+    now = datetime.datetime.now()
+    user_id = uuid.uuid4()
+    user = UserRead(id=user_id, username="tester", email="tester@example.com", created_at=now, updated_at=now)
+    claims = TokenClaims(sub="tester", uid=user_id, roles=roles, jti="t", iat=0, exp=0)
+    job = AsyncMock()
+    monkeypatch.setattr(resources_router, "run_purge_job", job)
+    app.dependency_overrides[get_current_user] = lambda: user
+    app.dependency_overrides[get_current_claims] = lambda: claims
+    try:
+        resp = TestClient(app).post("/resources/purge")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert resp.status_code == expected
+    assert job.await_count == (1 if expected == 202 else 0)
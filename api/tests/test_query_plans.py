@@ -0,0 +1,414 @@
+"""
+查询计划回归测试
+
+该模块包含两类测试：
+- 查询次数测试：使用模拟会话断言服务方法只发出预期数量的SQL
+- 执行计划测试：在已迁移的 PostgreSQL 测试库中写入种子数据，对服务生成的查询执行 EXPLAIN，
+  断言命中预期索引。种子数据在事务内写入，测试结束后回滚。数据库不可用时跳过。
+"""
+
+import datetime
+import pathlib
+import pytest
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import MultipleResultsFound, OperationalError
+from sqlalchemy.orm import Session
+
+from app.config.db import engine, get_async_db
+from app.models.auth import User, UserRead
+from app.models.connections import ConnectionType, DataBaseConnection
+from app.models.metadata import MetaDataTable, MetaDataTableColumn, MetaDataTableRead
+from app.models.workspace import Workspaces, WorkspaceResources, WorkspaceUsers
+from app.models.catalog import CatalogResource
+from app.models.resources import (
+    ConnectorResourceRead,
+    MetaDataResourceRead,
+    CatalogResourceRead,
+    ResourceRead,
+    Resources,
+    ResourcesState,
+    ResourcesType,
+)
+from app.services.auth import get_current_user
+from app.services.connections import DataConnectionService
+from app.services.metadata import MetaDataTableService
+from app.services.purge import ResourcePurgeService
+from app.services.resources import RESOURCE_SUBCLASSES, ResourcesService
+from app.services.workspace import WorkspaceService
+from app.utils.pagination import decode_cursor
+from main import app
+
+
+SEED_CONNECTION_ID = uuid.uuid4()
+SEED_USER_ID = uuid.uuid4()
+SEED_WORKSPACE_ID = uuid.uuid4()
+SEED_TABLE_IDS = [uuid.uuid4() for _ in range(50)]
+
+
+def explain(conn, query) -> str:
+    """
+    对查询执行 EXPLAIN 并返回计划文本
+
+    关闭顺序扫描，使小规模种子数据下也能验证查询是否可以走索引。
+    """
+    sql = query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    conn.execute(text("SET LOCAL enable_seqscan = off"))
+    return "\n".join(conn.execute(text(f"EXPLAIN {sql}")).scalars().all())
+
+
+async def capture_query(call):
+    """
+    以模拟会话运行服务方法，返回其发出的第一条SQL语句（不执行）
+
+    Args:
+        call: 接收会话并调用服务方法的函数
+    """
+    mock_result = MagicMock()
+    mock_result.scalars.return_value.all.return_value = []
+    mock_result.scalar_one_or_none.return_value = None
+    mock_result.__iter__.return_value = iter([])
+    mock_db = AsyncMock()
+    mock_db.execute = AsyncMock(return_value=mock_result)
+    await call(mock_db)
+    return mock_db.execute.call_args_list[0][0][0]
+
+
+@pytest.fixture(scope="module")
+def plan_db():
+    """连接测试库并写入种子数据，结束后回滚"""
+    try:
+        conn = engine.connect()
+    except OperationalError:
+        pytest.skip("PostgreSQL test database is not available")
+
+    trans = conn.begin()
+    session = Session(bind=conn)
+    try:
+        user = User(
+            id=SEED_USER_ID,
+            username=f"plan_test_{uuid.uuid4().hex[:8]}",
+            email=f"plan_test_{uuid.uuid4().hex[:8]}@example.com",
+            hashed_password="x",
+        )
+        session.add(user)
+        session.flush()
+        session.add(DataBaseConnection(
+            id=SEED_CONNECTION_ID,
+            name="plan test connection",
+            state=ResourcesState.ACTIVE,
+            created_by=user.id,
+            db_type=ConnectionType.POSTGRESQL,
+            host="localhost",
+        ))
+        session.flush()
+        for i, table_id in enumerate(SEED_TABLE_IDS):
+            session.add(MetaDataTable(
+                id=table_id,
+                name=f"table_{i}",
+                state=ResourcesState.ACTIVE,
+                created_by=user.id,
+                connection_id=SEED_CONNECTION_ID,
+                database_name="plan_db",
+                table_name=f"table_{i}",
+            ))
+        session.flush()
+        for table_id in SEED_TABLE_IDS:
+            for position in range(1, 6):
+                session.add(MetaDataTableColumn(
+                    table_id=table_id,
+                    column_name=f"column_{position}",
+                    data_type="integer",
+                    ordinal_position=position,
+                ))
+        session.add(Workspaces(
+            id=SEED_WORKSPACE_ID,
+            name=f"plan_test_{uuid.uuid4().hex[:8]}",
+            owner_id=user.id,
+        ))
+        session.flush()
+        session.add(WorkspaceUsers(workspace_id=SEED_WORKSPACE_ID, user_id=user.id, state='A'))
+        session.add(WorkspaceResources(workspace_id=SEED_WORKSPACE_ID, resource_id=SEED_CONNECTION_ID, state='A'))
+        for table_id in SEED_TABLE_IDS:
+            session.add(WorkspaceResources(workspace_id=SEED_WORKSPACE_ID, resource_id=table_id, state='A'))
+        session.flush()
+        yield conn
+    finally:
+        session.close()
+        trans.rollback()
+        conn.close()
+
+
+# -------------------- 查询次数 --------------------
+
+@pytest.mark.asyncio
+async def test_resolve_metadata_table_single_query():
+    """测试按三元组定位元数据表只发出一条SQL"""
+    mock_db = AsyncMock()
+    mock_result = MagicMock()
+    mock_result.scalar_one_or_none = MagicMock(return_value=MagicMock())
+    mock_db.execute = AsyncMock(return_value=mock_result)
+
+    service = MetaDataTableService(mock_db)
+    result = await service.resolve_metadata_table(uuid.uuid4(), "test_db", "test_table")
+
+    assert result is not None
+    mock_db.execute.assert_awaited_once()
+    where = str(mock_db.execute.call_args[0][0].whereclause)
+    assert "connection_id" in where
+    assert "database_name" in where
+    assert "table_name" in where
+    # 已软删除的表不参与定位，查询谓词与部分唯一索引一致
+    assert "NOT resources_metadata_tables.deleted" in where
+    index = next(i for i in MetaDataTable.__table__.indexes if i.name == "uq_metadata_tables_connection_database_table")
+    assert str(index.dialect_options["postgresql"]["where"]) == "NOT deleted"
+
+
+@pytest.mark.asyncio
+async def test_get_metadata_table_by_name_returns_read_model():
+    """测试按表名定位返回 MetaDataTableRead，未找到时返回 None"""
+    table = MetaDataTable(
+        id=uuid.uuid4(), name="orders", type=ResourcesType.METADATA, state=ResourcesState.ACTIVE,
+        created_by=SEED_USER_ID, connection_id=SEED_CONNECTION_ID, database_name="shop", table_name="orders",
+    )
+    mock_db = AsyncMock()
+    mock_result = MagicMock()
+    mock_result.scalar_one_or_none = MagicMock(side_effect=[table, None])
+    mock_db.execute = AsyncMock(return_value=mock_result)
+    service = MetaDataTableService(mock_db)
+
+    found = await service.get_metadata_table_by_name("orders")
+    assert isinstance(found, MetaDataTableRead) and found.id == table.id
+    assert mock_db.execute.call_args[0][0]._with_options
+    assert await service.get_metadata_table_by_name("missing") is None
+
+
+def test_resolve_route_does_not_collide_with_resource_routes():
+    """测试 /resources/metadata-catalog/resolve 按三元组定位元数据表，不与资源路由的 /metadata/{metadata_id} 冲突"""
+    now = datetime.datetime.now()
+    user = UserRead(id=SEED_USER_ID, username="tester", email="tester@example.com", created_at=now, updated_at=now)
+    table = MetaDataTable(
+        id=uuid.uuid4(), name="orders", type=ResourcesType.METADATA, state=ResourcesState.ACTIVE,
+        created_by=SEED_USER_ID, connection_id=SEED_CONNECTION_ID, database_name="shop", table_name="orders",
+    )
+    mock_db = AsyncMock()
+    mock_result = MagicMock()
+    mock_result.scalar_one_or_none = MagicMock(return_value=table)
+    mock_db.execute = AsyncMock(return_value=mock_result)
+    app.dependency_overrides[get_current_user] = lambda: user
+    app.dependency_overrides[get_async_db] = lambda: mock_db
+    try:
+        resp = TestClient(app).get("/resources/metadata-catalog/resolve", params={
+            "connection_id": str(SEED_CONNECTION_ID), "database_name": "shop", "table_name": "orders",
+        })
+    finally:
+        app.dependency_overrides.clear()
+
+    assert resp.status_code == 200
+    assert resp.json()["data"]["id"] == str(table.id)
+    mock_db.execute.assert_awaited_once()
+
+
+def test_query_table_data_ambiguous_name_returns_409():
+    """测试表名匹配到多个元数据表时返回 409 及提示信息，而不是 404"""
+    now = datetime.datetime.now()
+    user = UserRead(id=SEED_USER_ID, username="tester", email="tester@example.com", created_at=now, updated_at=now)
+    mock_db = AsyncMock()
+    mock_result = MagicMock()
+    mock_result.scalar_one_or_none = MagicMock(side_effect=MultipleResultsFound())
+    mock_db.execute = AsyncMock(return_value=mock_result)
+    app.dependency_overrides[get_current_user] = lambda: user
+    app.dependency_overrides[get_async_db] = lambda: mock_db
+    try:
+        resp = TestClient(app).post("/resources/metadata/orders/query", json={})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert resp.status_code == 409
+    assert "connection_id" in resp.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_list_data_connections_single_query():
+    """测试连接器列表单条SQL取出整页，并按ID键集分页"""
+    rows = [
+        DataBaseConnection(
+            id=uuid.UUID(int=i),
+            name=f"connection_{i}",
+            state=ResourcesState.ACTIVE,
+            db_type=ConnectionType.POSTGRESQL,
+            host="localhost",
+        )
+        for i in range(1, 4)
+    ]
+    mock_db = AsyncMock()
+    mock_result = MagicMock()
+    mock_result.scalars.return_value.all.return_value = rows
+    mock_db.execute = AsyncMock(return_value=mock_result)
+
+    service = DataConnectionService(mock_db)
+    page, next_cursor = await service.list_data_connections(limit=2)
+
+    mock_db.execute.assert_awaited_once()
+    assert [c.name for c in page] == ["connection_1", "connection_2"]
+    assert decode_cursor(next_cursor) == {"id": str(uuid.UUID(int=2))}
+
+    sql = str(mock_db.execute.call_args[0][0].compile(dialect=postgresql.dialect()))
+    assert "JOIN resources_database_connections" in sql
+    assert "ORDER BY resources_database_connections.id" in sql
+
+    mock_db.execute.reset_mock()
+    mock_result.scalars.return_value.all.return_value = rows[2:]
+    page, next_cursor = await service.list_data_connections(limit=2, cursor=next_cursor)
+
+    mock_db.execute.assert_awaited_once()
+    assert [c.name for c in page] == ["connection_3"]
+    assert next_cursor is None
+    where = str(mock_db.execute.call_args[0][0].whereclause)
+    assert "resources_database_connections.id >" in where
+
+    with pytest.raises(ValueError):
+        await service.list_data_connections(cursor="not-a-cursor")
+
+
+def test_connectors_route_returns_cursor_in_body():
+    """测试连接器列表在响应体的 next_cursor 中返回下一页游标，并拒绝不支持的 skip 参数"""
+    now = datetime.datetime.now()
+    user = UserRead(id=SEED_USER_ID, username="tester", email="tester@example.com", created_at=now, updated_at=now)
+    rows = [
+        DataBaseConnection(id=uuid.UUID(int=i), name=f"connection_{i}", state=ResourcesState.ACTIVE,
+                           db_type=ConnectionType.POSTGRESQL, host="localhost")
+        for i in range(1, 4)
+    ]
+    mock_db = AsyncMock()
+    mock_result = MagicMock()
+    mock_result.scalars.return_value.all.return_value = rows
+    mock_db.execute = AsyncMock(return_value=mock_result)
+    app.dependency_overrides[get_current_user] = lambda: user
+    app.dependency_overrides[get_async_db] = lambda: mock_db
+    try:
+        client = TestClient(app)
+        resp = client.get("/resources/connectors/", params={"limit": 2})
+        rejected = client.get("/resources/connectors/", params={"skip": 100})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert resp.status_code == 200
+    page = resp.json()["data"]
+    assert [c["name"] for c in page["items"]] == ["connection_1", "connection_2"]
+    assert page["has_next"] and decode_cursor(page["next_cursor"]) == {"id": str(uuid.UUID(int=2))}
+    assert "X-Next-Cursor" not in resp.headers
+    assert rejected.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_typed_resources_single_query():
+    """测试通用资源列表单条SQL只加载响应模型用到的子类字段，并返回对应类型的响应模型"""
+    user_id = uuid.uuid4()
+    common = dict(state=ResourcesState.ACTIVE, created_by=user_id)
+    rows = [
+        DataBaseConnection(id=uuid.uuid4(), name="conn", type=ResourcesType.CONNECTOR,
+                           db_type=ConnectionType.MYSQL, host="db", password="secret", **common),
+        MetaDataTable(id=uuid.uuid4(), name="orders", type=ResourcesType.METADATA,
+                      connection_id=SEED_CONNECTION_ID, database_name="shop", table_name="orders", **common),
+        CatalogResource(id=uuid.uuid4(), name="report", type=ResourcesType.CATALOG,
+                        catalog_item_id=uuid.uuid4(), **common),
+        Resources(id=uuid.uuid4(), name="node", type=ResourcesType.COMPUTE_NODE, **common),
+    ]
+    mock_db = AsyncMock()
+    mock_result = MagicMock()
+    mock_result.scalars.return_value.all.return_value = rows
+    mock_db.execute = AsyncMock(return_value=mock_result)
+
+    resources = await ResourcesService(mock_db).get_typed_resources()
+
+    mock_db.execute.assert_awaited_once()
+    sql = str(mock_db.execute.call_args[0][0].compile(dialect=postgresql.dialect()))
+    for table in ("resources_database_connections", "resources_metadata_tables", "catalog_resources"):
+        assert f"LEFT OUTER JOIN {table}" in sql
+    assert "resources_database_connections.password" not in sql
+    assert "resources_metadata_tables.deleted" not in sql
+    assert "resources_metadata_tables.table_name" in sql
+
+    assert [type(r) for r in resources] == [
+        ConnectorResourceRead, MetaDataResourceRead, CatalogResourceRead, ResourceRead
+    ]
+    assert resources[0].host == "db"
+    assert "password" not in resources[0].model_dump()
+    assert resources[1].table_name == "orders"
+
+
+
+def test_typed_resources_join_only_migrated_tables():
+    """测试多态列表关联的子表都由迁移创建，已迁移的库上不会因缺表而失败"""
+    versions = pathlib.Path(__file__).resolve().parents[1] / "alembic" / "versions"
+    migrations = "\n".join(path.read_text(encoding="utf-8") for path in versions.glob("*.py"))
+    for cls in RESOURCE_SUBCLASSES.values():
+        assert f"create_table('{cls.__tablename__}'" in migrations
+
+
+# -------------------- 执行计划 --------------------
+
+def test_resolve_metadata_table_uses_unique_index(plan_db):
+    """测试三元组查询命中唯一索引"""
+    query = MetaDataTableService.metadata_table_lookup_query("table_7", SEED_CONNECTION_ID, "plan_db")
+    assert "uq_metadata_tables_connection_database_table" in explain(plan_db, query)
+
+
+def test_metadata_table_by_name_uses_name_index(plan_db):
+    """测试仅按表名查询时命中表名索引"""
+    query = MetaDataTableService.metadata_table_lookup_query("table_7")
+    assert "ix_metadata_tables_table_name" in explain(plan_db, query)
+
+
+@pytest.mark.asyncio
+async def test_get_resources_by_creator_uses_composite_index(plan_db):
+    """测试按创建者和类型列资源命中组合索引"""
+    query = await capture_query(lambda db: ResourcesService(db).get_resources(
+        type=ResourcesType.METADATA, created_by=SEED_USER_ID
+    ))
+    assert "ix_resources_created_by_type" in explain(plan_db, query)
+
+
+@pytest.mark.asyncio
+async def test_typed_resources_by_live_type_uses_partial_index(plan_db):
+    """测试按类型列未删除资源命中部分索引"""
+    query = await capture_query(lambda db: ResourcesService(db).get_typed_resources(
+        type=ResourcesType.METADATA, state=ResourcesState.ACTIVE
+    ))
+    assert "ix_resources_type_id_live" in explain(plan_db, query)
+
+
+@pytest.mark.asyncio
+async def test_table_columns_use_table_position_index(plan_db):
+    """测试读取表字段命中 (table_id, ordinal_position) 索引"""
+    query = await capture_query(lambda db: MetaDataTableService(db).get_table_columns(SEED_TABLE_IDS[0]))
+    assert "ix_metadata_table_columns_table_id_position" in explain(plan_db, query)
+
+
+@pytest.mark.asyncio
+async def test_workspace_connectors_use_live_workspace_index(plan_db):
+    """测试按工作区取连接器命中工作区资源部分索引"""
+    query = await capture_query(lambda db: DataConnectionService(db).get_connections_for_test(
+        workspace_id=SEED_WORKSPACE_ID
+    ))
+    assert "ix_workspace_resources_workspace_resource_live" in explain(plan_db, query)
+
+
+@pytest.mark.asyncio
+async def test_joined_workspaces_use_user_index(plan_db):
+    """测试按用户取已加入工作区命中 workspace_users.user_id 索引"""
+    query = await capture_query(
+        lambda db: WorkspaceService(db).get_joined_workspaces_by_user(SEED_USER_ID, 0, 100)
+    )
+    assert "ix_workspace_users_user_id" in explain(plan_db, query)
+
+
+def test_purge_candidates_use_deleted_partial_index(plan_db):
+    """测试清理任务扫描已删除资源命中部分索引"""
+    query = ResourcePurgeService.purge_candidates_query(datetime.datetime.now(), SEED_CONNECTION_ID, 200)
+    assert "ix_resources_deleted_id" in explain(plan_db, query)
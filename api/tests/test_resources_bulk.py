@@ -0,0 +1,125 @@
+"""
+资源批量操作测试用例
+
+该模块使用模拟会话测试批量状态变更的分块、SQL 形式和逐个资源的结果。
+"""
+
+import pytest
+import uuid
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from pydantic import ValidationError
+from sqlalchemy.dialects import postgresql
+
+from app.models.resources import ResourceBulkStateUpdate, ResourceFilter, ResourcesState, ResourcesType
+from app.services.resources import ResourcesService
+
+
+def scalars_result(values):
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = values
+    return result
+
+
+def returned(ids, type=ResourcesType.CONNECTOR):
+    result = MagicMock()
+    result.all.return_value = [SimpleNamespace(id=i, type=type) for i in ids]
+    return result
+
+
+def rows_result(rows):
+    result = MagicMock()
+    result.__iter__.return_value = iter([SimpleNamespace(id=i, state=s) for i, s in rows])
+    return result
+
+
+def test_bulk_request_requires_exactly_one_target():
+    """测试 ids 与 filter 必须二选一"""
+    with pytest.raises(ValidationError):
+        ResourceBulkStateUpdate(state=ResourcesState.ACTIVE)
+    with pytest.raises(ValidationError):
+        ResourceBulkStateUpdate(state=ResourcesState.ACTIVE, ids=[uuid.uuid4()], filter=ResourceFilter())
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_by_ids_uses_one_update_per_chunk():
+    """测试按ID批量更新每块一条 UPDATE ... RETURNING，并区分已是目标状态和不存在"""
+    ids = [uuid.UUID(int=i) for i in range(1, 6)]
+    mock_db = AsyncMock()
+    mock_db.add = MagicMock()
+    mock_db.execute = AsyncMock(side_effect=[
+        returned([ids[0], ids[1]]),                           # 第1块 UPDATE，ids[2] 未更新
+        rows_result([(ids[2], ResourcesState.ACTIVE)]),      # ids[2] 已是目标状态
+        returned([ids[3]]),                                   # 第2块 UPDATE，ids[4] 未更新
+        rows_result([]),                                      # ids[4] 不存在
+    ])
+
+    service = ResourcesService(mock_db)
+    report = await service.bulk_update_state(ResourcesState.ACTIVE, ids=ids + [ids[0]], chunk_size=3)
+
+    assert mock_db.execute.await_count == 4
+    assert mock_db.commit.await_count == 2
+    assert (report.updated, report.unchanged, report.not_found) == (3, 1, 1)
+    assert [item.status for item in report.items] == ["updated", "updated", "unchanged", "updated", "not_found"]
+
+    sql = str(mock_db.execute.call_args_list[0][0][0].compile(dialect=postgresql.dialect()))
+    assert sql.startswith("UPDATE resources SET")
+    assert "resources.id = ANY (%(ids)s::UUID[])" in sql
+    assert "RETURNING resources.id, resources.type" in sql
+
+    # 每个实际更新的资源在同一事务内追加一条变更日志
+    changes = [call.args[0] for call in mock_db.add.call_args_list]
+    assert [c.entity_id for c in changes] == [ids[0], ids[1], ids[3]]
+    assert {c.action for c in changes} == {"update"}
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_by_filter_pages_through_matches():
+    """测试按筛选条件批量更新时按ID键集分块"""
+    ids = [uuid.UUID(int=i) for i in range(1, 4)]
+    mock_db = AsyncMock()
+    mock_db.add = MagicMock()
+    mock_db.execute = AsyncMock(side_effect=[
+        scalars_result(ids[:2]),
+        returned(ids[:2], ResourcesType.METADATA),
+        scalars_result(ids[2:]),
+        returned(ids[2:], ResourcesType.METADATA),
+    ])
+
+    service = ResourcesService(mock_db)
+    report = await service.bulk_update_state(
+        ResourcesState.DELETED,
+        filter=ResourceFilter(type=ResourcesType.METADATA),
+        created_by=uuid.uuid4(),
+        chunk_size=2
+    )
+
+    assert report.updated == 3
+    assert mock_db.commit.await_count == 2
+    changes = [call.args[0] for call in mock_db.add.call_args_list]
+    assert {(c.entity, c.action) for c in changes} == {("metadata", "delete")}
+    second_select = str(mock_db.execute.call_args_list[2][0][0].whereclause)
+    assert "resources.id >" in second_select
+    assert "resources.created_by" in second_select
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_by_ids_is_scoped_to_creator():
+    """测试按ID批量更新时限定创建者，其他用户的资源按不存在统计"""
+    owner = uuid.uuid4()
+    mine, others = uuid.UUID(int=1), uuid.UUID(int=2)
+    mock_db = AsyncMock()
+    mock_db.add = MagicMock()
+    mock_db.execute = AsyncMock(side_effect=[returned([mine]), rows_result([])])
+
+    service = ResourcesService(mock_db)
+    report = await service.bulk_update_state(ResourcesState.DELETED, ids=[mine, others], created_by=owner)
+
+    assert (report.updated, report.unchanged, report.not_found) == (1, 0, 1)
+    assert [(item.id, item.status) for item in report.items] == [(mine, "updated"), (others, "not_found")]
+    update_sql, lookup_sql = [str(c[0][0].compile(dialect=postgresql.dialect()))
+                              for c in mock_db.execute.call_args_list]
+    assert "resources.created_by = %(created_by_1)s" in update_sql
+    assert "resources.created_by = %(created_by_1)s" in lookup_sql
+    assert mock_db.add.call_args[0][0].actor_id == owner
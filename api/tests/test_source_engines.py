@@ -0,0 +1,101 @@
+"""
+源库引擎缓存测试用例
+
+该模块包含对源库引擎复用、淘汰和失效逻辑的测试，只创建引擎而不建立连接。
+"""
+
+import pytest
+import uuid
+from types import SimpleNamespace
+
+from app.config.settings import settings
+from app.models.connections import ConnectionType
+from app.services.source_engines import SourceEngineCache, build_source_url
+from app.utils.sercret import set_encrypted_password
+
+
+@pytest.fixture(autouse=True)
+def datasource_key(monkeypatch):
+    # 密码加解密依赖 DATASOURCE_KEY，不依赖运行环境是否配置
+    monkeypatch.setattr(settings, "DATASOURCE_KEY", "test-datasource-key")
+
+
+def make_connection(connection_id=None, host="localhost", password="secret"):
+    return SimpleNamespace(
+        id=connection_id or uuid.uuid4(),
+        db_type=ConnectionType.POSTGRESQL,
+        host=host,
+        port=5432,
+        database="source_db",
+        username="reader",
+        password=set_encrypted_password(password, settings.DATASOURCE_KEY),
+    )
+
+
+def test_build_source_url_decrypts_password():
+    """测试连接URL使用解密后的密码"""
+    url = build_source_url(make_connection(password="secret"), "other_db")
+    assert url.drivername == "postgresql+asyncpg"
+    assert url.password == "secret"
+    assert url.database == "other_db"
+
+
+@pytest.mark.asyncio
+async def test_engine_reused_per_connection_and_database():
+    """测试相同连接器和数据库复用同一引擎"""
+    cache = SourceEngineCache(max_engines=4)
+    connection = make_connection()
+
+    engine = cache.get_engine(connection)
+    assert cache.get_engine(connection) is engine
+    assert cache.get_engine(connection, "source_db") is engine
+    assert cache.get_engine(connection, "other_db") is not engine
+    assert len(cache) == 2
+    await cache.dispose_all()
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_engine_rebuilt_when_config_changes():
+    """测试连接器配置变化后重建引擎"""
+    cache = SourceEngineCache(max_engines=4)
+    connection = make_connection()
+    engine = cache.get_engine(connection)
+
+    changed = make_connection(connection.id, host="replica")
+    assert cache.get_engine(changed) is not engine
+    assert len(cache) == 1
+    await cache.dispose_all()
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_engine_evicted():
+    """测试超出上限时淘汰最近最少使用的引擎"""
+    cache = SourceEngineCache(max_engines=2)
+    first, second, third = make_connection(), make_connection(), make_connection()
+
+    first_engine = cache.get_engine(first)
+    cache.get_engine(second)
+    cache.get_engine(first)  # first 变为最近使用
+    cache.get_engine(third)
+
+    assert len(cache) == 2
+    assert cache.get_engine(first) is first_engine
+    assert (second.id, second.database) not in cache._engines
+    await cache.dispose_all()
+
+
+@pytest.mark.asyncio
+async def test_invalidate_drops_all_engines_of_connection():
+    """测试失效连接器时移除其全部引擎"""
+    cache = SourceEngineCache(max_engines=4)
+    connection, other = make_connection(), make_connection()
+    cache.get_engine(connection)
+    cache.get_engine(connection, "other_db")
+    other_engine = cache.get_engine(other)
+
+    await cache.invalidate(connection.id)
+
+    assert len(cache) == 1
+    assert cache.get_engine(other) is other_engine
+    await cache.dispose_all()
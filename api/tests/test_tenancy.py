@@ -0,0 +1,104 @@
+"""
+租户索引测试用例
+
+该模块测试租户索引的全量构建、增量维护、以及重建期间的修改重放。
+"""
+
+import asyncio
+import pytest
+import uuid
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+from app.models.workspace import Workspaces, WorkspaceResources, WorkspaceUsers
+from app.services import tenancy as tenancy_module
+from app.services.tenancy import TenancyIndex, TenancySnapshot, collect_changes
+
+OWNER = uuid.UUID(int=1)
+MEMBER = uuid.UUID(int=2)
+STRANGER = uuid.UUID(int=3)
+WS = uuid.UUID(int=10)
+WS2 = uuid.UUID(int=11)
+R1, R2, R3 = uuid.UUID(int=100), uuid.UUID(int=101), uuid.UUID(int=102)
+
+
+def snapshot():
+    return TenancySnapshot(
+        owners=[(WS, OWNER), (WS2, MEMBER)],
+        members=[(WS, MEMBER)],
+        resources=[(WS, R2), (WS, R1), (WS2, R3)],
+    )
+
+
+@pytest.mark.asyncio
+async def test_build_and_query():
+    """测试全量构建后的访问判断和有序资源数组"""
+    index = TenancyIndex(loader=AsyncMock(return_value=snapshot()))
+    assert not index.ready
+    await index.refresh()
+
+    assert index.ready
+    assert index.has_access(OWNER, WS) and index.has_access(MEMBER, WS)
+    assert not index.has_access(OWNER, WS2)
+    assert index.workspaces_of(MEMBER) == [WS, WS2]
+    assert index.resources_of(WS) == [R1, R2]
+    assert index.visible_resources(MEMBER) == [R1, R2, R3]
+
+
+@pytest.mark.asyncio
+async def test_incremental_changes():
+    """测试成员、所有者和工作区的增量修改"""
+    index = TenancyIndex(loader=AsyncMock(return_value=snapshot()))
+    await index.refresh()
+
+    index.remove_members(WS, [MEMBER])
+    assert not index.has_access(MEMBER, WS)
+    assert index.has_access(MEMBER, WS2)
+
+    # 原所有者同时是成员时，转移所有权后仍可访问
+    index.add_members(WS, [STRANGER])
+    index.set_owner(WS, STRANGER)
+    assert not index.has_access(OWNER, WS)
+    index.set_owner(WS, OWNER)
+    assert index.has_access(STRANGER, WS)
+
+    index.remove_workspace(WS)
+    assert not index.has_workspace(WS)
+    assert index.workspaces_of(OWNER) == []
+    assert index.resources_of(WS) == []
+
+
+@pytest.mark.asyncio
+async def test_changes_during_refresh_are_replayed():
+    """测试重建期间提交的修改在新索引上重放"""
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def slow_loader():
+        started.set()
+        await release.wait()
+        return snapshot()
+
+    index = TenancyIndex(loader=slow_loader)
+    task = asyncio.create_task(index.refresh())
+    await started.wait()
+    index.add_members(WS2, [STRANGER])
+    release.set()
+    await task
+
+    assert index.has_access(STRANGER, WS2)
+
+
+def test_collect_changes_from_session():
+    """测试从待刷新对象中收集新增、修改和删除"""
+    new_member = WorkspaceUsers(workspace_id=WS, user_id=STRANGER, state='A')
+    new_resource = WorkspaceResources(workspace_id=WS, resource_id=R3, state='A')
+    removed = WorkspaceUsers(workspace_id=WS, user_id=MEMBER, state='D')
+    workspace = Workspaces(id=WS2, owner_id=MEMBER)
+    session = SimpleNamespace(new=[new_member, new_resource], dirty=[removed], deleted=[workspace])
+
+    assert collect_changes(session) == [
+        ("add_member", (WS, STRANGER)),
+        ("add_resource", (WS, R3)),
+        ("remove_member", (WS, MEMBER)),
+        ("remove_workspace", (WS2,)),
+    ]
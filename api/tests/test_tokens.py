@@ -0,0 +1,162 @@
+"""
+访问令牌声明与吊销测试用例
+
+该模块测试令牌声明的构建与无状态校验、布隆过滤器以及吊销列表的精确确认和刷新。
+"""
+
+import pytest
+import uuid
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from fastapi import HTTPException
+from jose import jwt
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.models.auth import RoleEnum
+from app.services import auth as auth_module
+from app.services.auth import AuthService, resolve_token_claims
+from app.models.auth import User
+from app.services.tokens import RevocationList, collect_deactivated_users
+from app.utils.sketches import BloomFilter
+
+SECRET = auth_module.settings.NEXTAUTH_SECRET
+ALGORITHM = auth_module.settings.ALGORITHM
+
+
+def scalars(values):
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = values
+    return result
+
+
+def test_bloom_filter_has_no_false_negatives():
+    """测试布隆过滤器不漏判，误判率接近目标值"""
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    members = [uuid.uuid4().hex for _ in range(1000)]
+    for m in members:
+        bloom.add(m)
+    assert all(m in bloom for m in members)
+    false_positives = sum(uuid.uuid4().hex in bloom for _ in range(10000))
+    assert false_positives < 300
+
+
+@pytest.mark.asyncio
+async def test_build_token_claims_with_roles_and_workspaces(monkeypatch):
+    """测试令牌携带用户ID、角色和工作区摘要，超出上限时标记为不完整"""
+    monkeypatch.setattr(auth_module.settings, "TOKEN_MAX_WORKSPACES", 2)
+    owned, joined = uuid.UUID(int=1), [uuid.UUID(int=2), uuid.UUID(int=3)]
+    db = AsyncMock()
+    db.execute = AsyncMock(side_effect=[
+        scalars([RoleEnum.normal_user, RoleEnum.data_analyst]),
+        scalars([owned]),
+        scalars([owned] + joined),
+    ])
+    user = SimpleNamespace(id=uuid.uuid4(), username="alice")
+
+    service = AuthService()
+    token = service.create_access_token(await service.build_token_claims(db, user))
+    claims = await resolve_token_claims(token, SECRET, ALGORITHM)
+
+    assert claims.uid == user.id and claims.sub == "alice"
+    assert claims.roles == ["data_analyst", "normal_user"]
+    assert claims.workspace_role(owned) == "owner"
+    assert claims.workspace_role(joined[0]) == "member"
+    assert claims.workspace_role(joined[1]) is None
+    assert not claims.ws_complete
+    assert claims.jti and claims.iat <= claims.exp
+
+
+@pytest.mark.asyncio
+async def test_tokens_without_claims_are_rejected():
+    """测试只携带 sub 的旧令牌无法通过校验"""
+    token = jwt.encode({"sub": "alice"}, SECRET, algorithm=ALGORITHM)
+    with pytest.raises(HTTPException) as exc:
+        await resolve_token_claims(token, SECRET, ALGORITHM)
+    assert exc.value.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_revocation_list_confirms_only_filter_hits(monkeypatch):
+    """测试未命中过滤器的令牌不查询数据库，命中后精确确认"""
+    confirm = AsyncMock(return_value=True)
+    revoked = RevocationList(capacity=100, loader=AsyncMock(return_value=[]), confirm=confirm)
+    monkeypatch.setattr(auth_module, "revocation_list", revoked)
+
+    service = AuthService()
+    token = service.create_access_token({"sub": "alice", "uid": str(uuid.uuid4())})
+    claims = await resolve_token_claims(token, SECRET, ALGORITHM)
+    confirm.assert_not_awaited()
+
+    revoked._filter.add(claims.jti)  # 模拟其他进程吊销后刷新
+    with pytest.raises(HTTPException):
+        await resolve_token_claims(token, SECRET, ALGORITHM)
+    confirm.assert_awaited_once_with(claims.jti)
+
+    # 已确认的吊销结果不再查询
+    assert await revoked.is_revoked(claims.jti)
+    assert confirm.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_revocation_list_refresh_rebuilds_filter():
+    """测试刷新时加载其他进程吊销的令牌并丢弃已过期的记录"""
+    loader = AsyncMock(return_value=["a", "b"])
+    revoked = RevocationList(capacity=100, loader=loader, confirm=AsyncMock(return_value=False),
+                             user_loader=AsyncMock(return_value={}))
+    revoked.add("expired")
+
+    await revoked.refresh()
+    assert await revoked.is_revoked("a") is False  # 过滤器命中，但精确确认未吊销
+    assert "a" in revoked._filter and "b" in revoked._filter
+    assert "expired" not in revoked._confirmed
+
+
+@pytest.mark.asyncio
+async def test_revocation_list_refresh_keeps_tokens_revoked_during_load():
+    """测试加载期间本进程吊销的令牌在重建后的过滤器中仍然生效"""
+    revoked = RevocationList(capacity=100, confirm=AsyncMock(return_value=False),
+                             user_loader=AsyncMock(return_value={}))
+
+    async def loader():
+        revoked.add("logout")  # 吊销记录在加载的快照之后提交
+        return ["a"]
+    revoked.loader = loader
+
+    await revoked.refresh()
+    assert await revoked.is_revoked("logout")
+    assert revoked._replay is None
+
+
+@pytest.mark.asyncio
+async def test_deactivated_user_tokens_are_rejected(monkeypatch):
+    """测试用户停用前签发的令牌全部失效，之后签发的令牌不受影响，其他进程的停用随刷新加载"""
+    user_id, other_id = uuid.uuid4(), uuid.uuid4()
+    revoked = RevocationList(capacity=100, loader=AsyncMock(return_value=[]),
+                             confirm=AsyncMock(return_value=False),
+                             user_loader=AsyncMock(return_value={other_id: 2000.0}))
+    monkeypatch.setattr(auth_module, "revocation_list", revoked)
+    service = AuthService()
+    token = service.create_access_token({"sub": "alice", "uid": str(user_id)})
+    claims = await resolve_token_claims(token, SECRET, ALGORITHM)
+
+    revoked.revoke_user(user_id, claims.iat)
+    with pytest.raises(HTTPException) as exc:
+        await resolve_token_claims(token, SECRET, ALGORITHM)
+    assert exc.value.status_code == 401
+    assert not revoked.is_user_revoked(user_id, claims.iat + 1)
+
+    await revoked.refresh()
+    assert revoked.is_user_revoked(other_id, 1999) and not revoked.is_user_revoked(other_id, 2001)
+
+
+def test_collect_deactivated_users():
+    """测试只收集由启用改为停用的用户"""
+    deactivated, unchanged = User(id=uuid.uuid4(), is_active=None), User(id=uuid.uuid4(), is_active=None)
+    for user in (deactivated, unchanged):
+        set_committed_value(user, "is_active", True)
+    deactivated.is_active = False
+    unchanged.full_name = "bob"
+    session = SimpleNamespace(dirty=[deactivated, unchanged])
+
+    assert collect_deactivated_users(session) == [deactivated.id]
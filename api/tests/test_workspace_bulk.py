@@ -0,0 +1,128 @@
+"""
+工作区成员与资源批量操作测试用例
+
+该模块使用模拟会话测试批量添加/移除的分块、ON CONFLICT 语句形式、计数以及租户索引同步。
+"""
+
+import pytest
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+
+from sqlalchemy.dialects import postgresql
+
+from app.services import workspace as workspace_module
+from app.services.permissions import PermissionResolver
+from app.services.tenancy import TenancyIndex, TenancySnapshot
+from app.services.workspace import WorkspaceService
+
+WS = uuid.UUID(int=10)
+OWNER = uuid.UUID(int=1)
+
+
+def scalars_result(values):
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = values
+    return result
+
+
+def sql(mock_db, index: int) -> str:
+    query = mock_db.execute.call_args_list[index][0][0]
+    return str(query.compile(dialect=postgresql.dialect()))
+
+
+@pytest.fixture
+def index(monkeypatch):
+    index = TenancyIndex(loader=AsyncMock(return_value=TenancySnapshot(owners=[(WS, OWNER)])))
+    monkeypatch.setattr(workspace_module, "tenancy_index", index)
+    monkeypatch.setattr(workspace_module, "permission_resolver", PermissionResolver())
+    return index
+
+
+@pytest.mark.asyncio
+async def test_add_members_chunks_and_dedupes(index):
+    """测试每块一次存在性查询和一条 INSERT ... ON CONFLICT，区分新增、已存在和不存在"""
+    await index.refresh()
+    users = [uuid.UUID(int=i) for i in range(100, 105)]
+    mock_db = AsyncMock()
+    mock_db.add = MagicMock()
+    mock_db.execute = AsyncMock(side_effect=[
+        scalars_result(users[:3]),            # 第1块：三个用户都存在
+        scalars_result([users[0], users[2]]),  # users[1] 已是成员
+        scalars_result([users[3]]),           # 第2块：users[4] 不存在
+        scalars_result([users[3]]),
+    ])
+
+    report = await WorkspaceService(mock_db).add_members(WS, users + [users[0]], OWNER, chunk_size=3)
+
+    assert (report.requested, report.added, report.unchanged, report.not_found) == (5, 3, 1, 1)
+    insert_sql = sql(mock_db, 1)
+    assert "INSERT INTO workspace_users" in insert_sql
+    assert "ON CONFLICT (workspace_id, user_id) DO UPDATE" in insert_sql
+    assert "WHERE workspace_users.state = %(state_" in insert_sql
+    assert mock_db.execute.await_count == 4
+    # 每块一次提交，最后记录一条工作区变更
+    assert mock_db.commit.await_count == 3
+    mock_db.add.assert_called_once()
+    assert index.has_access(users[0], WS) and index.has_access(users[3], WS)
+    assert not index.has_access(users[1], WS)
+
+
+@pytest.mark.asyncio
+async def test_remove_resources_soft_deletes(index):
+    """测试移除资源为一条 UPDATE ... RETURNING，并同步租户索引"""
+    resources = [uuid.UUID(int=i) for i in range(200, 203)]
+    index.add_resources(WS, resources)
+    mock_db = AsyncMock()
+    mock_db.add = MagicMock()
+    mock_db.execute = AsyncMock(return_value=scalars_result(resources[:2]))
+
+    report = await WorkspaceService(mock_db).remove_resources(WS, resources, OWNER)
+
+    assert (report.removed, report.unchanged) == (2, 1)
+    assert "UPDATE workspace_resources SET state=" in sql(mock_db, 0)
+    assert "RETURNING workspace_resources.resource_id" in sql(mock_db, 0)
+    assert index.resources_of(WS) == [resources[2]]
+
+
+@pytest.mark.asyncio
+async def test_no_change_records_nothing(index):
+    """测试没有任何变化时不记录变更"""
+    mock_db = AsyncMock()
+    mock_db.add = MagicMock()
+    mock_db.execute = AsyncMock(return_value=scalars_result([]))
+
+    report = await WorkspaceService(mock_db).add_resources(WS, [uuid.uuid4()], OWNER)
+
+    assert report.not_found == 1
+    mock_db.add.assert_not_called()
+    mock_db.commit.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_add_resources_only_attaches_visible_resources(index):
+    """测试只能分配自己创建或已在可访问工作区内的资源，其他租户的资源计入 not_found"""
+    mine, foreign = uuid.UUID(int=300), uuid.UUID(int=301)
+    mock_db = AsyncMock()
+    mock_db.add = MagicMock()
+    mock_db.execute = AsyncMock(side_effect=[scalars_result([mine]), scalars_result([mine])])
+
+    report = await WorkspaceService(mock_db).add_resources(WS, [mine, foreign], OWNER)
+
+    assert (report.added, report.not_found) == (1, 1)
+    lookup_sql = sql(mock_db, 0)
+    assert "resources.created_by = %(created_by_1)s" in lookup_sql
+    assert "resources.id IN (SELECT workspace_resources.resource_id" in lookup_sql
+    assert "workspaces.owner_id = %(owner_id_1)s" in lookup_sql
+    assert "workspace_users.user_id = %(user_id_1)s" in lookup_sql
+
+
+@pytest.mark.asyncio
+async def test_add_resources_unrestricted_skips_visibility(index):
+    """测试超级管理员分配资源时不限制资源归属"""
+    mock_db = AsyncMock()
+    mock_db.add = MagicMock()
+    mock_db.execute = AsyncMock(return_value=scalars_result([]))
+
+    await WorkspaceService(mock_db).add_resources(WS, [uuid.uuid4()], OWNER, unrestricted=True)
+
+    assert "created_by" not in sql(mock_db, 0)
@@ -0,0 +1,138 @@
+"""
+工作区后台删除测试用例
+
+该模块使用模拟会话测试删除标记、按表分批删除的顺序和进度，以及删除中的工作区不可再次删除。
+"""
+
+import pytest
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+
+from sqlalchemy.dialects import postgresql
+
+from app.models.workspace import WorkspaceDeletionProgress
+from app.services import workspace_deletion as deletion_module
+from app.services.permissions import PermissionResolver
+from app.services.tenancy import TenancyIndex, TenancySnapshot
+from app.services.workspace_deletion import WorkspaceDeletionService, mark_workspace_deleted
+
+WS = uuid.UUID(int=10)
+OWNER = uuid.UUID(int=1)
+MEMBER = uuid.UUID(int=2)
+
+
+def scalars_result(values):
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = values
+    result.scalar_one_or_none.return_value = values[0] if values else None
+    return result
+
+
+def rowcount_result(count):
+    result = MagicMock()
+    result.rowcount = count
+    return result
+
+
+def statements(mock_db):
+    return [str(c[0][0].compile(dialect=postgresql.dialect())) for c in mock_db.execute.call_args_list]
+
+
+@pytest.mark.asyncio
+async def test_mark_workspace_deleted_hides_workspace(monkeypatch):
+    """测试标记删除时吊销 API Key，并立即从租户索引和权限缓存中移除"""
+    index = TenancyIndex(loader=AsyncMock(return_value=TenancySnapshot(owners=[(WS, OWNER)], members=[(WS, MEMBER)])))
+    await index.refresh()
+    resolver = PermissionResolver()
+    monkeypatch.setattr(deletion_module, "tenancy_index", index)
+    monkeypatch.setattr(deletion_module, "permission_resolver", resolver)
+
+    mock_db = AsyncMock()
+    mock_db.add = MagicMock()
+    mock_db.execute = AsyncMock(side_effect=[
+        scalars_result([OWNER]),      # UPDATE workspaces ... RETURNING owner_id
+        scalars_result(["abc123"]),   # UPDATE api_keys ... RETURNING prefix
+        scalars_result([MEMBER]),     # 成员
+    ])
+
+    assert await mark_workspace_deleted(mock_db, WS, OWNER)
+
+    sql = statements(mock_db)
+    assert sql[0].startswith("UPDATE workspaces SET state=")
+    assert "workspaces.state != %(state_1)s" in sql[0]
+    assert sql[1].startswith("UPDATE api_keys SET revoked_at=")
+    mock_db.add.assert_called_once()
+    mock_db.commit.assert_awaited_once()
+    assert not index.has_workspace(WS)
+    assert not index.has_access(MEMBER, WS)
+    assert resolver.version(OWNER) == 1 and resolver.version(MEMBER) == 1
+
+
+@pytest.mark.asyncio
+async def test_mark_missing_or_deleting_workspace_returns_false():
+    """测试工作区不存在或已在删除中时不做任何修改"""
+    mock_db = AsyncMock()
+    mock_db.execute = AsyncMock(return_value=scalars_result([]))
+
+    assert not await mark_workspace_deleted(mock_db, WS)
+    mock_db.rollback.assert_awaited_once()
+    mock_db.commit.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_delete_dependents_in_batches():
+    """测试按表依次分批删除，每批一个事务，最后删除工作区"""
+    keys = [uuid.UUID(int=100)]
+    members = [uuid.UUID(int=i) for i in range(200, 203)]
+    items = [uuid.UUID(int=300), uuid.UUID(int=301)]
+    mock_db = AsyncMock()
+    mock_db.execute = AsyncMock(side_effect=[
+        scalars_result([OWNER]),        # 确认工作区处于删除中
+        scalars_result(keys),           # api_keys 第1批
+        rowcount_result(1),
+        scalars_result([]),
+        scalars_result(members[:2]),    # workspace_users 第1批
+        rowcount_result(2),
+        scalars_result(members[2:]),    # workspace_users 第2批
+        rowcount_result(1),
+        scalars_result([]),
+        scalars_result([]),             # workspace_resources 无记录
+        scalars_result(items[1:]),      # 断开目录项父子引用
+        rowcount_result(1),
+        scalars_result([]),
+        scalars_result(items),          # catalog_items 第1批
+        scalars_result([]),             # 没有挂载的目录资源
+        rowcount_result(3),             # 闭包表路径
+        rowcount_result(2),
+        scalars_result([]),
+        rowcount_result(1),             # DELETE workspaces
+    ])
+    progress = WorkspaceDeletionProgress(workspace_id=WS)
+    service = WorkspaceDeletionService(mock_db, batch_size=2, throttle_seconds=0, progress=progress)
+
+    await service.delete_workspace(WS)
+
+    sql = statements(mock_db)
+    assert "workspace_users.id > %(id_1)s" in sql[6]
+    assert sql[10].startswith("SELECT catalog_items.id") and "parent_id IS NOT NULL" in sql[10]
+    assert sql[15].startswith("DELETE FROM catalog_item_closure")
+    assert sql[16].startswith("DELETE FROM catalog_items")
+    assert sql[-1].startswith("DELETE FROM workspaces")
+    assert progress.rows_deleted == {"api_keys": 1, "workspace_users": 3, "catalog_items": 2}
+    assert progress.batches == 5
+    assert progress.owner_id == OWNER
+    assert not progress.running and progress.finished_at is not None
+    assert mock_db.commit.await_count == 6
+
+
+@pytest.mark.asyncio
+async def test_delete_skips_workspace_not_marked():
+    """测试工作区未标记为删除中（如已删除完成）时不做任何删除"""
+    mock_db = AsyncMock()
+    mock_db.execute = AsyncMock(return_value=scalars_result([]))
+    service = WorkspaceDeletionService(mock_db, throttle_seconds=0)
+
+    progress = await service.delete_workspace(WS)
+
+    assert mock_db.execute.await_count == 1
+    assert progress.rows_deleted == {}
@@ -70,7 +70,14 @@ export function ConnectionManager() {
   const fetchConnections = async () => {
     try {
       setLoading(true);
-      const data = await getDataConnections();
+      // 依次读取全部分页
+      const data: DataConnectionRead[] = [];
+      let cursor: string | null | undefined;
+      do {
+        const page = await getDataConnections(cursor);
+        data.push(...page.items);
+        cursor = page.next_cursor;
+      } while (cursor);
       setConnections(data);
     } catch (error) {
       console.error("Failed to fetch connections:", error);
@@ -83,16 +83,27 @@ export async function createDataConnection(
   }
 }
 
-// 获取数据连接列表
+// 分页响应模型
+export interface PageResponse<T> {
+  items: T[];
+  total?: number | null;
+  page?: number | null;
+  size: number;
+  has_next: boolean;
+  has_prev: boolean;
+  next_cursor?: string | null;
+}
+
+// 获取数据连接列表（按游标分页，cursor 取自上一页的 next_cursor）
 export async function getDataConnections(
-  skip: number = 0,
+  cursor?: string | null,
   limit: number = 100
-): Promise<DataConnectionRead[]> {
+): Promise<PageResponse<DataConnectionRead>> {
   try {
-    const response = await instance.get<DataConnectionRead[]>(
+    const response = await instance.get<PageResponse<DataConnectionRead>>(
       "/resources/connectors/",
       {
-        params: { skip, limit },
+        params: { cursor: cursor ?? undefined, limit },
       }
     );
     return response.data;